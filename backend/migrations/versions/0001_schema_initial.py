@@ -0,0 +1,25 @@
+"""Schéma initial (créé par init_db)
+
+Révision de référence : les tables existent déjà, créées par db.create_all().
+Les bases existantes sont marquées avec `flask db stamp 0001_schema_initial`.
+
+Revision ID: 0001_schema_initial
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_schema_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,42 @@
+"""Total et nombre d'articles persistés sur les commandes
+
+Ajoute commandes.total et commandes.nombre_articles puis les calcule pour les
+commandes existantes à partir de leurs lignes (un seul UPDATE ensembliste).
+
+Revision ID: 0002_totaux_commandes
+Revises: 0001_schema_initial
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_totaux_commandes'
+down_revision = '0001_schema_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    colonnes = {colonne['name'] for colonne in sa.inspect(op.get_bind()).get_columns('commandes')}
+    # Une base créée par init_db() après ce changement possède déjà les colonnes
+    if 'total' not in colonnes:
+        op.add_column('commandes', sa.Column('total', sa.Float(), nullable=False, server_default='0'))
+    if 'nombre_articles' not in colonnes:
+        op.add_column('commandes', sa.Column('nombre_articles', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE commandes SET "
+        "total = COALESCE((SELECT SUM(l.quantite * l.prix_unitaire) FROM lignes_commande l "
+        "WHERE l.commande_id = commandes.id), 0), "
+        "nombre_articles = COALESCE((SELECT SUM(l.quantite) FROM lignes_commande l "
+        "WHERE l.commande_id = commandes.id), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('commandes') as batch_op:
+        batch_op.drop_column('nombre_articles')
+        batch_op.drop_column('total')
@@ -0,0 +1,65 @@
+"""Index des chemins d'accès fréquents
+
+Paniers par (utilisateur_id, statut) et (session_id, statut), articles par
+(panier_id, produit_id), commandes par utilisateur, statut et date, lignes par
+commande et par produit, et index partiel des paniers abandonnés par date.
+
+Sous PostgreSQL, les index sont construits avec CREATE INDEX CONCURRENTLY, hors
+transaction, pour ne pas bloquer les écritures. Si une construction échoue,
+PostgreSQL laisse un index INVALID : le supprimer (DROP INDEX CONCURRENTLY) puis
+relancer la migration. Les index déjà présents (base créée par init_db) sont
+ignorés.
+
+Revision ID: 0003_index_acces
+Revises: 0002_totaux_commandes
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_index_acces'
+down_revision = '0002_totaux_commandes'
+branch_labels = None
+depends_on = None
+
+# (nom, table, colonnes, condition d'un index partiel)
+INDEX = [
+    ('ix_paniers_utilisateur_statut', 'paniers', ['utilisateur_id', 'statut'], None),
+    ('ix_paniers_session_statut', 'paniers', ['session_id', 'statut'], None),
+    ('ix_paniers_abandonnes_modification', 'paniers', ['date_modification'], "statut = 'abandonne'"),
+    ('ix_panier_items_panier_produit', 'panier_items', ['panier_id', 'produit_id'], None),
+    ('ix_commandes_utilisateur_id', 'commandes', ['utilisateur_id', 'id'], None),
+    ('ix_commandes_statut', 'commandes', ['statut', 'id'], None),
+    ('ix_commandes_date_commande', 'commandes', ['date_commande'], None),
+    ('ix_lignes_commande_commande_id', 'lignes_commande', ['commande_id'], None),
+    ('ix_lignes_commande_produit_id', 'lignes_commande', ['produit_id'], None),
+]
+
+
+def _index_existants():
+    inspector = sa.inspect(op.get_bind())
+    tables = {table for _, table, _, _ in INDEX}
+    return {index['name'] for table in tables for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    existants = _index_existants()
+    # CONCURRENTLY est interdit dans une transaction : bloc en autocommit
+    with op.get_context().autocommit_block():
+        for nom, table, colonnes, condition in INDEX:
+            if nom in existants:
+                continue
+            where = sa.text(condition) if condition else None
+            op.create_index(nom, table, colonnes, postgresql_concurrently=True,
+                            postgresql_where=where, sqlite_where=where)
+
+
+def downgrade():
+    existants = _index_existants()
+    with op.get_context().autocommit_block():
+        for nom, table, _, _ in reversed(INDEX):
+            if nom in existants:
+                op.drop_index(nom, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Date de commande recopiée sur les lignes
+
+Ajoute lignes_commande.date_commande (clé de partitionnement mensuel sous
+PostgreSQL, filtre par date sans jointure ailleurs), la renseigne à partir des
+commandes existantes et l'indexe.
+
+Revision ID: 0004_lignes_date_commande
+Revises: 0003_index_acces
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_lignes_date_commande'
+down_revision = '0003_index_acces'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'date_commande' not in {colonne['name'] for colonne in inspector.get_columns('lignes_commande')}:
+        op.add_column('lignes_commande', sa.Column('date_commande', sa.DateTime(), nullable=True))
+
+    op.execute(
+        "UPDATE lignes_commande SET date_commande = "
+        "(SELECT c.date_commande FROM commandes c WHERE c.id = lignes_commande.commande_id) "
+        "WHERE date_commande IS NULL"
+    )
+
+    if 'ix_lignes_commande_date_commande' not in {index['name'] for index in inspector.get_indexes('lignes_commande')}:
+        op.create_index('ix_lignes_commande_date_commande', 'lignes_commande', ['date_commande'])
+
+
+def downgrade():
+    op.drop_index('ix_lignes_commande_date_commande', table_name='lignes_commande')
+    with op.batch_alter_table('lignes_commande') as batch_op:
+        batch_op.drop_column('date_commande')
@@ -0,0 +1,64 @@
+"""Agrégat quotidien des ventes (daily_sales)
+
+Crée la table daily_sales puis la remplit à partir de l'historique des
+commandes : une ligne par jour toutes catégories confondues (categorie = '')
+et une ligne par jour et catégorie de produit. L'application la tient ensuite
+à jour à chaque transaction ; `flask daily-sales rebuild` la recalcule.
+
+Revision ID: 0005_ventes_journalieres
+Revises: 0004_lignes_date_commande
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_ventes_journalieres'
+down_revision = '0004_lignes_date_commande'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Une base créée par init_db() après ce changement possède déjà la table
+    if not sa.inspect(op.get_bind()).has_table('daily_sales'):
+        op.create_table(
+            'daily_sales',
+            sa.Column('jour', sa.Date(), nullable=False),
+            sa.Column('categorie', sa.String(length=100), nullable=False),
+            sa.Column('commandes', sa.Integer(), nullable=False),
+            sa.Column('commandes_avec_articles', sa.Integer(), nullable=False),
+            sa.Column('articles', sa.Integer(), nullable=False),
+            sa.Column('chiffre_affaires', sa.Float(), nullable=False),
+            sa.Column('clients', sa.Integer(), nullable=False),
+            sa.Column('commandes_annulees', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('jour', 'categorie')
+        )
+
+    op.execute("DELETE FROM daily_sales")
+    op.execute(
+        "INSERT INTO daily_sales (jour, categorie, commandes, commandes_avec_articles, articles, "
+        "chiffre_affaires, clients, commandes_annulees) "
+        "SELECT DATE(date_commande), '', COUNT(id), "
+        "SUM(CASE WHEN nombre_articles > 0 THEN 1 ELSE 0 END), SUM(nombre_articles), SUM(total), "
+        "COUNT(DISTINCT utilisateur_id), SUM(CASE WHEN statut = 'annulee' THEN 1 ELSE 0 END) "
+        "FROM commandes WHERE date_commande IS NOT NULL GROUP BY DATE(date_commande)"
+    )
+    op.execute(
+        "INSERT INTO daily_sales (jour, categorie, commandes, commandes_avec_articles, articles, "
+        "chiffre_affaires, clients, commandes_annulees) "
+        "SELECT DATE(l.date_commande), p.categorie, COUNT(DISTINCT l.commande_id), COUNT(DISTINCT l.commande_id), "
+        "SUM(l.quantite), SUM(l.quantite * l.prix_unitaire), COUNT(DISTINCT c.utilisateur_id), "
+        "COUNT(DISTINCT CASE WHEN c.statut = 'annulee' THEN c.id END) "
+        "FROM lignes_commande l "
+        "JOIN produits p ON p.id = l.produit_id "
+        "JOIN commandes c ON c.id = l.commande_id "
+        "WHERE l.date_commande IS NOT NULL "
+        "GROUP BY DATE(l.date_commande), p.categorie"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_sales')
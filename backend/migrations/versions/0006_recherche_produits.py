@@ -0,0 +1,67 @@
+"""Index de recherche plein texte des produits
+
+PostgreSQL : extension pg_trgm et index GIN trigrammes sur le document
+« nom description categorie » (construit avec CREATE INDEX CONCURRENTLY, hors
+transaction). SQLite : table virtuelle FTS5 produits_fts, ses triggers de
+synchronisation, puis indexation des produits existants.
+
+Revision ID: 0006_recherche_produits
+Revises: 0005_ventes_journalieres
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_recherche_produits'
+down_revision = '0005_ventes_journalieres'
+branch_labels = None
+depends_on = None
+
+# Expression identique à src/data/database/search.py (DOCUMENT_SQL)
+DOCUMENT = "(coalesce(nom, '') || ' ' || coalesce(description, '') || ' ' || coalesce(categorie, ''))"
+
+SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS produits_fts USING fts5("
+    "nom, description, categorie, content='produits', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_ai AFTER INSERT ON produits BEGIN "
+    "INSERT INTO produits_fts(rowid, nom, description, categorie) "
+    "VALUES (new.id, new.nom, new.description, new.categorie); END",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_ad AFTER DELETE ON produits BEGIN "
+    "INSERT INTO produits_fts(produits_fts, rowid, nom, description, categorie) "
+    "VALUES ('delete', old.id, old.nom, old.description, old.categorie); END",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_au AFTER UPDATE OF nom, description, categorie ON produits BEGIN "
+    "INSERT INTO produits_fts(produits_fts, rowid, nom, description, categorie) "
+    "VALUES ('delete', old.id, old.nom, old.description, old.categorie); "
+    "INSERT INTO produits_fts(rowid, nom, description, categorie) "
+    "VALUES (new.id, new.nom, new.description, new.categorie); END",
+    "INSERT INTO produits_fts(produits_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialecte = op.get_bind().dialect.name
+    if dialecte == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # CONCURRENTLY est interdit dans une transaction : bloc en autocommit
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produits_recherche_trgm "
+                f"ON produits USING gin ({DOCUMENT} gin_trgm_ops)"
+            )
+    elif dialecte == 'sqlite':
+        for statement in SQLITE:
+            op.execute(statement)
+
+
+def downgrade():
+    dialecte = op.get_bind().dialect.name
+    if dialecte == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_produits_recherche_trgm")
+    elif dialecte == 'sqlite':
+        for statement in ("DROP TRIGGER IF EXISTS produits_fts_au", "DROP TRIGGER IF EXISTS produits_fts_ad",
+                          "DROP TRIGGER IF EXISTS produits_fts_ai", "DROP TABLE IF EXISTS produits_fts"):
+            op.execute(statement)
@@ -0,0 +1,56 @@
+"""Un seul article par produit et par panier
+
+Fusionne les doublons (panier_id, produit_id) existants sur la ligne la plus
+ancienne en cumulant les quantités, puis remplace l'index
+ix_panier_items_panier_produit par l'index unique
+uq_panier_items_panier_produit, cible des INSERT ... ON CONFLICT des ajouts au
+panier. Sous PostgreSQL, l'index est construit avec CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0007_panier_items_unique
+Revises: 0006_recherche_produits
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_panier_items_unique'
+down_revision = '0006_recherche_produits'
+branch_labels = None
+depends_on = None
+
+
+def _index_existants():
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('panier_items')}
+
+
+def upgrade():
+    op.execute(
+        "UPDATE panier_items SET quantite = (SELECT SUM(d.quantite) FROM panier_items d "
+        "WHERE d.panier_id = panier_items.panier_id AND d.produit_id = panier_items.produit_id) "
+        "WHERE id IN (SELECT MIN(id) FROM panier_items GROUP BY panier_id, produit_id HAVING COUNT(*) > 1)"
+    )
+    op.execute(
+        "DELETE FROM panier_items WHERE id NOT IN (SELECT MIN(id) FROM panier_items GROUP BY panier_id, produit_id)"
+    )
+
+    existants = _index_existants()
+    # CONCURRENTLY est interdit dans une transaction : bloc en autocommit
+    with op.get_context().autocommit_block():
+        if 'uq_panier_items_panier_produit' not in existants:
+            op.create_index('uq_panier_items_panier_produit', 'panier_items', ['panier_id', 'produit_id'],
+                            unique=True, postgresql_concurrently=True)
+        if 'ix_panier_items_panier_produit' in existants:
+            op.drop_index('ix_panier_items_panier_produit', table_name='panier_items', postgresql_concurrently=True)
+
+
+def downgrade():
+    existants = _index_existants()
+    with op.get_context().autocommit_block():
+        if 'ix_panier_items_panier_produit' not in existants:
+            op.create_index('ix_panier_items_panier_produit', 'panier_items', ['panier_id', 'produit_id'],
+                            postgresql_concurrently=True)
+        if 'uq_panier_items_panier_produit' in existants:
+            op.drop_index('uq_panier_items_panier_produit', table_name='panier_items', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Index partiel des paniers actifs par date de modification
+
+Sert le marquage par lots des paniers inactifs (statut 'actif' ->
+'abandonne') du cycle de vie des paniers, sans parcourir toute la table.
+Sous PostgreSQL, l'index est construit avec CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0008_paniers_actifs_modification
+Revises: 0007_panier_items_unique
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_paniers_actifs_modification'
+down_revision = '0007_panier_items_unique'
+branch_labels = None
+depends_on = None
+
+
+def _index_existants():
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('paniers')}
+
+
+def upgrade():
+    if 'ix_paniers_actifs_modification' in _index_existants():
+        return
+    where = sa.text("statut = 'actif'")
+    # CONCURRENTLY est interdit dans une transaction : bloc en autocommit
+    with op.get_context().autocommit_block():
+        op.create_index('ix_paniers_actifs_modification', 'paniers', ['date_modification'],
+                        postgresql_concurrently=True, postgresql_where=where, sqlite_where=where)
+
+
+def downgrade():
+    if 'ix_paniers_actifs_modification' not in _index_existants():
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_paniers_actifs_modification', table_name='paniers', postgresql_concurrently=True)
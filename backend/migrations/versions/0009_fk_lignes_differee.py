@@ -0,0 +1,52 @@
+"""Clé étrangère composite des lignes vérifiée à la validation
+
+En mode partitionné, lignes_commande (commande_id, date_commande) référence
+commandes (id, date_commande). Redater une commande change cette clé avant
+que ses lignes ne la suivent, dans le même flush : la contrainte devient
+DEFERRABLE INITIALLY DEFERRED. Sans partitionnement, rien ne change.
+
+Revision ID: 0009_fk_lignes_differee
+Revises: 0008_paniers_actifs_modification
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_fk_lignes_differee'
+down_revision = '0008_paniers_actifs_modification'
+branch_labels = None
+depends_on = None
+
+
+def _contrainte_composite():
+    """Nom de la clé étrangère composite, None hors mode partitionné"""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+    return bind.execute(sa.text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = to_regclass('lignes_commande') AND confrelid = to_regclass('commandes') "
+        "AND contype = 'f' AND array_length(conkey, 1) = 2"
+    )).scalar()
+
+
+def _recreer(differee):
+    nom = _contrainte_composite()
+    if nom is None:
+        return
+    op.execute(f'ALTER TABLE lignes_commande DROP CONSTRAINT "{nom}"')
+    op.execute(
+        f'ALTER TABLE lignes_commande ADD CONSTRAINT "{nom}" FOREIGN KEY (commande_id, date_commande) '
+        "REFERENCES commandes (id, date_commande)" + (" DEFERRABLE INITIALLY DEFERRED" if differee else "")
+    )
+
+
+def upgrade():
+    _recreer(differee=True)
+
+
+def downgrade():
+    _recreer(differee=False)
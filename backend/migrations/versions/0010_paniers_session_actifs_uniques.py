@@ -0,0 +1,48 @@
+"""Un seul panier actif par session
+
+Index unique partiel sur paniers (session_id) WHERE statut = 'actif' : la
+ligne paniers d'une session est créée par upsert (ON CONFLICT), et deux
+écritures concurrentes ne créent plus deux paniers actifs. Les doublons
+existants sont d'abord marqués abandonnés (le plus récent reste actif).
+Sous PostgreSQL, l'index est construit avec CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0010_paniers_session_actifs_uniques
+Revises: 0009_fk_lignes_differee
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_paniers_session_actifs_uniques'
+down_revision = '0009_fk_lignes_differee'
+branch_labels = None
+depends_on = None
+
+
+def _index_existants():
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('paniers')}
+
+
+def upgrade():
+    if 'uq_paniers_session_actif' in _index_existants():
+        return
+    op.execute(
+        "UPDATE paniers SET statut = 'abandonne' "
+        "WHERE statut = 'actif' AND session_id IS NOT NULL AND id NOT IN ("
+        "SELECT max(id) FROM paniers WHERE statut = 'actif' AND session_id IS NOT NULL GROUP BY session_id)"
+    )
+    where = sa.text("statut = 'actif'")
+    # CONCURRENTLY est interdit dans une transaction : bloc en autocommit
+    with op.get_context().autocommit_block():
+        op.create_index('uq_paniers_session_actif', 'paniers', ['session_id'], unique=True,
+                        postgresql_concurrently=True, postgresql_where=where, sqlite_where=where)
+
+
+def downgrade():
+    if 'uq_paniers_session_actif' not in _index_existants():
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_paniers_session_actif', table_name='paniers', postgresql_concurrently=True)
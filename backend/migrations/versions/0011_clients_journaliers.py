@@ -0,0 +1,54 @@
+"""Compteurs de clients de l'agrégat quotidien (daily_sales_clients)
+
+daily_sales est désormais tenu par deltas : le nombre de clients distincts
+d'un jour (et d'une catégorie) l'est par un compteur de commandes par
+(jour, catégorie, client), rempli ici à partir de l'historique des commandes.
+
+Revision ID: 0011_clients_journaliers
+Revises: 0010_paniers_session_actifs_uniques
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_clients_journaliers'
+down_revision = '0010_paniers_session_actifs_uniques'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Une base créée par init_db() après ce changement possède déjà la table
+    if not sa.inspect(op.get_bind()).has_table('daily_sales_clients'):
+        op.create_table(
+            'daily_sales_clients',
+            sa.Column('jour', sa.Date(), nullable=False),
+            sa.Column('categorie', sa.String(length=100), nullable=False),
+            sa.Column('utilisateur_id', sa.Integer(), nullable=False),
+            sa.Column('commandes', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('jour', 'categorie', 'utilisateur_id')
+        )
+
+    op.execute("DELETE FROM daily_sales_clients")
+    op.execute(
+        "INSERT INTO daily_sales_clients (jour, categorie, utilisateur_id, commandes) "
+        "SELECT DATE(date_commande), '', utilisateur_id, COUNT(id) "
+        "FROM commandes WHERE date_commande IS NOT NULL AND utilisateur_id IS NOT NULL "
+        "GROUP BY DATE(date_commande), utilisateur_id"
+    )
+    op.execute(
+        "INSERT INTO daily_sales_clients (jour, categorie, utilisateur_id, commandes) "
+        "SELECT DATE(l.date_commande), p.categorie, c.utilisateur_id, COUNT(DISTINCT l.commande_id) "
+        "FROM lignes_commande l "
+        "JOIN produits p ON p.id = l.produit_id "
+        "JOIN commandes c ON c.id = l.commande_id "
+        "WHERE l.date_commande IS NOT NULL AND c.utilisateur_id IS NOT NULL "
+        "GROUP BY DATE(l.date_commande), p.categorie, c.utilisateur_id"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_sales_clients')
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des index d'accès (migration 0003_index_acces)
+
+Remplit une base jetable avec un jeu de données volumineux, puis mesure la
+latence des requêtes des repositories sans les index, puis avec :
+
+    python scripts/benchmark_indexes.py
+    python scripts/benchmark_indexes.py --commandes 500000 --database-url postgresql://...
+
+Sans --database-url, une base SQLite temporaire est utilisée. Attention : les
+tables de la base indiquée sont supprimées puis recréées.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Tables dont les index sont mesurés (l'index unique sur utilisateurs.email est conservé)
+TABLES = ('paniers', 'panier_items', 'commandes', 'lignes_commande')
+
+LOT = 5000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help="Base jetable (défaut : SQLite temporaire)")
+    parser.add_argument('--utilisateurs', type=int, default=5000)
+    parser.add_argument('--produits', type=int, default=1000)
+    parser.add_argument('--commandes', type=int, default=100000)
+    parser.add_argument('--paniers', type=int, default=50000)
+    parser.add_argument('--repetitions', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def inserer(db, table, lignes):
+    """Insertion par lots de LOT lignes"""
+    for debut in range(0, len(lignes), LOT):
+        db.session.execute(table.insert(), lignes[debut:debut + LOT])
+    db.session.commit()
+
+
+def remplir(db, args, rng):
+    """
+    Jeu de données : commandes sur un an, paniers actifs, abandonnés et convertis
+
+    L'âge des paniers suit une loi exponentielle (moyenne 7 jours) : le nettoyage
+    quotidien laisse peu de paniers abandonnés de plus de 30 jours.
+    """
+    tables = db.metadata.tables
+    maintenant = datetime.utcnow()
+    print(f"Remplissage : {args.utilisateurs} utilisateurs, {args.produits} produits, "
+          f"{args.commandes} commandes, {args.paniers} paniers...")
+
+    inserer(db, tables['utilisateurs'], [
+        {'id': i, 'email': f'u{i}@bench.test', 'mot_de_passe': 'x', 'nom': f'U{i}', 'role': 'client',
+         'date_creation': maintenant}
+        for i in range(1, args.utilisateurs + 1)
+    ])
+    inserer(db, tables['produits'], [
+        {'id': i, 'nom': f'P{i}', 'categorie': f'C{i % 20}', 'prix': float(1 + i % 100),
+         'quantite_stock': 100, 'date_creation': maintenant}
+        for i in range(1, args.produits + 1)
+    ])
+
+    statuts = ['en_attente', 'validee', 'expediee', 'livree', 'annulee']
+    commandes, lignes = [], []
+    for i in range(1, args.commandes + 1):
+        articles = [(rng.randint(1, args.produits), rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+        commandes.append({
+            'id': i, 'utilisateur_id': rng.randint(1, args.utilisateurs),
+            'date_commande': maintenant - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+            'adresse_livraison': '1 rue du Banc', 'statut': rng.choice(statuts),
+            'total': sum(q * float(1 + p % 100) for p, q in articles),
+            'nombre_articles': sum(q for _, q in articles)
+        })
+        lignes.extend({'commande_id': i, 'produit_id': p, 'quantite': q, 'prix_unitaire': float(1 + p % 100)}
+                      for p, q in articles)
+    inserer(db, tables['commandes'], commandes)
+    inserer(db, tables['lignes_commande'], lignes)
+
+    paniers, items = [], []
+    for i in range(1, args.paniers + 1):
+        connecte = i % 2 == 0
+        paniers.append({
+            'id': i, 'utilisateur_id': rng.randint(1, args.utilisateurs) if connecte else None,
+            'session_id': None if connecte else f'session-{i}',
+            'statut': rng.choices(['actif', 'abandonne', 'converti'], weights=[2, 5, 3])[0],
+            'date_creation': maintenant, 'date_modification': maintenant - timedelta(days=rng.expovariate(1 / 7))
+        })
+        items.extend({'panier_id': i, 'produit_id': p, 'quantite': 1, 'prix_unitaire': 1.0,
+                      'date_ajout': maintenant, 'date_modification': maintenant}
+                     for p in rng.sample(range(1, args.produits + 1), 3))
+    inserer(db, tables['paniers'], paniers)
+    inserer(db, tables['panier_items'], items)
+
+
+def scenarios(args, rng):
+    """Requêtes mesurées : (libellé, fonction), paramètres tirés au hasard à chaque appel"""
+    from src.data.repositories import CommandeRepository, LigneCommandeRepository, PageRequest
+    from src.data.repositories.panier_repository import PanierRepository
+    from src.domain.models.panier import PanierItem
+
+    paniers, commandes, lignes = PanierRepository(), CommandeRepository(), LigneCommandeRepository()
+    aujourd_hui = datetime.utcnow().date()
+
+    def session_aleatoire():
+        return f'session-{rng.randrange(1, args.paniers, 2)}'
+
+    return [
+        ("panier actif d'une session", lambda: paniers.get_panier_session(session_aleatoire())),
+        ("panier actif d'un utilisateur", lambda: paniers.get_panier_utilisateur(rng.randint(1, args.utilisateurs))),
+        ("article (panier, produit)", lambda: PanierItem.query.filter_by(
+            panier_id=rng.randint(1, args.paniers), produit_id=rng.randint(1, args.produits)).first()),
+        ("paniers abandonnés > 30 j", lambda: paniers.get_paniers_abandonnes(30)),
+        ("commandes d'un utilisateur (page)", lambda: commandes.get_page_by_utilisateur(
+            rng.randint(1, args.utilisateurs), PageRequest(limit=20))),
+        ("commandes en attente (page)", lambda: commandes.get_page_by_statut('en_attente', PageRequest(limit=20))),
+        ("nombre de commandes en attente", lambda: commandes.count_by_status('en_attente')),
+        ("CA par jour sur 7 jours", lambda: commandes.get_revenue_by_date_range_chart(
+            aujourd_hui - timedelta(days=6), aujourd_hui)),
+        ("ventes d'un produit", lambda: lignes.get_total_ventes_produit(rng.randint(1, args.produits))),
+    ]
+
+
+def mesurer(db, args, rng):
+    """Latence médiane et p95 (ms) de chaque scénario, session vidée entre deux appels"""
+    resultats = {}
+    for libelle, requete in scenarios(args, rng):
+        durees = []
+        for _ in range(args.repetitions):
+            db.session.expunge_all()
+            debut = time.perf_counter()
+            requete()
+            durees.append((time.perf_counter() - debut) * 1000.0)
+            db.session.rollback()
+        durees.sort()
+        resultats[libelle] = (statistics.median(durees), durees[max(0, int(len(durees) * 0.95) - 1)])
+    return resultats
+
+
+def index_mesures(db):
+    return [index for nom in TABLES for index in db.metadata.tables[nom].indexes]
+
+
+def analyser(db):
+    """Met à jour les statistiques du planificateur"""
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.exec_driver_sql('ANALYZE')
+
+
+def main():
+    args = parse_args()
+    url = args.database_url
+    if url is None:
+        url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='bench-index-'), 'bench.db')
+    os.environ['DATABASE_URL'] = url
+    os.environ.setdefault('SLOW_QUERY_THRESHOLD_MS', '-1')
+    os.environ.setdefault('PRODUCT_CACHE_SIZE', '0')
+
+    from src.app import create_app
+    from src.data.database.db import db
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        remplir(db, args, rng)
+
+        for index in index_mesures(db):
+            index.drop(db.engine, checkfirst=True)
+        analyser(db)
+        sans_index = mesurer(db, args, random.Random(args.seed))
+
+        for index in index_mesures(db):
+            index.create(db.engine, checkfirst=True)
+        analyser(db)
+        avec_index = mesurer(db, args, random.Random(args.seed))
+
+    print(f"\n{'Requête':<36} {'sans index (p50/p95 ms)':>24} {'avec index (p50/p95 ms)':>24} {'gain p50':>9}")
+    for libelle, (p50, p95) in sans_index.items():
+        apres_p50, apres_p95 = avec_index[libelle]
+        gain = p50 / apres_p50 if apres_p50 else float('inf')
+        print(f"{libelle:<36} {p50:>13.2f} / {p95:>8.2f} {apres_p50:>13.2f} / {apres_p95:>8.2f} {gain:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
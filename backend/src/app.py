@@ -7,7 +7,17 @@ from flask import Flask
 from flask_migrate import Migrate
 from .config.app_config import config
 from .data.database.db import db
-from .domain.models import Utilisateur, Produit, Commande, LigneCommande, Panier, PanierItem
+from .data.database.routing import configure_replica_binds
+from .data.database import instrumentation
+from .data.database.cart_store import configure_cart_store
+from .data.database.partitioning import partitions_cli
+from .data.repositories.produit_repository import produit_cache
+from .service.impl.auth_service import token_cache
+from .service.impl.jwt_keys import jwt_cli, jwt_keyring
+from .utils.password_hashing import password_hasher
+from .data.repositories.vente_journaliere_repository import daily_sales_cli
+from .service.impl.paniers_abandonnes_job import carts_cli
+from .domain.models import Utilisateur, Produit, Commande, LigneCommande, Panier, PanierItem, VenteJournaliere
 from .utils.logging_config import configure_external_loggers, get_logger
 
 # Configuration du logging
@@ -26,8 +36,20 @@ def create_app(config_name='default'):
     logger.info("✅ Configuration de l'application chargée")
     
     # Initialisation des extensions
+    configure_replica_binds(app)
     db.init_app(app)
+    instrumentation.init_app(app)
+    produit_cache.configure(app.config['PRODUCT_CACHE_SIZE'], app.config['PRODUCT_CACHE_TTL'])
+    token_cache.configure(app.config['TOKEN_CACHE_SIZE'], app.config['TOKEN_CACHE_TTL'])
+    password_hasher.configure(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'],
+                              app.config['PASSWORD_HASH_QUEUE_SIZE'], app.config['PASSWORD_HASH_TIMEOUT'])
+    jwt_keyring.configure(app)
+    configure_cart_store(app)
     migrate = Migrate(app, db)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(daily_sales_cli)
+    app.cli.add_command(carts_cli)
+    app.cli.add_command(jwt_cli)
     
     # Enregistrement des blueprints
     from .controller.api import api_bp
@@ -56,6 +78,7 @@ def create_app(config_name='default'):
                     'register': '/api/auth/register',
                     'login': '/api/auth/login',
                     'verify': '/api/auth/verify',
+                    'jwks': '/api/auth/jwks',
                     'refresh': '/api/auth/refresh'
                 },
                 'utilisateurs': '/api/utilisateurs',
@@ -90,7 +113,12 @@ def create_app(config_name='default'):
                     'performances': '/api/maintenance/performance',
                     'redemarrer_api': '/api/maintenance/restart',
                     'redemarrer_cache': '/api/maintenance/restart-cache',
+                    'caches': '/api/maintenance/cache',
+                    'paniers_anonymes': '/api/maintenance/cart-store',
+                    'paniers_abandonnes': '/api/maintenance/abandoned-carts',
                     'logs': '/api/maintenance/logs',
+                    'requetes_lentes': '/api/maintenance/slow-queries',
+                    'partitions': '/api/maintenance/partitions',
                     'sante': '/api/maintenance/health',
                     'statut': '/api/maintenance/status',
                     'sauvegarde': '/api/maintenance/backup',
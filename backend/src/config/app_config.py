@@ -24,6 +24,73 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)  # Token expire après 1 heure
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)  # Refresh token expire après 30 jours
     JWT_EXPIRATION = 3600  # 1 heure en secondes
+    
+    # Pagination des listes (taille par défaut et plafond appliqué côté serveur)
+    PAGINATION_DEFAULT_LIMIT = int(os.environ.get('PAGINATION_DEFAULT_LIMIT', 50))
+    PAGINATION_MAX_LIMIT = int(os.environ.get('PAGINATION_MAX_LIMIT', 200))
+    
+    # Import de catalogue en masse : nombre de produits écrits par transaction
+    BULK_IMPORT_CHUNK_SIZE = int(os.environ.get('BULK_IMPORT_CHUNK_SIZE', 500))
+    
+    # Réplicas en lecture seule (URLs séparées par des virgules) et durée pendant
+    # laquelle un client relit sur le primaire après ses propres écritures (gardée par le
+    # worker et renvoyée dans le cookie signé replica_sticky, valable sur tous les workers)
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    
+    # Instrumentation base de données : requêtes mesurées par endpoint (fenêtre glissante)
+    DB_METRICS_WINDOW = int(os.environ.get('DB_METRICS_WINDOW', 1000))
+    
+    # Journal des requêtes lentes (seuil en ms, négatif pour désactiver) et capture des plans
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 500))
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    
+    # Cache des produits lus par id (entrées, durée de vie en secondes ; 0 entrée : désactivé)
+    PRODUCT_CACHE_SIZE = int(os.environ.get('PRODUCT_CACHE_SIZE', 1024))
+    PRODUCT_CACHE_TTL = float(os.environ.get('PRODUCT_CACHE_TTL', 30))
+    
+    # Cache des tokens vérifiés (claims par empreinte du token, jamais au-delà de son expiration)
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+    TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 300))
+    
+    # Hachage des mots de passe : méthode et facteur de travail (format werkzeug), pool borné
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Signature des tokens : HS256 (JWT_SECRET_KEY) ou RS256/EdDSA avec les clés
+    # privées <kid>.pem de JWT_KEYS_DIR (publiées sur /api/auth/jwks, voir jwt_keys)
+    JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+    JWT_KEYS_DIR = os.environ.get('JWT_KEYS_DIR')
+    JWT_ACTIVE_KID = os.environ.get('JWT_ACTIVE_KID')
+    JWT_KEYS_RELOAD_INTERVAL = float(os.environ.get('JWT_KEYS_RELOAD_INTERVAL', 60))
+    
+    # Paniers anonymes (X-Session-ID) : 'database' (défaut) les écrit à chaque modification,
+    # quel que soit le nombre de workers. 'memory' est à activer explicitement, pour un seul
+    # processus serveur ou derrière un répartiteur à affinité de session (X-Session-ID) : il
+    # les garde en mémoire du processus (paniers, inactivité en secondes avant expiration) et
+    # ne les écrit en base qu'à la migration vers un utilisateur, à la commande ou toutes les
+    # CART_STORE_FLUSH_INTERVAL secondes ; sans affinité, les paniers se répartiraient entre
+    # workers et des modifications seraient perdues
+    CART_STORE_BACKEND = os.environ.get('CART_STORE_BACKEND', 'database')
+    CART_STORE_SIZE = int(os.environ.get('CART_STORE_SIZE', 10000))
+    CART_STORE_TTL = float(os.environ.get('CART_STORE_TTL', 3600))
+    CART_STORE_FLUSH_INTERVAL = float(os.environ.get('CART_STORE_FLUSH_INTERVAL', 60))
+    
+    # Cycle de vie des paniers (`flask carts lifecycle`, POST /api/maintenance/abandoned-carts) :
+    # jours d'inactivité avant abandon puis avant suppression, paniers par lot et pause entre lots
+    CART_ABANDON_DAYS = int(os.environ.get('CART_ABANDON_DAYS', 7))
+    CART_PURGE_DAYS = int(os.environ.get('CART_PURGE_DAYS', 30))
+    CART_LIFECYCLE_BATCH_SIZE = int(os.environ.get('CART_LIFECYCLE_BATCH_SIZE', 1000))
+    CART_LIFECYCLE_BATCH_PAUSE = float(os.environ.get('CART_LIFECYCLE_BATCH_PAUSE', 0.05))
+
+    # Partitionnement mensuel des commandes (PostgreSQL, activé par `flask partitions enable`) :
+    # mois créés à l'avance, rétention en mois avant archivage (0 : tout garder), schéma d'archive
+    PARTITIONS_AHEAD_MONTHS = int(os.environ.get('PARTITIONS_AHEAD_MONTHS', 3))
+    PARTITIONS_RETENTION_MONTHS = int(os.environ.get('PARTITIONS_RETENTION_MONTHS', 0))
+    PARTITIONS_ARCHIVE_SCHEMA = os.environ.get('PARTITIONS_ARCHIVE_SCHEMA', 'archive')
 
 
 class DevelopmentConfig(Config):
@@ -3,9 +3,11 @@ Contrôleur pour l'authentification
 """
 
 import logging
-from flask import request
+from flask import current_app, request
 from flask_restx import Resource, Namespace
 from ...service.impl.auth_service import AuthService
+from ...service.impl.jwt_keys import jwt_keyring
+from ...utils.password_hashing import HachageIndisponible
 from ..dto.auth_dto import register_model, login_model, token_response_model, error_model
 
 # Configuration du logger
@@ -14,6 +16,10 @@ logger = logging.getLogger(__name__)
 # Créer un namespace pour l'authentification
 auth_ns = Namespace('auth', description='Opérations d\'authentification')
 
+def _hachage_indisponible(e: HachageIndisponible):
+    """Réponse 503 quand le pool de hachage des mots de passe est saturé"""
+    return {'message': str(e), 'error': 'password_hashing_busy'}, 503, {'Retry-After': '1'}
+
 @auth_ns.route('/register')
 class Register(Resource):
     """Endpoint pour l'inscription d'un nouvel utilisateur"""
@@ -63,9 +69,10 @@ class Register(Resource):
                 logger.error(f"Échec de l'inscription: {result}")
                 return result, 400
             
-            # Générer un token pour l'utilisateur nouvellement créé
+            # Générer un token pour l'utilisateur nouvellement créé (sans vérifier de nouveau le mot de passe)
             logger.info("Génération du token de connexion...")
-            login_result = auth_service.login_user(email, mot_de_passe)
+            utilisateur = auth_service.utilisateur_repo.get_by_id(result['user']['id'])
+            login_result = auth_service.issue_token(utilisateur)
             logger.info(f"Résultat de la connexion: {login_result}")
             
             logger.info("=== INSCRIPTION RÉUSSIE ===")
@@ -74,6 +81,9 @@ class Register(Resource):
         except ValueError as e:
             logger.error(f"Erreur de validation: {str(e)}")
             return {'message': str(e), 'error': 'validation_error'}, 400
+        except HachageIndisponible as e:
+            logger.warning(f"Inscription refusée, hachage saturé: {str(e)}")
+            return _hachage_indisponible(e)
         except Exception as e:
             logger.error(f"Erreur interne lors de l'inscription: {str(e)}", exc_info=True)
             return {'message': 'Erreur interne du serveur', 'error': 'internal_error'}, 500
@@ -121,6 +131,9 @@ class Login(Resource):
         except ValueError as e:
             logger.error(f"Erreur de validation lors de la connexion: {str(e)}")
             return {'message': str(e), 'error': 'authentication_error'}, 401
+        except HachageIndisponible as e:
+            logger.warning(f"Connexion refusée, hachage saturé: {str(e)}")
+            return _hachage_indisponible(e)
         except Exception as e:
             logger.error(f"Erreur interne lors de la connexion: {str(e)}", exc_info=True)
             return {'message': 'Erreur interne du serveur', 'error': 'internal_error'}, 500
@@ -159,6 +172,18 @@ class VerifyToken(Resource):
         except Exception as e:
             return {'message': 'Erreur interne du serveur', 'error': 'internal_error'}, 500
 
+@auth_ns.route('/jwks')
+class Jwks(Resource):
+    """Clés publiques de vérification des tokens (RS256/EdDSA)"""
+    
+    def get(self):
+        """
+        Retourne les clés publiques au format JWKS : le frontend vérifie les
+        tokens localement au lieu d'appeler /verify (liste vide en HS256)
+        """
+        max_age = int(current_app.config.get('JWT_KEYS_RELOAD_INTERVAL', 60))
+        return jwt_keyring.jwks(), 200, {'Cache-Control': f'public, max-age={max_age}'}
+
 @auth_ns.route('/refresh')
 class RefreshToken(Resource):
     """Endpoint pour rafraîchir un token JWT"""
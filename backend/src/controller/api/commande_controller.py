@@ -6,6 +6,7 @@ from flask_restx import Namespace, Resource, fields
 from ...service.impl import CommandeService
 from ...controller.dto import CommandeDTO, CreateCommandeDTO, UpdateCommandeDTO
 from ...utils.auth_decorators import token_required, admin_required, client_or_admin_required
+from ...utils.pagination import pagination_parser, get_page_request, page_model, page_response
 
 # Namespace pour les commandes
 commande_ns = Namespace('commandes', description='Opérations sur les commandes')
@@ -27,9 +28,12 @@ commande_model = commande_ns.model('Commande', {
     'adresse_livraison': fields.String(required=True, description='Adresse de livraison'),
     'statut': fields.String(description='Statut de la commande'),
     'lignes_commande': fields.List(fields.Nested(ligne_commande_model)),
-    'total': fields.Float(readonly=True, description='Total de la commande')
+    'total': fields.Float(readonly=True, description='Total de la commande'),
+    'nombre_articles': fields.Integer(readonly=True, description='Nombre d\'articles de la commande')
 })
 
+commande_page_model = page_model(commande_ns, 'CommandePage', commande_model)
+
 commande_input_model = commande_ns.model('CommandeInput', {
     'utilisateur_id': fields.Integer(required=True, description='ID de l\'utilisateur'),
     'adresse_livraison': fields.String(required=True, description='Adresse de livraison'),
@@ -43,12 +47,16 @@ commande_service = CommandeService()
 @commande_ns.route('/')
 class CommandeList(Resource):
     @commande_ns.doc('list_commandes')
-    @commande_ns.marshal_list_with(commande_model)
+    @commande_ns.expect(pagination_parser)
+    @commande_ns.marshal_with(commande_page_model)
     @admin_required
     def get(self):
-        """Récupère la liste de toutes les commandes (Admin uniquement)"""
-        orders = commande_service.get_all_orders()
-        return [order.to_dict() for order in orders]
+        """Récupère une page de commandes (Admin uniquement)"""
+        try:
+            page = commande_service.get_orders_page(get_page_request())
+        except ValueError as e:
+            commande_ns.abort(400, str(e))
+        return page_response(page)
 
     @commande_ns.doc('create_commande')
     @commande_ns.expect(commande_input_model)
@@ -57,11 +65,14 @@ class CommandeList(Resource):
     def post(self):
         """Crée une nouvelle commande (Client ou Admin)"""
         data = commande_ns.payload
-        order = commande_service.create_order(
-            utilisateur_id=data['utilisateur_id'],
-            adresse_livraison=data['adresse_livraison'],
-            lignes_commande=data.get('lignes_commande', [])
-        )
+        try:
+            order = commande_service.create_order(
+                utilisateur_id=data['utilisateur_id'],
+                adresse_livraison=data['adresse_livraison'],
+                lignes_commande=data.get('lignes_commande', [])
+            )
+        except ValueError as e:
+            commande_ns.abort(400, str(e))
         return order.to_dict(), 201
 
 
@@ -83,7 +94,7 @@ class Commande(Resource):
     @commande_ns.marshal_with(commande_model)
     @admin_required
     def put(self, order_id):
-        """Met à jour une commande (Admin uniquement)"""
+        """Met à jour l'adresse de livraison et le statut d'une commande (Admin uniquement)"""
         data = commande_ns.payload
         order = commande_service.update_order(order_id, **data)
         if not order:
@@ -104,24 +115,32 @@ class Commande(Resource):
 @commande_ns.param('user_id', 'ID de l\'utilisateur')
 class CommandesByUser(Resource):
     @commande_ns.doc('list_commandes_by_user')
-    @commande_ns.marshal_list_with(commande_model)
+    @commande_ns.expect(pagination_parser)
+    @commande_ns.marshal_with(commande_page_model)
     @client_or_admin_required
     def get(self, user_id):
-        """Récupère toutes les commandes d'un utilisateur (Client ou Admin)"""
-        orders = commande_service.get_orders_by_user(user_id)
-        return [order.to_dict() for order in orders]
+        """Récupère une page des commandes d'un utilisateur (Client ou Admin)"""
+        try:
+            page = commande_service.get_orders_by_user_page(user_id, get_page_request())
+        except ValueError as e:
+            commande_ns.abort(400, str(e))
+        return page_response(page)
 
 
 @commande_ns.route('/statut/<string:status>')
 @commande_ns.param('status', 'Statut de la commande')
 class CommandesByStatus(Resource):
     @commande_ns.doc('list_commandes_by_status')
-    @commande_ns.marshal_list_with(commande_model)
+    @commande_ns.expect(pagination_parser)
+    @commande_ns.marshal_with(commande_page_model)
     @admin_required
     def get(self, status):
-        """Récupère toutes les commandes d'un statut donné (Admin uniquement)"""
-        orders = commande_service.get_orders_by_status(status)
-        return [order.to_dict() for order in orders]
+        """Récupère une page des commandes d'un statut donné (Admin uniquement)"""
+        try:
+            page = commande_service.get_orders_by_status_page(status, get_page_request())
+        except ValueError as e:
+            commande_ns.abort(400, str(e))
+        return page_response(page)
 
 
 @commande_ns.route('/<int:order_id>/statut')
@@ -140,6 +140,52 @@ class RestartCacheResource(Resource):
                 'message': f'Erreur lors du redémarrage du cache: {str(e)}'
             }, 500
 
+@maintenance_ns.route('/cache')
+class CacheStatsResource(Resource):
+    """Ressource pour les compteurs des caches"""
+    
+    @maintenance_ns.doc('get_cache_stats')
+    @token_required
+    def get(self):
+        """Récupère les compteurs des caches (succès, échecs, évictions, invalidations)"""
+        maintenance_service = MaintenanceService()
+        return {
+            'success': True,
+            'data': maintenance_service.get_cache_stats()
+        }, 200
+
+@maintenance_ns.route('/password-hashing')
+class PasswordHashingStatsResource(Resource):
+    """Ressource pour les compteurs du pool de hachage des mots de passe"""
+    
+    @maintenance_ns.doc('get_password_hashing_stats')
+    @admin_required
+    def get(self):
+        """Récupère la profondeur de file et les compteurs du hachage des mots de passe (Admin uniquement)"""
+        maintenance_service = MaintenanceService()
+        return {
+            'success': True,
+            'data': maintenance_service.get_password_hashing_stats()
+        }, 200
+
+@maintenance_ns.route('/cart-store')
+class CartStoreResource(Resource):
+    """Ressource pour le magasin des paniers anonymes"""
+    
+    @maintenance_ns.doc('persist_cart_store')
+    @admin_required
+    def post(self):
+        """Écrit en base les paniers anonymes modifiés sans attendre l'écriture différée (Admin uniquement)"""
+        try:
+            maintenance_service = MaintenanceService()
+            return maintenance_service.persist_cart_store(), 200
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Erreur lors de l\'écriture des paniers: {str(e)}'
+            }, 500
+
 @maintenance_ns.route('/logs')
 class LogsResource(Resource):
     """Ressource pour récupérer les logs"""
@@ -166,6 +212,107 @@ class LogsResource(Resource):
                 'message': f'Erreur lors de la récupération des logs: {str(e)}'
             }, 500
 
+@maintenance_ns.route('/slow-queries')
+class SlowQueriesResource(Resource):
+    """Ressource pour le journal des requêtes lentes"""
+    
+    @maintenance_ns.doc('get_slow_queries', params={'limit': 'Nombre de requêtes retournées (défaut 20)'})
+    @admin_required
+    def get(self):
+        """Requêtes lentes classées par temps cumulé, avec endpoint et plan d'exécution (Admin uniquement)"""
+        limit = request.args.get('limit', 20, type=int)
+        if limit is None or limit < 1:
+            maintenance_ns.abort(400, 'limit doit être un entier positif')
+        
+        try:
+            maintenance_service = MaintenanceService()
+            slow_queries = maintenance_service.get_slow_queries(limit)
+            
+            return {
+                'success': True,
+                'data': slow_queries
+            }, 200
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Erreur lors de la récupération des requêtes lentes: {str(e)}'
+            }, 500
+    
+    @maintenance_ns.doc('clear_slow_queries')
+    @admin_required
+    def delete(self):
+        """Vide le journal des requêtes lentes (Admin uniquement)"""
+        maintenance_service = MaintenanceService()
+        return maintenance_service.clear_slow_queries(), 200
+
+@maintenance_ns.route('/partitions')
+class PartitionsResource(Resource):
+    """Ressource pour les partitions mensuelles des commandes"""
+    
+    @maintenance_ns.doc('get_partitions')
+    @admin_required
+    def get(self):
+        """Liste les partitions des commandes et des lignes (Admin uniquement)"""
+        maintenance_service = MaintenanceService()
+        return {
+            'success': True,
+            'data': maintenance_service.get_partitions()
+        }, 200
+    
+    @maintenance_ns.doc('maintain_partitions')
+    @admin_required
+    def post(self):
+        """Crée les partitions à venir et archive les anciennes (Admin uniquement)"""
+        try:
+            maintenance_service = MaintenanceService()
+            result = maintenance_service.maintain_partitions()
+            return result, 200 if result['success'] else 409
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 500
+
+@maintenance_ns.route('/abandoned-carts')
+class AbandonedCartsResource(Resource):
+    """Ressource pour le cycle de vie des paniers (abandon puis purge, par lots)"""
+    
+    @maintenance_ns.doc('get_abandoned_carts_job')
+    @admin_required
+    def get(self):
+        """Progression de la dernière exécution : phase, lots, paniers marqués et supprimés (Admin uniquement)"""
+        maintenance_service = MaintenanceService()
+        return {
+            'success': True,
+            'data': maintenance_service.get_abandoned_carts_job()
+        }, 200
+    
+    @maintenance_ns.doc('start_abandoned_carts_job', params={
+        'abandon_days': "Jours d'inactivité avant abandon (défaut CART_ABANDON_DAYS)",
+        'purge_days': "Jours d'inactivité avant suppression (défaut CART_PURGE_DAYS)",
+        'batch_size': 'Paniers par lot (défaut CART_LIFECYCLE_BATCH_SIZE)'
+    })
+    @admin_required
+    def post(self):
+        """Lance en arrière-plan le marquage des paniers inactifs puis la purge des abandonnés (Admin uniquement)"""
+        options = {}
+        for name in ('abandon_days', 'purge_days', 'batch_size'):
+            value = request.args.get(name, type=int)
+            if name in request.args and (value is None or value < 1):
+                maintenance_ns.abort(400, f'{name} doit être un entier positif')
+            if value is not None:
+                options[name] = value
+        
+        maintenance_service = MaintenanceService()
+        try:
+            result = maintenance_service.start_abandoned_carts_job(**options)
+        except ValueError as e:
+            # CART_LIFECYCLE_BATCH_SIZE (ou autre défaut) non positif
+            maintenance_ns.abort(400, str(e))
+        return result, 202 if result['success'] else 409
+
 @maintenance_ns.route('/health')
 class HealthCheckResource(Resource):
     """Ressource pour vérifier la santé du système"""
@@ -4,7 +4,7 @@ Contrôleur API pour le panier
 
 import logging
 from flask import request
-from flask_restx import Resource, Namespace, fields
+from flask_restx import Resource, Namespace, fields, inputs
 from ...service.impl.panier_service import PanierService
 from ...controller.dto.panier_dto import AjouterAuPanierDTO, ModifierQuantiteDTO, SupprimerDuPanierDTO
 from ...utils.auth_decorators import token_required, optional_auth, get_current_user
@@ -57,7 +57,11 @@ supprimer_du_panier_model = panier_ns.model('SupprimerDuPanier', {
 panier_resume_model = panier_ns.model('PanierResume', {
     'nombre_items': fields.Integer(description='Nombre d\'items'),
     'total': fields.Float(description='Total du panier'),
-    'items': fields.List(fields.Raw, description='Items du panier')
+    'items': fields.List(fields.Raw, description='Items du panier (avec details=true)')
+})
+
+valider_commande_model = panier_ns.model('ValiderCommande', {
+    'adresse_livraison': fields.String(required=True, description='Adresse de livraison')
 })
 
 # Service
@@ -111,18 +115,19 @@ class PanierResource(Resource):
 
 @panier_ns.route('/resume')
 class PanierResumeResource(Resource):
-    @panier_ns.doc('get_panier_resume')
+    @panier_ns.doc('get_panier_resume', params={'details': 'Inclure les articles (défaut false : nombre et total seulement)'})
     @panier_ns.marshal_with(panier_resume_model)
     @optional_auth
     def get(self):
-        """Récupère le résumé du panier"""
+        """Récupère le résumé du panier (nombre d'articles et total ; articles si details=true)"""
         try:
             user = get_current_user()
+            details = request.args.get('details', False, type=inputs.boolean)
             if user:
-                resume = panier_service.get_resume_panier_utilisateur(user['id'])
+                resume = panier_service.get_resume_panier_utilisateur(user['id'], details)
             else:
                 session_id = request.headers.get('X-Session-ID', 'default')
-                resume = panier_service.get_resume_panier_session(session_id)
+                resume = panier_service.get_resume_panier_session(session_id, details)
             
             return resume
             
@@ -305,3 +310,27 @@ class MigrerPanierResource(Resource):
         except Exception as e:
             logger.error(f"Erreur lors de la migration: {e}")
             return {'message': 'Erreur lors de la migration'}, 500
+
+
+@panier_ns.route('/checkout')
+class CheckoutPanierResource(Resource):
+    @panier_ns.doc('checkout_panier')
+    @panier_ns.expect(valider_commande_model)
+    @token_required
+    def post(self):
+        """Transforme le panier de l'utilisateur connecté en commande (stock réservé, panier converti)"""
+        try:
+            user = get_current_user()
+            data = request.get_json() or {}
+            result = panier_service.valider_commande_utilisateur(user['id'], data.get('adresse_livraison'))
+            
+            if result['success']:
+                log_business_operation('PanierService', 'valider_commande_utilisateur', user_id=user['id'],
+                                       result={'commande_id': result['commande']['id']})
+                return result, 201
+            else:
+                return result, 400
+                
+        except Exception as e:
+            logger.error(f"Erreur lors de la validation de la commande: {e}")
+            return {'message': 'Erreur lors de la validation de la commande'}, 500
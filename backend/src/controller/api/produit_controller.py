@@ -2,13 +2,19 @@
 Contrôleur API pour les produits
 """
 
-from flask_restx import Namespace, Resource, fields
+import json
+from itertools import chain
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource, fields, inputs
 from ...service.impl import ProduitService
 from ...controller.dto import ProduitDTO, CreateProduitDTO, UpdateProduitDTO
 from ...utils.auth_decorators import token_required, admin_required
+from ...utils.pagination import pagination_parser, get_page_request, page_model, page_response
+from ...utils.json_stream import iter_json_array, iter_ndjson
+from ...utils.read_replica import replica_on_get
 
 # Namespace pour les produits
-produit_ns = Namespace('produits', description='Opérations sur les produits')
+produit_ns = Namespace('produits', description='Opérations sur les produits', decorators=[replica_on_get])
 
 # Modèles Swagger
 produit_model = produit_ns.model('Produit', {
@@ -23,6 +29,8 @@ produit_model = produit_ns.model('Produit', {
     'date_creation': fields.DateTime(readonly=True, description='Date d\'ajout du produit')
 })
 
+produit_page_model = page_model(produit_ns, 'ProduitPage', produit_model)
+
 produit_input_model = produit_ns.model('ProduitInput', {
     'nom': fields.String(required=True, description='Nom du produit'),
     'description': fields.String(description='Description du produit'),
@@ -33,6 +41,24 @@ produit_input_model = produit_ns.model('ProduitInput', {
     'images': fields.List(fields.String, description='Liste des URLs d\'images')
 })
 
+produit_bulk_input_model = produit_ns.inherit('ProduitBulkInput', produit_input_model, {
+    'id': fields.Integer(description='ID du produit à mettre à jour (absent : création)')
+})
+
+# Recherche : pagination commune, tri par pertinence par défaut, filtres
+search_parser = pagination_parser.copy()
+search_parser.replace_argument('sort', type=str, location='args', default='pertinence',
+                               help="Clé de tri ('pertinence', 'id', 'nom' ou 'prix')")
+search_parser.add_argument('q', type=str, location='args', required=True, help='Texte recherché')
+search_parser.add_argument('categorie', type=str, location='args', help='Catégorie exacte')
+search_parser.add_argument('prix_min', type=float, location='args', help='Prix minimum')
+search_parser.add_argument('prix_max', type=float, location='args', help='Prix maximum')
+search_parser.add_argument('en_stock', type=inputs.boolean, location='args', default=False,
+                           help='Produits en stock uniquement')
+
+# Types de contenu traités comme NDJSON (un produit par ligne)
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
 # Service
 produit_service = ProduitService()
 
@@ -40,11 +66,15 @@ produit_service = ProduitService()
 @produit_ns.route('/')
 class ProduitList(Resource):
     @produit_ns.doc('list_produits')
-    @produit_ns.marshal_list_with(produit_model)
+    @produit_ns.expect(pagination_parser)
+    @produit_ns.marshal_with(produit_page_model)
     def get(self):
-        """Récupère la liste de tous les produits"""
-        products = produit_service.get_all_products()
-        return [product.to_dict() for product in products]
+        """Récupère une page de produits (pagination par curseur)"""
+        try:
+            page = produit_service.get_products_page(get_page_request())
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        return page_response(page)
 
     @produit_ns.doc('create_produit')
     @produit_ns.expect(produit_input_model)
@@ -63,6 +93,108 @@ class ProduitList(Resource):
         return product.to_dict(), 201
 
 
+@produit_ns.route('/search')
+class ProduitSearch(Resource):
+    @produit_ns.doc('search_produits')
+    @produit_ns.expect(search_parser)
+    @produit_ns.marshal_with(produit_page_model)
+    def get(self):
+        """Recherche des produits (nom, description, catégorie), les plus pertinents en premier"""
+        args = search_parser.parse_args()
+        try:
+            page = produit_service.search_products(
+                args['q'],
+                get_page_request(search_parser),
+                category=args.get('categorie'),
+                min_price=args.get('prix_min'),
+                max_price=args.get('prix_max'),
+                in_stock=args.get('en_stock')
+            )
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        return page_response(page)
+
+
+@produit_ns.route('/bulk')
+class ProduitBulk(Resource):
+    @produit_ns.doc('bulk_upsert_produits', description=(
+        "Corps : tableau JSON ou flux NDJSON (Content-Type application/x-ndjson). "
+        "Les produits avec id sont mis à jour (ou créés avec cet id), les autres sont créés. "
+        "La réponse est diffusée au fil de l'import, au même format que le corps."
+    ))
+    @produit_ns.expect([produit_bulk_input_model])
+    @produit_ns.response(200, 'Résultat par ligne puis récapitulatif')
+    @produit_ns.response(400, 'Corps illisible')
+    @admin_required
+    def post(self):
+        """Insère ou met à jour des produits en masse (Admin uniquement)"""
+        ndjson = request.mimetype in NDJSON_MIMETYPES
+        rows = iter_ndjson(request.stream) if ndjson else iter_json_array(request.stream)
+        
+        # Le début du corps est lu avant de diffuser la réponse pour pouvoir répondre 400
+        try:
+            premier = next(rows, None)
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        if premier is not None:
+            rows = chain([premier], rows)
+        
+        resultats = produit_service.bulk_upsert_products(rows, current_app.config['BULK_IMPORT_CHUNK_SIZE'])
+        if ndjson:
+            return Response(stream_with_context(_bulk_ndjson(resultats)), mimetype='application/x-ndjson')
+        return Response(stream_with_context(_bulk_json(resultats)), mimetype='application/json')
+
+
+def _bulk_ndjson(resultats):
+    """Diffuse les résultats d'import en NDJSON, récapitulatif en dernière ligne"""
+    recap = _BulkRecap()
+    try:
+        for resultat in resultats:
+            recap.ajouter(resultat)
+            yield json.dumps(resultat, ensure_ascii=False) + '\n'
+    except ValueError as e:
+        recap.erreur = str(e)
+    yield json.dumps({'summary': recap.to_dict()}, ensure_ascii=False) + '\n'
+
+
+def _bulk_json(resultats):
+    """Diffuse les résultats d'import dans un document JSON {success, results, summary}"""
+    recap = _BulkRecap()
+    yield '{"results": ['
+    try:
+        for resultat in resultats:
+            yield (',' if recap.total else '') + json.dumps(resultat, ensure_ascii=False)
+            recap.ajouter(resultat)
+    except ValueError as e:
+        recap.erreur = str(e)
+    yield '], "summary": %s, "success": %s}' % (
+        json.dumps(recap.to_dict(), ensure_ascii=False), json.dumps(recap.erreur is None)
+    )
+
+
+class _BulkRecap:
+    """Compteurs d'un import en masse"""
+    
+    def __init__(self):
+        self.total = 0
+        self.compteurs = {'created': 0, 'updated': 0, 'error': 0}
+        # Erreur de lecture du corps : l'import s'arrête, les lots déjà écrits sont conservés
+        self.erreur = None
+    
+    def ajouter(self, resultat: dict):
+        self.total += 1
+        self.compteurs[resultat['status']] += 1
+    
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'created': self.compteurs['created'],
+            'updated': self.compteurs['updated'],
+            'failed': self.compteurs['error'],
+            'message': self.erreur
+        }
+
+
 @produit_ns.route('/<int:product_id>')
 @produit_ns.param('product_id', 'ID du produit')
 class Produit(Resource):
@@ -104,11 +236,15 @@ class Produit(Resource):
 @produit_ns.param('categorie', 'Catégorie du produit')
 class ProduitsByCategorie(Resource):
     @produit_ns.doc('list_produits_by_categorie')
-    @produit_ns.marshal_list_with(produit_model)
+    @produit_ns.expect(pagination_parser)
+    @produit_ns.marshal_with(produit_page_model)
     def get(self, categorie):
-        """Récupère tous les produits d'une catégorie"""
-        products = produit_service.get_products_by_category(categorie)
-        return [product.to_dict() for product in products]
+        """Récupère une page des produits d'une catégorie"""
+        try:
+            page = produit_service.get_products_by_category_page(categorie, get_page_request())
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        return page_response(page)
 
 
 @produit_ns.route('/prix/<float:min_price>/<float:max_price>')
@@ -116,21 +252,29 @@ class ProduitsByCategorie(Resource):
 @produit_ns.param('max_price', 'Prix maximum')
 class ProduitsByPriceRange(Resource):
     @produit_ns.doc('list_produits_by_price_range')
-    @produit_ns.marshal_list_with(produit_model)
+    @produit_ns.expect(pagination_parser)
+    @produit_ns.marshal_with(produit_page_model)
     def get(self, min_price, max_price):
-        """Récupère les produits dans une fourchette de prix"""
-        products = produit_service.get_products_by_price_range(min_price, max_price)
-        return [product.to_dict() for product in products]
+        """Récupère une page des produits dans une fourchette de prix"""
+        try:
+            page = produit_service.get_products_by_price_range_page(min_price, max_price, get_page_request())
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        return page_response(page)
 
 
 @produit_ns.route('/stock')
 class ProduitsInStock(Resource):
     @produit_ns.doc('list_produits_in_stock')
-    @produit_ns.marshal_list_with(produit_model)
+    @produit_ns.expect(pagination_parser)
+    @produit_ns.marshal_with(produit_page_model)
     def get(self):
-        """Récupère tous les produits en stock"""
-        products = produit_service.get_products_in_stock()
-        return [product.to_dict() for product in products]
+        """Récupère une page des produits en stock"""
+        try:
+            page = produit_service.get_products_in_stock_page(get_page_request())
+        except ValueError as e:
+            produit_ns.abort(400, str(e))
+        return page_response(page)
 
 
 @produit_ns.route('/<int:product_id>/stock')
@@ -5,10 +5,11 @@ Contrôleur pour les rapports
 from flask_restx import Namespace, Resource, fields
 from flask import request, jsonify
 from ...utils.auth_decorators import token_required, admin_required
+from ...utils.read_replica import replica_on_get
 from ...service.impl.reports_service import ReportsService
 
 # Créer le namespace pour les rapports
-reports_ns = Namespace('reports', description='Rapports du système')
+reports_ns = Namespace('reports', description='Rapports du système', decorators=[replica_on_get])
 
 # Modèles de données pour la documentation Swagger
 sales_report_model = reports_ns.model('SalesReport', {
@@ -35,7 +36,8 @@ performance_report_model = reports_ns.model('PerformanceReport', {
     'avg_response_time': fields.Float(description='Temps de réponse moyen'),
     'requests_per_minute': fields.Integer(description='Requêtes par minute'),
     'error_rate': fields.Float(description='Taux d\'erreur'),
-    'performance_data': fields.List(fields.Raw, description='Données de performance')
+    'performance_data': fields.List(fields.Raw, description='Données de performance'),
+    'database': fields.Raw(description='Mesures base de données par endpoint (percentiles)')
 })
 
 @reports_ns.route('/generate')
@@ -90,7 +92,7 @@ class GenerateReportResource(Resource):
 class SalesReportResource(Resource):
     """Ressource pour le rapport des ventes"""
     
-    @reports_ns.doc('generate_sales_report')
+    @reports_ns.doc('generate_sales_report', params={'category': 'Catégorie de produits (toutes par défaut)'})
     @reports_ns.marshal_with(sales_report_model)
     @token_required
     def get(self):
@@ -98,9 +100,10 @@ class SalesReportResource(Resource):
         try:
             start_date = request.args.get('start_date')
             end_date = request.args.get('end_date')
+            category = request.args.get('category')
             
             reports_service = ReportsService()
-            report_data = reports_service.generate_sales_report(start_date, end_date)
+            report_data = reports_service.generate_sales_report(start_date, end_date, category)
             
             return {
                 'success': True,
@@ -5,10 +5,11 @@ Contrôleur pour les statistiques
 from flask_restx import Namespace, Resource, fields
 from flask import request, jsonify
 from ...utils.auth_decorators import token_required, admin_required
+from ...utils.read_replica import replica_on_get
 from ...service.impl.stats_service import StatsService
 
 # Créer le namespace pour les statistiques
-stats_ns = Namespace('stats', description='Statistiques du système')
+stats_ns = Namespace('stats', description='Statistiques du système', decorators=[replica_on_get])
 
 # Modèles de données pour la documentation Swagger
 stats_model = stats_ns.model('Stats', {
@@ -5,6 +5,7 @@ Contrôleur API pour les utilisateurs
 from flask_restx import Namespace, Resource, fields
 from ...service.impl import UtilisateurService
 from ...controller.dto import UtilisateurDTO, CreateUtilisateurDTO, UpdateUtilisateurDTO
+from ...utils.pagination import pagination_parser, get_page_request, page_model, page_response
 
 # Namespace pour les utilisateurs
 utilisateur_ns = Namespace('utilisateurs', description='Opérations sur les utilisateurs')
@@ -18,6 +19,8 @@ utilisateur_model = utilisateur_ns.model('Utilisateur', {
     'date_creation': fields.DateTime(readonly=True, description='Date de création du compte')
 })
 
+utilisateur_page_model = page_model(utilisateur_ns, 'UtilisateurPage', utilisateur_model)
+
 utilisateur_input_model = utilisateur_ns.model('UtilisateurInput', {
     'email': fields.String(required=True, description='Email de l\'utilisateur'),
     'mot_de_passe': fields.String(required=True, description='Mot de passe'),
@@ -32,11 +35,15 @@ utilisateur_service = UtilisateurService()
 @utilisateur_ns.route('/')
 class UtilisateurList(Resource):
     @utilisateur_ns.doc('list_utilisateurs')
-    @utilisateur_ns.marshal_list_with(utilisateur_model)
+    @utilisateur_ns.expect(pagination_parser)
+    @utilisateur_ns.marshal_with(utilisateur_page_model)
     def get(self):
-        """Récupère la liste de tous les utilisateurs"""
-        users = utilisateur_service.get_all_users()
-        return [user.to_dict() for user in users]
+        """Récupère une page d'utilisateurs (pagination par curseur)"""
+        try:
+            page = utilisateur_service.get_users_page(get_page_request())
+        except ValueError as e:
+            utilisateur_ns.abort(400, str(e))
+        return page_response(page)
 
     @utilisateur_ns.doc('create_utilisateur')
     @utilisateur_ns.expect(utilisateur_input_model)
@@ -102,9 +109,13 @@ class UtilisateurByEmail(Resource):
 @utilisateur_ns.param('role', 'Rôle de l\'utilisateur')
 class UtilisateursByRole(Resource):
     @utilisateur_ns.doc('list_utilisateurs_by_role')
-    @utilisateur_ns.marshal_list_with(utilisateur_model)
+    @utilisateur_ns.expect(pagination_parser)
+    @utilisateur_ns.marshal_with(utilisateur_page_model)
     def get(self, role):
-        """Récupère tous les utilisateurs d'un rôle donné"""
-        users = utilisateur_service.get_users_by_role(role)
-        return [user.to_dict() for user in users]
+        """Récupère une page des utilisateurs d'un rôle donné"""
+        try:
+            page = utilisateur_service.get_users_by_role_page(role, get_page_request())
+        except ValueError as e:
+            utilisateur_ns.abort(400, str(e))
+        return page_response(page)
 
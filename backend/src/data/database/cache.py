@@ -0,0 +1,115 @@
+"""
+Caches en mémoire du processus (LRU borné avec expiration)
+
+Chaque cache enregistré dans `caches` expose ses compteurs (succès, échecs,
+évictions, invalidations) via stats(). Les écritures invalident leurs clés
+immédiatement puis une seconde fois à la validation (ou l'annulation) de la
+transaction : une lecture concurrente qui aurait rechargé l'ancienne valeur
+entre-temps ne peut pas survivre au COMMIT.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy import event
+from .routing import RoutingSession
+
+# Caches du processus, par nom
+caches: Dict[str, 'TTLCache'] = {}
+
+# Invalidations à rejouer après la transaction, portées par session.info
+_PENDING_KEY = 'cache_pending_invalidations'
+
+
+class TTLCache:
+    """Cache LRU borné dont les entrées expirent après `ttl` secondes"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self._lock = threading.Lock()
+        self.configure(maxsize, ttl)
+        caches[name] = self
+
+    def configure(self, maxsize: int, ttl: float):
+        """Redimensionne le cache (maxsize 0 : désactivé) ; les entrées et compteurs sont remis à zéro"""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valeur associée à la clé, ou None si absente ou expirée"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Mémorise une valeur, en évinçant la moins récemment utilisée si le cache est plein
+
+        `ttl` raccourcit la durée de vie de cette entrée (jamais au-delà de celle du cache).
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable):
+        """Retire des clés du cache"""
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> int:
+        """Vide le cache ; retourne le nombre d'entrées retirées"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def invalidate_on_write(cache: TTLCache, *keys: Hashable):
+    """Invalide des clés maintenant et à la fin de la transaction courante"""
+    from .db import db
+
+    cache.invalidate(*keys)
+    db.session.info.setdefault(_PENDING_KEY, []).append((cache, keys))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rejouer_invalidations(session):
+    for cache, keys in session.info.pop(_PENDING_KEY, ()):
+        cache.invalidate(*keys)
@@ -0,0 +1,349 @@
+"""
+Magasin des paniers anonymes (clé : en-tête X-Session-ID)
+
+La plupart des paniers anonymes sont abandonnés sans commande : plutôt que
+d'écrire une ligne paniers à la première consultation puis à chaque ajout, ils
+vivent dans un magasin et ne sont écrits en base qu'à la migration vers un
+utilisateur, à la commande ou par écriture différée (voir
+PanierAnonymeRepository).
+
+Le magasin manipule l'état d'un panier sous forme de dictionnaire :
+
+    {'panier_id': None, 'date_creation': datetime, 'date_modification': datetime,
+     'items': {produit_id: {'id', 'quantite', 'prix_unitaire', 'date_ajout', 'date_modification'}}}
+
+Un seul écrivain à la fois par panier : l'écriture différée et les écritures
+à la demande (migration, commande) réservent le panier (a_persister,
+reserver) jusqu'à la fin de leur écriture (marquer_persiste, liberer) ; un
+panier réservé n'est pas proposé à l'écriture différée.
+
+CartStore décrit l'interface d'un magasin ; MemoryCartStore la réalise en
+mémoire du processus (LRU borné, expiration après inactivité). Ce magasin
+n'est pas partagé entre processus : par défaut les paniers restent en base
+(CART_STORE_BACKEND = 'database'), et CART_STORE_BACKEND = 'memory' ne
+s'active que pour un seul processus serveur ou avec affinité de session.
+"""
+
+import copy
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def nouvel_etat() -> Dict[str, Any]:
+    """État d'un panier vide, jamais écrit en base"""
+    maintenant = datetime.utcnow()
+    return {'panier_id': None, 'date_creation': maintenant, 'date_modification': maintenant, 'items': {}}
+
+
+class CartStore(ABC):
+    """Interface d'un magasin de paniers anonymes"""
+
+    name = 'paniers_anonymes'
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Copie de l'état du panier, ou None s'il n'est pas dans le magasin"""
+        pass
+
+    @abstractmethod
+    def charger(self, session_id: str, etat: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Place un panier lu en base (ou vide) dans le magasin, sans le marquer modifié
+
+        Un panier déjà présent est conservé : c'est son état qui est retourné.
+        """
+        pass
+
+    @abstractmethod
+    def modifier(self, session_id: str, modification: Callable[[Dict[str, Any]], Any],
+                 initial: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Applique une modification à l'état du panier, de façon atomique
+
+        Le panier est marqué à persister, sauf si la modification retourne False
+        (rien n'a changé).
+
+        Args:
+            session_id: Clé du panier
+            modification: Fonction recevant l'état, qu'elle modifie en place
+            initial: État à utiliser si le panier n'est pas dans le magasin
+
+        Returns:
+            Le résultat de la modification et une copie du nouvel état
+
+        Raises:
+            KeyError: Si le panier n'est pas dans le magasin et qu'aucun état initial n'est fourni
+        """
+        pass
+
+    @abstractmethod
+    def a_persister(self) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """
+        Réserve les paniers modifiés depuis leur dernière écriture, hors paniers
+        déjà réservés : (session_id, version, copie de l'état)
+        """
+        pass
+
+    @abstractmethod
+    def reserver(self, session_id: str, timeout: float = 30.0) -> Optional[Tuple[int, Dict[str, Any], bool]]:
+        """
+        Réserve un panier pour l'écrire, après la fin de l'écriture en cours
+
+        Returns:
+            (version, copie de l'état, modifié depuis sa dernière écriture), ou
+            None si le panier n'est pas dans le magasin
+
+        Raises:
+            TimeoutError: Si le panier est encore réservé après `timeout` secondes
+        """
+        pass
+
+    @abstractmethod
+    def est_reserve(self, session_id: str) -> bool:
+        """Indique si le panier est toujours dans le magasin et réservé"""
+        pass
+
+    @abstractmethod
+    def liberer(self, session_id: str):
+        """Met fin à la réservation d'un panier (écriture terminée ou abandonnée)"""
+        pass
+
+    @abstractmethod
+    def marquer_persiste(self, session_id: str, version: int, panier_id: int, item_ids: Dict[int, int]):
+        """
+        Enregistre l'écriture en base d'un panier
+
+        Les identifiants sont reportés dans tous les cas ; le panier n'est
+        considéré à jour que s'il n'a pas été modifié depuis la version écrite.
+        La réservation prend fin.
+        """
+        pass
+
+    @abstractmethod
+    def retirer(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Retire un panier du magasin (et sa réservation) ; retourne son état"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> int:
+        """Vide le magasin ; retourne le nombre de paniers retirés"""
+        pass
+
+    def purger(self) -> int:
+        """Retire les paniers expirés déjà écrits en base ; retourne leur nombre"""
+        return 0
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du magasin"""
+        pass
+
+
+class MemoryCartStore(CartStore):
+    """
+    Paniers anonymes en mémoire du processus
+
+    LRU borné à `maxsize` paniers ; un panier inutilisé depuis `ttl` secondes
+    expire. Un panier modifié et pas encore écrit en base n'est jamais perdu :
+    évincé, il attend la prochaine écriture différée ; il n'expire qu'une fois
+    écrit.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600.0):
+        self._lock = threading.Lock()
+        # Signalé à chaque fin de réservation
+        self._libere = threading.Condition(self._lock)
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize: int, ttl: float):
+        """Redimensionne le magasin ; les paniers et compteurs sont remis à zéro"""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            # session_id -> [échéance, version, version écrite, état, réservé]
+            self._entries: 'OrderedDict[Hashable, list]' = OrderedDict()
+            # Paniers modifiés évincés du LRU, en attente d'écriture
+            self._evinces: Dict[Hashable, list] = {}
+            self.hits = self.misses = self.evictions = self.expirations = self.writes = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entry(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry[3])
+
+    def charger(self, session_id: str, etat: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entry(session_id)
+            if entry is None:
+                entry = self._inserer(session_id, [0, 0, 0, copy.deepcopy(etat), False])
+            return copy.deepcopy(entry[3])
+
+    def modifier(self, session_id: str, modification: Callable[[Dict[str, Any]], Any],
+                 initial: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+        with self._lock:
+            entry = self._entry(session_id)
+            if entry is None:
+                if initial is None:
+                    raise KeyError(session_id)
+                entry = self._inserer(session_id, [0, 0, 0, copy.deepcopy(initial), False])
+            resultat = modification(entry[3])
+            if resultat is not False:
+                entry[1] += 1
+            return copy.deepcopy(resultat), copy.deepcopy(entry[3])
+
+    def a_persister(self) -> List[Tuple[str, int, Dict[str, Any]]]:
+        with self._lock:
+            entries = list(self._evinces.items()) + list(self._entries.items())
+            reserves = []
+            for cle, entry in entries:
+                if entry[1] != entry[2] and not entry[4]:
+                    entry[4] = True
+                    reserves.append((cle, entry[1], copy.deepcopy(entry[3])))
+            return reserves
+
+    def reserver(self, session_id: str, timeout: float = 30.0) -> Optional[Tuple[int, Dict[str, Any], bool]]:
+        with self._libere:
+            if not self._libere.wait_for(lambda: not self._reserve(session_id), timeout):
+                raise TimeoutError(f"Écriture du panier de session {session_id} toujours en cours")
+            entry = self._entries.get(session_id) or self._evinces.get(session_id)
+            if entry is None:
+                return None
+            entry[4] = True
+            return entry[1], copy.deepcopy(entry[3]), entry[1] != entry[2]
+
+    def est_reserve(self, session_id: str) -> bool:
+        with self._lock:
+            return self._reserve(session_id)
+
+    def liberer(self, session_id: str):
+        with self._libere:
+            entry = self._entries.get(session_id) or self._evinces.get(session_id)
+            if entry is not None:
+                entry[4] = False
+            self._libere.notify_all()
+
+    def marquer_persiste(self, session_id: str, version: int, panier_id: int, item_ids: Dict[int, int]):
+        with self._lock:
+            entry = self._entries.get(session_id) or self._evinces.get(session_id)
+            if entry is None:
+                return
+            etat = entry[3]
+            etat['panier_id'] = panier_id
+            for produit_id, item_id in item_ids.items():
+                if produit_id in etat['items']:
+                    etat['items'][produit_id]['id'] = item_id
+            self.writes += 1
+            entry[4] = False
+            if entry[1] == version:
+                entry[2] = version
+                self._evinces.pop(session_id, None)
+            self._libere.notify_all()
+
+    def retirer(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._libere:
+            entry = self._entries.pop(session_id, None) or self._evinces.pop(session_id, None)
+            self._libere.notify_all()
+            return entry[3] if entry is not None else None
+
+    def clear(self) -> int:
+        with self._libere:
+            count = len(self._entries) + len(self._evinces)
+            self._entries.clear()
+            self._evinces.clear()
+            self._libere.notify_all()
+            return count
+
+    def purger(self) -> int:
+        """Retire les paniers expirés déjà écrits en base ; retourne leur nombre"""
+        now = time.monotonic()
+        with self._lock:
+            expires = [session_id for session_id, entry in self._entries.items()
+                       if entry[0] <= now and entry[1] == entry[2] and not entry[4]]
+            for session_id in expires:
+                del self._entries[session_id]
+            self.expirations += len(expires)
+            return len(expires)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = list(self._entries.values()) + list(self._evinces.values())
+            return {
+                'name': self.name,
+                'backend': 'memory',
+                'size': len(entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'dirty': sum(1 for entry in entries if entry[1] != entry[2]),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'writes': self.writes
+            }
+
+    def _reserve(self, session_id: str) -> bool:
+        """Indique si le panier est réservé (verrou tenu)"""
+        entry = self._entries.get(session_id) or self._evinces.get(session_id)
+        return entry is not None and entry[4]
+
+    def _entry(self, session_id: str) -> Optional[list]:
+        """Entrée d'un panier (verrou tenu), rafraîchie ; None si absente ou expirée"""
+        entry = self._evinces.pop(session_id, None)
+        if entry is not None:
+            return self._inserer(session_id, entry)
+
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic() and entry[1] == entry[2] and not entry[4]:
+            del self._entries[session_id]
+            self.expirations += 1
+            return None
+        entry[0] = time.monotonic() + self.ttl
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def _inserer(self, session_id: str, entry: list) -> list:
+        """Ajoute une entrée en tête du LRU (verrou tenu), en évinçant les plus anciennes"""
+        entry[0] = time.monotonic() + self.ttl
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > max(self.maxsize, 1):
+            ancien_id, ancien = self._entries.popitem(last=False)
+            if ancien[1] != ancien[2]:
+                self._evinces[ancien_id] = ancien
+            self.evictions += 1
+        return entry
+
+
+# Magasin du processus ; None : paniers anonymes écrits directement en base
+cart_store: Optional[CartStore] = None
+
+
+def configure_cart_store(app) -> Optional[CartStore]:
+    """Installe le magasin désigné par CART_STORE_BACKEND ('memory' ou 'database')"""
+    global cart_store
+
+    backend = app.config['CART_STORE_BACKEND']
+    if backend == 'memory':
+        cart_store = MemoryCartStore(app.config['CART_STORE_SIZE'], app.config['CART_STORE_TTL'])
+    elif backend == 'database':
+        cart_store = None
+    else:
+        raise ValueError(f"CART_STORE_BACKEND inconnu: {backend}")
+    return cart_store
+
+
+def get_cart_store() -> Optional[CartStore]:
+    """Magasin des paniers anonymes installé, ou None si les paniers sont en base"""
+    return cart_store
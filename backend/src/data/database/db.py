@@ -3,7 +3,7 @@ Configuration de la base de données SQLAlchemy
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from .routing import RoutingSession
 
-# Instance globale de SQLAlchemy
-db = SQLAlchemy()
-
+# Instance globale de SQLAlchemy (lectures routables vers les réplicas)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
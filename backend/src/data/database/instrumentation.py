@@ -0,0 +1,305 @@
+"""
+Instrumentation des accès base de données, par requête HTTP et par endpoint
+
+Des événements SQLAlchemy mesurent chaque requête SQL (nombre, durée, plus lente)
+et l'attente d'une connexion du pool ; les mesures sont rattachées à la requête
+HTTP courante puis agrégées par endpoint ("GET /api/produits/") dans le registre
+`metrics`, sur une fenêtre glissante de DB_METRICS_WINDOW requêtes par endpoint.
+Une chronologie minute par minute (24 h) alimente les rapports de performance,
+et les requêtes lentes sont transmises au journal slow_query_log.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from .slow_query_log import DEFAULT_LOG_SIZE, DEFAULT_THRESHOLD_MS, slow_queries
+
+# Taille par défaut de la fenêtre glissante par endpoint
+DEFAULT_WINDOW = 1000
+
+# Profondeur de la chronologie, en minutes
+TIMELINE_MINUTES = 24 * 60
+
+# Longueur maximale conservée pour le texte des requêtes SQL
+STATEMENT_MAX_LENGTH = 500
+
+_QUERY_START_KEY = 'instrumentation_query_start'
+
+
+@dataclass
+class RequestSample:
+    """Mesures base de données d'une requête HTTP"""
+    endpoint: str
+    status: int = 200
+    duration: float = 0.0
+    queries: int = 0
+    db_time: float = 0.0
+    checkout_wait: float = 0.0
+    slowest_statement: Optional[str] = None
+    slowest_time: float = 0.0
+
+    def add_query(self, statement: str, duration: float):
+        """Comptabilise une requête SQL"""
+        self.queries += 1
+        self.db_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement[:STATEMENT_MAX_LENGTH]
+
+
+class _EndpointStats:
+    """Fenêtre glissante et cumuls d'un endpoint"""
+
+    def __init__(self, window: int):
+        self.samples: Deque[RequestSample] = deque(maxlen=window)
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.duration = 0.0
+        self.errors = 0
+        self.slowest_statement = None
+        self.slowest_time = 0.0
+
+    def add(self, sample: RequestSample):
+        self.samples.append(sample)
+        self.requests += 1
+        self.queries += sample.queries
+        self.db_time += sample.db_time
+        self.duration += sample.duration
+        self.errors += 1 if sample.status >= 500 else 0
+        if sample.slowest_statement is not None and sample.slowest_time >= self.slowest_time:
+            self.slowest_time = sample.slowest_time
+            self.slowest_statement = sample.slowest_statement
+
+    def to_dict(self, endpoint: str) -> Dict[str, Any]:
+        samples = list(self.samples)
+        return {
+            'endpoint': endpoint,
+            'requests': self.requests,
+            'errors': self.errors,
+            'total_queries': self.queries,
+            'total_db_time_ms': _ms(self.db_time),
+            'queries': percentiles([s.queries for s in samples], scale=1),
+            'db_time_ms': percentiles([s.db_time for s in samples]),
+            'checkout_wait_ms': percentiles([s.checkout_wait for s in samples]),
+            'response_time_ms': percentiles([s.duration for s in samples]),
+            'slowest_query': {
+                'statement': self.slowest_statement,
+                'duration_ms': _ms(self.slowest_time)
+            }
+        }
+
+
+class DatabaseMetrics:
+    """Registre des mesures par endpoint (processus courant)"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Efface toutes les mesures"""
+        with self._lock:
+            self._endpoints: Dict[str, _EndpointStats] = {}
+            self._timeline: Deque[list] = deque(maxlen=TIMELINE_MINUTES)
+            self.active_requests = 0
+
+    def request_started(self):
+        with self._lock:
+            self.active_requests += 1
+
+    def record(self, sample: RequestSample, at: Optional[float] = None):
+        """Enregistre les mesures d'une requête HTTP terminée"""
+        minute = int((at if at is not None else time.time()) // 60) * 60
+        with self._lock:
+            self.active_requests = max(self.active_requests - 1, 0)
+            stats = self._endpoints.get(sample.endpoint)
+            if stats is None:
+                stats = self._endpoints[sample.endpoint] = _EndpointStats(self.window)
+            stats.add(sample)
+
+            # Seau de la minute : [minute, requêtes, erreurs, durée, requêtes SQL, temps SQL]
+            if not self._timeline or self._timeline[-1][0] != minute:
+                self._timeline.append([minute, 0, 0, 0.0, 0, 0.0])
+            bucket = self._timeline[-1]
+            bucket[1] += 1
+            bucket[2] += 1 if sample.status >= 500 else 0
+            bucket[3] += sample.duration
+            bucket[4] += sample.queries
+            bucket[5] += sample.db_time
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Agrégats par endpoint, triés par temps base de données cumulé décroissant
+
+        Returns:
+            {'active_requests', 'totals': {...}, 'endpoints': [...]}
+        """
+        with self._lock:
+            endpoints = [stats.to_dict(endpoint) for endpoint, stats in self._endpoints.items()]
+            duration = sum(stats.duration for stats in self._endpoints.values())
+            active = self.active_requests
+        endpoints.sort(key=lambda e: e['total_db_time_ms'], reverse=True)
+
+        requests = sum(e['requests'] for e in endpoints)
+        queries = sum(e['total_queries'] for e in endpoints)
+        db_time = sum(e['total_db_time_ms'] for e in endpoints)
+        errors = sum(e['errors'] for e in endpoints)
+        return {
+            'active_requests': active,
+            'totals': {
+                'requests': requests,
+                'queries': queries,
+                'db_time_ms': round(db_time, 3),
+                'avg_query_time_ms': round(db_time / queries, 3) if queries else 0.0,
+                'avg_queries_per_request': round(queries / requests, 2) if requests else 0.0,
+                'avg_response_time_ms': _ms(duration / requests) if requests else 0.0,
+                'error_rate': round(100.0 * errors / requests, 2) if requests else 0.0
+            },
+            'endpoints': endpoints
+        }
+
+    def timeline(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Mesures minute par minute, éventuellement bornées (start inclus, end exclu)"""
+        start_ts = start.timestamp() if start else None
+        end_ts = end.timestamp() if end else None
+        with self._lock:
+            buckets = [list(bucket) for bucket in self._timeline]
+        return [
+            {
+                'time': datetime.fromtimestamp(minute).isoformat(),
+                'requests': count,
+                'response_time': _ms(duration / count),
+                'error_rate': round(100.0 * errors / count, 2),
+                'queries': queries,
+                'db_time': _ms(db_time)
+            }
+            for minute, count, errors, duration, queries, db_time in buckets
+            if (start_ts is None or minute >= start_ts) and (end_ts is None or minute < end_ts)
+        ]
+
+
+# Registre global du processus
+metrics = DatabaseMetrics()
+
+
+def percentiles(values: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    """Moyenne, p50, p95, p99 et maximum (rang le plus proche) ; scale=1000 convertit s -> ms"""
+    if not values:
+        return {'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p * len(ordered) / 100) - 1)]
+
+    return {
+        'avg': round(scale * sum(ordered) / len(ordered), 3),
+        'p50': round(scale * rank(50), 3),
+        'p95': round(scale * rank(95), 3),
+        'p99': round(scale * rank(99), 3),
+        'max': round(scale * ordered[-1], 3)
+    }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+def current_sample() -> Optional[RequestSample]:
+    """Mesures de la requête HTTP en cours (None hors requête)"""
+    if not has_request_context():
+        return None
+    return g.get('db_sample')
+
+
+def instrument_engine(engine):
+    """Installe les mesures sur un engine (sans effet s'il est déjà instrumenté)"""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    # SQLAlchemy n'expose pas d'événement avant l'attente d'une connexion du pool :
+    # la prise de connexion (Engine.raw_connection) est chronométrée directement
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            sample = current_sample()
+            if sample is not None:
+                sample.checkout_wait += time.perf_counter() - start
+
+    engine.raw_connection = timed_raw_connection
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get(_QUERY_START_KEY)
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    sample = current_sample()
+    if sample is not None:
+        sample.add_query(statement, duration)
+    if slow_queries.is_slow(duration):
+        slow_queries.observe(cursor, conn.dialect.name, statement, parameters, executemany, duration,
+                             sample.endpoint if sample is not None else None)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get(_QUERY_START_KEY) if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def init_app(app):
+    """Instrumente les engines de l'application et mesure chaque requête HTTP"""
+    from .db import db
+
+    metrics.window = app.config.get('DB_METRICS_WINDOW', DEFAULT_WINDOW)
+    slow_queries.configure(
+        app.config.get('SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS),
+        app.config.get('SLOW_QUERY_LOG_SIZE', DEFAULT_LOG_SIZE),
+        app.config.get('SLOW_QUERY_EXPLAIN', True)
+    )
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def _start_db_sample():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g.db_sample = RequestSample(endpoint=f"{request.method} {rule}")
+        g.db_sample_started = time.perf_counter()
+        metrics.request_started()
+
+    @app.after_request
+    def _status_db_sample(response):
+        sample = g.get('db_sample')
+        if sample is not None:
+            sample.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_db_sample(exception=None):
+        sample = g.pop('db_sample', None)
+        if sample is None:
+            return
+        sample.duration = time.perf_counter() - g.pop('db_sample_started')
+        if exception is not None:
+            sample.status = 500
+        metrics.record(sample)
@@ -0,0 +1,284 @@
+"""
+Partitionnement mensuel des commandes et de leurs lignes (PostgreSQL, optionnel)
+
+En mode partitionné, `commandes` et `lignes_commande` sont partitionnées par
+intervalle sur date_commande (une partition par mois, plus une partition DEFAULT
+qui recueille les dates hors des mois créés). Les filtres par date des
+statistiques et des rapports ne lisent alors que les partitions concernées.
+
+Les modèles ne changent pas : l'id reste unique (séquence) et sert de clé à
+l'ORM, même si la clé primaire en base devient (id, date_commande), comme
+l'exige PostgreSQL pour une table partitionnée. Les lignes portent leur propre
+copie de date_commande, renseignée à l'insertion (voir commande_repository).
+
+Sous SQLite, ou tant que `flask partitions enable` n'a pas été exécuté, le
+schéma reste celui de db.create_all().
+
+    flask partitions enable              # conversion des tables existantes
+    flask partitions create --ahead 3    # partitions des 3 prochains mois
+    flask partitions detach --before 2024-01 [--drop]
+    flask partitions list
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import inspect, text
+from .db import db
+
+# Tables partitionnées, la table référencée en premier
+PARTITIONED_TABLES = ('commandes', 'lignes_commande')
+
+PARTITION_KEY = 'date_commande'
+
+_NOM_MENSUEL = re.compile(r'^(?P<table>commandes|lignes_commande)_p(?P<annee>\d{4})_(?P<mois>\d{2})$')
+_IDENTIFIANT = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+def month_start(value) -> date:
+    """Premier jour du mois d'une date, d'un horodatage ou d'une chaîne AAAA-MM"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:7], '%Y-%m')
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Premier jour du mois décalé de `count` mois"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nom de la partition mensuelle : commandes_p2026_10"""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(connection, table: str = 'commandes') -> bool:
+    """Indique si la table est partitionnée (toujours faux hors PostgreSQL)"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return bool(connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {'table': table}
+    ).scalar())
+
+
+def enable_partitioning(connection, ahead: int = 3) -> List[str]:
+    """
+    Convertit commandes et lignes_commande en tables partitionnées par mois
+
+    Les données sont recopiées dans une seule transaction (tables verrouillées
+    pendant la copie) : à exécuter pendant une fenêtre de maintenance.
+
+    Returns:
+        Noms des partitions créées (liste vide si les tables l'étaient déjà)
+    """
+    _require_postgresql(connection)
+    if is_partitioned(connection):
+        return []
+
+    colonnes = {table: [c['name'] for c in inspect(connection).get_columns(table)] for table in PARTITIONED_TABLES}
+    # Lignes antérieures à la migration 0004 : date de leur commande
+    connection.execute(text(
+        "UPDATE lignes_commande l SET date_commande = c.date_commande "
+        "FROM commandes c WHERE c.id = l.commande_id AND l.date_commande IS NULL"
+    ))
+    premiere = connection.execute(text("SELECT min(date_commande) FROM commandes")).scalar()
+
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {table}_plain"))
+        connection.execute(text(
+            f"CREATE TABLE {table} (LIKE {table}_plain INCLUDING DEFAULTS) PARTITION BY RANGE ({PARTITION_KEY})"
+        ))
+        connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {PARTITION_KEY} SET NOT NULL"))
+
+    created = create_partitions(connection, ahead, start=premiere or date.today())
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+        created.append(f"{table}_default")
+        liste = ', '.join(colonnes[table])
+        connection.execute(text(f"INSERT INTO {table} ({liste}) SELECT {liste} FROM {table}_plain"))
+        # La séquence de l'id survit à l'ancienne table
+        sequence = connection.execute(text(f"SELECT pg_get_serial_sequence('{table}_plain', 'id')")).scalar()
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+    for table in reversed(PARTITIONED_TABLES):
+        connection.execute(text(f"DROP TABLE {table}_plain"))
+
+    # Contraintes : la clé de partitionnement entre dans la clé primaire et la clé étrangère
+    connection.execute(text("ALTER TABLE commandes ADD PRIMARY KEY (id, date_commande)"))
+    connection.execute(text("ALTER TABLE commandes ADD FOREIGN KEY (utilisateur_id) REFERENCES utilisateurs (id)"))
+    connection.execute(text("ALTER TABLE lignes_commande ADD PRIMARY KEY (id, date_commande)"))
+    # Vérifiée à la validation : une commande redatée change de clé avant que ses
+    # lignes ne la suivent (voir commande_repository._maintenir_totaux)
+    connection.execute(text(
+        "ALTER TABLE lignes_commande ADD FOREIGN KEY (commande_id, date_commande) "
+        "REFERENCES commandes (id, date_commande) DEFERRABLE INITIALLY DEFERRED"
+    ))
+    connection.execute(text("ALTER TABLE lignes_commande ADD FOREIGN KEY (produit_id) REFERENCES produits (id)"))
+    # Index déclarés par les modèles, propagés à chaque partition
+    for table in PARTITIONED_TABLES:
+        for index in db.metadata.tables[table].indexes:
+            index.create(connection)
+    return created
+
+
+def create_partitions(connection, ahead: int = 3, start=None) -> List[str]:
+    """
+    Crée les partitions mensuelles manquantes, du mois de `start` (défaut : mois
+    courant) jusqu'à `ahead` mois après le mois courant
+
+    Returns:
+        Noms des partitions créées
+    """
+    _require_partitioned(connection)
+    month = month_start(start or date.today())
+    last = add_months(month_start(date.today()), ahead)
+    created = []
+    while month <= last:
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            if connection.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is None:
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def list_partitions(connection) -> List[Dict[str, Any]]:
+    """Partitions attachées (table, partition, mois, bornes, lignes estimées)"""
+    if not is_partitioned(connection):
+        return []
+    rows = connection.execute(text(
+        "SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples "
+        "FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.oid IN (to_regclass('commandes'), to_regclass('lignes_commande')) "
+        "ORDER BY parent.relname, child.relname"
+    )).all()
+    partitions = []
+    for table, name, bounds, estimated in rows:
+        match = _NOM_MENSUEL.match(name)
+        partitions.append({
+            'table': table,
+            'partition': name,
+            'month': f"{match['annee']}-{match['mois']}" if match else None,
+            'bounds': bounds,
+            'estimated_rows': max(int(estimated), 0)
+        })
+    return partitions
+
+
+def detach_partitions(connection, before, archive_schema: Optional[str] = 'archive', drop: bool = False) -> List[str]:
+    """
+    Détache les partitions mensuelles antérieures au mois `before`
+
+    Les partitions de lignes sont détachées avant celles des commandes qu'elles
+    référencent. Une partition détachée est déplacée dans `archive_schema`
+    (interrogeable, sauvegardable à part) ou supprimée avec drop=True.
+
+    Returns:
+        Noms des partitions détachées
+    """
+    _require_partitioned(connection)
+    if not drop and not _IDENTIFIANT.match(archive_schema or ''):
+        raise ValueError(f"Schéma d'archive invalide: {archive_schema}")
+    limite = month_start(before).strftime('%Y-%m')
+
+    anciennes = [p for p in list_partitions(connection) if p['month'] is not None and p['month'] < limite]
+    anciennes.sort(key=lambda p: (p['table'] != 'lignes_commande', p['month']))
+    if anciennes and not drop:
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+
+    detached = []
+    for partition in anciennes:
+        name = partition['partition']
+        connection.execute(text(f"ALTER TABLE {partition['table']} DETACH PARTITION {name}"))
+        if partition['table'] == 'lignes_commande':
+            # La clé étrangère héritée référencerait encore commandes, empêchant son détachement
+            contraintes = connection.execute(text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = to_regclass(:name) AND contype = 'f' AND confrelid = to_regclass('commandes')"
+            ), {'name': name}).scalars().all()
+            for contrainte in contraintes:
+                connection.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{contrainte}"'))
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        else:
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+        detached.append(name)
+    return detached
+
+
+def maintain_partitions(connection, ahead: int, retention_months: int = 0,
+                        archive_schema: Optional[str] = 'archive') -> Dict[str, List[str]]:
+    """Crée les partitions à venir et archive celles qui dépassent la rétention (0 : tout garder)"""
+    created = create_partitions(connection, ahead)
+    detached = []
+    if retention_months > 0:
+        detached = detach_partitions(connection, add_months(month_start(date.today()), -retention_months),
+                                     archive_schema)
+    return {'created': created, 'detached': detached}
+
+
+def _require_postgresql(connection):
+    if connection.dialect.name != 'postgresql':
+        raise RuntimeError("Le partitionnement des commandes n'est disponible que sous PostgreSQL")
+
+
+def _require_partitioned(connection):
+    _require_postgresql(connection)
+    if not is_partitioned(connection):
+        raise RuntimeError("Les commandes ne sont pas partitionnées : exécuter `flask partitions enable`")
+
+
+# Commandes `flask partitions ...`
+partitions_cli = AppGroup('partitions', help="Partitionnement mensuel des commandes (PostgreSQL)")
+
+
+@partitions_cli.command('enable')
+@click.option('--ahead', type=int, default=None, help="Mois créés à l'avance (défaut : PARTITIONS_AHEAD_MONTHS)")
+def enable_command(ahead):
+    """Convertit commandes et lignes_commande en tables partitionnées"""
+    with db.engine.begin() as connection:
+        created = enable_partitioning(connection, _ahead(ahead))
+    click.echo(f"{len(created)} partitions créées" if created else "Tables déjà partitionnées")
+
+
+@partitions_cli.command('create')
+@click.option('--ahead', type=int, default=None, help="Mois créés à l'avance (défaut : PARTITIONS_AHEAD_MONTHS)")
+def create_command(ahead):
+    """Crée les partitions des prochains mois"""
+    with db.engine.begin() as connection:
+        created = create_partitions(connection, _ahead(ahead))
+    click.echo('\n'.join(created) if created else "Aucune partition à créer")
+
+
+@partitions_cli.command('detach')
+@click.option('--before', required=True, help="Mois AAAA-MM : les partitions antérieures sont détachées")
+@click.option('--drop', is_flag=True, help="Supprimer les partitions au lieu de les archiver")
+def detach_command(before, drop):
+    """Détache (et archive ou supprime) les partitions anciennes"""
+    with db.engine.begin() as connection:
+        detached = detach_partitions(connection, before, current_app.config['PARTITIONS_ARCHIVE_SCHEMA'], drop)
+    click.echo('\n'.join(detached) if detached else "Aucune partition à détacher")
+
+
+@partitions_cli.command('list')
+def list_command():
+    """Liste les partitions et leur nombre de lignes estimé"""
+    with db.engine.connect() as connection:
+        for partition in list_partitions(connection):
+            click.echo(f"{partition['partition']:<32} {partition['bounds']:<70} ~{partition['estimated_rows']}")
+
+
+def _ahead(ahead: Optional[int]) -> int:
+    return current_app.config['PARTITIONS_AHEAD_MONTHS'] if ahead is None else ahead
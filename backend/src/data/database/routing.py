@@ -0,0 +1,221 @@
+"""
+Routage des lectures vers les réplicas en lecture seule
+
+Les réplicas sont déclarés par SQLALCHEMY_REPLICA_URIS et enregistrés comme binds
+'replica_<n>'. Seules les requêtes SELECT exécutées dans un bloc replica_reads()
+(ou une méthode décorée par read_only) leur sont envoyées, et uniquement si :
+- aucune écriture n'est en attente dans la session (ni unité de travail ouverte) ;
+- le client courant n'a pas écrit récemment (lecture de ses propres écritures :
+  après une validation, ses lectures restent sur le primaire pendant
+  REPLICA_STICKY_SECONDS secondes).
+Sans réplica configuré, tout reste sur le primaire.
+
+La fin de la période est gardée par le processus et renvoyée au client dans un
+cookie signé (replica_sticky) : sa requête suivante peut être servie par un
+autre worker. Un client qui ne renvoie pas les cookies ne relit ses écritures
+que sur le worker qui les a reçues.
+"""
+
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import event
+
+# Préfixe des binds de réplicas dans SQLALCHEMY_BINDS
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Clés portées par session.info
+_READS_KEY = 'replica_reads_depth'
+_PRIMARY_KEY = 'primary_reads_depth'
+_WROTE_KEY = 'replica_session_wrote'
+_REPLICA_KEY = 'replica_bind_key'
+
+# Fin de la période « lecture sur le primaire » par client (processus courant)
+_sticky_until: Dict[str, float] = {}
+_sticky_lock = threading.Lock()
+_STICKY_PRUNE_SIZE = 10000
+
+# Cookie signé [client, fin de période (horloge murale)], lu par tous les workers
+STICKY_COOKIE = 'replica_sticky'
+_STICKY_SALT = 'replica-sticky'
+
+
+def configure_replica_binds(app):
+    """Déclare un bind par URI de réplica (à appeler avant db.init_app)"""
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    if app.config.get('SQLALCHEMY_REPLICA_URIS'):
+        app.after_request(_poser_cookie_collant)
+
+
+class RoutingSession(Session):
+    """Session qui envoie les lectures autorisées vers un réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._replica_eligible(clause):
+            replica = self._replica_engine()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_eligible(self, clause) -> bool:
+        """Indique si la requête peut être servie par un réplica"""
+        from .unit_of_work import in_transaction
+
+        return (
+            self.info.get(_READS_KEY, 0) > 0
+            and not self.info.get(_PRIMARY_KEY, 0)
+            and getattr(clause, 'is_select', False)
+            and not self._flushing
+            and not self.info.get(_WROTE_KEY)
+            and not in_transaction()
+            and not _is_sticky(_client_key())
+        )
+
+    def _replica_engine(self):
+        """Réplica attribué à la session (tiré une fois, puis conservé)"""
+        keys = [key for key in self._db.engines if isinstance(key, str) and key.startswith(REPLICA_BIND_PREFIX)]
+        if not keys:
+            return None
+        key = self.info.get(_REPLICA_KEY)
+        if key not in keys:
+            key = self.info[_REPLICA_KEY] = random.choice(keys)
+        return self._db.engines[key]
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _marquer_ecriture_dml(orm_execute_state):
+    """INSERT/UPDATE/DELETE exécutés directement (hors flush)"""
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _marquer_ecriture_flush(session, flush_context):
+    """Écritures ORM envoyées par un flush"""
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _coller_au_primaire(session):
+    """Après une validation avec écritures, le client lit sur le primaire un moment"""
+    if session.info.pop(_WROTE_KEY, False):
+        _mark_sticky(_client_key())
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _oublier_ecritures(session):
+    """Écritures annulées : rien à relire sur le primaire"""
+    session.info.pop(_WROTE_KEY, None)
+
+
+@contextmanager
+def replica_reads():
+    """Autorise l'envoi des lectures du bloc vers un réplica"""
+    from .db import db
+
+    info = db.session.info
+    info[_READS_KEY] = info.get(_READS_KEY, 0) + 1
+    try:
+        yield
+    finally:
+        info[_READS_KEY] -= 1
+
+
+@contextmanager
+def primary_reads():
+    """
+    Envoie les lectures du bloc vers le primaire, même dans un bloc replica_reads()
+
+    Pour les données partagées entre clients (caches du processus) : un réplica
+    en retard y figerait une valeur périmée pour tout le monde.
+    """
+    from .db import db
+
+    info = db.session.info
+    info[_PRIMARY_KEY] = info.get(_PRIMARY_KEY, 0) + 1
+    try:
+        yield
+    finally:
+        info[_PRIMARY_KEY] -= 1
+
+
+def read_only(f):
+    """Décorateur : méthode en lecture seule, servie par un réplica si possible"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated
+
+
+def _client_key() -> Optional[str]:
+    """Identifie le client de la requête courante (utilisateur ou session panier)"""
+    if not has_request_context():
+        return None
+    user_id = g.get('current_user_id')
+    if user_id is not None:
+        return f'user:{user_id}'
+    session_id = request.headers.get('X-Session-ID')
+    return f'session:{session_id}' if session_id else None
+
+
+def _mark_sticky(client_key: Optional[str]):
+    """Envoie les lectures du client vers le primaire pendant REPLICA_STICKY_SECONDS"""
+    if client_key is None or not has_app_context():
+        return
+    now = time.monotonic()
+    with _sticky_lock:
+        if len(_sticky_until) >= _STICKY_PRUNE_SIZE:
+            for key in [key for key, until in _sticky_until.items() if until <= now]:
+                del _sticky_until[key]
+        _sticky_until[client_key] = now + current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+    # Renvoyée au client par _poser_cookie_collant
+    g.replica_sticky = (client_key, time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 5))
+
+
+def _is_sticky(client_key: Optional[str]) -> bool:
+    """Indique si le client a écrit récemment (sur ce worker ou d'après son cookie)"""
+    if client_key is None:
+        return False
+    return _sticky_until.get(client_key, 0) > time.monotonic() or _sticky_par_cookie(client_key)
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=_STICKY_SALT)
+
+
+def _sticky_par_cookie(client_key: str) -> bool:
+    """Période collante portée par le cookie de la requête (vérifié une fois par requête)"""
+    jeton = request.cookies.get(STICKY_COOKIE)
+    if not jeton:
+        return False
+    verifie = g.get('replica_sticky_cookie')
+    if verifie is None or verifie[0] != jeton:
+        try:
+            cle, until = _serializer().loads(jeton)
+            verifie = (jeton, cle, float(until))
+        except (BadSignature, TypeError, ValueError):
+            verifie = (jeton, None, 0.0)
+        g.replica_sticky_cookie = verifie
+    return verifie[1] == client_key and verifie[2] > time.time()
+
+
+def _poser_cookie_collant(response):
+    """Renvoie au client la fin de sa période collante, pour les autres workers"""
+    sticky = g.pop('replica_sticky', None)
+    if sticky is not None:
+        client_key, until = sticky
+        response.set_cookie(STICKY_COOKIE, _serializer().dumps([client_key, until]),
+                            max_age=max(0, math.ceil(until - time.time())), httponly=True, samesite='Lax')
+    return response
@@ -0,0 +1,93 @@
+"""
+Index de recherche plein texte des produits
+
+Sous PostgreSQL, un index GIN trigrammes (extension pg_trgm) sur le document
+« nom description categorie » sert à la fois la recherche approchée par mots
+(opérateur <%) et la recherche de sous-chaîne (ILIKE). Sous SQLite, une table
+virtuelle FTS5 à contenu externe (produits_fts), tenue à jour par des triggers,
+indexe les mêmes colonnes.
+
+Les objets sont créés avec la table produits (create_all / init_db) et par la
+migration 0006_recherche_produits pour les bases existantes.
+"""
+
+from sqlalchemy import event, literal_column
+from ...domain.models import Produit
+
+# Document indexé : la requête doit reprendre exactement l'expression de l'index GIN
+_DOCUMENT = "(coalesce({t}nom, '') || ' ' || coalesce({t}description, '') || ' ' || coalesce({t}categorie, ''))"
+DOCUMENT_SQL = _DOCUMENT.format(t='')
+
+POSTGRESQL_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_produits_recherche_trgm ON produits USING gin ({DOCUMENT_SQL} gin_trgm_ops)",
+)
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS produits_fts USING fts5("
+    "nom, description, categorie, content='produits', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_ai AFTER INSERT ON produits BEGIN "
+    "INSERT INTO produits_fts(rowid, nom, description, categorie) "
+    "VALUES (new.id, new.nom, new.description, new.categorie); END",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_ad AFTER DELETE ON produits BEGIN "
+    "INSERT INTO produits_fts(produits_fts, rowid, nom, description, categorie) "
+    "VALUES ('delete', old.id, old.nom, old.description, old.categorie); END",
+    "CREATE TRIGGER IF NOT EXISTS produits_fts_au AFTER UPDATE OF nom, description, categorie ON produits BEGIN "
+    "INSERT INTO produits_fts(produits_fts, rowid, nom, description, categorie) "
+    "VALUES ('delete', old.id, old.nom, old.description, old.categorie); "
+    "INSERT INTO produits_fts(rowid, nom, description, categorie) "
+    "VALUES (new.id, new.nom, new.description, new.categorie); END",
+    # Indexe les produits déjà présents
+    "INSERT INTO produits_fts(produits_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DROP = (
+    "DROP TRIGGER IF EXISTS produits_fts_au",
+    "DROP TRIGGER IF EXISTS produits_fts_ad",
+    "DROP TRIGGER IF EXISTS produits_fts_ai",
+    "DROP TABLE IF EXISTS produits_fts",
+)
+
+# Poids des colonnes nom, description, categorie dans le classement bm25 (SQLite)
+SQLITE_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def install_search(connection):
+    """Crée les index de recherche adaptés au dialecte de la connexion (idempotent)"""
+    statements = {'postgresql': POSTGRESQL_DDL, 'sqlite': SQLITE_DDL}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def uninstall_search(connection):
+    """Supprime les index de recherche"""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_produits_recherche_trgm")
+    elif connection.dialect.name == 'sqlite':
+        for statement in SQLITE_DROP:
+            connection.exec_driver_sql(statement)
+
+
+def document():
+    """Expression SQL du document indexé (PostgreSQL)"""
+    return literal_column(_DOCUMENT.format(t='produits.'))
+
+
+def fts_query(terms: str) -> str:
+    """
+    Traduit une saisie libre en requête FTS5 : chaque mot devient un préfixe
+    entre guillemets (aucun opérateur FTS5 ne peut être injecté), tous requis
+    """
+    words = [word.replace('"', '""') for word in terms.split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+@event.listens_for(Produit.__table__, 'after_create')
+def _creer_index_recherche(target, connection, **kw):
+    install_search(connection)
+
+
+@event.listens_for(Produit.__table__, 'before_drop')
+def _supprimer_index_recherche(target, connection, **kw):
+    uninstall_search(connection)
@@ -0,0 +1,179 @@
+"""
+Journal des requêtes SQL lentes avec capture automatique du plan d'exécution
+
+Toute requête plus lente que SLOW_QUERY_THRESHOLD_MS est enregistrée (endpoint,
+durée, paramètres masqués) dans un journal borné : au-delà de SLOW_QUERY_LOG_SIZE
+entrées, les plus anciennes sont écartées. Le plan (EXPLAIN sous PostgreSQL,
+EXPLAIN QUERY PLAN sous SQLite) est capturé une fois par requête normalisée, sur
+un curseur DBAPI séparé, sans exécuter la requête ni repasser par les événements.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, Optional
+
+# Valeurs par défaut (surchargées par la configuration de l'application)
+DEFAULT_THRESHOLD_MS = 200.0
+DEFAULT_LOG_SIZE = 500
+
+# Requêtes dont le plan peut être demandé sans les exécuter
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+# Listes de paramètres d'un IN : « IN (?, ?, ?) », « IN (%(p_1)s, %(p_2)s) »
+_PARAM_LIST = re.compile(r'\b(IN\s*)\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(statement: str) -> str:
+    """Forme canonique d'une requête : listes IN repliées, espaces normalisés"""
+    return _WHITESPACE.sub(' ', _PARAM_LIST.sub(r'\1(...)', statement)).strip()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Masque les valeurs textuelles ou binaires (emails, mots de passe...) ; garde nombres et dates"""
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (bool, int, float, Decimal)):
+        return parameters
+    if isinstance(parameters, (date, datetime)):
+        return parameters.isoformat()
+    if isinstance(parameters, (str, bytes)):
+        return f'<{type(parameters).__name__}:{len(parameters)}>'
+    return f'<{type(parameters).__name__}>'
+
+
+class SlowQueryLog:
+    """Journal borné des requêtes lentes (processus courant)"""
+
+    def __init__(self, threshold_ms: Optional[float] = DEFAULT_THRESHOLD_MS, size: int = DEFAULT_LOG_SIZE,
+                 explain: bool = True):
+        self._lock = threading.Lock()
+        self.configure(threshold_ms, size, explain)
+
+    def configure(self, threshold_ms: Optional[float], size: int, explain: bool = True):
+        """Seuil en ms (None ou négatif : journal désactivé), taille du journal, capture des plans"""
+        with self._lock:
+            self.threshold_ms = threshold_ms if threshold_ms is not None and threshold_ms >= 0 else None
+            self.size = size
+            self.explain = explain
+            self._entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+            self._plans: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+
+    def clear(self):
+        """Vide le journal et les plans mémorisés"""
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def is_slow(self, duration: float) -> bool:
+        return self.threshold_ms is not None and duration * 1000.0 >= self.threshold_ms
+
+    def observe(self, cursor, dialect_name: str, statement: str, parameters: Any, executemany: bool,
+                duration: float, endpoint: Optional[str] = None):
+        """Enregistre la requête si elle dépasse le seuil"""
+        if not self.is_slow(duration):
+            return
+        if executemany and parameters:
+            parameters = parameters[0]
+        normalized = normalize_statement(statement)
+
+        with self._lock:
+            known = normalized in self._plans
+            if known:
+                self._plans.move_to_end(normalized)
+        if not known:
+            plan = self._explain(cursor, dialect_name, statement, parameters) if self.explain else None
+            with self._lock:
+                self._plans[normalized] = plan
+                while len(self._plans) > self.size:
+                    self._plans.popitem(last=False)
+
+        with self._lock:
+            self._entries.append({
+                'statement': normalized,
+                'endpoint': endpoint,
+                'duration_ms': round(duration * 1000.0, 3),
+                'parameters': redact_parameters(parameters),
+                'at': time.time()
+            })
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Requêtes lentes regroupées par forme normalisée, par temps cumulé décroissant"""
+        with self._lock:
+            entries = list(self._entries)
+            plans = dict(self._plans)
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            group = groups.get(entry['statement'])
+            if group is None:
+                group = groups[entry['statement']] = {
+                    'statement': entry['statement'],
+                    'count': 0,
+                    'total_time_ms': 0.0,
+                    'max_time_ms': 0.0,
+                    'endpoints': {},
+                    'plan': plans.get(entry['statement'])
+                }
+            group['count'] += 1
+            group['total_time_ms'] += entry['duration_ms']
+            if entry['duration_ms'] >= group['max_time_ms']:
+                group['max_time_ms'] = entry['duration_ms']
+                group['slowest_parameters'] = entry['parameters']
+            group['last_seen'] = datetime.fromtimestamp(entry['at']).isoformat()
+            endpoint = entry['endpoint'] or 'hors requête'
+            group['endpoints'][endpoint] = group['endpoints'].get(endpoint, 0) + 1
+
+        ranked = sorted(groups.values(), key=lambda g: g['total_time_ms'], reverse=True)[:limit]
+        for group in ranked:
+            group['total_time_ms'] = round(group['total_time_ms'], 3)
+            group['avg_time_ms'] = round(group['total_time_ms'] / group['count'], 3)
+        return ranked
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _explain(self, cursor, dialect_name: str, statement: str, parameters: Any) -> Optional[str]:
+        """Plan d'exécution de la requête (None si indisponible)"""
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        if dialect_name == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect_name == 'postgresql':
+            prefix = 'EXPLAIN '
+        else:
+            return None
+
+        explain_cursor = cursor.connection.cursor()
+        try:
+            # Sous PostgreSQL, une erreur annulerait la transaction en cours : SAVEPOINT
+            if dialect_name == 'postgresql':
+                explain_cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                explain_cursor.execute(prefix + statement, parameters if parameters is not None else ())
+                rows = explain_cursor.fetchall()
+            except Exception:
+                if dialect_name == 'postgresql':
+                    explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                return None
+            finally:
+                if dialect_name == 'postgresql':
+                    explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        except Exception:
+            return None
+        finally:
+            explain_cursor.close()
+
+        # SQLite : (id, parent, notused, detail) ; PostgreSQL : une ligne de texte par nœud
+        return '\n'.join(str(row[-1]) for row in rows)
+
+
+# Journal global du processus
+slow_queries = SlowQueryLog()
@@ -0,0 +1,68 @@
+"""
+Unité de travail : regroupe plusieurs écritures dans une seule transaction
+
+Les repositories et les modèles appellent commit() après leurs écritures.
+Hors unité de travail, commit() valide immédiatement (comportement historique) ;
+à l'intérieur d'un bloc transaction(), il se contente d'un flush et la
+validation unique a lieu à la sortie du bloc le plus externe.
+
+    with transaction():
+        panier = repository.get_ou_creer_panier_utilisateur(utilisateur_id)
+        panier.ajouter_produit(produit_id, quantite)
+    # un seul COMMIT pour la création du panier et l'ajout de l'article
+"""
+
+from contextlib import contextmanager
+from .db import db
+
+# Profondeur d'imbrication des blocs transaction(), portée par la session courante
+_DEPTH_KEY = 'unit_of_work_depth'
+
+
+def in_transaction() -> bool:
+    """Indique si une unité de travail est ouverte sur la session courante"""
+    return db.session.info.get(_DEPTH_KEY, 0) > 0
+
+
+@contextmanager
+def transaction(savepoint: bool = False):
+    """
+    Ouvre une unité de travail sur la session courante
+
+    Le bloc le plus externe valide à la sortie et annule tout en cas
+    d'exception. Un bloc imbriqué rejoint la transaction englobante ; avec
+    savepoint=True, il est isolé dans un SAVEPOINT : une exception n'annule
+    que ses propres écritures avant d'être propagée.
+
+    Args:
+        savepoint: Isoler le bloc imbriqué dans un SAVEPOINT
+
+    Yields:
+        La session SQLAlchemy courante
+    """
+    session = db.session()
+    depth = session.info.get(_DEPTH_KEY, 0)
+    session.info[_DEPTH_KEY] = depth + 1
+    try:
+        if depth == 0:
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        elif savepoint:
+            with session.begin_nested():
+                yield session
+        else:
+            yield session
+    finally:
+        session.info[_DEPTH_KEY] = depth
+
+
+def commit():
+    """Valide les écritures, ou les envoie seulement (flush) dans une unité de travail"""
+    if in_transaction():
+        db.session.flush()
+    else:
+        db.session.commit()
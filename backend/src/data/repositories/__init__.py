@@ -3,15 +3,20 @@ Repositories pour l'accès aux données
 """
 
 from .base_repository import BaseRepository
+from .pagination import Page, PageRequest
 from .utilisateur_repository import UtilisateurRepository
 from .produit_repository import ProduitRepository
 from .commande_repository import CommandeRepository
 from .ligne_commande_repository import LigneCommandeRepository
+from .vente_journaliere_repository import VenteJournaliereRepository
 
 __all__ = [
     'BaseRepository',
+    'Page',
+    'PageRequest',
     'UtilisateurRepository',
     'ProduitRepository',
     'CommandeRepository',
-    'LigneCommandeRepository'
+    'LigneCommandeRepository',
+    'VenteJournaliereRepository'
 ]
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Agrégations SQL partagées par les repositories (statistiques et rapports)
+
+Les expressions d'agrégat (sous-requêtes scalaires COUNT/SUM) sont construites
+par les repositories puis exécutées ensemble par fetch_aggregates, ce qui permet
+de calculer tout un tableau de bord en une seule requête. Les expressions
+utilisées ici fonctionnent à l'identique sous PostgreSQL et SQLite.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, func, select
+from ...data.database.db import db
+from ...data.database.routing import read_only
+
+
+def day_bounds(start: date, end: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """
+    Convertit un intervalle de jours inclusif en bornes [début, fin) sur des horodatages
+
+    Les bornes restent comparables directement à la colonne (pas de fonction
+    appliquée à la colonne), ce qui laisse les index sur les dates utilisables.
+    """
+    start = start.date() if isinstance(start, datetime) else start
+    end = start if end is None else (end.date() if isinstance(end, datetime) else end)
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def date_range_filter(column, start: date, end: Optional[date] = None):
+    """Critère « column dans les jours start..end inclus »"""
+    lower, upper = day_bounds(start, end)
+    return and_(column >= lower, column < upper)
+
+
+def day_of(column):
+    """Expression du jour calendaire d'un horodatage (clé de regroupement)"""
+    return func.date(column)
+
+
+def date_key(value: Any) -> str:
+    """Normalise une clé de jour : date sous PostgreSQL, chaîne ISO sous SQLite"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    return str(value)
+
+
+@read_only
+def fetch_aggregates(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exécute plusieurs agrégats scalaires en un seul SELECT
+
+    Args:
+        columns: Expressions scalaires par nom, éventuellement regroupées dans
+            des dictionnaires imbriqués ({'users': {'total': expr, ...}, ...})
+
+    Returns:
+        Dictionnaire de même forme contenant les valeurs calculées
+    """
+    flat = {}
+    _flatten(columns, (), flat)
+    if not flat:
+        return {}
+
+    row = db.session.execute(
+        select(*[expr.label(f'agg_{index}') for index, expr in enumerate(flat.values())])
+    ).one()
+
+    result = {}
+    for path, value in zip(flat, row):
+        target = result
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return result
+
+
+def _flatten(columns: Dict[str, Any], prefix: tuple, flat: dict):
+    """Aplatit un dictionnaire d'expressions imbriqué en {chemin: expression}"""
+    for key, value in columns.items():
+        if isinstance(value, dict):
+            _flatten(value, prefix + (key,), flat)
+        else:
+            flat[prefix + (key,)] = value
@@ -2,19 +2,113 @@
 Repository de base avec les opérations CRUD communes
 """
 
+from datetime import datetime
 from typing import List, Optional
+from flask import current_app
+from sqlalchemy import and_, func, or_, select
 from ...data.database.db import db
+from ...data.database.unit_of_work import commit
+from ...data.database.routing import read_only
+from .aggregation import date_range_filter
+from .pagination import Page, PageRequest, clamp_limit, decode_cursor, encode_cursor
 
 
 class BaseRepository:
     """Repository de base avec les opérations CRUD communes"""
     
+    # Colonnes autorisées comme clé de tri pour la pagination (l'id sert de départage)
+    sortable_fields = ('id',)
+    
+    # Profil de chargement (options selectinload/joinedload) appliqué aux lectures
+    load_options = ()
+    
+    # Colonne d'horodatage de création utilisée par les comptages par date
+    date_field = None
+    
     def __init__(self, model_class):
         self.model_class = model_class
     
+    def _query(self):
+        """Requête de base avec le profil de chargement du repository"""
+        query = self.model_class.query
+        if self.load_options:
+            query = query.options(*self.load_options)
+        return query
+    
+    @read_only
     def get_all(self) -> List:
         """Récupère tous les enregistrements"""
-        return self.model_class.query.all()
+        return self._query().all()
+    
+    @read_only
+    def get_page(self, page_request: Optional[PageRequest] = None, query=None) -> Page:
+        """Récupère une page d'enregistrements par pagination keyset (clé de tri, id)"""
+        page_request = page_request or PageRequest()
+        if page_request.sort not in self.sortable_fields:
+            raise ValueError(f"Tri non supporté: {page_request.sort}")
+        
+        limit = clamp_limit(
+            page_request.limit,
+            default=current_app.config.get('PAGINATION_DEFAULT_LIMIT', 50),
+            maximum=current_app.config.get('PAGINATION_MAX_LIMIT', 200)
+        )
+        query = query if query is not None else self._query()
+        id_column = self.model_class.id
+        sort_column = getattr(self.model_class, page_request.sort)
+        descending = page_request.descending
+        
+        if page_request.cursor:
+            position = decode_cursor(page_request.cursor)
+            if position['s'] != page_request.sort or bool(position.get('d')) != descending:
+                raise ValueError("Le curseur ne correspond pas au tri demandé")
+            query = query.filter(self._keyset_filter(sort_column, position['v'], position['id'], descending))
+        elif page_request.after_id is not None:
+            if page_request.sort != 'id':
+                raise ValueError("after_id n'est utilisable qu'avec le tri par id")
+            query = query.filter(id_column < page_request.after_id if descending else id_column > page_request.after_id)
+        
+        if page_request.sort == 'id':
+            order = [id_column.desc() if descending else id_column.asc()]
+        else:
+            order = [sort_column.desc() if descending else sort_column.asc(),
+                     id_column.desc() if descending else id_column.asc()]
+            # Colonne nullable : les NULL en fin de parcours, dans les deux sens (voir _keyset_filter)
+            if sort_column.expression.nullable:
+                order[0] = order[0].nulls_last()
+        
+        # Une ligne de plus pour savoir s'il existe une page suivante sans COUNT
+        rows = query.order_by(*order).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(page_request.sort, descending, getattr(last, page_request.sort), last.id)
+        
+        return Page(items=rows, next_cursor=next_cursor, limit=limit)
+    
+    def _keyset_filter(self, sort_column, value, last_id: int, descending: bool):
+        """
+        Construit le prédicat « après (valeur, id) » pour la pagination keyset
+        
+        Les NULL d'une colonne nullable sont triés en dernier : après une valeur,
+        toutes les lignes NULL restent à parcourir ; après une ligne NULL, seules
+        les lignes NULL d'id suivant (une comparaison à NULL ne retient rien).
+        """
+        id_column = self.model_class.id
+        if sort_column.key == 'id':
+            return id_column < last_id if descending else id_column > last_id
+        
+        id_suivant = id_column < last_id if descending else id_column > last_id
+        if value is None:
+            return and_(sort_column.is_(None), id_suivant)
+        
+        if isinstance(sort_column.type, db.DateTime):
+            value = datetime.fromisoformat(value)
+        apres = or_(sort_column < value if descending else sort_column > value,
+                    and_(sort_column == value, id_suivant))
+        if sort_column.expression.nullable:
+            return or_(apres, sort_column.is_(None))
+        return apres
     
     def get_by_id(self, id: int):
         """Récupère un enregistrement par son ID"""
@@ -24,7 +118,7 @@ class BaseRepository:
         """Crée un nouvel enregistrement"""
         instance = self.model_class(**kwargs)
         db.session.add(instance)
-        db.session.commit()
+        commit()
         return instance
     
     def update(self, id: int, **kwargs):
@@ -34,7 +128,7 @@ class BaseRepository:
             for key, value in kwargs.items():
                 if hasattr(instance, key):
                     setattr(instance, key, value)
-            db.session.commit()
+            commit()
             return instance
         return None
     
@@ -43,11 +137,28 @@ class BaseRepository:
         instance = self.get_by_id(id)
         if instance:
             db.session.delete(instance)
-            db.session.commit()
+            commit()
             return True
         return False
     
+    @read_only
     def count(self) -> int:
         """Compte le nombre total d'enregistrements"""
         return self.model_class.query.count()
-
+    
+    def count_column(self, *criteria):
+        """Sous-requête scalaire COUNT(*) sur la table, filtrée par les critères donnés"""
+        return select(func.count()).select_from(self.model_class).where(*criteria).scalar_subquery()
+    
+    def count_by_date_range_column(self, start, end):
+        """Sous-requête scalaire du nombre d'enregistrements créés entre deux jours inclus"""
+        return self.count_column(date_range_filter(getattr(self.model_class, self.date_field), start, end))
+    
+    def count_by_date(self, day) -> int:
+        """Compte les enregistrements créés un jour donné"""
+        return self.count_by_date_range(day, day)
+    
+    @read_only
+    def count_by_date_range(self, start, end) -> int:
+        """Compte les enregistrements créés entre deux jours inclus"""
+        return db.session.scalar(select(self.count_by_date_range_column(start, end)))
@@ -2,50 +2,341 @@
 Repository pour la gestion des commandes
 """
 
-from typing import List
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import event, func, insert, inspect, select, update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
+from .aggregation import date_key, date_range_filter, day_of
 from .base_repository import BaseRepository
-from ...domain.models import Commande, LigneCommande
+from .pagination import Page, PageRequest
+from ...domain.models import Commande, LigneCommande, Produit, Utilisateur
+from ...data.database.db import db
+from ...data.database.unit_of_work import commit, transaction
+from ...data.database.routing import RoutingSession, read_only
+
+# Commandes dont les totaux ont été recalculés pendant le flush en cours
+_TOTAUX_KEY = 'commandes_totaux_recalcules'
+
+# Attributs d'une ligne qui influencent les totaux de sa commande
+_ATTRIBUTS_TOTAUX = ('commande_id', 'quantite', 'prix_unitaire')
 
 
 class CommandeRepository(BaseRepository):
     """Repository pour la gestion des commandes"""
     
+    sortable_fields = ('id', 'date_commande')
+    
+    date_field = 'date_commande'
+    
+    # Champs modifiables par update (PUT /api/commandes/<id>)
+    updatable_fields = ('adresse_livraison', 'statut')
+    
+    # Les lignes sont sérialisées par Commande.to_dict : une requête IN pour toute la page
+    load_options = (selectinload(Commande.lignes_commande),)
+    
     def __init__(self):
         super().__init__(Commande)
     
     def get_by_utilisateur(self, utilisateur_id: int) -> List[Commande]:
         """Récupère toutes les commandes d'un utilisateur"""
-        return Commande.query.filter_by(utilisateur_id=utilisateur_id).all()
+        return self._query().filter_by(utilisateur_id=utilisateur_id).all()
     
     def get_by_statut(self, statut: str) -> List[Commande]:
         """Récupère toutes les commandes d'un statut donné"""
-        return Commande.query.filter_by(statut=statut).all()
+        return self._query().filter_by(statut=statut).all()
+    
+    def get_page_by_utilisateur(self, utilisateur_id: int, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes d'un utilisateur"""
+        return self.get_page(page_request, self._query().filter_by(utilisateur_id=utilisateur_id))
+    
+    def get_page_by_statut(self, statut: str, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes d'un statut donné"""
+        return self.get_page(page_request, self._query().filter_by(statut=statut))
+    
+    def get_total(self, commande_id: int):
+        """Total persisté d'une commande, sans charger ses lignes (None si elle n'existe pas)"""
+        return db.session.scalar(select(Commande.total).where(Commande.id == commande_id))
+    
+    def count_by_status_column(self, statut: str):
+        """Sous-requête scalaire du nombre de commandes d'un statut donné"""
+        return self.count_column(Commande.statut == statut)
+    
+    @read_only
+    def count_by_status(self, statut: str) -> int:
+        """Compte les commandes d'un statut donné"""
+        return db.session.scalar(select(self.count_by_status_column(statut)))
+    
+    def revenue_column(self, start=None, end=None):
+        """
+        Sous-requête scalaire du chiffre d'affaires (somme des totaux des commandes)
+        
+        Sans dates, porte sur toutes les commandes ; sinon sur les commandes
+        passées entre les deux jours inclus.
+        """
+        query = select(func.coalesce(func.sum(Commande.total), 0.0))
+        if start is not None:
+            query = query.where(date_range_filter(Commande.date_commande, start, end))
+        return query.scalar_subquery()
+    
+    @read_only
+    def get_total_revenue(self) -> float:
+        """Calcule le chiffre d'affaires total"""
+        return db.session.scalar(select(self.revenue_column()))
+    
+    def get_revenue_by_date(self, day) -> float:
+        """Calcule le chiffre d'affaires d'un jour"""
+        return self.get_revenue_by_date_range(day, day)
+    
+    @read_only
+    def get_revenue_by_date_range(self, start, end) -> float:
+        """Calcule le chiffre d'affaires entre deux jours inclus"""
+        return db.session.scalar(select(self.revenue_column(start, end)))
+    
+    @read_only
+    def get_orders_by_date_range(self, start, end) -> List[Dict[str, Any]]:
+        """Nombre de commandes par jour entre deux jours inclus (jours sans commande omis)"""
+        jour = day_of(Commande.date_commande)
+        rows = db.session.execute(
+            select(jour, func.count(Commande.id))
+            .where(date_range_filter(Commande.date_commande, start, end))
+            .group_by(jour)
+            .order_by(jour)
+        ).all()
+        return [{'date': date_key(day), 'count': count} for day, count in rows]
+    
+    @read_only
+    def get_revenue_by_date_range_chart(self, start, end) -> List[Dict[str, Any]]:
+        """Chiffre d'affaires, nombre de commandes et panier moyen par jour entre deux jours inclus"""
+        jour = day_of(Commande.date_commande)
+        rows = db.session.execute(
+            select(jour, func.sum(Commande.total), func.count(Commande.id))
+            .where(date_range_filter(Commande.date_commande, start, end), _avec_lignes())
+            .group_by(jour)
+            .order_by(jour)
+        ).all()
+        return [
+            {
+                'date': date_key(day),
+                'revenue': float(revenue or 0.0),
+                'count': count,
+                'average': float(revenue or 0.0) / count if count else 0.0
+            }
+            for day, revenue, count in rows
+        ]
+    
+    def get_orders_by_status(self) -> List[Dict[str, Any]]:
+        """Répartition de toutes les commandes par statut"""
+        return self._count_by_statut()
+    
+    def get_orders_by_status_in_range(self, start, end) -> List[Dict[str, Any]]:
+        """Répartition par statut des commandes passées entre deux jours inclus"""
+        return self._count_by_statut(date_range_filter(Commande.date_commande, start, end))
+    
+    @read_only
+    def _count_by_statut(self, *criteria) -> List[Dict[str, Any]]:
+        """Compte les commandes par statut (GROUP BY statut)"""
+        total = func.count(Commande.id)
+        rows = db.session.execute(
+            select(Commande.statut, total)
+            .where(*criteria)
+            .group_by(Commande.statut)
+            .order_by(total.desc(), Commande.statut)
+        ).all()
+        return [{'statut': statut, 'count': count} for statut, count in rows]
+    
+    @read_only
+    def get_top_clients(self, start, end, limit: int = 10) -> List[Dict[str, Any]]:
+        """Clients ayant le plus dépensé entre deux jours inclus"""
+        total_spent = func.sum(Commande.total)
+        rows = db.session.execute(
+            select(
+                Utilisateur.id,
+                Utilisateur.nom,
+                Utilisateur.email,
+                func.count(Commande.id),
+                total_spent
+            )
+            .select_from(Commande)
+            .join(Utilisateur, Utilisateur.id == Commande.utilisateur_id)
+            .where(date_range_filter(Commande.date_commande, start, end), _avec_lignes())
+            .group_by(Utilisateur.id, Utilisateur.nom, Utilisateur.email)
+            .order_by(total_spent.desc(), Utilisateur.id)
+            .limit(limit)
+        ).all()
+        return [
+            {
+                'utilisateur_id': utilisateur_id,
+                'nom': nom,
+                'email': email,
+                'order_count': order_count,
+                'total_spent': float(spent or 0.0)
+            }
+            for utilisateur_id, nom, email, order_count, spent in rows
+        ]
+    
+    def update(self, id: int, **kwargs):
+        """
+        Met à jour l'adresse de livraison et le statut d'une commande
+        
+        Les autres champs sont ignorés : les totaux sont dérivés des lignes
+        (recalculés quand elles changent), la date et le client sont fixés à la
+        création.
+        """
+        return super().update(id, **{cle: valeur for cle, valeur in kwargs.items() if cle in self.updatable_fields})
     
     def update_statut(self, commande_id: int, statut: str) -> bool:
         """Met à jour le statut d'une commande"""
         commande = self.get_by_id(commande_id)
         if commande:
             commande.statut = statut
-            self.model_class.query.session.commit()
+            commit()
             return True
         return False
     
     def create_commande(self, utilisateur_id: int, adresse_livraison: str, lignes_commande: List[dict]) -> Commande:
-        """Crée une nouvelle commande avec ses lignes"""
-        commande = self.create(
-            utilisateur_id=utilisateur_id,
-            adresse_livraison=adresse_livraison
-        )
+        """
+        Crée une nouvelle commande avec ses lignes dans une seule transaction
         
-        # Ajouter les lignes de commande
-        from .ligne_commande_repository import LigneCommandeRepository
-        for ligne_data in lignes_commande:
-            LigneCommandeRepository().create(
-                commande_id=commande.id,
-                produit_id=ligne_data['produit_id'],
-                quantite=ligne_data['quantite'],
-                prix_unitaire=ligne_data['prix_unitaire']
-            )
+        Les prix unitaires sont relus en base (une requête IN) : le prix envoyé
+        par le client est ignoré. Les lignes sont insérées en un seul lot, le
+        total et le nombre d'articles de la commande calculés au passage.
+        Dans une unité de travail englobante, la commande rejoint sa transaction.
         
+        Raises:
+            ValueError: Si une ligne est invalide ou référence un produit inexistant
+        """
+        with transaction():
+            lignes = self._valider_lignes(lignes_commande)
+            prix_par_produit = self._get_prix_produits({ligne['produit_id'] for ligne in lignes})
+            manquants = sorted({ligne['produit_id'] for ligne in lignes} - prix_par_produit.keys())
+            if manquants:
+                raise ValueError(f"Produits introuvables: {manquants}")
+            
+            commande = Commande(
+                utilisateur_id=utilisateur_id,
+                adresse_livraison=adresse_livraison,
+                total=sum(ligne['quantite'] * prix_par_produit[ligne['produit_id']] for ligne in lignes),
+                nombre_articles=sum(ligne['quantite'] for ligne in lignes)
+            )
+            db.session.add(commande)
+            db.session.flush()
+            
+            if lignes:
+                db.session.execute(insert(LigneCommande), [
+                    {
+                        'commande_id': commande.id,
+                        'produit_id': ligne['produit_id'],
+                        'quantite': ligne['quantite'],
+                        'prix_unitaire': prix_par_produit[ligne['produit_id']],
+                        'date_commande': commande.date_commande
+                    }
+                    for ligne in lignes
+                ])
+            
         return commande
+    
+    def _valider_lignes(self, lignes_commande: List[dict]) -> List[dict]:
+        """Normalise les lignes reçues (produit_id et quantite entiers, quantite > 0)"""
+        lignes = []
+        for ligne_data in lignes_commande or []:
+            try:
+                produit_id = int(ligne_data['produit_id'])
+                quantite = int(ligne_data['quantite'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Ligne de commande invalide: {ligne_data}")
+            if quantite <= 0:
+                raise ValueError(f"Quantité invalide pour le produit {produit_id}: {quantite}")
+            lignes.append({'produit_id': produit_id, 'quantite': quantite})
+        return lignes
+    
+    def _get_prix_produits(self, produit_ids: set) -> dict:
+        """Récupère le prix courant de plusieurs produits en une requête"""
+        if not produit_ids:
+            return {}
+        rows = db.session.query(Produit.id, Produit.prix).filter(Produit.id.in_(produit_ids)).all()
+        return {produit_id: prix for produit_id, prix in rows}
+
+
+def _avec_lignes():
+    """Critère « la commande a au moins une ligne » (les commandes vides n'entrent pas dans les moyennes)"""
+    return Commande.nombre_articles > 0
+
+
+def recalculer_totaux(connection, commande_ids: Iterable[int]):
+    """
+    Recalcule total et nombre_articles de commandes à partir de leurs lignes
+    
+    Un seul UPDATE avec sous-requêtes corrélées, identique sous PostgreSQL et
+    SQLite (c'est aussi le calcul du rattrapage 0002_totaux_commandes).
+    """
+    commandes = Commande.__table__
+    connection.execute(
+        update(commandes)
+        .where(commandes.c.id.in_(sorted(commande_ids)))
+        .values(
+            total=select(func.coalesce(func.sum(LigneCommande.quantite * LigneCommande.prix_unitaire), 0.0))
+            .where(LigneCommande.commande_id == commandes.c.id)
+            .scalar_subquery(),
+            nombre_articles=select(func.coalesce(func.sum(LigneCommande.quantite), 0))
+            .where(LigneCommande.commande_id == commandes.c.id)
+            .scalar_subquery()
+        )
+    )
+
+
+@event.listens_for(LigneCommande.commande_id, 'set', active_history=True)
+def _charger_ancienne_commande(ligne, value, oldvalue, initiator):
+    """Charge l'ancienne commande_id avant modification : ses totaux seront aussi recalculés"""
+
+
+@event.listens_for(LigneCommande, 'before_insert')
+@event.listens_for(LigneCommande, 'before_update')
+def _recopier_date_commande(mapper, connection, ligne):
+    """Une ligne créée ou rattachée à une autre commande reprend la date de celle-ci"""
+    state = inspect(ligne)
+    if state.persistent and not state.attrs.commande_id.history.has_changes():
+        return
+    commande = state.attrs.commande.loaded_value
+    if isinstance(commande, Commande) and commande.id == ligne.commande_id and commande.date_commande is not None:
+        ligne.date_commande = commande.date_commande
+    else:
+        ligne.date_commande = connection.scalar(
+            select(Commande.date_commande).where(Commande.id == ligne.commande_id)
+        )
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _maintenir_totaux(session, flush_context):
+    """Recalcule les totaux des commandes dont des lignes ont été créées, modifiées ou supprimées"""
+    commande_ids = set()
+    for ligne in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(ligne, LigneCommande):
+            continue
+        attrs = inspect(ligne).attrs
+        historiques = [attrs[nom].history for nom in _ATTRIBUTS_TOTAUX]
+        if ligne in session.dirty and not any(h.has_changes() for h in historiques):
+            continue
+        # Ancienne et nouvelle commande si la ligne a changé de commande
+        commande_ids.update(v for v in historiques[0].sum() if v is not None)
+    
+    if commande_ids:
+        recalculer_totaux(session.connection(), commande_ids)
+        session.info.setdefault(_TOTAUX_KEY, set()).update(commande_ids)
+    
+    # Date de commande modifiée : les lignes suivent (et changent de partition)
+    for commande in session.dirty:
+        if isinstance(commande, Commande) and inspect(commande).attrs.date_commande.history.has_changes():
+            session.connection().execute(
+                update(LigneCommande.__table__)
+                .where(LigneCommande.__table__.c.commande_id == commande.id)
+                .values(date_commande=commande.date_commande)
+            )
+
 
+@event.listens_for(RoutingSession, 'after_flush_postexec')
+def _expirer_totaux(session, flush_context):
+    """Les commandes chargées relisent leurs totaux recalculés au prochain accès"""
+    for commande_id in session.info.pop(_TOTAUX_KEY, ()):
+        commande = session.identity_map.get(identity_key(Commande, commande_id))
+        if commande is not None:
+            session.expire(commande, ['total', 'nombre_articles'])
@@ -2,9 +2,13 @@
 Repository pour la gestion des lignes de commande
 """
 
-from typing import List
+from typing import Any, Dict, List
+from sqlalchemy import func, select
+from .aggregation import date_range_filter
 from .base_repository import BaseRepository
-from ...domain.models import LigneCommande
+from ...domain.models import LigneCommande, Produit
+from ...data.database.db import db
+from ...data.database.routing import read_only
 
 
 class LigneCommandeRepository(BaseRepository):
@@ -21,8 +25,48 @@ class LigneCommandeRepository(BaseRepository):
         """Récupère toutes les lignes pour un produit"""
         return LigneCommande.query.filter_by(produit_id=produit_id).all()
     
+    @read_only
     def get_total_ventes_produit(self, produit_id: int) -> int:
         """Calcule le total des ventes d'un produit"""
-        lignes = self.get_by_produit(produit_id)
-        return sum(ligne.quantite for ligne in lignes)
-
+        return db.session.scalar(
+            select(func.coalesce(func.sum(LigneCommande.quantite), 0))
+            .where(LigneCommande.produit_id == produit_id)
+        )
+    
+    def get_top_products(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Produits les plus vendus (en quantité) toutes commandes confondues"""
+        return self._top_products(limit)
+    
+    def get_top_products_by_date_range(self, start, end, limit: int = 10) -> List[Dict[str, Any]]:
+        """Produits les plus vendus (en quantité) sur les commandes passées entre deux jours inclus"""
+        return self._top_products(limit, date_range_filter(LigneCommande.date_commande, start, end))
+    
+    @read_only
+    def _top_products(self, limit: int, *date_criteria) -> List[Dict[str, Any]]:
+        """
+        Classement des produits par quantité vendue (GROUP BY produit)
+        
+        Les critères de date portent sur la date de commande recopiée sur les
+        lignes : pas de jointure avec commandes.
+        """
+        quantity_sold = func.sum(LigneCommande.quantite)
+        query = (
+            select(
+                Produit.id,
+                Produit.nom,
+                quantity_sold,
+                func.sum(LigneCommande.quantite * LigneCommande.prix_unitaire)
+            )
+            .select_from(LigneCommande)
+            .join(Produit, Produit.id == LigneCommande.produit_id)
+            .where(*date_criteria)
+        )
+        rows = db.session.execute(
+            query.group_by(Produit.id, Produit.nom)
+            .order_by(quantity_sold.desc(), Produit.id)
+            .limit(limit)
+        ).all()
+        return [
+            {'id': produit_id, 'nom': nom, 'quantity_sold': quantity, 'revenue': float(revenue or 0.0)}
+            for produit_id, nom, quantity, revenue in rows
+        ]
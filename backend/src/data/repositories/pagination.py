@@ -0,0 +1,63 @@
+"""
+Pagination par curseur (keyset) pour les repositories
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+# Taille de page par défaut et plafond absolu appliqué côté serveur
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class PageRequest:
+    """Paramètres d'une demande de page"""
+    limit: Optional[int] = None
+    after_id: Optional[int] = None
+    cursor: Optional[str] = None
+    sort: str = 'id'
+    descending: bool = False
+
+
+@dataclass
+class Page:
+    """Page de résultats avec le curseur de la page suivante"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+    @property
+    def has_more(self) -> bool:
+        """Indique s'il reste des résultats après cette page"""
+        return self.next_cursor is not None
+
+
+def clamp_limit(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Ramène la taille de page demandée dans l'intervalle autorisé"""
+    if limit is None:
+        limit = default
+    return max(1, min(int(limit), maximum, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort: str, descending: bool, value: Any, last_id: int) -> str:
+    """Encode la position (clé de tri, id) du dernier élément en curseur opaque"""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'd': descending, 'v': value, 'id': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Décode un curseur produit par encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(payload, dict) or 'id' not in payload or 's' not in payload:
+            raise ValueError
+        return payload
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Curseur de pagination invalide")
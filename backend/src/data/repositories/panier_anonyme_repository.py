@@ -0,0 +1,279 @@
+"""
+Repository des paniers anonymes tenus par le magasin des paniers
+
+Lecture : le magasin d'abord, puis la base (panier déjà écrit, redémarrage) ;
+un panier lu en base est placé dans le magasin. Un panier consulté pour la
+première fois est créé dans le magasin seulement : aucune écriture en base.
+
+Écriture en base : à la migration vers un utilisateur, à la commande
+(persister) et périodiquement pour tous les paniers modifiés
+(persister_paniers_modifies, appelé par demarrer_ecriture_differee). Chaque
+écriture réserve le panier dans le magasin : une écriture différée et une
+écriture à la demande du même panier ne se chevauchent pas, et un panier migré
+(retiré du magasin) n'est plus écrit. En base, la ligne paniers d'une session
+est créée ou mise à jour par upsert (un seul panier actif par session).
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .panier_repository import PanierRepository
+from .produit_repository import ProduitRepository
+from ...domain.entities.panier_anonyme import PanierAnonyme
+from ...domain.models.panier import Panier, PanierItem
+from ...data.database.cart_store import CartStore, get_cart_store, nouvel_etat
+from ...data.database.db import db
+from ...data.database.unit_of_work import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class PanierAnonymeRepository:
+    """Repository des paniers de session servis par le magasin des paniers"""
+
+    def __init__(self, store: Optional[CartStore] = None):
+        self.store = store or get_cart_store()
+        self.paniers = PanierRepository()
+        self.produits = ProduitRepository()
+
+    def get_panier_session(self, session_id: str) -> Optional[PanierAnonyme]:
+        """Récupère le panier d'une session (magasin, sinon base)"""
+        etat = self.store.get(session_id)
+        if etat is not None:
+            return PanierAnonyme(session_id, etat)
+
+        panier = self.paniers.get_panier_session(session_id)
+        if panier is None:
+            return None
+        etat = self.store.charger(session_id, self._etat(panier))
+        return PanierAnonyme(session_id, etat, {item.produit_id: item.produit for item in panier.items})
+
+    def get_resume_session(self, session_id: str) -> Dict[str, Any]:
+        """Nombre d'articles et total du panier d'une session : magasin, sinon une requête d'agrégat"""
+        etat = self.store.get(session_id)
+        if etat is None:
+            return self.paniers.get_resume_session(session_id)
+        items = etat['items'].values()
+        return {
+            'nombre_items': sum(item['quantite'] for item in items),
+            'total': float(sum(item['quantite'] * item['prix_unitaire'] for item in items))
+        }
+
+    def get_ou_creer_panier_session(self, session_id: str) -> PanierAnonyme:
+        """Récupère ou crée (dans le magasin seulement) le panier d'une session"""
+        panier = self.get_panier_session(session_id)
+        if panier is None:
+            panier = PanierAnonyme(session_id, self.store.charger(session_id, nouvel_etat()))
+        return panier
+
+    def ajouter_item(self, session_id: str, produit_id: int, quantite: int) -> Optional[Dict[str, Any]]:
+        """
+        Ajoute une quantité d'un produit au panier (prix du catalogue capturé au premier ajout)
+
+        Returns:
+            Le nouvel état du panier, None si le produit n'existe pas
+        """
+        produit = self.produits.get_cached(produit_id)
+        if produit is None:
+            return None
+        prix = produit.prix
+
+        def ajout(etat):
+            maintenant = datetime.utcnow()
+            item = etat['items'].get(produit_id)
+            if item is None:
+                etat['items'][produit_id] = {'id': None, 'quantite': quantite, 'prix_unitaire': prix,
+                                             'date_ajout': maintenant, 'date_modification': maintenant}
+            else:
+                item['quantite'] += quantite
+                item['date_modification'] = maintenant
+            etat['date_modification'] = maintenant
+
+        return self._modifier(session_id, ajout)[1]
+
+    def modifier_item(self, session_id: str, produit_id: int, quantite: int) -> Tuple[bool, Dict[str, Any]]:
+        """Fixe la quantité d'un article ; (False, état) si l'article est absent"""
+        def modification(etat):
+            item = etat['items'].get(produit_id)
+            if item is None:
+                return False
+            maintenant = datetime.utcnow()
+            item['quantite'] = quantite
+            item['date_modification'] = etat['date_modification'] = maintenant
+            return True
+
+        return self._modifier(session_id, modification)
+
+    def supprimer_items(self, session_id: str, produit_id: Optional[int] = None) -> Tuple[bool, Dict[str, Any]]:
+        """Supprime un article (ou tous les articles) ; (False, état) si aucun article n'a été retiré"""
+        def suppression(etat):
+            retires = list(etat['items']) if produit_id is None else [p for p in etat['items'] if p == produit_id]
+            if not retires:
+                return False
+            for retire in retires:
+                del etat['items'][retire]
+            etat['date_modification'] = datetime.utcnow()
+            return True
+
+        return self._modifier(session_id, suppression)
+
+    def migrer_panier_session_vers_utilisateur(self, session_id: str, utilisateur_id: int) -> Panier:
+        """
+        Écrit le panier de session en base, le migre vers l'utilisateur puis le retire du magasin
+
+        Le panier reste réservé jusqu'à son retrait : l'écriture différée ne peut
+        pas le recréer en base après la migration.
+        """
+        reservation = self.store.reserver(session_id)
+        try:
+            if reservation is not None and reservation[2]:
+                self._ecrire(session_id, reservation[0], reservation[1])
+            panier = self.paniers.migrer_panier_session_vers_utilisateur(session_id, utilisateur_id)
+            self.store.retirer(session_id)
+            return panier
+        finally:
+            self.store.liberer(session_id)
+
+    def persister(self, session_id: str) -> Optional[int]:
+        """
+        Écrit en base le panier d'une session s'il a été modifié (avant une commande par exemple)
+
+        Une écriture différée en cours de ce panier est attendue.
+
+        Returns:
+            L'id du panier en base, None si le panier n'y a jamais été écrit
+        """
+        reservation = self.store.reserver(session_id)
+        if reservation is None:
+            return None
+        version, etat, modifie = reservation
+        try:
+            return self._ecrire(session_id, version, etat) if modifie else etat['panier_id']
+        finally:
+            self.store.liberer(session_id)
+
+    def persister_paniers_modifies(self) -> int:
+        """
+        Écriture différée : écrit en base tous les paniers modifiés du magasin
+
+        Chaque panier est écrit dans sa propre transaction ; un échec est journalisé
+        et le panier reste à persister. Les paniers expirés déjà écrits sont
+        ensuite retirés du magasin.
+
+        Returns:
+            Le nombre de paniers écrits
+        """
+        ecrits = 0
+        for session_id, version, etat in self.store.a_persister():
+            try:
+                if self._ecrire(session_id, version, etat) is not None:
+                    ecrits += 1
+            except Exception as e:
+                logger.error(f"Écriture différée du panier de session {session_id} impossible: {e}")
+            finally:
+                self.store.liberer(session_id)
+        self.store.purger()
+        return ecrits
+
+    def _modifier(self, session_id: str, modification) -> Tuple[Any, Dict[str, Any]]:
+        """Modifie un panier du magasin, en le relisant d'abord en base s'il en a été évincé"""
+        try:
+            return self.store.modifier(session_id, modification)
+        except KeyError:
+            panier = self.paniers.get_panier_session(session_id)
+            initial = self._etat(panier) if panier is not None else nouvel_etat()
+            return self.store.modifier(session_id, modification, initial)
+
+    def _ecrire(self, session_id: str, version: int, etat: Dict[str, Any]) -> Optional[int]:
+        """
+        Écrit l'état d'un panier réservé : ligne paniers (upsert, verrouillée
+        jusqu'à la validation), articles retirés supprimés, articles présents
+        insérés ou mis à jour (ON CONFLICT)
+
+        Returns:
+            L'id du panier, None si le panier a quitté le magasin entre-temps (rien n'est écrit)
+        """
+        items = etat['items']
+        with transaction():
+            if not self.store.est_reserve(session_id):
+                return None
+            panier_id = self.paniers.upsert_panier_session(session_id, etat['date_creation'],
+                                                           etat['date_modification'])
+
+            db.session.execute(
+                delete(PanierItem).where(PanierItem.panier_id == panier_id, PanierItem.produit_id.notin_(list(items)))
+            )
+            item_ids = {}
+            if items:
+                insert_ = pg_insert if self._dialecte() == 'postgresql' else sqlite_insert
+                stmt = insert_(PanierItem).values([
+                    {'panier_id': panier_id, 'produit_id': produit_id, 'quantite': item['quantite'],
+                     'prix_unitaire': item['prix_unitaire'], 'date_ajout': item['date_ajout'],
+                     'date_modification': item['date_modification']}
+                    for produit_id, item in items.items()
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['panier_id', 'produit_id'],
+                    set_={'quantite': stmt.excluded.quantite, 'date_modification': stmt.excluded.date_modification}
+                )
+                item_ids = {produit_id: item_id for item_id, produit_id in
+                            db.session.execute(stmt.returning(PanierItem.id, PanierItem.produit_id))}
+
+        self.store.marquer_persiste(session_id, version, panier_id, item_ids)
+        return panier_id
+
+    def _etat(self, panier: Panier) -> Dict[str, Any]:
+        """État de magasin d'un panier lu en base"""
+        return {
+            'panier_id': panier.id,
+            'date_creation': panier.date_creation,
+            'date_modification': panier.date_modification,
+            'items': {
+                item.produit_id: {'id': item.id, 'quantite': item.quantite, 'prix_unitaire': item.prix_unitaire,
+                                  'date_ajout': item.date_ajout, 'date_modification': item.date_modification}
+                for item in panier.items
+            }
+        }
+
+    def _dialecte(self) -> str:
+        return db.session.get_bind().dialect.name
+
+
+def demarrer_ecriture_differee(app) -> Optional[threading.Event]:
+    """
+    Lance l'écriture différée des paniers anonymes toutes les
+    CART_STORE_FLUSH_INTERVAL secondes (et une dernière fois à l'arrêt du processus)
+
+    Returns:
+        L'événement qui arrête la boucle, None si le magasin est désactivé
+    """
+    intervalle = app.config.get('CART_STORE_FLUSH_INTERVAL', 0)
+    if get_cart_store() is None or intervalle <= 0:
+        return None
+
+    arret = threading.Event()
+
+    def ecrire():
+        with app.app_context():
+            try:
+                ecrits = PanierAnonymeRepository().persister_paniers_modifies()
+                if ecrits:
+                    logger.info(f"Écriture différée: {ecrits} panier(s) anonyme(s) écrit(s) en base")
+            finally:
+                db.session.remove()
+
+    def boucle():
+        while not arret.wait(intervalle):
+            try:
+                ecrire()
+            except Exception as e:
+                logger.error(f"Écriture différée des paniers anonymes en échec: {e}")
+
+    threading.Thread(target=boucle, name='paniers-anonymes', daemon=True).start()
+    atexit.register(ecrire)
+    return arret
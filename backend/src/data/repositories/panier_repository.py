@@ -2,32 +2,67 @@
 Repository pour la gestion du panier
 """
 
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import case, delete, exists, func, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
 from .base_repository import BaseRepository
 from ...domain.models.panier import Panier, PanierItem
+from ...domain.models.produit import Produit
 from ...data.database.db import db
+from ...data.database.unit_of_work import commit, transaction
 
 
 class PanierRepository(BaseRepository):
     """Repository pour la gestion du panier"""
     
+    # Panier.to_dict parcourt les items puis le produit de chaque item
+    load_options = (selectinload(Panier.items).selectinload(PanierItem.produit),)
+    
     def __init__(self):
         super().__init__(Panier)
     
     def get_panier_utilisateur(self, utilisateur_id: int) -> Optional[Panier]:
         """Récupère le panier actif d'un utilisateur"""
-        return Panier.query.filter_by(
+        return self._query().filter_by(
             utilisateur_id=utilisateur_id,
             statut='actif'
         ).first()
     
     def get_panier_session(self, session_id: str) -> Optional[Panier]:
         """Récupère le panier d'une session"""
-        return Panier.query.filter_by(
+        return self._query().filter_by(
             session_id=session_id,
             statut='actif'
         ).first()
     
+    def get_resume_utilisateur(self, utilisateur_id: int) -> Dict[str, Any]:
+        """Nombre d'articles et total du panier actif d'un utilisateur (une requête)"""
+        return self._resume(Panier.utilisateur_id == utilisateur_id)
+    
+    def get_resume_session(self, session_id: str) -> Dict[str, Any]:
+        """Nombre d'articles et total du panier actif d'une session (une requête)"""
+        return self._resume(Panier.session_id == session_id)
+    
+    def _resume(self, critere) -> Dict[str, Any]:
+        """
+        Agrège les articles du panier actif répondant au critère, sans charger
+        ni le panier, ni ses articles, ni leurs produits
+        
+        Une seule requête servie par les index : le panier par (utilisateur_id ou
+        session_id, statut), ses articles par uq_panier_items_panier_produit.
+        """
+        panier_id = select(Panier.id).where(critere, Panier.statut == 'actif').limit(1).scalar_subquery()
+        nombre_items, total = db.session.execute(
+            select(
+                func.coalesce(func.sum(PanierItem.quantite), 0),
+                func.coalesce(func.sum(PanierItem.quantite * PanierItem.prix_unitaire), 0.0)
+            ).where(PanierItem.panier_id == panier_id)
+        ).one()
+        return {'nombre_items': int(nombre_items), 'total': float(total)}
+    
     def creer_panier_utilisateur(self, utilisateur_id: int) -> Panier:
         """Crée un nouveau panier pour un utilisateur"""
         panier = Panier(
@@ -35,19 +70,38 @@ class PanierRepository(BaseRepository):
             statut='actif'
         )
         db.session.add(panier)
-        db.session.commit()
+        commit()
         return panier
     
     def creer_panier_session(self, session_id: str) -> Panier:
-        """Crée un nouveau panier pour une session"""
-        panier = Panier(
-            utilisateur_id=None,  # Explicitement None pour les utilisateurs anonymes
-            session_id=session_id,
-            statut='actif'
+        """Crée un nouveau panier pour une session (ou retourne celui créé entre-temps)"""
+        maintenant = datetime.utcnow()
+        with transaction():
+            panier_id = self.upsert_panier_session(session_id, maintenant, maintenant)
+        return self.get_by_id(panier_id)
+    
+    def upsert_panier_session(self, session_id: str, date_creation: datetime, date_modification: datetime) -> int:
+        """
+        Crée le panier actif d'une session, ou met à jour sa date de modification
+        
+        INSERT ... ON CONFLICT sur uq_paniers_session_actif : deux écritures
+        concurrentes d'une même session partagent la même ligne, verrouillée
+        jusqu'à la fin de la transaction.
+        
+        Returns:
+            L'id du panier
+        """
+        insert_ = pg_insert if self._dialecte() == 'postgresql' else sqlite_insert
+        stmt = insert_(Panier.__table__).values(
+            session_id=session_id, utilisateur_id=None, statut='actif',
+            date_creation=date_creation, date_modification=date_modification
         )
-        db.session.add(panier)
-        db.session.commit()
-        return panier
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id'],
+            index_where=Panier.__table__.c.statut == 'actif',
+            set_={'date_modification': stmt.excluded.date_modification}
+        )
+        return db.session.execute(stmt.returning(Panier.__table__.c.id)).scalar_one()
     
     def get_ou_creer_panier_utilisateur(self, utilisateur_id: int) -> Panier:
         """Récupère ou crée un panier pour un utilisateur"""
@@ -63,46 +117,142 @@ class PanierRepository(BaseRepository):
             panier = self.creer_panier_session(session_id)
         return panier
     
+    def ajouter_item(self, panier_id: int, produit_id: int, quantite: int) -> Optional[PanierItem]:
+        """
+        Ajoute une quantité d'un produit à un panier en une seule instruction
+        
+        INSERT ... SELECT sur le produit (prix capturé au passage) avec ON CONFLICT
+        (panier_id, produit_id) DO UPDATE : deux ajouts concurrents cumulent leurs
+        quantités sur la même ligne. Le prix d'un article existant est conservé.
+        
+        Returns:
+            L'article ajouté ou mis à jour, None si le produit n'existe pas
+        """
+        maintenant = datetime.utcnow()
+        insert_ = pg_insert if self._dialecte() == 'postgresql' else sqlite_insert
+        stmt = insert_(PanierItem).from_select(
+            ['panier_id', 'produit_id', 'quantite', 'prix_unitaire', 'date_ajout', 'date_modification'],
+            select(literal(panier_id), Produit.id, literal(quantite), Produit.prix,
+                   literal(maintenant), literal(maintenant)).where(Produit.id == produit_id)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['panier_id', 'produit_id'],
+            set_={
+                'quantite': PanierItem.quantite + stmt.excluded.quantite,
+                'date_modification': stmt.excluded.date_modification
+            }
+        )
+        stmt = self._toucher_panier(stmt, panier_id, maintenant)
+        return db.session.scalars(
+            stmt.returning(PanierItem), execution_options={'populate_existing': True}
+        ).one_or_none()
+    
+    def modifier_item(self, panier_id: int, produit_id: int, quantite: int) -> bool:
+        """Fixe la quantité d'un article (UPDATE conditionnel) ; False si l'article est absent"""
+        maintenant = datetime.utcnow()
+        stmt = (
+            update(PanierItem)
+            .where(PanierItem.panier_id == panier_id, PanierItem.produit_id == produit_id)
+            .values(quantite=quantite, date_modification=maintenant)
+        )
+        return db.session.execute(self._toucher_panier(stmt, panier_id, maintenant)).rowcount > 0
+    
+    def supprimer_items(self, panier_id: int, produit_id: Optional[int] = None) -> int:
+        """Supprime un article (ou tous les articles) d'un panier ; retourne le nombre de lignes supprimées"""
+        maintenant = datetime.utcnow()
+        stmt = delete(PanierItem).where(PanierItem.panier_id == panier_id)
+        if produit_id is not None:
+            stmt = stmt.where(PanierItem.produit_id == produit_id)
+        return db.session.execute(self._toucher_panier(stmt, panier_id, maintenant)).rowcount
+    
+    def _toucher_panier(self, stmt, panier_id: int, maintenant: datetime):
+        """
+        Joint à une écriture d'articles la mise à jour de paniers.date_modification
+        
+        Sous PostgreSQL, l'UPDATE part dans la même instruction (CTE modifiante) ;
+        ailleurs, il est exécuté juste avant.
+        """
+        touche = update(Panier.__table__).where(Panier.__table__.c.id == panier_id).values(date_modification=maintenant)
+        if self._dialecte() == 'postgresql':
+            return stmt.add_cte(touche.cte('panier_touche'))
+        db.session.execute(touche)
+        return stmt
+    
+    def _dialecte(self) -> str:
+        return db.session.get_bind().dialect.name
+    
     def migrer_panier_session_vers_utilisateur(self, session_id: str, utilisateur_id: int) -> Panier:
-        """Migre un panier de session vers un utilisateur"""
-        panier_session = self.get_panier_session(session_id)
-        panier_utilisateur = self.get_panier_utilisateur(utilisateur_id)
-        
-        if panier_session and not panier_utilisateur:
-            # Migrer le panier de session vers l'utilisateur
-            panier_session.utilisateur_id = utilisateur_id
-            panier_session.session_id = None
-            db.session.commit()
-            return panier_session
-        elif panier_session and panier_utilisateur:
-            # Fusionner les paniers
-            for item in panier_session.items:
-                item_existant = PanierItem.query.filter_by(
-                    panier_id=panier_utilisateur.id,
-                    produit_id=item.produit_id
-                ).first()
-                
-                if item_existant:
-                    item_existant.quantite += item.quantite
-                else:
-                    item.panier_id = panier_utilisateur.id
-                    db.session.add(item)
+        """
+        Migre un panier de session vers un utilisateur
+        
+        Sans panier utilisateur, le panier de session lui est simplement rattaché.
+        Sinon, les deux paniers sont fusionnés en une instruction (voir _fusionner)
+        puis le panier de session est supprimé.
+        """
+        with transaction():
+            panier_session_id = self._id_panier_actif(Panier.session_id == session_id)
+            panier_utilisateur_id = self._id_panier_actif(Panier.utilisateur_id == utilisateur_id)
             
-            # Supprimer le panier de session
-            db.session.delete(panier_session)
-            db.session.commit()
-            return panier_utilisateur
-        elif panier_utilisateur:
-            return panier_utilisateur
-        else:
-            return self.creer_panier_utilisateur(utilisateur_id)
+            if panier_session_id is None:
+                if panier_utilisateur_id is None:
+                    return self.creer_panier_utilisateur(utilisateur_id)
+                return self._recharger(panier_utilisateur_id)
+            
+            if panier_utilisateur_id is None:
+                db.session.execute(
+                    update(Panier.__table__).where(Panier.__table__.c.id == panier_session_id)
+                    .values(utilisateur_id=utilisateur_id, session_id=None, date_modification=datetime.utcnow())
+                )
+                return self._recharger(panier_session_id)
+            
+            self._fusionner(panier_session_id, panier_utilisateur_id)
+            db.session.execute(delete(PanierItem).where(PanierItem.panier_id == panier_session_id))
+            db.session.execute(delete(Panier).where(Panier.id == panier_session_id))
+            return self._recharger(panier_utilisateur_id)
+    
+    def _fusionner(self, source_id: int, cible_id: int):
+        """
+        Reporte les articles du panier source dans le panier cible (INSERT ... SELECT ... ON CONFLICT)
+        
+        Un produit absent du panier cible y est ajouté tel quel. Pour un produit
+        présent dans les deux paniers, les quantités sont cumulées dans la limite du
+        stock, comme le contrôle de PanierService à l'ajout ; la quantité déjà au
+        panier cible n'est jamais réduite.
+        """
+        maintenant = datetime.utcnow()
+        insert_ = pg_insert if self._dialecte() == 'postgresql' else sqlite_insert
+        stmt = insert_(PanierItem).from_select(
+            ['panier_id', 'produit_id', 'quantite', 'prix_unitaire', 'date_ajout', 'date_modification'],
+            select(literal(cible_id), PanierItem.produit_id, PanierItem.quantite, PanierItem.prix_unitaire,
+                   PanierItem.date_ajout, literal(maintenant)).where(PanierItem.panier_id == source_id)
+        )
+        cumul = PanierItem.quantite + stmt.excluded.quantite
+        # Référence textuelle : excluded n'est pas une table que le sous-SELECT peut corréler
+        stock = select(Produit.quantite_stock).where(Produit.id == literal_column('excluded.produit_id')).scalar_subquery()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['panier_id', 'produit_id'],
+            set_={
+                'quantite': case((cumul <= stock, cumul), (PanierItem.quantite >= stock, PanierItem.quantite),
+                                 else_=stock),
+                'date_modification': stmt.excluded.date_modification
+            }
+        )
+        db.session.execute(self._toucher_panier(stmt, cible_id, maintenant))
+    
+    def _id_panier_actif(self, critere) -> Optional[int]:
+        """Id du panier actif répondant au critère, sans charger le panier"""
+        return db.session.scalar(select(Panier.id).where(critere, Panier.statut == 'actif').limit(1))
+    
+    def _recharger(self, panier_id: int) -> Panier:
+        """Relit un panier et ses articles après une écriture ensembliste"""
+        return self._query().filter_by(id=panier_id).populate_existing().first()
     
     def abandonner_panier(self, panier_id: int) -> bool:
         """Marque un panier comme abandonné"""
         panier = self.get_by_id(panier_id)
         if panier:
             panier.statut = 'abandonne'
-            db.session.commit()
+            commit()
             return True
         return False
     
@@ -111,10 +261,40 @@ class PanierRepository(BaseRepository):
         panier = self.get_by_id(panier_id)
         if panier:
             panier.statut = 'converti'
-            db.session.commit()
+            commit()
             return True
         return False
     
+    def convertir_panier_actif_utilisateur(self, utilisateur_id: int) -> Optional[Tuple[int, Dict[int, int]]]:
+        """
+        Marque converti le panier actif d'un utilisateur et retourne ses quantités
+        
+        Le panier est réclamé par un UPDATE ... RETURNING conditionné à
+        statut = 'actif' : deux validations concurrentes du même panier ne
+        peuvent pas le convertir deux fois. Dans une unité de travail
+        englobante (validation de commande), la conversion est annulée avec elle.
+        
+        Returns:
+            (id du panier, quantité par id de produit), None si l'utilisateur
+            n'a pas de panier actif
+        """
+        paniers = Panier.__table__
+        actif = select(Panier.id).where(Panier.utilisateur_id == utilisateur_id,
+                                        Panier.statut == 'actif').limit(1).scalar_subquery()
+        with transaction():
+            panier_id = db.session.scalar(
+                update(paniers)
+                .where(paniers.c.id == actif, paniers.c.statut == 'actif')
+                .values(statut='converti', date_modification=datetime.utcnow())
+                .returning(paniers.c.id)
+            )
+            if panier_id is None:
+                return None
+            quantites = dict(db.session.execute(
+                select(PanierItem.produit_id, PanierItem.quantite).where(PanierItem.panier_id == panier_id)
+            ).all())
+        return panier_id, quantites
+    
     def get_paniers_abandonnes(self, jours: int = 7) -> List[Panier]:
         """Récupère les paniers abandonnés depuis X jours"""
         from datetime import datetime, timedelta
@@ -125,13 +305,79 @@ class PanierRepository(BaseRepository):
             Panier.date_modification < date_limite
         ).all()
     
-    def nettoyer_paniers_abandonnes(self, jours: int = 30) -> int:
-        """Nettoie les paniers abandonnés anciens"""
-        paniers_abandonnes = self.get_paniers_abandonnes(jours)
-        count = len(paniers_abandonnes)
+    def lot_perimes(self, statut: str, date_limite: datetime, taille_lot: int = 1000, apres: int = 0) -> List[int]:
+        """
+        Identifiants d'au plus `taille_lot` paniers `statut` inchangés depuis date_limite
+        
+        Parcours par id croissant à partir de `apres` (dernier id du lot précédent) :
+        un panier épargné par un lot n'est pas resélectionné, et le parcours se
+        termine quand la sélection est vide. Un lot plus court que taille_lot ne
+        signifie pas qu'il ne reste rien : des paniers ont pu être épargnés.
+        """
+        return db.session.scalars(
+            select(Panier.id)
+            .where(Panier.statut == statut, Panier.date_modification < date_limite, Panier.id > apres)
+            .order_by(Panier.id)
+            .limit(taille_lot)
+        ).all()
+    
+    def marquer_lot_abandonnes(self, ids: List[int], date_limite: datetime) -> int:
+        """
+        Marque abandonnés les paniers `ids` (voir lot_perimes) encore actifs et inchangés depuis date_limite
         
-        for panier in paniers_abandonnes:
-            db.session.delete(panier)
+        Un UPDATE validé seul : la transaction et les verrous restent bornés au lot.
+        date_modification est conservée : la purge compte l'ancienneté depuis la
+        dernière activité du panier. Les conditions sont répétées pour épargner un
+        panier modifié depuis sa sélection.
         
-        db.session.commit()
-        return count
+        Returns:
+            Le nombre de paniers marqués
+        """
+        paniers = Panier.__table__
+        with transaction():
+            return db.session.execute(
+                update(paniers)
+                .where(paniers.c.id.in_(ids), paniers.c.statut == 'actif', paniers.c.date_modification < date_limite)
+                .values(statut='abandonne', date_modification=paniers.c.date_modification)
+            ).rowcount
+    
+    def purger_lot_abandonnes(self, ids: List[int], date_limite: datetime) -> Tuple[int, int]:
+        """
+        Supprime les paniers `ids` (voir lot_perimes) encore abandonnés et inchangés depuis date_limite
+        
+        Deux DELETE validés ensemble, articles puis paniers. Un panier modifié
+        depuis sa sélection, ou dont un article a été ajouté entre les deux DELETE
+        (NOT EXISTS), est épargné et repris à la prochaine exécution.
+        
+        Returns:
+            (paniers supprimés, articles supprimés)
+        """
+        paniers = Panier.__table__
+        lot = (
+            select(paniers.c.id)
+            .where(paniers.c.id.in_(ids), paniers.c.statut == 'abandonne', paniers.c.date_modification < date_limite)
+            .scalar_subquery()
+        )
+        with transaction():
+            articles = db.session.execute(
+                delete(PanierItem.__table__).where(PanierItem.__table__.c.panier_id.in_(lot))
+            ).rowcount
+            supprimes = db.session.execute(
+                delete(paniers).where(
+                    paniers.c.id.in_(lot),
+                    ~exists().where(PanierItem.__table__.c.panier_id == paniers.c.id)
+                )
+            ).rowcount
+        return supprimes, articles
+    
+    def nettoyer_paniers_abandonnes(self, jours: int = 30, taille_lot: int = 1000) -> int:
+        """Supprime les paniers abandonnés anciens, par lots ; retourne le nombre de paniers supprimés"""
+        date_limite = datetime.utcnow() - timedelta(days=jours)
+        total, apres = 0, 0
+        while True:
+            ids = self.lot_perimes('abandonne', date_limite, taille_lot, apres)
+            if not ids:
+                return total
+            paniers, _ = self.purger_lot_abandonnes(ids, date_limite)
+            total += paniers
+            apres = ids[-1]
@@ -2,22 +2,82 @@
 Repository pour la gestion des produits
 """
 
-from typing import List
+import copy
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import and_, column, func, inspect, insert, literal, literal_column, or_, select, table, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from .base_repository import BaseRepository
+from .pagination import Page, PageRequest, clamp_limit, decode_cursor, encode_cursor
 from ...domain.models import Produit
 from ...data.database.db import db
+from ...data.database.unit_of_work import commit, in_transaction, transaction
+from ...data.database.routing import primary_reads, read_only
+from ...data.database.cache import TTLCache, invalidate_on_write
+from ...data.database import search
+
+# Colonnes des produits lus par id, partagées entre requêtes (configuré par create_app)
+produit_cache = TTLCache('produits', maxsize=1024, ttl=30.0)
 
 
 class ProduitRepository(BaseRepository):
     """Repository pour la gestion des produits"""
     
+    sortable_fields = ('id', 'nom', 'prix')
+    
+    date_field = 'date_creation'
+    
+    # Seuil (inclus) en dessous duquel un produit est compté en stock faible
+    low_stock_threshold = 5
+    
     def __init__(self):
         super().__init__(Produit)
     
+    def get_cached(self, produit_id: int) -> Optional[Produit]:
+        """
+        Récupère un produit pour lecture, via le cache des produits
+        
+        Le produit retourné est attaché à la session (sans SELECT en cas de succès
+        du cache) ; un produit déjà chargé dans la session est retourné tel quel.
+        Le cache n'est pas alimenté depuis une unité de travail ouverte, dont les
+        écritures ne sont pas encore validées, ni depuis un réplica : le cache
+        est partagé par tous les clients, y compris ceux qui viennent d'écrire et
+        lisent sur le primaire. Pour modifier un produit, utiliser get_by_id.
+        """
+        present = db.session.identity_map.get(identity_key(Produit, produit_id))
+        if present is not None and not inspect(present).expired_attributes:
+            return present
+        
+        colonnes = produit_cache.get(produit_id)
+        if colonnes is None:
+            with primary_reads():
+                produit = db.session.get(Produit, produit_id)
+            if produit is not None and not in_transaction():
+                produit_cache.set(produit_id, _colonnes(produit))
+            return produit
+        
+        produit = Produit(**copy.deepcopy(colonnes))
+        make_transient_to_detached(produit)
+        return db.session.merge(produit, load=False)
+    
+    def update(self, id: int, **kwargs):
+        """Met à jour un produit"""
+        invalidate_on_write(produit_cache, id)
+        return super().update(id, **kwargs)
+    
+    def delete(self, id: int) -> bool:
+        """Supprime un produit"""
+        invalidate_on_write(produit_cache, id)
+        return super().delete(id)
+    
+    @read_only
     def get_by_categorie(self, categorie: str) -> List[Produit]:
         """Récupère tous les produits d'une catégorie"""
         return Produit.query.filter_by(categorie=categorie).all()
     
+    @read_only
     def get_by_prix_range(self, prix_min: float, prix_max: float) -> List[Produit]:
         """Récupère les produits dans une fourchette de prix"""
         return Produit.query.filter(
@@ -25,25 +85,237 @@ class ProduitRepository(BaseRepository):
             Produit.prix <= prix_max
         ).all()
     
+    @read_only
     def get_en_stock(self) -> List[Produit]:
         """Récupère tous les produits en stock"""
         return Produit.query.filter(Produit.quantite_stock > 0).all()
     
+    def get_page_by_categorie(self, categorie: str, page_request: PageRequest) -> Page:
+        """Récupère une page des produits d'une catégorie"""
+        return self.get_page(page_request, Produit.query.filter_by(categorie=categorie))
+    
+    def get_page_by_prix_range(self, prix_min: float, prix_max: float, page_request: PageRequest) -> Page:
+        """Récupère une page des produits dans une fourchette de prix"""
+        return self.get_page(page_request, Produit.query.filter(
+            Produit.prix >= prix_min,
+            Produit.prix <= prix_max
+        ))
+    
+    def get_page_en_stock(self, page_request: PageRequest) -> Page:
+        """Récupère une page des produits en stock"""
+        return self.get_page(page_request, Produit.query.filter(Produit.quantite_stock > 0))
+    
+    def count_low_stock_column(self, seuil: int = None):
+        """Sous-requête scalaire du nombre de produits en stock faible"""
+        seuil = self.low_stock_threshold if seuil is None else seuil
+        return self.count_column(Produit.quantite_stock <= seuil)
+    
+    @read_only
+    def count_low_stock(self, seuil: int = None) -> int:
+        """Compte les produits dont le stock est inférieur ou égal au seuil"""
+        return db.session.scalar(select(self.count_low_stock_column(seuil)))
+    
+    @read_only
+    def rechercher(self, terms: str, page_request: Optional[PageRequest] = None, categorie: Optional[str] = None,
+                   prix_min: Optional[float] = None, prix_max: Optional[float] = None,
+                   en_stock: bool = False) -> Page:
+        """
+        Recherche plein texte dans le nom, la description et la catégorie
+        
+        PostgreSQL : similarité de trigrammes (pg_trgm) ou sous-chaîne, index
+        GIN ; SQLite : table FTS5, chaque mot étant un préfixe requis. Le tri
+        par défaut ('pertinence') classe les meilleurs résultats en premier ; les
+        autres clés de tri du repository restent utilisables.
+        
+        Raises:
+            ValueError: Recherche vide, tri ou curseur invalide
+        """
+        terms = ' '.join((terms or '').split())
+        if not terms:
+            raise ValueError("Terme de recherche vide")
+        page_request = page_request or PageRequest(sort='pertinence')
+        
+        filtres = []
+        if categorie:
+            filtres.append(Produit.categorie == categorie)
+        if prix_min is not None:
+            filtres.append(Produit.prix >= prix_min)
+        if prix_max is not None:
+            filtres.append(Produit.prix <= prix_max)
+        if en_stock:
+            filtres.append(Produit.quantite_stock > 0)
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            document = search.document()
+            motif = '%' + terms.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            classement = select(
+                Produit.id.label('id'),
+                (func.word_similarity(terms, document) + func.similarity(Produit.nom, terms)).label('rang')
+            ).where(or_(literal(terms).op('<%')(document), document.ilike(motif, escape='\\')), *filtres)
+        else:
+            fts = table('produits_fts', column('rowid'))
+            classement = select(
+                Produit.id.label('id'),
+                (-func.bm25(literal_column('produits_fts'), *search.SQLITE_WEIGHTS)).label('rang')
+            ).join_from(Produit, fts, fts.c.rowid == Produit.id).where(
+                literal_column('produits_fts').op('MATCH')(search.fts_query(terms)), *filtres
+            )
+        classement = classement.subquery('classement')
+        
+        query = Produit.query.join(classement, classement.c.id == Produit.id)
+        if page_request.sort != 'pertinence':
+            return self.get_page(page_request, query)
+        return self._page_par_pertinence(query, classement.c.rang, page_request)
+    
+    def _page_par_pertinence(self, query, rang, page_request: PageRequest) -> Page:
+        """Pagination keyset sur (pertinence décroissante, id)"""
+        if page_request.after_id is not None:
+            raise ValueError("after_id n'est utilisable qu'avec le tri par id")
+        limit = clamp_limit(
+            page_request.limit,
+            default=current_app.config.get('PAGINATION_DEFAULT_LIMIT', 50),
+            maximum=current_app.config.get('PAGINATION_MAX_LIMIT', 200)
+        )
+        if page_request.cursor:
+            position = decode_cursor(page_request.cursor)
+            if position['s'] != 'pertinence':
+                raise ValueError("Le curseur ne correspond pas au tri demandé")
+            query = query.filter(or_(rang < position['v'], and_(rang == position['v'], Produit.id > position['id'])))
+        
+        rows = query.add_columns(rang).order_by(rang.desc(), Produit.id.asc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            dernier, pertinence = rows[-1]
+            next_cursor = encode_cursor('pertinence', True, pertinence, dernier.id)
+        return Page(items=[produit for produit, _ in rows], next_cursor=next_cursor, limit=limit)
+    
     def update_stock(self, produit_id: int, quantite: int) -> bool:
         """Met à jour le stock d'un produit"""
         produit = self.get_by_id(produit_id)
         if produit:
             produit.quantite_stock = quantite
-            db.session.commit()
+            invalidate_on_write(produit_cache, produit_id)
+            commit()
             return True
         return False
     
     def decrementer_stock(self, produit_id: int, quantite: int) -> bool:
-        """Décrémente le stock d'un produit"""
-        produit = self.get_by_id(produit_id)
-        if produit and produit.quantite_stock >= quantite:
-            produit.quantite_stock -= quantite
-            db.session.commit()
-            return True
-        return False
+        """Décrémente le stock d'un produit (UPDATE conditionnel, sans lecture préalable)"""
+        return not self.reserver_stock({produit_id: quantite})
+    
+    def reserver_stock(self, quantites: Dict[int, int]) -> List[int]:
+        """
+        Réserve le stock de plusieurs produits en une seule transaction
+        
+        Chaque produit est décrémenté par un UPDATE ... WHERE quantite_stock >= :q,
+        ce qui rend la réservation sûre face aux commandes concurrentes. Les produits
+        sont traités par id croissant pour éviter les interblocages sous PostgreSQL.
+        Si un produit échoue, toute la réservation est annulée ; dans une unité de
+        travail englobante, seul son SAVEPOINT l'est.
+        
+        Args:
+            quantites: Quantité à réserver par id de produit
+            
+        Returns:
+            Liste des ids de produits en stock insuffisant (ou inexistants),
+            vide si la réservation a réussi
+        """
+        echecs = []
+        invalidate_on_write(produit_cache, *quantites)
+        try:
+            with transaction(savepoint=True):
+                for produit_id in sorted(quantites):
+                    quantite = quantites[produit_id]
+                    if quantite <= 0:
+                        continue
+                    result = db.session.execute(
+                        update(Produit)
+                        .where(Produit.id == produit_id, Produit.quantite_stock >= quantite)
+                        .values(quantite_stock=Produit.quantite_stock - quantite)
+                    )
+                    if result.rowcount != 1:
+                        echecs.append(produit_id)
+                
+                if echecs:
+                    raise _ReservationAnnulee()
+        except _ReservationAnnulee:
+            pass
+        return echecs
+    
+    def upsert_batch(self, rows: List[dict]) -> List[Tuple[int, bool]]:
+        """
+        Insère ou met à jour un lot de produits en une transaction
+        
+        Les lignes sans id sont insérées ; les lignes avec id sont fusionnées sur
+        la clé primaire (INSERT ... ON CONFLICT sous PostgreSQL, UPDATE groupé puis
+        INSERT ailleurs). Seules les colonnes présentes dans une ligne sont écrites.
+        Les lignes doivent être validées au préalable et leurs ids uniques dans le lot.
+        Le lot passe par un SAVEPOINT dans une unité de travail englobante.
+        
+        Args:
+            rows: Produits à écrire (colonnes du modèle, id optionnel)
+            
+        Returns:
+            (id, créé) pour chaque ligne, dans l'ordre des lignes reçues
+        """
+        resultats = [None] * len(rows)
+        with transaction(savepoint=True):
+            ids = [row['id'] for row in rows if row.get('id') is not None]
+            invalidate_on_write(produit_cache, *ids)
+            existants = set(db.session.scalars(select(Produit.id).where(Produit.id.in_(ids)))) if ids else set()
+            
+            # Une instruction par jeu de colonnes pour ne jamais écraser une colonne absente
+            groupes = {}
+            for index, row in enumerate(rows):
+                groupes.setdefault(tuple(sorted(row)), []).append(index)
+            
+            for colonnes, indexes in groupes.items():
+                nouveaux = [i for i in indexes if rows[i].get('id') is None]
+                fusions = [i for i in indexes if rows[i].get('id') is not None]
+                if nouveaux:
+                    nouveaux_ids = db.session.scalars(
+                        insert(Produit).returning(Produit.id, sort_by_parameter_order=True),
+                        [rows[i] for i in nouveaux]
+                    ).all()
+                    for i, produit_id in zip(nouveaux, nouveaux_ids):
+                        resultats[i] = (produit_id, True)
+                if fusions:
+                    self._fusionner([rows[i] for i in fusions], colonnes, existants)
+                    for i in fusions:
+                        resultats[i] = (rows[i]['id'], rows[i]['id'] not in existants)
+            
+            if set(ids) - existants and db.session.get_bind().dialect.name == 'postgresql':
+                # Ids explicites insérés : réaligner la séquence comme le script d'initialisation
+                db.session.execute(text(
+                    "SELECT setval(pg_get_serial_sequence('produits', 'id'), (SELECT MAX(id) FROM produits))"
+                ))
+        return resultats
+    
+    def _fusionner(self, rows: List[dict], colonnes: tuple, existants: set):
+        """Écrit des lignes portant un id : mise à jour si l'id existe, insertion sinon"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            stmt = pg_insert(Produit)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Produit.id],
+                set_={colonne: stmt.excluded[colonne] for colonne in colonnes if colonne != 'id'}
+            )
+            db.session.execute(stmt, rows)
+            return
+        
+        # Repli portable (SQLite) : UPDATE groupé par clé primaire puis INSERT des ids absents
+        mises_a_jour = [row for row in rows if row['id'] in existants]
+        insertions = [row for row in rows if row['id'] not in existants]
+        if mises_a_jour:
+            db.session.execute(update(Produit), mises_a_jour)
+        if insertions:
+            db.session.execute(insert(Produit), insertions)
+
+
+def _colonnes(produit: Produit) -> dict:
+    """Valeurs des colonnes d'un produit, pour le cache"""
+    return {attr.key: copy.deepcopy(getattr(produit, attr.key)) for attr in inspect(Produit).column_attrs}
+
 
+class _ReservationAnnulee(Exception):
+    """Signale une réservation incomplète pour annuler ses décréments"""
@@ -3,14 +3,22 @@ Repository pour la gestion des utilisateurs
 """
 
 from typing import List, Optional
+from sqlalchemy import distinct, func, select
+from .aggregation import day_bounds
 from .base_repository import BaseRepository
-from ...domain.models import Utilisateur
+from .pagination import Page, PageRequest
+from ...domain.models import Commande, Utilisateur
 from ...data.database.db import db
+from ...data.database.routing import read_only
 
 
 class UtilisateurRepository(BaseRepository):
     """Repository pour la gestion des utilisateurs"""
     
+    sortable_fields = ('id', 'email')
+    
+    date_field = 'date_creation'
+    
     def __init__(self):
         super().__init__(Utilisateur)
     
@@ -22,6 +30,23 @@ class UtilisateurRepository(BaseRepository):
         """Récupère tous les utilisateurs d'un rôle donné"""
         return Utilisateur.query.filter_by(role=role).all()
     
+    def get_page_by_role(self, role: str, page_request: PageRequest) -> Page:
+        """Récupère une page des utilisateurs d'un rôle donné"""
+        return self.get_page(page_request, Utilisateur.query.filter_by(role=role))
+    
+    def count_active_since_column(self, since):
+        """Sous-requête scalaire du nombre d'utilisateurs ayant commandé depuis un jour donné"""
+        return (
+            select(func.count(distinct(Commande.utilisateur_id)))
+            .where(Commande.date_commande >= day_bounds(since)[0])
+            .scalar_subquery()
+        )
+    
+    @read_only
+    def count_active_since(self, since) -> int:
+        """Compte les utilisateurs ayant passé au moins une commande depuis un jour donné"""
+        return db.session.scalar(select(self.count_active_since_column(since)))
+    
     def create_user(self, email: str, mot_de_passe: str, nom: str, role: str = 'client') -> Utilisateur:
         """Crée un nouvel utilisateur avec mot de passe haché"""
         return self.create(
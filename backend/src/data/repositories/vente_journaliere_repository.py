@@ -0,0 +1,374 @@
+"""
+Repository de l'agrégat quotidien des ventes (table daily_sales)
+
+Chaque jour a une ligne « toutes catégories » (categorie = '') et une ligne par
+catégorie de produit vendue ce jour-là. L'agrégat est tenu par deltas : la
+contribution d'une commande (son jour, ses totaux, ses lignes par catégorie)
+est relue avant sa première écriture dans la transaction, puis de nouveau
+juste avant la validation, et seule la différence est ajoutée
+(UPDATE x = x + delta, par upsert). Le coût ne dépend que des commandes
+écrites, pas du nombre de commandes du jour, et aucun verrou n'est pris en
+dehors des lignes de l'agrégat modifiées.
+
+Le nombre de clients distincts est tenu par un compteur de référence par
+(jour, catégorie, client) dans daily_sales_clients : +1 quand le compteur
+passe à 1, -1 quand il retombe à 0.
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, distinct, event, func, inspect, literal, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .aggregation import date_key, date_range_filter, day_of
+from .base_repository import BaseRepository
+from .commande_repository import _avec_lignes
+from ...domain.models import ClientJournalier, Commande, LigneCommande, Produit, VenteJournaliere
+from ...domain.models.vente_journaliere import TOUTES_CATEGORIES
+from ...data.database.db import db
+from ...data.database.routing import RoutingSession, read_only
+from ...data.database.unit_of_work import transaction
+
+# Contribution à l'agrégat, avant leur première écriture dans la transaction
+# courante, des commandes écrites : {commande_id: contribution}
+_CONTRIBUTIONS_KEY = 'daily_sales_contributions'
+
+# Attributs d'une commande qui entrent dans l'agrégat
+_ATTRIBUTS_COMMANDE = ('date_commande', 'statut', 'utilisateur_id', 'total', 'nombre_articles')
+
+# Colonnes additives de daily_sales, dans l'ordre des deltas
+_COLONNES = ('commandes', 'commandes_avec_articles', 'articles', 'chiffre_affaires', 'clients',
+             'commandes_annulees')
+
+# Contribution d'une commande : {(jour, categorie): (commandes, commandes_avec_articles,
+# articles, chiffre_affaires, commandes_annulees, utilisateur_id)}
+Contribution = Dict[Tuple[date, str], Tuple[int, int, int, float, int, Optional[int]]]
+
+
+class VenteJournaliereRepository(BaseRepository):
+    """Repository de l'agrégat quotidien des ventes"""
+
+    date_field = 'jour'
+
+    def __init__(self):
+        super().__init__(VenteJournaliere)
+
+    @read_only
+    def get_par_jour(self, start, end, categorie: Optional[str] = None) -> List[VenteJournaliere]:
+        """Lignes de l'agrégat entre deux jours inclus (toutes catégories par défaut)"""
+        return VenteJournaliere.query.filter(
+            VenteJournaliere.jour.between(_jour(start), _jour(end)),
+            VenteJournaliere.categorie == (categorie or TOUTES_CATEGORIES)
+        ).order_by(VenteJournaliere.jour).all()
+
+    @read_only
+    def get_totaux(self, start, end, categorie: Optional[str] = None) -> Dict[str, Any]:
+        """Commandes, articles et chiffre d'affaires cumulés entre deux jours inclus"""
+        commandes, articles, chiffre_affaires = db.session.execute(
+            select(
+                func.coalesce(func.sum(VenteJournaliere.commandes), 0),
+                func.coalesce(func.sum(VenteJournaliere.articles), 0),
+                func.coalesce(func.sum(VenteJournaliere.chiffre_affaires), 0.0)
+            ).where(
+                VenteJournaliere.jour.between(_jour(start), _jour(end)),
+                VenteJournaliere.categorie == (categorie or TOUTES_CATEGORIES)
+            )
+        ).one()
+        return {'commandes': commandes, 'articles': articles, 'chiffre_affaires': float(chiffre_affaires)}
+
+    def get_orders_chart(self, start, end) -> List[Dict[str, Any]]:
+        """Nombre de commandes par jour (même forme que CommandeRepository.get_orders_by_date_range)"""
+        return [{'date': vente.jour.isoformat(), 'count': vente.commandes} for vente in self.get_par_jour(start, end)]
+
+    def get_revenue_chart(self, start, end, categorie: Optional[str] = None) -> List[Dict[str, Any]]:
+        """CA, commandes et panier moyen par jour (même forme que get_revenue_by_date_range_chart)"""
+        return [
+            {
+                'date': vente.jour.isoformat(),
+                'revenue': vente.chiffre_affaires,
+                'count': vente.commandes_avec_articles,
+                'average': vente.chiffre_affaires / vente.commandes_avec_articles
+            }
+            for vente in self.get_par_jour(start, end, categorie)
+            if vente.commandes_avec_articles > 0
+        ]
+
+    def rebuild(self, start=None, end=None) -> int:
+        """
+        Recalcule l'agrégat entre deux jours inclus (par défaut : tout l'historique)
+
+        Returns:
+            Nombre de jours recalculés
+        """
+        if start is None or end is None:
+            premiere, derniere = db.session.execute(
+                select(func.min(Commande.date_commande), func.max(Commande.date_commande))
+            ).one()
+            if premiere is None:
+                with transaction():
+                    db.session.execute(delete(VenteJournaliere))
+                    db.session.execute(delete(ClientJournalier))
+                return 0
+            start = start if start is not None else premiere
+            end = end if end is not None else derniere
+        start, end = _jour(start), _jour(end)
+        with transaction():
+            recalculer_jours(db.session.connection(), start, end)
+        return (end - start).days + 1
+
+
+def recalculer_jours(connection, start: date, end: date):
+    """
+    Recalcule entièrement l'agrégat et les compteurs de clients entre deux jours inclus
+
+    Rattrapage (flask daily-sales rebuild) : sous PostgreSQL, les deux tables sont
+    verrouillées contre les écritures jusqu'à la fin de la transaction, les deltas
+    des transactions concurrentes s'appliquent ensuite sur les lignes recalculées.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("LOCK TABLE daily_sales, daily_sales_clients IN SHARE ROW EXCLUSIVE MODE"))
+    ventes, clients = VenteJournaliere.__table__, ClientJournalier.__table__
+    connection.execute(delete(ventes).where(ventes.c.jour.between(start, end)))
+    connection.execute(delete(clients).where(clients.c.jour.between(start, end)))
+
+    jour = day_of(Commande.date_commande)
+    connection.execute(ventes.insert().from_select(['jour', 'categorie', *_COLONNES], select(
+        jour,
+        literal(TOUTES_CATEGORIES),
+        func.count(Commande.id),
+        func.coalesce(func.sum(case((_avec_lignes(), 1), else_=0)), 0),
+        func.coalesce(func.sum(Commande.nombre_articles), 0),
+        func.coalesce(func.sum(Commande.total), 0.0),
+        func.count(distinct(Commande.utilisateur_id)),
+        func.coalesce(func.sum(case((Commande.statut == 'annulee', 1), else_=0)), 0)
+    ).where(date_range_filter(Commande.date_commande, start, end)).group_by(jour)))
+    connection.execute(clients.insert().from_select(['jour', 'categorie', 'utilisateur_id', 'commandes'], select(
+        jour, literal(TOUTES_CATEGORIES), Commande.utilisateur_id, func.count(Commande.id)
+    ).where(
+        date_range_filter(Commande.date_commande, start, end), Commande.utilisateur_id.isnot(None)
+    ).group_by(jour, Commande.utilisateur_id)))
+
+    jour = day_of(LigneCommande.date_commande)
+    dans_l_intervalle = date_range_filter(LigneCommande.date_commande, start, end)
+    connection.execute(ventes.insert().from_select(['jour', 'categorie', *_COLONNES], _lignes_par_categorie(
+        jour,
+        Produit.categorie,
+        func.count(distinct(LigneCommande.commande_id)),
+        func.count(distinct(LigneCommande.commande_id)),
+        func.sum(LigneCommande.quantite),
+        func.sum(LigneCommande.quantite * LigneCommande.prix_unitaire),
+        func.count(distinct(Commande.utilisateur_id)),
+        func.count(distinct(case((Commande.statut == 'annulee', Commande.id))))
+    ).where(dans_l_intervalle).group_by(jour, Produit.categorie)))
+    clients_par_categorie = _lignes_par_categorie(
+        jour, Produit.categorie, Commande.utilisateur_id, func.count(distinct(LigneCommande.commande_id))
+    ).where(dans_l_intervalle, Commande.utilisateur_id.isnot(None)).group_by(
+        jour, Produit.categorie, Commande.utilisateur_id
+    )
+    connection.execute(clients.insert().from_select(['jour', 'categorie', 'utilisateur_id', 'commandes'],
+                                                    clients_par_categorie))
+
+
+def _lignes_par_categorie(*colonnes):
+    """SELECT sur les lignes de commande jointes à leur produit et à leur commande"""
+    return select(*colonnes).select_from(LigneCommande).join(
+        Produit, Produit.id == LigneCommande.produit_id
+    ).join(Commande, Commande.id == LigneCommande.commande_id)
+
+
+def contributions(connection, commande_ids: Iterable[int]) -> Dict[int, Contribution]:
+    """
+    Contribution actuelle de commandes à l'agrégat, en une requête
+
+    Une entrée « toutes catégories » par commande datée, une par catégorie de
+    ses lignes ; une commande absente (supprimée) ne contribue à rien.
+    """
+    ids = sorted(commande_ids)
+    resultat: Dict[int, Contribution] = {commande_id: {} for commande_id in ids}
+    if not ids:
+        return resultat
+    annulee = case((Commande.statut == 'annulee', 1), else_=0)
+    entetes = select(
+        Commande.id, day_of(Commande.date_commande), literal(TOUTES_CATEGORIES), case((_avec_lignes(), 1), else_=0),
+        Commande.nombre_articles, Commande.total, annulee, Commande.utilisateur_id
+    ).where(Commande.id.in_(ids), Commande.date_commande.isnot(None))
+    jour = day_of(LigneCommande.date_commande)
+    lignes = _lignes_par_categorie(
+        LigneCommande.commande_id, jour, Produit.categorie, literal(1), func.sum(LigneCommande.quantite),
+        func.sum(LigneCommande.quantite * LigneCommande.prix_unitaire), annulee, Commande.utilisateur_id
+    ).where(
+        LigneCommande.commande_id.in_(ids), LigneCommande.date_commande.isnot(None)
+    ).group_by(LigneCommande.commande_id, jour, Produit.categorie, Commande.statut, Commande.utilisateur_id)
+    for commande_id, jour, categorie, avec_articles, articles, chiffre_affaires, annulee, utilisateur_id \
+            in connection.execute(union_all(entetes, lignes)):
+        resultat[commande_id][(_jour(jour), categorie)] = (
+            1, avec_articles, articles or 0, chiffre_affaires or 0.0, annulee, utilisateur_id
+        )
+    return resultat
+
+
+def appliquer_deltas(connection, avant: Dict[int, Contribution], apres: Dict[int, Contribution]):
+    """
+    Ajoute à l'agrégat la différence entre deux contributions des mêmes commandes
+
+    Les lignes sont écrites dans l'ordre (jour, catégorie, client) : deux
+    transactions qui touchent les mêmes lignes les verrouillent dans le même
+    ordre (pas d'interblocage sous PostgreSQL). Les lignes retombées à zéro
+    commande sont supprimées.
+    """
+    ventes: Dict[Tuple[date, str], List] = defaultdict(lambda: [0, 0, 0, 0.0, 0, 0])
+    references: Dict[Tuple[date, str, int], int] = defaultdict(int)
+    for commande_id, contribution in avant.items():
+        for signe, valeurs in ((-1, contribution), (1, apres.get(commande_id, {}))):
+            for cle, (commandes, avec_articles, articles, chiffre_affaires, annulee, utilisateur_id) \
+                    in valeurs.items():
+                delta = ventes[cle]
+                delta[0] += signe * commandes
+                delta[1] += signe * avec_articles
+                delta[2] += signe * articles
+                delta[3] += signe * chiffre_affaires
+                delta[5] += signe * annulee
+                if utilisateur_id is not None:
+                    references[(*cle, utilisateur_id)] += signe * commandes
+
+    references = {cle: delta for cle, delta in references.items() if delta}
+    insert_ = pg_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    if references:
+        clients = ClientJournalier.__table__
+        stmt = insert_(clients)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['jour', 'categorie', 'utilisateur_id'],
+            set_={'commandes': clients.c.commandes + stmt.excluded.commandes}
+        ).returning(clients.c.jour, clients.c.categorie, clients.c.utilisateur_id, clients.c.commandes)
+        lignes = connection.execute(stmt, [
+            {'jour': jour, 'categorie': categorie, 'utilisateur_id': utilisateur_id, 'commandes': delta}
+            for (jour, categorie, utilisateur_id), delta in sorted(references.items())
+        ])
+        retombes = False
+        for jour, categorie, utilisateur_id, commandes in lignes:
+            precedent = commandes - references[(_jour(jour), categorie, utilisateur_id)]
+            if precedent <= 0 < commandes:
+                ventes[(_jour(jour), categorie)][4] += 1
+            elif commandes <= 0 < precedent:
+                ventes[(_jour(jour), categorie)][4] -= 1
+            retombes = retombes or commandes <= 0
+        if retombes:
+            connection.execute(delete(clients).where(
+                clients.c.jour.in_(sorted({jour for jour, _, _ in references})), clients.c.commandes <= 0
+            ))
+
+    ventes = {cle: delta for cle, delta in ventes.items() if any(delta)}
+    if not ventes:
+        return
+    table = VenteJournaliere.__table__
+    stmt = insert_(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['jour', 'categorie'],
+        set_={colonne: table.c[colonne] + stmt.excluded[colonne] for colonne in _COLONNES}
+    )
+    connection.execute(stmt, [
+        {'jour': jour, 'categorie': categorie, **dict(zip(_COLONNES, delta))}
+        for (jour, categorie), delta in sorted(ventes.items())
+    ])
+    if any(delta[0] < 0 for delta in ventes.values()):
+        connection.execute(delete(table).where(
+            table.c.jour.in_(sorted({jour for jour, _ in ventes})), table.c.commandes <= 0
+        ))
+
+
+def _jour(value) -> date:
+    """Jour calendaire d'une date, d'un horodatage ou d'une clé 'AAAA-MM-JJ'"""
+    if isinstance(value, str):
+        return date.fromisoformat(date_key(value))
+    return value.date() if hasattr(value, 'date') else value
+
+
+def _relire_avant_ecriture(session, commande_ids: Iterable[int]):
+    """Relit la contribution des commandes pas encore relues dans la transaction courante"""
+    avant = session.info.setdefault(_CONTRIBUTIONS_KEY, {})
+    a_relire = {commande_id for commande_id in commande_ids if commande_id is not None} - avant.keys()
+    if a_relire:
+        avant.update(contributions(session.connection(), a_relire))
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _commandes_avant_flush(session, flush_context, instances):
+    """
+    Relit, avant qu'il les écrive, la contribution des commandes touchées par ce flush
+
+    Commandes modifiées (attributs de l'agrégat ou lignes) ou supprimées, et
+    commandes (ancienne et nouvelle) des lignes créées, modifiées ou supprimées.
+    """
+    commande_ids = set()
+    for objet in (*session.dirty, *session.deleted):
+        if isinstance(objet, Commande) and inspect(objet).persistent and (
+            objet in session.deleted
+            or any(inspect(objet).attrs[nom].history.has_changes()
+                   for nom in (*_ATTRIBUTS_COMMANDE, 'lignes_commande'))
+        ):
+            commande_ids.add(objet.id)
+    for ligne in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(ligne, LigneCommande):
+            continue
+        commande_ids.update(inspect(ligne).attrs.commande_id.history.sum())
+        commande = inspect(ligne).attrs.commande.loaded_value
+        if isinstance(commande, Commande) and inspect(commande).persistent:
+            commande_ids.add(commande.id)
+    if commande_ids:
+        _relire_avant_ecriture(session, commande_ids)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _commandes_creees(session, flush_context):
+    """Une commande créée dans la transaction ne contribuait à rien avant elle"""
+    for commande in session.new:
+        if isinstance(commande, Commande):
+            session.info.setdefault(_CONTRIBUTIONS_KEY, {}).setdefault(commande.id, {})
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _lignes_inserees(orm_execute_state):
+    """Lignes insérées en lot (CommandeRepository.create_commande), hors flush"""
+    if orm_execute_state.is_insert and orm_execute_state.bind_mapper is inspect(LigneCommande):
+        parametres = orm_execute_state.parameters
+        lignes = parametres if isinstance(parametres, list) else [parametres or {}]
+        _relire_avant_ecriture(orm_execute_state.session, {ligne.get('commande_id') for ligne in lignes})
+
+
+@event.listens_for(RoutingSession, 'before_commit')
+def _appliquer_deltas_de_la_transaction(session):
+    """
+    Ajoute à l'agrégat, juste avant la validation, les deltas des commandes écrites
+
+    Une seule relecture et un seul upsert par transaction, quel que soit le
+    nombre de flush ; sous PostgreSQL, les lignes de l'agrégat ne restent
+    verrouillées que le temps de la validation.
+    """
+    session.flush()
+    avant = session.info.pop(_CONTRIBUTIONS_KEY, None)
+    if not avant:
+        return
+    connection = session.connection()
+    appliquer_deltas(connection, avant, contributions(connection, avant.keys()))
+
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _oublier_contributions(session, previous_transaction):
+    """Transaction annulée : l'agrégat n'a pas bougé (un SAVEPOINT annulé ne change rien)"""
+    if previous_transaction.parent is None:
+        session.info.pop(_CONTRIBUTIONS_KEY, None)
+
+
+daily_sales_cli = AppGroup('daily-sales', help="Agrégat quotidien des ventes")
+
+
+@daily_sales_cli.command('rebuild')
+@click.option('--start', default=None, help="Premier jour AAAA-MM-JJ (défaut : première commande)")
+@click.option('--end', default=None, help="Dernier jour AAAA-MM-JJ (défaut : dernière commande)")
+def rebuild_command(start, end):
+    """Recalcule l'agrégat à partir des commandes (rattrapage ou contrôle)"""
+    jours = VenteJournaliereRepository().rebuild(start, end)
+    click.echo(f"{jours} jours recalculés")
@@ -0,0 +1,141 @@
+"""
+Panier anonyme servi par le magasin des paniers (src/data/database/cart_store.py)
+
+Expose la même interface que le modèle Panier (items, to_dict, calculs,
+ajouter_produit...) : les services et contrôleurs traitent indifféremment un
+panier anonyme en mémoire et un panier en base. `id` reste None tant que le
+panier n'a pas été écrit en base.
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class PanierAnonymeItem:
+    """Article d'un panier anonyme"""
+
+    def __init__(self, panier: 'PanierAnonyme', produit_id: int, etat: Dict[str, Any], produit=None):
+        self.panier_id = panier.id
+        self.produit_id = produit_id
+        self.id = etat.get('id')
+        self.quantite = etat['quantite']
+        self.prix_unitaire = etat['prix_unitaire']
+        self.date_ajout = etat['date_ajout']
+        self.date_modification = etat['date_modification']
+        self._produit = produit
+
+    @property
+    def produit(self):
+        """Produit de l'article (cache des produits)"""
+        if self._produit is None:
+            from ...data.repositories.produit_repository import ProduitRepository
+            self._produit = ProduitRepository().get_cached(self.produit_id)
+        return self._produit
+
+    @property
+    def sous_total(self) -> float:
+        """Calcule le sous-total de cet item"""
+        return self.quantite * self.prix_unitaire
+
+    def to_dict(self):
+        """Convertit l'objet en dictionnaire pour l'API (mêmes clés que PanierItem)"""
+        return {
+            'id': self.id,
+            'panier_id': self.panier_id,
+            'produit_id': self.produit_id,
+            'quantite': self.quantite,
+            'prix_unitaire': self.prix_unitaire,
+            'sous_total': self.sous_total,
+            'date_ajout': self.date_ajout.isoformat() if self.date_ajout else None,
+            'date_modification': self.date_modification.isoformat() if self.date_modification else None,
+            'produit': self.produit.to_dict() if self.produit else None
+        }
+
+    def __repr__(self):
+        return f'<PanierAnonymeItem {self.id} - Produit {self.produit_id} - Quantité {self.quantite}>'
+
+
+class PanierAnonyme:
+    """Panier d'une session non connectée, tenu par le magasin des paniers"""
+
+    utilisateur_id = None
+    statut = 'actif'
+
+    def __init__(self, session_id: str, etat: Dict[str, Any], produits: Optional[Dict[int, Any]] = None):
+        self.session_id = session_id
+        self._charger(etat, produits or {})
+
+    def _charger(self, etat: Dict[str, Any], produits: Dict[int, Any]):
+        self.id = etat['panier_id']
+        self.date_creation = etat['date_creation']
+        self.date_modification = etat['date_modification']
+        self.items: List[PanierAnonymeItem] = [
+            PanierAnonymeItem(self, produit_id, item, produits.get(produit_id))
+            for produit_id, item in etat['items'].items()
+        ]
+
+    def to_dict(self):
+        """Convertit l'objet en dictionnaire pour l'API (mêmes clés que Panier)"""
+        return {
+            'id': self.id,
+            'utilisateur_id': self.utilisateur_id,
+            'session_id': self.session_id,
+            'date_creation': self.date_creation.isoformat() if self.date_creation else None,
+            'date_modification': self.date_modification.isoformat() if self.date_modification else None,
+            'statut': self.statut,
+            'items': [item.to_dict() for item in self.items],
+            'total': self.calculer_total(),
+            'nombre_items': self.calculer_nombre_items()
+        }
+
+    def calculer_total(self) -> float:
+        """Calcule le total du panier"""
+        return sum(item.sous_total for item in self.items)
+
+    def calculer_nombre_items(self) -> int:
+        """Calcule le nombre total d'items dans le panier"""
+        return sum(item.quantite for item in self.items)
+
+    def ajouter_produit(self, produit_id: int, quantite: int = 1) -> PanierAnonymeItem:
+        """
+        Ajoute un produit au panier (quantité cumulée si le produit y est déjà)
+
+        Raises:
+            ValueError: Si le produit n'existe pas
+        """
+        from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+        etat = PanierAnonymeRepository().ajouter_item(self.session_id, produit_id, quantite)
+        if etat is None:
+            raise ValueError(f"Produit avec l'ID {produit_id} non trouvé")
+        self._charger(etat, self._produits())
+        return next(item for item in self.items if item.produit_id == produit_id)
+
+    def supprimer_produit(self, produit_id: int) -> bool:
+        """Supprime un produit du panier"""
+        from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+        return self._appliquer(PanierAnonymeRepository().supprimer_items(self.session_id, produit_id))
+
+    def modifier_quantite(self, produit_id: int, quantite: int) -> bool:
+        """Modifie la quantité d'un produit dans le panier"""
+        if quantite <= 0:
+            return self.supprimer_produit(produit_id)
+
+        from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+        return self._appliquer(PanierAnonymeRepository().modifier_item(self.session_id, produit_id, quantite))
+
+    def vider(self):
+        """Vide le panier"""
+        from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+        self._appliquer(PanierAnonymeRepository().supprimer_items(self.session_id))
+
+    def _appliquer(self, resultat) -> bool:
+        """Recharge l'état retourné par une écriture (trouve, état) ; retourne trouve"""
+        trouve, etat = resultat
+        self._charger(etat, self._produits())
+        return trouve
+
+    def _produits(self) -> Dict[int, Any]:
+        """Produits déjà résolus des articles, réutilisés au rechargement"""
+        return {item.produit_id: item._produit for item in self.items if item._produit is not None}
+
+    def __repr__(self):
+        return f'<PanierAnonyme {self.session_id} - {len(self.items)} article(s)>'
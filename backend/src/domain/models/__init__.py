@@ -7,5 +7,7 @@ from .produit import Produit
 from .commande import Commande
 from .ligne_commande import LigneCommande
 from .panier import Panier, PanierItem
+from .vente_journaliere import ClientJournalier, VenteJournaliere
 
-__all__ = ['Utilisateur', 'Produit', 'Commande', 'LigneCommande', 'Panier', 'PanierItem']
\ No newline at end of file
+__all__ = ['Utilisateur', 'Produit', 'Commande', 'LigneCommande', 'Panier', 'PanierItem', 'VenteJournaliere',
+           'ClientJournalier']
\ No newline at end of file
@@ -11,12 +11,23 @@ class Commande(db.Model):
     
     __tablename__ = 'commandes'
     
+    # Index des chemins d'accès fréquents (migration 0003_index_acces)
+    __table_args__ = (
+        db.Index('ix_commandes_utilisateur_id', 'utilisateur_id', 'id'),
+        db.Index('ix_commandes_statut', 'statut', 'id'),
+        db.Index('ix_commandes_date_commande', 'date_commande'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     utilisateur_id = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable=False)
     date_commande = db.Column(db.DateTime, default=datetime.utcnow)
     adresse_livraison = db.Column(db.String(500), nullable=False)
     statut = db.Column(db.String(20), nullable=False, default='en_attente')
     
+    # Dénormalisés : maintenus à chaque écriture de lignes (voir commande_repository)
+    total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    nombre_articles = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relations
     lignes_commande = db.relationship('LigneCommande', backref='commande', lazy=True, cascade='all, delete-orphan')
     
@@ -28,11 +39,13 @@ class Commande(db.Model):
             'date_commande': self.date_commande.isoformat() if self.date_commande else None,
             'adresse_livraison': self.adresse_livraison,
             'statut': self.statut,
+            'total': self.total,
+            'nombre_articles': self.nombre_articles,
             'lignes_commande': [ligne.to_dict() for ligne in self.lignes_commande]
         }
     
     def calculer_total(self):
-        """Calcule le total de la commande"""
+        """Calcule le total de la commande à partir de ses lignes (voir la colonne total)"""
         total = 0
         for ligne in self.lignes_commande:
             total += ligne.quantite * ligne.prix_unitaire
@@ -10,12 +10,23 @@ class LigneCommande(db.Model):
     
     __tablename__ = 'lignes_commande'
     
+    # Index des chemins d'accès fréquents (migration 0003_index_acces)
+    __table_args__ = (
+        db.Index('ix_lignes_commande_commande_id', 'commande_id'),
+        db.Index('ix_lignes_commande_produit_id', 'produit_id'),
+        db.Index('ix_lignes_commande_date_commande', 'date_commande'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     commande_id = db.Column(db.Integer, db.ForeignKey('commandes.id'), nullable=False)
     produit_id = db.Column(db.Integer, db.ForeignKey('produits.id'), nullable=False)
     quantite = db.Column(db.Integer, nullable=False)
     prix_unitaire = db.Column(db.Float, nullable=False)
     
+    # Copie de commandes.date_commande, renseignée à l'insertion : filtre par date
+    # sans jointure et clé de partitionnement sous PostgreSQL (voir partitioning)
+    date_commande = db.Column(db.DateTime, nullable=True)
+    
     def to_dict(self):
         """Convertit l'objet en dictionnaire pour l'API"""
         return {
@@ -5,6 +5,7 @@ Modèle Panier pour la gestion du panier d'achat
 from datetime import datetime
 from typing import Dict, List, Any
 from ...data.database.db import db
+from ...data.database.unit_of_work import commit
 
 
 class Panier(db.Model):
@@ -12,6 +13,20 @@ class Panier(db.Model):
     
     __tablename__ = 'paniers'
     
+    # Index des chemins d'accès fréquents (migration 0003_index_acces)
+    __table_args__ = (
+        db.Index('ix_paniers_utilisateur_statut', 'utilisateur_id', 'statut'),
+        db.Index('ix_paniers_session_statut', 'session_id', 'statut'),
+        db.Index('ix_paniers_abandonnes_modification', 'date_modification',
+                 postgresql_where=db.text("statut = 'abandonne'"), sqlite_where=db.text("statut = 'abandonne'")),
+        # Marquage des paniers inactifs (migration 0008_paniers_actifs_modification)
+        db.Index('ix_paniers_actifs_modification', 'date_modification',
+                 postgresql_where=db.text("statut = 'actif'"), sqlite_where=db.text("statut = 'actif'")),
+        # Un seul panier actif par session (migration 0010_paniers_session_actifs_uniques)
+        db.Index('uq_paniers_session_actif', 'session_id', unique=True,
+                 postgresql_where=db.text("statut = 'actif'"), sqlite_where=db.text("statut = 'actif'")),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     utilisateur_id = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable=True)
     session_id = db.Column(db.String(255), nullable=True)  # Pour les utilisateurs non connectés
@@ -46,47 +61,26 @@ class Panier(db.Model):
         return sum(item.quantite for item in self.items)
     
     def ajouter_produit(self, produit_id: int, quantite: int = 1) -> 'PanierItem':
-        """Ajoute un produit au panier"""
-        # Vérifier si le produit existe déjà dans le panier
-        item_existant = PanierItem.query.filter_by(
-            panier_id=self.id,
-            produit_id=produit_id
-        ).first()
+        """
+        Ajoute un produit au panier (quantité cumulée si le produit y est déjà)
         
-        if item_existant:
-            # Mettre à jour la quantité
-            item_existant.quantite += quantite
-            item_existant.date_modification = datetime.utcnow()
-        else:
-            # Créer un nouvel item
-            from ...domain.models.produit import Produit
-            produit = Produit.query.get(produit_id)
-            if not produit:
-                raise ValueError(f"Produit avec l'ID {produit_id} non trouvé")
-            
-            item_existant = PanierItem(
-                panier_id=self.id,
-                produit_id=produit_id,
-                quantite=quantite,
-                prix_unitaire=produit.prix
-            )
-            db.session.add(item_existant)
+        Une seule instruction INSERT ... ON CONFLICT, qui relit le prix du produit.
         
-        self.date_modification = datetime.utcnow()
-        db.session.commit()
-        return item_existant
+        Raises:
+            ValueError: Si le produit n'existe pas
+        """
+        from ...data.repositories.panier_repository import PanierRepository
+        item = PanierRepository().ajouter_item(self.id, produit_id, quantite)
+        if item is None:
+            raise ValueError(f"Produit avec l'ID {produit_id} non trouvé")
+        self._items_modifies()
+        return item
     
     def supprimer_produit(self, produit_id: int) -> bool:
         """Supprime un produit du panier"""
-        item = PanierItem.query.filter_by(
-            panier_id=self.id,
-            produit_id=produit_id
-        ).first()
-        
-        if item:
-            db.session.delete(item)
-            self.date_modification = datetime.utcnow()
-            db.session.commit()
+        from ...data.repositories.panier_repository import PanierRepository
+        if PanierRepository().supprimer_items(self.id, produit_id):
+            self._items_modifies()
             return True
         return False
     
@@ -95,25 +89,23 @@ class Panier(db.Model):
         if quantite <= 0:
             return self.supprimer_produit(produit_id)
         
-        item = PanierItem.query.filter_by(
-            panier_id=self.id,
-            produit_id=produit_id
-        ).first()
-        
-        if item:
-            item.quantite = quantite
-            item.date_modification = datetime.utcnow()
-            self.date_modification = datetime.utcnow()
-            db.session.commit()
+        from ...data.repositories.panier_repository import PanierRepository
+        if PanierRepository().modifier_item(self.id, produit_id, quantite):
+            self._items_modifies()
             return True
         return False
     
     def vider(self):
         """Vide le panier"""
-        for item in self.items:
-            db.session.delete(item)
-        self.date_modification = datetime.utcnow()
-        db.session.commit()
+        from ...data.repositories.panier_repository import PanierRepository
+        PanierRepository().supprimer_items(self.id)
+        self._items_modifies()
+    
+    def _items_modifies(self):
+        """Valide l'écriture des articles ; items et date de modification seront relus"""
+        commit()
+        if self in db.session:
+            db.session.expire(self, ['items', 'date_modification'])
     
     def __repr__(self):
         return f'<Panier {self.id} - Utilisateur {self.utilisateur_id}>'
@@ -124,6 +116,11 @@ class PanierItem(db.Model):
     
     __tablename__ = 'panier_items'
     
+    # Une seule ligne par produit et par panier (cible des INSERT ... ON CONFLICT)
+    __table_args__ = (
+        db.Index('uq_panier_items_panier_produit', 'panier_id', 'produit_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     panier_id = db.Column(db.Integer, db.ForeignKey('paniers.id'), nullable=False)
     produit_id = db.Column(db.Integer, db.ForeignKey('produits.id'), nullable=False)
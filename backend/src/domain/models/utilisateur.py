@@ -3,8 +3,8 @@ Modèle Utilisateur
 """
 
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from ...data.database.db import db
+from ...utils.password_hashing import password_hasher
 
 
 class Utilisateur(db.Model):
@@ -29,12 +29,16 @@ class Utilisateur(db.Model):
         self.role = role
     
     def set_password(self, password):
-        """Hache le mot de passe"""
-        self.mot_de_passe = generate_password_hash(password)
+        """Hache le mot de passe (pool de hachage, voir password_hashing)"""
+        self.mot_de_passe = password_hasher.hacher(password)
     
     def check_password(self, password):
-        """Vérifie le mot de passe"""
-        return check_password_hash(self.mot_de_passe, password)
+        """Vérifie le mot de passe (pool de hachage, voir password_hashing)"""
+        return password_hasher.verifier(self.mot_de_passe, password)
+    
+    def password_needs_rehash(self):
+        """Indique si le mot de passe a été haché avec une autre méthode ou un autre facteur de travail"""
+        return password_hasher.doit_rehacher(self.mot_de_passe)
     
     def to_dict(self):
         """Convertit l'objet en dictionnaire pour l'API"""
@@ -0,0 +1,67 @@
+"""
+Modèle VenteJournaliere (agrégat quotidien des ventes)
+"""
+
+from ...data.database.db import db
+
+# Catégorie de la ligne « toutes catégories » d'un jour
+TOUTES_CATEGORIES = ''
+
+
+class VenteJournaliere(db.Model):
+    """
+    Ventes d'une journée, toutes catégories confondues ou pour une catégorie
+    
+    Table dérivée des commandes, tenue à jour par deltas à chaque écriture
+    (voir vente_journaliere_repository) : les graphiques et rapports par jour
+    lisent une ligne par jour au lieu de parcourir les commandes.
+    """
+    
+    __tablename__ = 'daily_sales'
+    
+    jour = db.Column(db.Date, primary_key=True)
+    categorie = db.Column(db.String(100), primary_key=True, default=TOUTES_CATEGORIES)
+    commandes = db.Column(db.Integer, nullable=False, default=0)
+    commandes_avec_articles = db.Column(db.Integer, nullable=False, default=0)
+    articles = db.Column(db.Integer, nullable=False, default=0)
+    chiffre_affaires = db.Column(db.Float, nullable=False, default=0.0)
+    clients = db.Column(db.Integer, nullable=False, default=0)
+    commandes_annulees = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convertit l'objet en dictionnaire pour l'API"""
+        return {
+            'date': self.jour.isoformat() if self.jour else None,
+            'categorie': self.categorie or None,
+            'commandes': self.commandes,
+            'commandes_avec_articles': self.commandes_avec_articles,
+            'articles': self.articles,
+            'chiffre_affaires': self.chiffre_affaires,
+            'clients': self.clients,
+            'commandes_annulees': self.commandes_annulees
+        }
+    
+    def __repr__(self):
+        return f'<VenteJournaliere {self.jour} {self.categorie or "*"}>'
+
+
+
+class ClientJournalier(db.Model):
+    """
+    Commandes d'un client comptées dans une ligne de daily_sales
+    
+    Compteur de référence de la colonne clients (nombre de clients distincts) :
+    le client est compté quand son compteur passe à 1, décompté quand il
+    retombe à 0 (ligne supprimée). Un client qui commande plusieurs fois dans la
+    journée ne relit donc pas les commandes du jour.
+    """
+    
+    __tablename__ = 'daily_sales_clients'
+    
+    jour = db.Column(db.Date, primary_key=True)
+    categorie = db.Column(db.String(100), primary_key=True, default=TOUTES_CATEGORIES)
+    utilisateur_id = db.Column(db.Integer, primary_key=True)
+    commandes = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ClientJournalier {self.jour} {self.categorie or "*"} {self.utilisateur_id}>'
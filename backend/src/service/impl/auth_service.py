@@ -2,24 +2,84 @@
 Service d'authentification
 """
 
+import hashlib
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import jwt
 from flask import current_app
+from ...data.database.cache import TTLCache
+from ...data.database.db import db
+from ...data.database.unit_of_work import commit
 from ...data.repositories.utilisateur_repository import UtilisateurRepository
 from ...domain.models.utilisateur import Utilisateur
+from ...utils.password_hashing import password_hasher
+from .jwt_keys import jwt_keyring
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
 
+# Claims des tokens déjà vérifiés, par empreinte SHA-256 du token (voir verify_claims)
+token_cache = TTLCache('tokens', maxsize=4096, ttl=300.0)
+
+
+def verify_claims(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Vérifie un token JWT et retourne ses claims (user_id, email, role, exp)
+    
+    Les claims d'un token valide sont mémorisés dans token_cache, par
+    empreinte du token (le token lui-même n'est pas conservé), au plus
+    TOKEN_CACHE_TTL secondes et jamais au-delà de son expiration : un token
+    déjà vu n'est ni décodé ni vérifié de nouveau. Seul le kid de sa clé est
+    recontrôlé : un token signé par une clé retirée de JWT_KEYS_DIR est refusé
+    dès le rechargement des clés. Les tokens refusés ne sont pas mémorisés.
+    
+    Args:
+        token: Token JWT à vérifier
+        
+    Returns:
+        Les claims du token, ou None s'il est invalide ou expiré
+    """
+    cle = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    en_cache = token_cache.get(cle)
+    if en_cache is not None:
+        kid, claims = en_cache
+        if jwt_keyring.accepte(kid):
+            return claims
+        token_cache.invalidate(cle)
+        return None
+    
+    # Clé désignée par le kid de l'en-tête (secret partagé en HS256)
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+        cle_publique = jwt_keyring.cle_de_verification(kid)
+        if cle_publique is None:
+            return None
+        payload = jwt.decode(token, cle_publique, algorithms=[jwt_keyring.algorithm])
+    except jwt.InvalidTokenError:
+        # Inclut ExpiredSignatureError
+        return None
+    
+    if not payload.get('user_id'):
+        return None
+    
+    claims = {
+        'user_id': payload['user_id'],
+        'email': payload.get('email'),
+        'role': payload.get('role'),
+        'exp': payload.get('exp')
+    }
+    restant = claims['exp'] - time.time() if claims['exp'] is not None else None
+    token_cache.set(cle, (kid, claims), ttl=restant)
+    return claims
+
 
 class AuthService:
     """Service pour la gestion de l'authentification"""
     
     def __init__(self):
         self.utilisateur_repo = UtilisateurRepository()
-        self.secret_key = current_app.config.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
         self.jwt_expiration = current_app.config.get('JWT_EXPIRATION', 3600)  # 1 heure par défaut
     
     def register_user(self, email: str, mot_de_passe: str, nom: str, role: str = 'client') -> Dict[str, Any]:
@@ -105,9 +165,21 @@ class AuthService:
         
         logger.info(f"Authentification réussie pour: {email}")
         
-        # Générer le token JWT
+        # Méthode ou facteur de travail changés depuis le hachage : hacher de nouveau
+        if utilisateur.password_needs_rehash():
+            self._rehash_password(utilisateur, mot_de_passe)
+        
+        return self.issue_token(utilisateur)
+    
+    def issue_token(self, utilisateur: Utilisateur) -> Dict[str, Any]:
+        """
+        Génère la réponse de connexion (token JWT) d'un utilisateur déjà authentifié
+        
+        Utilisé après l'inscription : le mot de passe qui vient d'être haché
+        n'est pas vérifié une seconde fois.
+        """
         token = self._generate_jwt_token(utilisateur)
-        logger.info(f"Token JWT généré pour: {email}")
+        logger.info(f"Token JWT généré pour: {utilisateur.email}")
         
         return {
             'success': True,
@@ -118,6 +190,18 @@ class AuthService:
             'utilisateur': utilisateur.to_dict()
         }
     
+    def _rehash_password(self, utilisateur: Utilisateur, mot_de_passe: str):
+        """Remplace le hachage d'un mot de passe par un hachage aux paramètres configurés"""
+        try:
+            utilisateur.set_password(mot_de_passe)
+            commit()
+            password_hasher.compter_rehachage()
+            logger.info(f"Mot de passe haché de nouveau pour: {utilisateur.email}")
+        except Exception as e:
+            # La connexion n'échoue pas : le hachage sera refait à la prochaine connexion
+            db.session.rollback()
+            logger.warning(f"Nouveau hachage du mot de passe impossible pour {utilisateur.email}: {e}")
+    
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
         Vérifie et décode un token JWT
@@ -128,30 +212,21 @@ class AuthService:
         Returns:
             Dict contenant les informations de l'utilisateur ou None si invalide
         """
-        try:
-            # Décoder le token
-            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
-            
-            # Récupérer l'utilisateur
-            user_id = payload.get('user_id')
-            if not user_id:
-                return None
-            
-            utilisateur = self.utilisateur_repo.get_by_id(user_id)
-            if not utilisateur:
-                return None
-            
-            return {
-                'user_id': user_id,
-                'email': payload.get('email'),
-                'role': payload.get('role'),
-                'user': utilisateur.to_dict()
-            }
-            
-        except jwt.ExpiredSignatureError:
+        claims = verify_claims(token)
+        if not claims:
             return None
-        except jwt.InvalidTokenError:
+        
+        # Récupérer l'utilisateur
+        utilisateur = self.utilisateur_repo.get_by_id(claims['user_id'])
+        if not utilisateur:
             return None
+        
+        return {
+            'user_id': claims['user_id'],
+            'email': claims['email'],
+            'role': claims['role'],
+            'user': utilisateur.to_dict()
+        }
     
     def get_user_by_token(self, token: str) -> Optional[Utilisateur]:
         """
@@ -188,8 +263,9 @@ class AuthService:
             'iat': datetime.utcnow()
         }
         
-        # Encoder le token
-        return jwt.encode(payload, self.secret_key, algorithm='HS256')
+        # Encoder le token (clé active et son kid en RS256/EdDSA)
+        cle, en_tetes = jwt_keyring.cle_de_signature()
+        return jwt.encode(payload, cle, algorithm=jwt_keyring.algorithm, headers=en_tetes or None)
     
     def refresh_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
@@ -5,6 +5,7 @@ Implémentation du service commande
 from typing import List, Optional, Dict, Any
 from ...domain.models import Commande
 from ...data.repositories import CommandeRepository
+from ...data.repositories.pagination import Page, PageRequest
 from ..interfaces.commande_service import ICommandeService
 
 
@@ -18,6 +19,10 @@ class CommandeService(ICommandeService):
         """Récupère toutes les commandes"""
         return self.repository.get_all()
     
+    def get_orders_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de commandes"""
+        return self.repository.get_page(page_request)
+    
     def get_order_by_id(self, order_id: int) -> Optional[Commande]:
         """Récupère une commande par son ID"""
         return self.repository.get_by_id(order_id)
@@ -39,18 +44,24 @@ class CommandeService(ICommandeService):
         """Récupère les commandes d'un utilisateur"""
         return self.repository.get_by_utilisateur(user_id)
     
+    def get_orders_by_user_page(self, user_id: int, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes d'un utilisateur"""
+        return self.repository.get_page_by_utilisateur(user_id, page_request)
+    
     def get_orders_by_status(self, status: str) -> List[Commande]:
         """Récupère les commandes par statut"""
         return self.repository.get_by_statut(status)
     
+    def get_orders_by_status_page(self, status: str, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes par statut"""
+        return self.repository.get_page_by_statut(status, page_request)
+    
     def update_order_status(self, order_id: int, status: str) -> bool:
         """Met à jour le statut d'une commande"""
         return self.repository.update_statut(order_id, status)
     
     def calculate_order_total(self, order_id: int) -> float:
-        """Calcule le total d'une commande"""
-        order = self.get_order_by_id(order_id)
-        if order:
-            return order.calculer_total()
-        return 0.0
+        """Total d'une commande (0.0 si elle n'existe pas)"""
+        total = self.repository.get_total(order_id)
+        return total if total is not None else 0.0
 
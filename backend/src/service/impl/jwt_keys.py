@@ -0,0 +1,223 @@
+"""
+Clés de signature des tokens JWT
+
+HS256 (défaut) : secret partagé JWT_SECRET_KEY, seul le backend peut vérifier
+un token. RS256 ou EdDSA (JWT_ALGORITHM) : les tokens sont signés par une clé
+privée, et toute application qui connaît la clé publique les vérifie.
+Les clés publiques sont publiées au format JWKS (GET /api/auth/jwks) : le
+frontend et les sidecars vérifient les tokens localement, sans appeler
+/api/auth/verify.
+
+Rotation : JWT_KEYS_DIR contient une clé privée PEM par fichier, <kid>.pem.
+La clé JWT_ACTIVE_KID signe (à défaut, le dernier kid par ordre alphabétique) ;
+toutes sont publiées et acceptées en vérification. Pour changer de clé :
+en ajouter une (flask jwt generate-key), la rendre active, puis retirer
+l'ancienne une fois ses tokens expirés (JWT_EXPIRATION).
+
+Les clés lues sont gardées JWT_KEYS_RELOAD_INTERVAL secondes, puis le
+répertoire est relu : une clé ajoutée par un autre worker est prise en compte,
+et une clé retirée (compromise) cesse d'être acceptée et publiée, sans
+redémarrage (les tokens déjà vérifiés et mémorisés compris, voir verify_claims).
+Au démarrage, toute clé illisible est une erreur ; lors d'un rechargement, un
+fichier illisible (en cours d'écriture, d'un autre type) est ignoré, et un
+répertoire inutilisable laisse en service les dernières clés lues.
+
+    flask jwt generate-key [--kid 20240101]
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import click
+import jwt
+from flask import current_app
+from flask.cli import AppGroup
+
+logger = logging.getLogger(__name__)
+
+# Algorithmes à clé publique : JWT_KEYS_DIR requis, clés publiées dans le JWKS
+ALGORITHMES_ASYMETRIQUES = ('RS256', 'EdDSA')
+
+
+class JwtKeyring:
+    """Clés de signature et de vérification des tokens, avec leur cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cles: Dict[str, Any] = {}
+        self._repertoire: Optional[str] = None
+        self._charge_a = 0.0
+
+    @property
+    def algorithm(self) -> str:
+        return current_app.config.get('JWT_ALGORITHM', 'HS256')
+
+    @property
+    def asymetrique(self) -> bool:
+        return self.algorithm in ALGORITHMES_ASYMETRIQUES
+
+    def configure(self, app):
+        """
+        Valide la configuration et charge les clés (dès le démarrage : une clé
+        manquante ou illisible empêche l'application de démarrer)
+
+        Raises:
+            ValueError: Algorithme inconnu, JWT_KEYS_DIR absent ou vide, clé
+                d'un type incompatible avec l'algorithme
+        """
+        algorithm = app.config.get('JWT_ALGORITHM', 'HS256')
+        if algorithm != 'HS256' and algorithm not in ALGORITHMES_ASYMETRIQUES:
+            raise ValueError(f"JWT_ALGORITHM inconnu: {algorithm}")
+
+        with self._lock:
+            self._cles, self._repertoire, self._charge_a = {}, None, 0.0
+        if algorithm in ALGORITHMES_ASYMETRIQUES:
+            with app.app_context():
+                self._recharger(strict=True)
+                self.cle_de_signature()
+
+    def cle_de_signature(self) -> Tuple[Any, Dict[str, str]]:
+        """Clé et en-têtes (kid) pour signer un nouveau token"""
+        if not self.asymetrique:
+            return self._secret(), {}
+
+        cles = self._cles_chargees()
+        kid = current_app.config.get('JWT_ACTIVE_KID') or max(cles)
+        if kid not in cles:
+            cles = self._recharger()
+        if kid not in cles:
+            raise ValueError(f"Clé de signature {kid} absente de {self._repertoire}")
+        return cles[kid], {'kid': kid}
+
+    def cle_de_verification(self, kid: Optional[str]) -> Optional[Any]:
+        """Clé vérifiant les tokens signés par `kid`, None si elle est inconnue"""
+        if not self.asymetrique:
+            return self._secret()
+
+        cle = self._cles_chargees().get(kid)
+        return cle.public_key() if cle is not None else None
+
+    def accepte(self, kid: Optional[str]) -> bool:
+        """Indique si les tokens signés par `kid` sont encore acceptés (toujours en HS256)"""
+        return not self.asymetrique or kid in self._cles_chargees()
+
+    def jwks(self) -> Dict[str, Any]:
+        """Clés publiques au format JWKS (vide en HS256 : le secret n'est jamais publié)"""
+        if not self.asymetrique:
+            return {'keys': []}
+
+        algorithme = jwt.get_algorithm_by_name(self.algorithm)
+        return {'keys': [
+            dict(algorithme.to_jwk(cle.public_key(), as_dict=True), kid=kid, alg=self.algorithm, use='sig')
+            for kid, cle in sorted(self._cles_chargees().items())
+        ]}
+
+    def _secret(self) -> str:
+        return current_app.config.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
+
+    def _cles_chargees(self) -> Dict[str, Any]:
+        """Clés en cache, relues une fois JWT_KEYS_RELOAD_INTERVAL écoulé"""
+        with self._lock:
+            if (self._cles and self._repertoire == current_app.config.get('JWT_KEYS_DIR')
+                    and not self._peut_recharger()):
+                return self._cles
+        return self._recharger()
+
+    def _peut_recharger(self) -> bool:
+        intervalle = current_app.config.get('JWT_KEYS_RELOAD_INTERVAL', 60)
+        return time.monotonic() - self._charge_a >= intervalle
+
+    def _recharger(self, strict: bool = False) -> Dict[str, Any]:
+        """
+        Relit les clés privées de JWT_KEYS_DIR
+
+        Sauf au démarrage (strict), un répertoire absent ou sans clé lisible
+        laisse en service les dernières clés lues de ce répertoire : l'erreur est
+        journalisée et le répertoire n'est relu qu'à l'intervalle suivant.
+
+        Raises:
+            ValueError: Répertoire ou clé inutilisable (strict, ou aucune clé
+                encore lue dans ce répertoire)
+        """
+        repertoire = current_app.config.get('JWT_KEYS_DIR')
+        try:
+            cles = self._lire(repertoire, strict)
+        except ValueError as e:
+            with self._lock:
+                if strict or not self._cles or self._repertoire != repertoire:
+                    raise
+                logger.error(f"Clés JWT non rechargées, dernières clés lues conservées: {e}")
+                self._charge_a = time.monotonic()
+                return self._cles
+
+        with self._lock:
+            self._cles, self._repertoire, self._charge_a = cles, repertoire, time.monotonic()
+        return cles
+
+    def _lire(self, repertoire: Optional[str], strict: bool) -> Dict[str, Any]:
+        """Clés <kid>.pem du répertoire (un fichier illisible est ignoré sauf en strict)"""
+        from cryptography.exceptions import UnsupportedAlgorithm
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+        if not repertoire or not os.path.isdir(repertoire):
+            raise ValueError(f"JWT_KEYS_DIR requis pour {self.algorithm}: {repertoire!r}")
+
+        type_attendu = rsa.RSAPrivateKey if self.algorithm == 'RS256' else ed25519.Ed25519PrivateKey
+        cles = {}
+        for fichier in sorted(os.listdir(repertoire)):
+            kid, extension = os.path.splitext(fichier)
+            if extension != '.pem':
+                continue
+            try:
+                with open(os.path.join(repertoire, fichier), 'rb') as pem:
+                    cle = load_pem_private_key(pem.read(), password=None)
+                if not isinstance(cle, type_attendu):
+                    raise ValueError(f"La clé {fichier} ne convient pas à {self.algorithm}")
+            except (OSError, TypeError, ValueError, UnsupportedAlgorithm) as e:
+                if strict:
+                    raise ValueError(f"Clé {fichier} illisible: {e}") from e
+                logger.warning(f"Clé JWT {fichier} ignorée: {e}")
+                continue
+            cles[kid] = cle
+        if not cles:
+            raise ValueError(f"Aucune clé (<kid>.pem) dans {repertoire}")
+        return cles
+
+
+# Clés du processus, configurées par create_app
+jwt_keyring = JwtKeyring()
+
+
+jwt_cli = AppGroup('jwt', help="Clés de signature des tokens")
+
+
+@jwt_cli.command('generate-key')
+@click.option('--kid', default=None, help="Identifiant de la clé (défaut : date et heure UTC)")
+def generate_key_command(kid):
+    """Crée une clé privée JWT_ALGORITHM dans JWT_KEYS_DIR (à activer avec JWT_ACTIVE_KID)"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    algorithm = current_app.config.get('JWT_ALGORITHM', 'HS256')
+    repertoire = current_app.config.get('JWT_KEYS_DIR')
+    if algorithm not in ALGORITHMES_ASYMETRIQUES or not repertoire:
+        raise click.ClickException("JWT_ALGORITHM (RS256 ou EdDSA) et JWT_KEYS_DIR sont requis")
+
+    kid = kid or datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    chemin = os.path.join(repertoire, f"{kid}.pem")
+    if os.path.exists(chemin):
+        raise click.ClickException(f"La clé {chemin} existe déjà")
+
+    cle = (rsa.generate_private_key(public_exponent=65537, key_size=2048) if algorithm == 'RS256'
+           else ed25519.Ed25519PrivateKey.generate())
+    os.makedirs(repertoire, exist_ok=True)
+    descripteur = os.open(chemin, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descripteur, 'wb') as pem:
+        pem.write(cle.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption()))
+    click.echo(f"Clé {kid} créée ({algorithm}) : publiée au prochain rechargement, "
+               f"à activer avec JWT_ACTIVE_KID={kid}")
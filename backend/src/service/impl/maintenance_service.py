@@ -8,10 +8,20 @@ import time
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
+from flask import current_app
+from sqlalchemy import text
 from ...data.database.db import db
+from ...data.database.cache import caches
+from ...data.database.cart_store import get_cart_store
+from ...data.database.instrumentation import metrics
+from ...data.database.partitioning import is_partitioned, list_partitions, maintain_partitions
+from ...data.database.slow_query_log import slow_queries
 from ...data.repositories.utilisateur_repository import UtilisateurRepository
 from ...data.repositories.produit_repository import ProduitRepository
+from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
 from ...data.repositories.commande_repository import CommandeRepository
+from ...utils.password_hashing import password_hasher
+from .paniers_abandonnes_job import paniers_abandonnes_job
 
 class MaintenanceService:
     """Service pour la maintenance du système"""
@@ -134,11 +144,12 @@ class MaintenanceService:
         """Redémarre le cache"""
         try:
             # Nettoyer le cache
-            self._cleanup_cache()
+            cleared = self._cleanup_cache()
             
             return {
                 "success": True,
                 "message": "Cache redémarré avec succès",
+                "cleared_entries": cleared,
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -164,6 +175,79 @@ class MaintenanceService:
             self.logger.error(f"Erreur lors de la récupération des logs: {str(e)}")
             raise Exception(f"Erreur lors de la récupération des logs: {str(e)}")
     
+    def get_slow_queries(self, limit: int = 20) -> Dict[str, Any]:
+        """Requêtes lentes les plus coûteuses (temps cumulé), avec leur plan d'exécution"""
+        try:
+            return {
+                "threshold_ms": slow_queries.threshold_ms,
+                "recorded": slow_queries.count(),
+                "capacity": slow_queries.size,
+                "queries": slow_queries.top(limit)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la récupération des requêtes lentes: {str(e)}")
+            raise Exception(f"Erreur lors de la récupération des requêtes lentes: {str(e)}")
+    
+    def clear_slow_queries(self) -> Dict[str, Any]:
+        """Vide le journal des requêtes lentes"""
+        slow_queries.clear()
+        return {
+            "success": True,
+            "message": "Journal des requêtes lentes vidé",
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def get_partitions(self) -> Dict[str, Any]:
+        """Partitions mensuelles des commandes et des lignes (PostgreSQL partitionné uniquement)"""
+        connection = db.session.connection()
+        return {
+            "enabled": is_partitioned(connection),
+            "partitions": list_partitions(connection)
+        }
+    
+    def maintain_partitions(self) -> Dict[str, Any]:
+        """Crée les partitions des prochains mois et archive celles qui dépassent la rétention"""
+        connection = db.session.connection()
+        if not is_partitioned(connection):
+            return {
+                "success": False,
+                "message": "Les commandes ne sont pas partitionnées (PostgreSQL, flask partitions enable)"
+            }
+        
+        try:
+            result = maintain_partitions(
+                connection,
+                current_app.config['PARTITIONS_AHEAD_MONTHS'],
+                current_app.config['PARTITIONS_RETENTION_MONTHS'],
+                current_app.config['PARTITIONS_ARCHIVE_SCHEMA']
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Erreur lors de la maintenance des partitions: {str(e)}")
+            raise Exception(f"Erreur lors de la maintenance des partitions: {str(e)}")
+        
+        return {
+            "success": True,
+            "message": f"{len(result['created'])} partitions créées, {len(result['detached'])} détachées",
+            **result,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def get_abandoned_carts_job(self) -> Dict[str, Any]:
+        """Progression de la dernière exécution du cycle de vie des paniers"""
+        return paniers_abandonnes_job.progression()
+    
+    def start_abandoned_carts_job(self, **options) -> Dict[str, Any]:
+        """Lance en arrière-plan le marquage des paniers inactifs puis la purge des abandonnés"""
+        started = paniers_abandonnes_job.demarrer(current_app._get_current_object(), **options)
+        return {
+            "success": started,
+            "message": "Cycle de vie des paniers lancé" if started else "Cycle de vie des paniers déjà en cours",
+            "data": paniers_abandonnes_job.progression()
+        }
+    
     def health_check(self) -> Dict[str, Any]:
         """Vérifie la santé du système"""
         try:
@@ -303,10 +387,37 @@ class MaintenanceService:
         return 0
     
     def _cleanup_cache(self) -> int:
-        """Nettoie le cache"""
-        # En production, cela nettoierait le vrai cache
-        # Pour l'instant, on simule
-        return 0
+        """Vide les caches du processus ; retourne le nombre d'entrées retirées"""
+        return sum(cache.clear() for cache in caches.values())
+    
+    def get_cache_stats(self) -> List[Dict[str, Any]]:
+        """Compteurs des caches du processus (succès, échecs, évictions, invalidations) et du magasin des paniers"""
+        stats = [cache.stats() for cache in caches.values()]
+        store = get_cart_store()
+        if store is not None:
+            stats.append(store.stats())
+        return stats
+    
+    def get_password_hashing_stats(self) -> Dict[str, Any]:
+        """Configuration, profondeur de file et compteurs du pool de hachage des mots de passe"""
+        return password_hasher.stats()
+    
+    def persist_cart_store(self) -> Dict[str, Any]:
+        """Écrit en base les paniers anonymes modifiés (écriture différée immédiate)"""
+        store = get_cart_store()
+        if store is None:
+            return {
+                "success": True,
+                "message": "Paniers anonymes déjà écrits en base (CART_STORE_BACKEND = database)",
+                "data": {"paniers_ecrits": 0}
+            }
+        
+        ecrits = PanierAnonymeRepository(store).persister_paniers_modifies()
+        return {
+            "success": True,
+            "message": f"{ecrits} panier(s) anonyme(s) écrit(s) en base",
+            "data": {"paniers_ecrits": ecrits, "magasin": store.stats()}
+        }
     
     def _get_system_metrics(self) -> Dict[str, Any]:
         """Récupère les métriques système"""
@@ -326,31 +437,52 @@ class MaintenanceService:
             }
     
     def _get_database_metrics(self) -> Dict[str, Any]:
-        """Récupère les métriques de la base de données"""
+        """Récupère les métriques de la base de données (mesurées par l'instrumentation)"""
         try:
-            # En production, cela récupérerait les vraies métriques de la DB
+            snapshot = metrics.snapshot()
             return {
-                "connection_count": 1,
-                "query_count": 0,
-                "avg_query_time": 0.0,
-                "cache_hit_ratio": 0.95
+                "connection_count": self._get_checked_out_connections(),
+                "query_count": snapshot["totals"]["queries"],
+                "avg_query_time": snapshot["totals"]["avg_query_time_ms"],
+                "avg_queries_per_request": snapshot["totals"]["avg_queries_per_request"],
+                "cache_hit_ratio": self._get_cache_hit_ratio(),
+                "endpoints": snapshot["endpoints"]
             }
         except Exception:
             return {
                 "connection_count": 0,
                 "query_count": 0,
                 "avg_query_time": 0.0,
-                "cache_hit_ratio": 0.0
+                "avg_queries_per_request": 0.0,
+                "cache_hit_ratio": None,
+                "endpoints": []
             }
     
+    def _get_checked_out_connections(self) -> int:
+        """Connexions actuellement empruntées au pool"""
+        checkedout = getattr(db.engine.pool, 'checkedout', None)
+        return checkedout() if checkedout else 0
+    
+    def _get_cache_hit_ratio(self) -> Optional[float]:
+        """Taux de lecture des blocs depuis le cache PostgreSQL (None pour les autres bases)"""
+        if db.engine.dialect.name != 'postgresql':
+            return None
+        ratio = db.session.execute(text(
+            "SELECT sum(blks_hit)::float / nullif(sum(blks_hit) + sum(blks_read), 0) "
+            "FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+        return round(ratio, 4) if ratio is not None else None
+    
     def _get_application_metrics(self) -> Dict[str, Any]:
         """Récupère les métriques de l'application"""
         try:
+            snapshot = metrics.snapshot()
             return {
-                "active_requests": 0,
-                "total_requests": 0,
-                "error_rate": 0.0,
-                "response_time_avg": 0.0
+                "active_requests": snapshot["active_requests"],
+                "total_requests": snapshot["totals"]["requests"],
+                "error_rate": snapshot["totals"]["error_rate"],
+                "response_time_avg": snapshot["totals"]["avg_response_time_ms"],
+                "caches": self.get_cache_stats()
             }
         except Exception:
             return {
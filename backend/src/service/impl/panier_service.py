@@ -4,8 +4,12 @@ Implémentation du service panier
 
 from typing import List, Optional, Dict, Any
 from ...domain.models.panier import Panier, PanierItem
+from ...data.repositories.commande_repository import CommandeRepository
 from ...data.repositories.panier_repository import PanierRepository
-from ...domain.models.produit import Produit
+from ...data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+from ...data.repositories.produit_repository import ProduitRepository
+from ...data.database.cart_store import get_cart_store
+from ...data.database.unit_of_work import transaction
 
 
 class PanierService:
@@ -13,6 +17,15 @@ class PanierService:
     
     def __init__(self):
         self.repository = PanierRepository()
+        self.produits = ProduitRepository()
+    
+    def _paniers_session(self):
+        """
+        Repository des paniers de session : le magasin des paniers anonymes
+        s'il est activé (CART_STORE_BACKEND), sinon la base
+        """
+        store = get_cart_store()
+        return PanierAnonymeRepository(store) if store is not None else self.repository
     
     def get_panier_utilisateur(self, utilisateur_id: int) -> Optional[Panier]:
         """Récupère le panier d'un utilisateur"""
@@ -20,24 +33,23 @@ class PanierService:
     
     def get_panier_session(self, session_id: str) -> Optional[Panier]:
         """Récupère le panier d'une session"""
-        return self.repository.get_ou_creer_panier_session(session_id)
+        return self._paniers_session().get_ou_creer_panier_session(session_id)
     
     def ajouter_produit_utilisateur(self, utilisateur_id: int, produit_id: int, quantite: int = 1) -> Dict[str, Any]:
         """Ajoute un produit au panier d'un utilisateur"""
         try:
             # Vérifier que le produit existe et est en stock
-            produit = Produit.query.get(produit_id)
+            produit = self.produits.get_cached(produit_id)
             if not produit:
                 return {'success': False, 'message': 'Produit non trouvé'}
             
             if produit.quantite_stock < quantite:
                 return {'success': False, 'message': f'Stock insuffisant. Disponible: {produit.quantite_stock}'}
             
-            # Récupérer ou créer le panier
-            panier = self.repository.get_ou_creer_panier_utilisateur(utilisateur_id)
-            
-            # Ajouter le produit
-            item = panier.ajouter_produit(produit_id, quantite)
+            # Création éventuelle du panier et ajout validés ensemble
+            with transaction():
+                panier = self.repository.get_ou_creer_panier_utilisateur(utilisateur_id)
+                item = panier.ajouter_produit(produit_id, quantite)
             
             return {
                 'success': True,
@@ -53,18 +65,17 @@ class PanierService:
         """Ajoute un produit au panier d'une session"""
         try:
             # Vérifier que le produit existe et est en stock
-            produit = Produit.query.get(produit_id)
+            produit = self.produits.get_cached(produit_id)
             if not produit:
                 return {'success': False, 'message': 'Produit non trouvé'}
             
             if produit.quantite_stock < quantite:
                 return {'success': False, 'message': f'Stock insuffisant. Disponible: {produit.quantite_stock}'}
             
-            # Récupérer ou créer le panier
-            panier = self.repository.get_ou_creer_panier_session(session_id)
-            
-            # Ajouter le produit
-            item = panier.ajouter_produit(produit_id, quantite)
+            # Création éventuelle du panier et ajout validés ensemble
+            with transaction():
+                panier = self._paniers_session().get_ou_creer_panier_session(session_id)
+                item = panier.ajouter_produit(produit_id, quantite)
             
             return {
                 'success': True,
@@ -99,7 +110,7 @@ class PanierService:
     def supprimer_produit_session(self, session_id: str, produit_id: int) -> Dict[str, Any]:
         """Supprime un produit du panier d'une session"""
         try:
-            panier = self.repository.get_panier_session(session_id)
+            panier = self._paniers_session().get_panier_session(session_id)
             if not panier:
                 return {'success': False, 'message': 'Panier non trouvé'}
             
@@ -125,7 +136,7 @@ class PanierService:
             
             # Vérifier le stock si on augmente la quantité
             if quantite > 0:
-                produit = Produit.query.get(produit_id)
+                produit = self.produits.get_cached(produit_id)
                 if not produit:
                     return {'success': False, 'message': 'Produit non trouvé'}
                 
@@ -158,13 +169,13 @@ class PanierService:
     def modifier_quantite_session(self, session_id: str, produit_id: int, quantite: int) -> Dict[str, Any]:
         """Modifie la quantité d'un produit dans le panier d'une session"""
         try:
-            panier = self.repository.get_panier_session(session_id)
+            panier = self._paniers_session().get_panier_session(session_id)
             if not panier:
                 return {'success': False, 'message': 'Panier non trouvé'}
             
             # Vérifier le stock si on augmente la quantité
             if quantite > 0:
-                produit = Produit.query.get(produit_id)
+                produit = self.produits.get_cached(produit_id)
                 if not produit:
                     return {'success': False, 'message': 'Produit non trouvé'}
                 
@@ -214,7 +225,7 @@ class PanierService:
     def vider_panier_session(self, session_id: str) -> Dict[str, Any]:
         """Vide le panier d'une session"""
         try:
-            panier = self.repository.get_panier_session(session_id)
+            panier = self._paniers_session().get_panier_session(session_id)
             if not panier:
                 return {'success': False, 'message': 'Panier non trouvé'}
             
@@ -231,7 +242,7 @@ class PanierService:
     def migrer_panier_session_vers_utilisateur(self, session_id: str, utilisateur_id: int) -> Dict[str, Any]:
         """Migre un panier de session vers un utilisateur"""
         try:
-            panier = self.repository.migrer_panier_session_vers_utilisateur(session_id, utilisateur_id)
+            panier = self._paniers_session().migrer_panier_session_vers_utilisateur(session_id, utilisateur_id)
             return {
                 'success': True,
                 'message': 'Panier migré avec succès',
@@ -240,25 +251,66 @@ class PanierService:
         except Exception as e:
             return {'success': False, 'message': f'Erreur lors de la migration: {str(e)}'}
     
-    def get_resume_panier_utilisateur(self, utilisateur_id: int) -> Dict[str, Any]:
-        """Récupère le résumé du panier d'un utilisateur"""
-        panier = self.repository.get_panier_utilisateur(utilisateur_id)
-        if not panier:
+    def valider_commande_utilisateur(self, utilisateur_id: int, adresse_livraison: str) -> Dict[str, Any]:
+        """
+        Transforme le panier d'un utilisateur en commande, en une seule transaction
+        
+        Le panier est marqué converti, le stock de chaque produit réservé
+        (UPDATE conditionnels), la commande créée avec ses lignes au prix
+        courant du catalogue. Si une étape échoue (panier vide, stock
+        insuffisant), rien n'est écrit et le panier reste actif.
+        """
+        if not adresse_livraison or not str(adresse_livraison).strip():
+            return {'success': False, 'message': 'Adresse de livraison requise'}
+        
+        try:
+            with transaction():
+                converti = self.repository.convertir_panier_actif_utilisateur(utilisateur_id)
+                if converti is None or not converti[1]:
+                    raise ValueError('Panier vide')
+                
+                panier_id, quantites = converti
+                echecs = self.produits.reserver_stock(quantites)
+                if echecs:
+                    raise ValueError(f'Stock insuffisant pour les produits: {echecs}')
+                
+                commande = CommandeRepository().create_commande(utilisateur_id, adresse_livraison, [
+                    {'produit_id': produit_id, 'quantite': quantite} for produit_id, quantite in quantites.items()
+                ])
+            
             return {
-                'nombre_items': 0,
-                'total': 0.0,
-                'items': []
+                'success': True,
+                'message': 'Commande créée',
+                'panier_id': panier_id,
+                'commande': commande.to_dict()
             }
+            
+        except ValueError as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            return {'success': False, 'message': f'Erreur lors de la validation de la commande: {str(e)}'}
+    
+    def get_resume_panier_utilisateur(self, utilisateur_id: int, details: bool = False) -> Dict[str, Any]:
+        """
+        Récupère le résumé du panier d'un utilisateur
         
-        return {
-            'nombre_items': panier.calculer_nombre_items(),
-            'total': panier.calculer_total(),
-            'items': [item.to_dict() for item in panier.items]
-        }
+        Sans details, nombre d'articles et total viennent d'une seule requête
+        d'agrégat (items à None) ; avec details, le panier est chargé pour
+        lister ses articles.
+        """
+        if not details:
+            return dict(self.repository.get_resume_utilisateur(utilisateur_id), items=None)
+        return self._resume_detaille(self.repository.get_panier_utilisateur(utilisateur_id))
+    
+    def get_resume_panier_session(self, session_id: str, details: bool = False) -> Dict[str, Any]:
+        """Récupère le résumé du panier d'une session (voir get_resume_panier_utilisateur)"""
+        paniers = self._paniers_session()
+        if not details:
+            return dict(paniers.get_resume_session(session_id), items=None)
+        return self._resume_detaille(paniers.get_panier_session(session_id))
     
-    def get_resume_panier_session(self, session_id: str) -> Dict[str, Any]:
-        """Récupère le résumé du panier d'une session"""
-        panier = self.repository.get_panier_session(session_id)
+    def _resume_detaille(self, panier) -> Dict[str, Any]:
+        """Résumé d'un panier chargé, avec ses articles"""
         if not panier:
             return {
                 'nombre_items': 0,
@@ -0,0 +1,208 @@
+"""
+Cycle de vie des paniers : marquage des paniers inactifs puis purge des abandonnés
+
+Deux phases, chacune par lots validés séparément (PanierRepository) :
+
+1. marquage : paniers actifs sans modification depuis CART_ABANDON_DAYS jours
+   -> statut 'abandonne' ;
+2. purge : paniers abandonnés sans modification depuis CART_PURGE_DAYS jours
+   -> supprimés avec leurs articles.
+
+Chaque lot touche au plus CART_LIFECYCLE_BATCH_SIZE paniers, suivi d'une pause
+de CART_LIFECYCLE_BATCH_PAUSE secondes : la transaction, les verrous et la
+mémoire restent bornés quelle que soit la taille des tables. La progression est
+consultable pendant l'exécution (GET /api/maintenance/abandoned-carts).
+
+    flask carts lifecycle [--abandon-days 7] [--purge-days 30] [--batch-size 1000]
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from ...data.database.db import db
+from ...data.repositories.panier_repository import PanierRepository
+
+logger = logging.getLogger(__name__)
+
+
+class PaniersAbandonnesJob:
+    """Exécution (une à la fois par processus) et progression du cycle de vie des paniers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._progression: Dict[str, Any] = {'statut': 'jamais_execute'}
+
+    @property
+    def en_cours(self) -> bool:
+        return self._progression.get('statut') == 'en_cours'
+
+    def progression(self) -> Dict[str, Any]:
+        """Instantané de la progression de la dernière exécution"""
+        with self._lock:
+            return dict(self._progression)
+
+    def demarrer(self, app, **options) -> bool:
+        """
+        Lance le cycle de vie en arrière-plan
+
+        Returns:
+            False si une exécution est déjà en cours
+
+        Raises:
+            ValueError: Option ou valeur de configuration non positive
+        """
+        options = self._resoudre(options)
+        with self._lock:
+            if self.en_cours:
+                return False
+            self._initialiser(options)
+
+        def executer():
+            with app.app_context():
+                try:
+                    self._executer(**options)
+                finally:
+                    db.session.remove()
+
+        self._thread = threading.Thread(target=executer, name='paniers-abandonnes', daemon=True)
+        self._thread.start()
+        return True
+
+    def executer(self, **options) -> Dict[str, Any]:
+        """
+        Exécute le cycle de vie dans le thread courant (CLI, tests)
+
+        Raises:
+            RuntimeError: Si une exécution est déjà en cours
+            ValueError: Option ou valeur de configuration non positive
+        """
+        options = self._resoudre(options)
+        with self._lock:
+            if self.en_cours:
+                raise RuntimeError("Le cycle de vie des paniers est déjà en cours")
+            self._initialiser(options)
+        self._executer(**options)
+        return self.progression()
+
+    def attendre(self, timeout: Optional[float] = None):
+        """Attend la fin de l'exécution en arrière-plan"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @staticmethod
+    def _resoudre(options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Complète les options avec la configuration et les valide, avant de
+        passer en cours : un lot vide ne se terminerait jamais
+        """
+        config = current_app.config
+        resolues = {
+            'abandon_days': options.get('abandon_days'),
+            'purge_days': options.get('purge_days'),
+            'batch_size': options.get('batch_size'),
+            'pause': options.get('pause')
+        }
+        for nom, cle in (('abandon_days', 'CART_ABANDON_DAYS'), ('purge_days', 'CART_PURGE_DAYS'),
+                         ('batch_size', 'CART_LIFECYCLE_BATCH_SIZE'), ('pause', 'CART_LIFECYCLE_BATCH_PAUSE')):
+            if resolues[nom] is None:
+                resolues[nom] = config[cle]
+        for nom in ('abandon_days', 'purge_days', 'batch_size'):
+            if resolues[nom] < 1:
+                raise ValueError(f"{nom} doit être un entier positif: {resolues[nom]}")
+        if resolues['pause'] < 0:
+            raise ValueError(f"pause ne peut pas être négative: {resolues['pause']}")
+        return resolues
+
+    def _initialiser(self, options: Dict[str, Any]):
+        """Remet la progression à zéro (verrou tenu)"""
+        self._progression = {
+            'statut': 'en_cours',
+            'phase': 'marquage',
+            'options': dict(options),
+            'lots': 0,
+            'paniers_marques': 0,
+            'paniers_supprimes': 0,
+            'articles_supprimes': 0,
+            'debut': datetime.utcnow().isoformat(),
+            'fin': None,
+            'duree_secondes': None,
+            'erreur': None
+        }
+
+    def _compter(self, **increments):
+        """Ajoute un lot traité aux compteurs"""
+        with self._lock:
+            self._progression['lots'] += 1
+            for cle, valeur in increments.items():
+                self._progression[cle] += valeur
+
+    def _avancer(self, **valeurs):
+        with self._lock:
+            self._progression.update(valeurs)
+
+    @staticmethod
+    def _lots(repository: PanierRepository, statut: str, limite: datetime, batch_size: int, pause: float):
+        """Lots d'identifiants à traiter, jusqu'à une sélection vide (pause entre deux lots)"""
+        apres = 0
+        while True:
+            if apres:
+                time.sleep(pause)
+            ids = repository.lot_perimes(statut, limite, batch_size, apres)
+            if not ids:
+                return
+            yield ids
+            apres = ids[-1]
+
+    def _executer(self, abandon_days: int, purge_days: int, batch_size: int, pause: float):
+        """Options résolues et validées par _resoudre"""
+        repository = PanierRepository()
+        maintenant = datetime.utcnow()
+        debut = time.monotonic()
+        try:
+            limite = maintenant - timedelta(days=abandon_days)
+            for ids in self._lots(repository, 'actif', limite, batch_size, pause):
+                self._compter(paniers_marques=repository.marquer_lot_abandonnes(ids, limite))
+
+            self._avancer(phase='purge')
+            limite = maintenant - timedelta(days=purge_days)
+            for ids in self._lots(repository, 'abandonne', limite, batch_size, pause):
+                paniers, articles = repository.purger_lot_abandonnes(ids, limite)
+                self._compter(paniers_supprimes=paniers, articles_supprimes=articles)
+
+            self._avancer(statut='termine', phase=None)
+        except Exception as e:
+            logger.error(f"Cycle de vie des paniers interrompu: {e}")
+            self._avancer(statut='erreur', erreur=str(e))
+        finally:
+            self._avancer(fin=datetime.utcnow().isoformat(), duree_secondes=round(time.monotonic() - debut, 3))
+
+
+# Exécution du processus, partagée par l'API de maintenance et la CLI
+paniers_abandonnes_job = PaniersAbandonnesJob()
+
+
+carts_cli = AppGroup('carts', help="Cycle de vie des paniers")
+
+
+@carts_cli.command('lifecycle')
+@click.option('--abandon-days', type=int, default=None, help="Inactivité avant abandon (défaut : CART_ABANDON_DAYS)")
+@click.option('--purge-days', type=int, default=None, help="Inactivité avant suppression (défaut : CART_PURGE_DAYS)")
+@click.option('--batch-size', type=int, default=None, help="Paniers par lot (défaut : CART_LIFECYCLE_BATCH_SIZE)")
+def lifecycle_command(abandon_days, purge_days, batch_size):
+    """Marque les paniers inactifs abandonnés puis supprime les plus anciens, par lots"""
+    try:
+        progression = paniers_abandonnes_job.executer(abandon_days=abandon_days, purge_days=purge_days,
+                                                      batch_size=batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{progression['paniers_marques']} paniers marqués abandonnés, "
+               f"{progression['paniers_supprimes']} paniers et {progression['articles_supprimes']} articles "
+               f"supprimés en {progression['lots']} lots ({progression['statut']})")
+    if progression['erreur']:
+        raise click.ClickException(progression['erreur'])
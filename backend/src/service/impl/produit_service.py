@@ -2,9 +2,11 @@
 Implémentation du service produit
 """
 
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from sqlalchemy.exc import SQLAlchemyError
 from ...domain.models import Produit
 from ...data.repositories import ProduitRepository
+from ...data.repositories.pagination import Page, PageRequest
 from ..interfaces.produit_service import IProduitService
 
 
@@ -18,9 +20,13 @@ class ProduitService(IProduitService):
         """Récupère tous les produits"""
         return self.repository.get_all()
     
+    def get_products_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de produits"""
+        return self.repository.get_page(page_request)
+    
     def get_product_by_id(self, product_id: int) -> Optional[Produit]:
-        """Récupère un produit par son ID"""
-        return self.repository.get_by_id(product_id)
+        """Récupère un produit par son ID (lecture via le cache des produits)"""
+        return self.repository.get_cached(product_id)
     
     def create_product(self, nom: str, description: str, categorie: str, 
                       prix: float, quantite_stock: int = 0, 
@@ -48,14 +54,33 @@ class ProduitService(IProduitService):
         """Récupère les produits par catégorie"""
         return self.repository.get_by_categorie(category)
     
+    def get_products_by_category_page(self, category: str, page_request: PageRequest) -> Page:
+        """Récupère une page de produits par catégorie"""
+        return self.repository.get_page_by_categorie(category, page_request)
+    
     def get_products_by_price_range(self, min_price: float, max_price: float) -> List[Produit]:
         """Récupère les produits par fourchette de prix"""
         return self.repository.get_by_prix_range(min_price, max_price)
     
+    def get_products_by_price_range_page(self, min_price: float, max_price: float,
+                                         page_request: PageRequest) -> Page:
+        """Récupère une page de produits par fourchette de prix"""
+        return self.repository.get_page_by_prix_range(min_price, max_price, page_request)
+    
     def get_products_in_stock(self) -> List[Produit]:
         """Récupère les produits en stock"""
         return self.repository.get_en_stock()
     
+    def get_products_in_stock_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de produits en stock"""
+        return self.repository.get_page_en_stock(page_request)
+    
+    def search_products(self, terms: str, page_request: PageRequest, category: Optional[str] = None,
+                        min_price: Optional[float] = None, max_price: Optional[float] = None,
+                        in_stock: bool = False) -> Page:
+        """Recherche des produits par pertinence, avec filtres optionnels"""
+        return self.repository.rechercher(terms, page_request, category, min_price, max_price, in_stock)
+    
     def update_stock(self, product_id: int, quantity: int) -> bool:
         """Met à jour le stock d'un produit"""
         return self.repository.update_stock(product_id, quantity)
@@ -63,4 +88,97 @@ class ProduitService(IProduitService):
     def decrement_stock(self, product_id: int, quantity: int) -> bool:
         """Décrémente le stock d'un produit"""
         return self.repository.decrementer_stock(product_id, quantity)
+    
+    def reserve_stock(self, quantities: Dict[int, int]) -> List[int]:
+        """Réserve atomiquement le stock de plusieurs produits, retourne les ids en échec"""
+        return self.repository.reserver_stock(quantities)
+    
+    def bulk_upsert_products(self, rows: Iterable[Any], chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Insère ou met à jour un flux de produits par lots de chunk_size lignes
+        
+        Chaque lot est validé en une transaction ; un lot rejeté par la base ne
+        bloque pas les suivants. Les lignes invalides sont signalées sans être
+        écrites. Le flux n'est jamais chargé entièrement en mémoire.
+        
+        Yields:
+            Un résultat par ligne : {'index', 'status': 'created'|'updated', 'id'}
+            ou {'index', 'status': 'error', 'message'}
+        """
+        lot = []
+        ids_lot = set()
+        for index, raw in enumerate(rows):
+            try:
+                row = _valider_produit_bulk(raw)
+            except ValueError as e:
+                yield {'index': index, 'status': 'error', 'message': str(e)}
+                continue
+            
+            # Un même id deux fois dans un lot : écrire le lot avant de le réutiliser
+            if row.get('id') is not None and row['id'] in ids_lot:
+                yield from self._ecrire_lot(lot)
+                lot, ids_lot = [], set()
+            
+            lot.append((index, row))
+            if row.get('id') is not None:
+                ids_lot.add(row['id'])
+            if len(lot) >= chunk_size:
+                yield from self._ecrire_lot(lot)
+                lot, ids_lot = [], set()
+        
+        if lot:
+            yield from self._ecrire_lot(lot)
+    
+    def _ecrire_lot(self, lot: List[tuple]) -> Iterator[Dict[str, Any]]:
+        """Écrit un lot de lignes validées et produit leurs résultats"""
+        try:
+            resultats = self.repository.upsert_batch([row for _, row in lot])
+        except SQLAlchemyError as e:
+            message = f"Lot rejeté par la base de données: {getattr(e, 'orig', e)}"
+            for index, _ in lot:
+                yield {'index': index, 'status': 'error', 'message': message}
+            return
+        
+        for (index, _), (produit_id, cree) in zip(lot, resultats):
+            yield {'index': index, 'status': 'created' if cree else 'updated', 'id': produit_id}
+
+
+def _valider_produit_bulk(raw: Any) -> Dict[str, Any]:
+    """Valide une ligne d'import et ne conserve que les colonnes du modèle"""
+    if not isinstance(raw, dict):
+        raise ValueError("Objet JSON attendu")
+    
+    row = {}
+    if raw.get('id') is not None:
+        row['id'] = _entier(raw['id'], 'id', minimum=1)
+    for champ in ('nom', 'categorie'):
+        valeur = raw.get(champ)
+        if not isinstance(valeur, str) or not valeur.strip():
+            raise ValueError(f"Champ '{champ}' requis")
+        row[champ] = valeur
+    
+    prix = raw.get('prix')
+    if isinstance(prix, bool) or not isinstance(prix, (int, float)) or prix < 0:
+        raise ValueError("Champ 'prix' requis (nombre positif)")
+    row['prix'] = float(prix)
+    
+    if 'quantite_stock' in raw:
+        row['quantite_stock'] = _entier(raw['quantite_stock'], 'quantite_stock', minimum=0)
+    for champ in ('description', 'image_url'):
+        if champ in raw:
+            if raw[champ] is not None and not isinstance(raw[champ], str):
+                raise ValueError(f"Champ '{champ}' invalide")
+            row[champ] = raw[champ]
+    if 'images' in raw:
+        images = raw['images']
+        if images is not None and (not isinstance(images, list) or not all(isinstance(url, str) for url in images)):
+            raise ValueError("Champ 'images' invalide (liste d'URLs attendue)")
+        row['images'] = images
+    return row
+
 
+def _entier(valeur: Any, champ: str, minimum: int) -> int:
+    """Valide un champ entier supérieur ou égal à minimum"""
+    if isinstance(valeur, bool) or not isinstance(valeur, int) or valeur < minimum:
+        raise ValueError(f"Champ '{champ}' invalide (entier >= {minimum} attendu)")
+    return valeur
@@ -10,6 +10,8 @@ from ...data.repositories.utilisateur_repository import UtilisateurRepository
 from ...data.repositories.produit_repository import ProduitRepository
 from ...data.repositories.commande_repository import CommandeRepository
 from ...data.repositories.ligne_commande_repository import LigneCommandeRepository
+from ...data.repositories.vente_journaliere_repository import VenteJournaliereRepository
+from ...data.database.instrumentation import metrics
 
 class ReportsService:
     """Service pour la génération de rapports"""
@@ -19,23 +21,26 @@ class ReportsService:
         self.product_repo = ProduitRepository()
         self.order_repo = CommandeRepository()
         self.line_repo = LigneCommandeRepository()
+        self.daily_sales_repo = VenteJournaliereRepository()
     
-    def generate_sales_report(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
-        """Génère le rapport des ventes"""
+    def generate_sales_report(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                              category: Optional[str] = None) -> Dict[str, Any]:
+        """Génère le rapport des ventes (lu dans l'agrégat quotidien, éventuellement pour une catégorie)"""
         try:
             # Parser les dates
             start_dt = self._parse_date(start_date) if start_date else datetime.now().date() - timedelta(days=30)
             end_dt = self._parse_date(end_date) if end_date else datetime.now().date()
             
             # Récupérer les données de ventes
-            total_sales = self.order_repo.get_revenue_by_date_range(start_dt, end_dt) or 0.0
-            total_orders = self.order_repo.count_by_date_range(start_dt, end_dt)
+            totals = self.daily_sales_repo.get_totaux(start_dt, end_dt, category)
+            total_sales = totals['chiffre_affaires']
+            total_orders = totals['commandes']
             average_order = total_sales / total_orders if total_orders > 0 else 0.0
             
             # Données de ventes par période
-            sales_data = self.order_repo.get_revenue_by_date_range_chart(start_dt, end_dt)
+            sales_data = self.daily_sales_repo.get_revenue_chart(start_dt, end_dt, category)
             
-            return {
+            report = {
                 "total_sales": total_sales,
                 "total_orders": total_orders,
                 "average_order": average_order,
@@ -45,6 +50,10 @@ class ReportsService:
                 },
                 "sales_data": sales_data
             }
+            if category:
+                report["category"] = category
+            
+            return report
             
         except Exception as e:
             raise Exception(f"Erreur lors de la génération du rapport ventes: {str(e)}")
@@ -102,7 +111,7 @@ class ReportsService:
             status_analysis = self.order_repo.get_orders_by_status_in_range(start_dt, end_dt)
             
             # Analyse temporelle
-            temporal_analysis = self.order_repo.get_orders_by_date_range(start_dt, end_dt)
+            temporal_analysis = self.daily_sales_repo.get_orders_chart(start_dt, end_dt)
             
             return {
                 "period": {
@@ -123,23 +132,28 @@ class ReportsService:
             start_dt = self._parse_date(start_date) if start_date else datetime.now().date() - timedelta(days=30)
             end_dt = self._parse_date(end_date) if end_date else datetime.now().date()
             
-            # Métriques de performance (simulées pour l'instant)
-            avg_response_time = 150.0  # ms
-            requests_per_minute = 45
-            error_rate = 0.5  # %
-            
-            # Données de performance par période
-            performance_data = self._generate_performance_data(start_dt, end_dt)
+            # Mesures minute par minute enregistrées par l'instrumentation sur la période
+            performance_data = metrics.timeline(
+                datetime.combine(start_dt, datetime.min.time()),
+                datetime.combine(end_dt + timedelta(days=1), datetime.min.time())
+            )
+            requests = sum(point["requests"] for point in performance_data)
+            minutes = len(performance_data)
             
             return {
                 "period": {
                     "start_date": start_dt.isoformat(),
                     "end_date": end_dt.isoformat()
                 },
-                "avg_response_time": avg_response_time,
-                "requests_per_minute": requests_per_minute,
-                "error_rate": error_rate,
-                "performance_data": performance_data
+                "avg_response_time": round(
+                    sum(point["response_time"] * point["requests"] for point in performance_data) / requests, 3
+                ) if requests else 0.0,
+                "requests_per_minute": round(requests / minutes) if minutes else 0,
+                "error_rate": round(
+                    sum(point["error_rate"] * point["requests"] for point in performance_data) / requests, 2
+                ) if requests else 0.0,
+                "performance_data": performance_data,
+                "database": metrics.snapshot()
             }
             
         except Exception as e:
@@ -328,19 +342,3 @@ class ReportsService:
             
         except Exception as e:
             raise Exception(f"Erreur lors de l'export PDF: {str(e)}")
-    
-    def _generate_performance_data(self, start_date: datetime.date, end_date: datetime.date) -> List[Dict[str, Any]]:
-        """Génère des données de performance simulées"""
-        performance_data = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            performance_data.append({
-                "date": current_date.isoformat(),
-                "response_time": 150.0 + (current_date.day % 10) * 5,  # Simulation
-                "requests_per_minute": 40 + (current_date.day % 20),  # Simulation
-                "error_rate": 0.5 + (current_date.day % 5) * 0.1  # Simulation
-            })
-            current_date += timedelta(days=1)
-        
-        return performance_data
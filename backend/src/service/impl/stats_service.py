@@ -8,41 +8,41 @@ from ...data.repositories.utilisateur_repository import UtilisateurRepository
 from ...data.repositories.produit_repository import ProduitRepository
 from ...data.repositories.commande_repository import CommandeRepository
 from ...data.repositories.ligne_commande_repository import LigneCommandeRepository
-from ...data.database.db import db
+from ...data.repositories.vente_journaliere_repository import VenteJournaliereRepository
+from ...data.repositories.aggregation import fetch_aggregates
 
 class StatsService:
-    """Service pour les statistiques du système"""
+    """
+    Service pour les statistiques du système
+    
+    Les compteurs sont des sous-requêtes scalaires fournies par les repositories
+    et exécutées ensemble : chaque méthode coûte une seule requête SQL, quelle que
+    soit la taille des tables.
+    """
     
     def __init__(self):
         self.user_repo = UtilisateurRepository()
         self.product_repo = ProduitRepository()
         self.order_repo = CommandeRepository()
         self.line_repo = LigneCommandeRepository()
+        self.daily_sales_repo = VenteJournaliereRepository()
     
     def get_general_stats(self) -> Dict[str, Any]:
         """Récupère les statistiques générales"""
         try:
             today = datetime.now().date()
             
-            # Statistiques des utilisateurs
-            user_stats = self.get_user_stats()
-            
-            # Statistiques des produits
-            product_stats = self.get_product_stats()
-            
-            # Statistiques des commandes
-            order_stats = self.get_order_stats()
+            # Tous les compteurs du tableau de bord en un seul SELECT
+            stats = fetch_aggregates({
+                'users': self._user_stats_columns(today),
+                'products': self._product_stats_columns(today),
+                'orders': self._order_stats_columns(today),
+                'revenue': self._revenue_stats_columns(today)
+            })
+            stats['revenue'] = self._as_amounts(stats['revenue'])
+            stats['timestamp'] = datetime.now().isoformat()
             
-            # Statistiques du chiffre d'affaires
-            revenue_stats = self.get_revenue_stats()
-            
-            return {
-                'users': user_stats,
-                'products': product_stats,
-                'orders': order_stats,
-                'revenue': revenue_stats,
-                'timestamp': datetime.now().isoformat()
-            }
+            return stats
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques générales: {str(e)}")
@@ -52,21 +52,7 @@ class StatsService:
         try:
             today = datetime.now().date()
             
-            # Total des utilisateurs
-            total_users = self.user_repo.count()
-            
-            # Nouveaux utilisateurs aujourd'hui
-            new_today = self.user_repo.count_by_date(today)
-            
-            # Utilisateurs actifs (ayant passé une commande dans les 30 derniers jours)
-            active_date = today - timedelta(days=30)
-            active_users = self.user_repo.count_active_since(active_date)
-            
-            return {
-                'total': total_users,
-                'new_today': new_today,
-                'active': active_users
-            }
+            return fetch_aggregates(self._user_stats_columns(today))
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques utilisateurs: {str(e)}")
@@ -76,20 +62,7 @@ class StatsService:
         try:
             today = datetime.now().date()
             
-            # Total des produits
-            total_products = self.product_repo.count()
-            
-            # Nouveaux produits aujourd'hui
-            new_today = self.product_repo.count_by_date(today)
-            
-            # Produits en rupture de stock
-            low_stock = self.product_repo.count_low_stock()
-            
-            return {
-                'total': total_products,
-                'new_today': new_today,
-                'low_stock': low_stock
-            }
+            return fetch_aggregates(self._product_stats_columns(today))
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques produits: {str(e)}")
@@ -99,20 +72,7 @@ class StatsService:
         try:
             today = datetime.now().date()
             
-            # Total des commandes
-            total_orders = self.order_repo.count()
-            
-            # Nouvelles commandes aujourd'hui
-            new_today = self.order_repo.count_by_date(today)
-            
-            # Commandes en attente
-            pending_orders = self.order_repo.count_by_status('en_attente')
-            
-            return {
-                'total': total_orders,
-                'new_today': new_today,
-                'pending': pending_orders
-            }
+            return fetch_aggregates(self._order_stats_columns(today))
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques commandes: {str(e)}")
@@ -121,22 +81,8 @@ class StatsService:
         """Récupère les statistiques du chiffre d'affaires"""
         try:
             today = datetime.now().date()
-            start_of_month = today.replace(day=1)
             
-            # CA total
-            total_revenue = self.order_repo.get_total_revenue()
-            
-            # CA aujourd'hui
-            today_revenue = self.order_repo.get_revenue_by_date(today)
-            
-            # CA ce mois
-            month_revenue = self.order_repo.get_revenue_by_date_range(start_of_month, today)
-            
-            return {
-                'total': total_revenue or 0.0,
-                'today': today_revenue or 0.0,
-                'this_month': month_revenue or 0.0
-            }
+            return self._as_amounts(fetch_aggregates(self._revenue_stats_columns(today)))
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques CA: {str(e)}")
@@ -147,7 +93,7 @@ class StatsService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=days)
             
-            chart_data = self.order_repo.get_orders_by_date_range(start_date, end_date)
+            chart_data = self.daily_sales_repo.get_orders_chart(start_date, end_date)
             
             return chart_data
             
@@ -160,7 +106,7 @@ class StatsService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=days)
             
-            chart_data = self.order_repo.get_revenue_by_date_range_chart(start_date, end_date)
+            chart_data = self.daily_sales_repo.get_revenue_chart(start_date, end_date)
             
             return chart_data
             
@@ -190,24 +136,11 @@ class StatsService:
     def get_daily_stats(self, date: datetime.date) -> Dict[str, Any]:
         """Récupère les statistiques d'une journée spécifique"""
         try:
-            # Utilisateurs créés ce jour
-            users_created = self.user_repo.count_by_date(date)
-            
-            # Produits créés ce jour
-            products_created = self.product_repo.count_by_date(date)
-            
-            # Commandes créées ce jour
-            orders_created = self.order_repo.count_by_date(date)
-            
-            # CA du jour
-            daily_revenue = self.order_repo.get_revenue_by_date(date)
+            period_stats = fetch_aggregates(self._period_stats_columns(date, date))
             
             return {
                 'date': date.isoformat(),
-                'users_created': users_created,
-                'products_created': products_created,
-                'orders_created': orders_created,
-                'revenue': daily_revenue or 0.0
+                **self._as_amounts(period_stats, 'revenue')
             }
             
         except Exception as e:
@@ -218,25 +151,12 @@ class StatsService:
         try:
             week_end = week_start + timedelta(days=6)
             
-            # Utilisateurs créés cette semaine
-            users_created = self.user_repo.count_by_date_range(week_start, week_end)
-            
-            # Produits créés cette semaine
-            products_created = self.product_repo.count_by_date_range(week_start, week_end)
-            
-            # Commandes créées cette semaine
-            orders_created = self.order_repo.count_by_date_range(week_start, week_end)
-            
-            # CA de la semaine
-            weekly_revenue = self.order_repo.get_revenue_by_date_range(week_start, week_end)
+            period_stats = fetch_aggregates(self._period_stats_columns(week_start, week_end))
             
             return {
                 'week_start': week_start.isoformat(),
                 'week_end': week_end.isoformat(),
-                'users_created': users_created,
-                'products_created': products_created,
-                'orders_created': orders_created,
-                'revenue': weekly_revenue or 0.0
+                **self._as_amounts(period_stats, 'revenue')
             }
             
         except Exception as e:
@@ -254,28 +174,62 @@ class StatsService:
             else:
                 month_end = date(year, month + 1, 1) - timedelta(days=1)
             
-            # Utilisateurs créés ce mois
-            users_created = self.user_repo.count_by_date_range(month_start, month_end)
-            
-            # Produits créés ce mois
-            products_created = self.product_repo.count_by_date_range(month_start, month_end)
-            
-            # Commandes créées ce mois
-            orders_created = self.order_repo.count_by_date_range(month_start, month_end)
-            
-            # CA du mois
-            monthly_revenue = self.order_repo.get_revenue_by_date_range(month_start, month_end)
+            period_stats = fetch_aggregates(self._period_stats_columns(month_start, month_end))
             
             return {
                 'month': month,
                 'year': year,
                 'month_start': month_start.isoformat(),
                 'month_end': month_end.isoformat(),
-                'users_created': users_created,
-                'products_created': products_created,
-                'orders_created': orders_created,
-                'revenue': monthly_revenue or 0.0
+                **self._as_amounts(period_stats, 'revenue')
             }
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des statistiques mensuelles: {str(e)}")
+    
+    def _user_stats_columns(self, today) -> Dict[str, Any]:
+        """Compteurs utilisateurs : total, créés aujourd'hui, actifs sur 30 jours"""
+        return {
+            'total': self.user_repo.count_column(),
+            'new_today': self.user_repo.count_by_date_range_column(today, today),
+            'active': self.user_repo.count_active_since_column(today - timedelta(days=30))
+        }
+    
+    def _product_stats_columns(self, today) -> Dict[str, Any]:
+        """Compteurs produits : total, créés aujourd'hui, en stock faible"""
+        return {
+            'total': self.product_repo.count_column(),
+            'new_today': self.product_repo.count_by_date_range_column(today, today),
+            'low_stock': self.product_repo.count_low_stock_column()
+        }
+    
+    def _order_stats_columns(self, today) -> Dict[str, Any]:
+        """Compteurs commandes : total, passées aujourd'hui, en attente"""
+        return {
+            'total': self.order_repo.count_column(),
+            'new_today': self.order_repo.count_by_date_range_column(today, today),
+            'pending': self.order_repo.count_by_status_column('en_attente')
+        }
+    
+    def _revenue_stats_columns(self, today) -> Dict[str, Any]:
+        """Chiffre d'affaires : total, du jour, du mois en cours"""
+        return {
+            'total': self.order_repo.revenue_column(),
+            'today': self.order_repo.revenue_column(today, today),
+            'this_month': self.order_repo.revenue_column(today.replace(day=1), today)
+        }
+    
+    def _period_stats_columns(self, start, end) -> Dict[str, Any]:
+        """Créations et chiffre d'affaires sur une période (jours inclus)"""
+        return {
+            'users_created': self.user_repo.count_by_date_range_column(start, end),
+            'products_created': self.product_repo.count_by_date_range_column(start, end),
+            'orders_created': self.order_repo.count_by_date_range_column(start, end),
+            'revenue': self.order_repo.revenue_column(start, end)
+        }
+    
+    @staticmethod
+    def _as_amounts(values: Dict[str, Any], *keys: str) -> Dict[str, Any]:
+        """Convertit des montants en float (toutes les clés si aucune n'est précisée)"""
+        keys = keys or tuple(values)
+        return {key: float(value or 0.0) if key in keys else value for key, value in values.items()}
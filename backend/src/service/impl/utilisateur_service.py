@@ -5,6 +5,7 @@ Implémentation du service utilisateur
 from typing import List, Optional
 from ...domain.models import Utilisateur
 from ...data.repositories import UtilisateurRepository
+from ...data.repositories.pagination import Page, PageRequest
 from ..interfaces.utilisateur_service import IUtilisateurService
 
 
@@ -18,6 +19,10 @@ class UtilisateurService(IUtilisateurService):
         """Récupère tous les utilisateurs"""
         return self.repository.get_all()
     
+    def get_users_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page d'utilisateurs"""
+        return self.repository.get_page(page_request)
+    
     def get_user_by_id(self, user_id: int) -> Optional[Utilisateur]:
         """Récupère un utilisateur par son ID"""
         return self.repository.get_by_id(user_id)
@@ -45,4 +50,7 @@ class UtilisateurService(IUtilisateurService):
     def get_users_by_role(self, role: str) -> List[Utilisateur]:
         """Récupère les utilisateurs par rôle"""
         return self.repository.get_by_role(role)
-
+    
+    def get_users_by_role_page(self, role: str, page_request: PageRequest) -> Page:
+        """Récupère une page d'utilisateurs par rôle"""
+        return self.repository.get_page_by_role(role, page_request)
@@ -5,6 +5,7 @@ Interface du service commande
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 from ...domain.models import Commande
+from ...data.repositories.pagination import Page, PageRequest
 
 
 class ICommandeService(ABC):
@@ -15,6 +16,11 @@ class ICommandeService(ABC):
         """Récupère toutes les commandes"""
         pass
     
+    @abstractmethod
+    def get_orders_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de commandes"""
+        pass
+    
     @abstractmethod
     def get_order_by_id(self, order_id: int) -> Optional[Commande]:
         """Récupère une commande par son ID"""
@@ -41,11 +47,21 @@ class ICommandeService(ABC):
         """Récupère les commandes d'un utilisateur"""
         pass
     
+    @abstractmethod
+    def get_orders_by_user_page(self, user_id: int, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes d'un utilisateur"""
+        pass
+    
     @abstractmethod
     def get_orders_by_status(self, status: str) -> List[Commande]:
         """Récupère les commandes par statut"""
         pass
     
+    @abstractmethod
+    def get_orders_by_status_page(self, status: str, page_request: PageRequest) -> Page:
+        """Récupère une page des commandes par statut"""
+        pass
+    
     @abstractmethod
     def update_order_status(self, order_id: int, status: str) -> bool:
         """Met à jour le statut d'une commande"""
@@ -3,8 +3,9 @@ Interface du service produit
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from ...domain.models import Produit
+from ...data.repositories.pagination import Page, PageRequest
 
 
 class IProduitService(ABC):
@@ -15,6 +16,11 @@ class IProduitService(ABC):
         """Récupère tous les produits"""
         pass
     
+    @abstractmethod
+    def get_products_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de produits"""
+        pass
+    
     @abstractmethod
     def get_product_by_id(self, product_id: int) -> Optional[Produit]:
         """Récupère un produit par son ID"""
@@ -41,16 +47,39 @@ class IProduitService(ABC):
         """Récupère les produits par catégorie"""
         pass
     
+    @abstractmethod
+    def get_products_by_category_page(self, category: str, page_request: PageRequest) -> Page:
+        """Récupère une page de produits par catégorie"""
+        pass
+    
     @abstractmethod
     def get_products_by_price_range(self, min_price: float, max_price: float) -> List[Produit]:
         """Récupère les produits par fourchette de prix"""
         pass
     
+    @abstractmethod
+    def get_products_by_price_range_page(self, min_price: float, max_price: float,
+                                         page_request: PageRequest) -> Page:
+        """Récupère une page de produits par fourchette de prix"""
+        pass
+    
     @abstractmethod
     def get_products_in_stock(self) -> List[Produit]:
         """Récupère les produits en stock"""
         pass
     
+    @abstractmethod
+    def get_products_in_stock_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page de produits en stock"""
+        pass
+    
+    @abstractmethod
+    def search_products(self, terms: str, page_request: PageRequest, category: Optional[str] = None,
+                        min_price: Optional[float] = None, max_price: Optional[float] = None,
+                        in_stock: bool = False) -> Page:
+        """Recherche des produits par pertinence, avec filtres optionnels"""
+        pass
+    
     @abstractmethod
     def update_stock(self, product_id: int, quantity: int) -> bool:
         """Met à jour le stock d'un produit"""
@@ -60,4 +89,13 @@ class IProduitService(ABC):
     def decrement_stock(self, product_id: int, quantity: int) -> bool:
         """Décrémente le stock d'un produit"""
         pass
-
+    
+    @abstractmethod
+    def reserve_stock(self, quantities: Dict[int, int]) -> List[int]:
+        """Réserve atomiquement le stock de plusieurs produits, retourne les ids en échec"""
+        pass
+    
+    @abstractmethod
+    def bulk_upsert_products(self, rows: Iterable[Any], chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Insère ou met à jour un flux de produits par lots, produit un résultat par ligne"""
+        pass
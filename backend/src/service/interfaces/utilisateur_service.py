@@ -5,6 +5,7 @@ Interface du service utilisateur
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from ...domain.models import Utilisateur
+from ...data.repositories.pagination import Page, PageRequest
 
 
 class IUtilisateurService(ABC):
@@ -15,6 +16,11 @@ class IUtilisateurService(ABC):
         """Récupère tous les utilisateurs"""
         pass
     
+    @abstractmethod
+    def get_users_page(self, page_request: PageRequest) -> Page:
+        """Récupère une page d'utilisateurs"""
+        pass
+    
     @abstractmethod
     def get_user_by_id(self, user_id: int) -> Optional[Utilisateur]:
         """Récupère un utilisateur par son ID"""
@@ -49,4 +55,8 @@ class IUtilisateurService(ABC):
     def get_users_by_role(self, role: str) -> List[Utilisateur]:
         """Récupère les utilisateurs par rôle"""
         pass
-
+    
+    @abstractmethod
+    def get_users_by_role_page(self, role: str, page_request: PageRequest) -> Page:
+        """Récupère une page d'utilisateurs par rôle"""
+        pass
@@ -1,10 +1,82 @@
 """
 Décorateurs pour l'authentification et l'autorisation
+
+La requête est authentifiée une seule fois, quel que soit le nombre de
+décorateurs ou d'appels : les claims du token viennent du cache des tokens
+vérifiés (verify_claims) et l'utilisateur est chargé une fois, puis partagé
+via g. Un refus lève une erreur HTTP (flask_restx.abort) : la réponse 401/403
+n'est jamais sérialisée par le marshal_with de la ressource.
 """
 
 from functools import wraps
-from flask import request, jsonify
-from ..service.impl.auth_service import AuthService
+from typing import Optional, Tuple
+from flask import request, g
+from flask_restx import abort
+from ..data.repositories.utilisateur_repository import UtilisateurRepository
+from ..service.impl.auth_service import verify_claims
+
+# Résultat de l'authentification de la requête courante, conservé dans g
+_AUTH_KEY = '_authentification'
+
+
+def _authentifier() -> Optional[Tuple[str, str]]:
+    """
+    Authentifie la requête courante à partir de l'en-tête Authorization
+    
+    Les informations de l'utilisateur sont placées dans g (current_user,
+    current_user_id, current_user_role). Le résultat, succès ou erreur, est
+    conservé pour la durée de la requête ; il est associé à la requête et non
+    au seul contexte d'application, qui peut en servir plusieurs (tests).
+    
+    Returns:
+        None si la requête est authentifiée, sinon (message, code d'erreur)
+    """
+    courante = request._get_current_object()
+    resultat = g.get(_AUTH_KEY)
+    if resultat is None or resultat[0] is not courante:
+        for attribut in ('current_user', 'current_user_id', 'current_user_role'):
+            g.pop(attribut, None)
+        resultat = (courante, _verifier_en_tete())
+        setattr(g, _AUTH_KEY, resultat)
+    return resultat[1]
+
+
+def _verifier_en_tete() -> Optional[Tuple[str, str]]:
+    """Vérifie le token de l'en-tête Authorization et charge l'utilisateur (voir _authentifier)"""
+    # Récupérer le token depuis l'en-tête Authorization
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return 'Token d\'authentification requis', 'missing_token'
+    
+    # Extraire le token (format: "Bearer <token>")
+    try:
+        token = auth_header.split(' ')[1]
+    except IndexError:
+        return 'Format de token invalide', 'invalid_token_format'
+    
+    # Vérifier le token (cache des tokens vérifiés), puis charger l'utilisateur
+    claims = verify_claims(token)
+    utilisateur = UtilisateurRepository().get_by_id(claims['user_id']) if claims else None
+    if not utilisateur:
+        return 'Token invalide ou expiré', 'invalid_token'
+    
+    # Ajouter les informations utilisateur à la requête
+    g.current_user = utilisateur.to_dict()
+    g.current_user_id = claims['user_id']
+    g.current_user_role = claims['role']
+    return None
+
+
+def _refuser(code: int, message: str, erreur: str):
+    """Interrompt la requête par une erreur JSON {'success', 'message', 'error'}"""
+    abort(code, message, success=False, error=erreur)
+
+
+def _exiger_authentification():
+    """Interrompt la requête (401) si elle n'est pas authentifiée"""
+    erreur = _authentifier()
+    if erreur:
+        _refuser(401, *erreur)
 
 
 def token_required(f):
@@ -19,30 +91,7 @@ def token_required(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Récupérer le token depuis l'en-tête Authorization
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({'message': 'Token d\'authentification requis', 'error': 'missing_token'}), 401
-        
-        # Extraire le token (format: "Bearer <token>")
-        try:
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'message': 'Format de token invalide', 'error': 'invalid_token_format'}), 401
-        
-        # Vérifier le token
-        auth_service = AuthService()
-        token_data = auth_service.verify_token(token)
-        
-        if not token_data:
-            return jsonify({'message': 'Token invalide ou expiré', 'error': 'invalid_token'}), 401
-        
-        # Ajouter les informations utilisateur à la requête
-        from flask import g
-        g.current_user = token_data['user']
-        g.current_user_id = token_data['user_id']
-        g.current_user_role = token_data['role']
-        
+        _exiger_authentification()
         return f(*args, **kwargs)
     
     return decorated
@@ -60,33 +109,11 @@ def admin_required(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Récupérer le token depuis l'en-tête Authorization
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({'message': 'Token d\'authentification requis', 'error': 'missing_token'}), 401
-        
-        # Extraire le token
-        try:
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'message': 'Format de token invalide', 'error': 'invalid_token_format'}), 401
-        
-        # Vérifier le token
-        auth_service = AuthService()
-        token_data = auth_service.verify_token(token)
-        
-        if not token_data:
-            return jsonify({'message': 'Token invalide ou expiré', 'error': 'invalid_token'}), 401
+        _exiger_authentification()
         
         # Vérifier le rôle admin
-        if token_data['role'] != 'admin':
-            return jsonify({'message': 'Accès refusé. Rôle administrateur requis', 'error': 'insufficient_permissions'}), 403
-        
-        # Ajouter les informations utilisateur à la requête
-        from flask import g
-        g.current_user = token_data['user']
-        g.current_user_id = token_data['user_id']
-        g.current_user_role = token_data['role']
+        if g.current_user_role != 'admin':
+            _refuser(403, 'Accès refusé. Rôle administrateur requis', 'insufficient_permissions')
         
         return f(*args, **kwargs)
     
@@ -105,33 +132,11 @@ def client_or_admin_required(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Récupérer le token depuis l'en-tête Authorization
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({'message': 'Token d\'authentification requis', 'error': 'missing_token'}), 401
-        
-        # Extraire le token
-        try:
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'message': 'Format de token invalide', 'error': 'invalid_token_format'}), 401
-        
-        # Vérifier le token
-        auth_service = AuthService()
-        token_data = auth_service.verify_token(token)
-        
-        if not token_data:
-            return jsonify({'message': 'Token invalide ou expiré', 'error': 'invalid_token'}), 401
+        _exiger_authentification()
         
         # Vérifier le rôle (client ou admin)
-        if token_data['role'] not in ['client', 'admin']:
-            return jsonify({'message': 'Accès refusé. Rôle client ou administrateur requis', 'error': 'insufficient_permissions'}), 403
-        
-        # Ajouter les informations utilisateur à la requête
-        from flask import g
-        g.current_user = token_data['user']
-        g.current_user_id = token_data['user_id']
-        g.current_user_role = token_data['role']
+        if g.current_user_role not in ['client', 'admin']:
+            _refuser(403, 'Accès refusé. Rôle client ou administrateur requis', 'insufficient_permissions')
         
         return f(*args, **kwargs)
     
@@ -145,7 +150,6 @@ def get_current_user():
     Returns:
         Dict contenant les informations de l'utilisateur ou None
     """
-    from flask import g
     return getattr(g, 'current_user', None)
 
 
@@ -156,7 +160,6 @@ def get_current_user_id():
     Returns:
         ID de l'utilisateur ou None
     """
-    from flask import g
     return getattr(g, 'current_user_id', None)
 
 
@@ -167,7 +170,6 @@ def get_current_user_role():
     Returns:
         Rôle de l'utilisateur ou None
     """
-    from flask import g
     return getattr(g, 'current_user_role', None)
 
 
@@ -175,7 +177,7 @@ def optional_auth(f):
     """
     Décorateur pour une authentification optionnelle
     Si un token est fourni, il est vérifié et l'utilisateur est ajouté au contexte
-    Si aucun token n'est fourni, la fonction continue sans utilisateur
+    Si aucun token n'est fourni (ou s'il est invalide), la fonction continue sans utilisateur
     
     Usage:
         @optional_auth
@@ -186,28 +188,7 @@ def optional_auth(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        # Récupérer le token depuis l'en-tête Authorization
-        auth_header = request.headers.get('Authorization')
-        
-        if auth_header:
-            # Extraire le token (format: "Bearer <token>")
-            try:
-                token = auth_header.split(' ')[1]
-            except IndexError:
-                # Token mal formaté, continuer sans authentification
-                pass
-            else:
-                # Vérifier le token
-                auth_service = AuthService()
-                token_data = auth_service.verify_token(token)
-                
-                if token_data:
-                    # Ajouter les informations utilisateur à la requête
-                    from flask import g
-                    g.current_user = token_data['user']
-                    g.current_user_id = token_data['user_id']
-                    g.current_user_role = token_data['role']
-        
+        _authentifier()
         return f(*args, **kwargs)
     
     return decorated
@@ -0,0 +1,114 @@
+"""
+Lecture incrémentale de gros corps JSON (tableau JSON ou NDJSON)
+
+Les éléments sont décodés au fil de la lecture du flux : la mémoire utilisée
+ne dépend que de la taille d'un élément, pas de celle du corps complet.
+"""
+
+import codecs
+import json
+from typing import Any, Iterator
+
+# Taille des blocs lus sur le flux d'entrée
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_ndjson(stream) -> Iterator[Any]:
+    """
+    Itère sur les documents d'un flux NDJSON (un document JSON par ligne)
+
+    Raises:
+        ValueError: Si une ligne n'est pas un document JSON valide
+    """
+    for numero, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise ValueError(f"Ligne NDJSON {numero} invalide")
+
+
+def iter_json_array(stream, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """
+    Itère sur les éléments d'un tableau JSON sans charger le tableau en mémoire
+
+    Raises:
+        ValueError: Si le corps n'est pas un tableau JSON valide
+    """
+    reader = _StreamReader(stream, read_size)
+    if reader.peek() != '[':
+        raise ValueError("Le corps doit être un tableau JSON")
+    reader.advance()
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.decode_value()
+        separateur = reader.peek()
+        if separateur == ']':
+            return
+        if separateur != ',':
+            raise ValueError("Tableau JSON invalide")
+        reader.advance()
+
+
+class _StreamReader:
+    """Tampon de texte alimenté bloc par bloc à partir d'un flux binaire"""
+
+    def __init__(self, stream, read_size: int):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Lit un bloc supplémentaire ; retourne False en fin de flux"""
+        if self.eof:
+            return False
+        data = self.stream.read(self.read_size)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data or b'', final=self.eof)
+        self.pos = 0
+        return bool(data)
+
+    def peek(self) -> str:
+        """Retourne le prochain caractère significatif ('' en fin de flux)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def advance(self):
+        """Consomme le caractère courant"""
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """Décode la valeur JSON commençant à la position courante"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise ValueError("Tableau JSON invalide ou tronqué")
+            # Un nombre coupé en fin de bloc (« 12. ») se poursuit dans le bloc suivant
+            if not self.eof and (end == len(self.buffer) or _nombre_incomplet(value, self.buffer[end])):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def _nombre_incomplet(value: Any, suivant: str) -> bool:
+    """Indique si un nombre décodé est suivi d'autre chose qu'un séparateur"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and suivant not in _WHITESPACE + ',]}'
@@ -0,0 +1,45 @@
+"""
+Helpers de pagination pour les contrôleurs REST
+"""
+
+from flask_restx import fields, reqparse
+from ..data.repositories.pagination import Page, PageRequest
+
+# Paramètres de pagination communs à toutes les listes
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument('limit', type=int, location='args', help='Taille de page (plafonnée côté serveur)')
+pagination_parser.add_argument('after_id', type=int, location='args', help='Retourne les éléments après cet ID (tri par id)')
+pagination_parser.add_argument('cursor', type=str, location='args', help='Curseur opaque retourné par la page précédente')
+pagination_parser.add_argument('sort', type=str, location='args', default='id', help='Clé de tri')
+pagination_parser.add_argument('order', type=str, location='args', default='asc',
+                               choices=('asc', 'desc'), help='Sens du tri')
+
+
+def get_page_request(parser: reqparse.RequestParser = pagination_parser) -> PageRequest:
+    """Construit un PageRequest à partir des paramètres de la requête courante"""
+    args = parser.parse_args()
+    return PageRequest(
+        limit=args.get('limit'),
+        after_id=args.get('after_id'),
+        cursor=args.get('cursor'),
+        sort=args.get('sort') or 'id',
+        descending=args.get('order') == 'desc'
+    )
+
+
+def page_model(namespace, name: str, item_model):
+    """Déclare le modèle Swagger d'une page d'éléments"""
+    return namespace.model(name, {
+        'data': fields.List(fields.Nested(item_model), description='Éléments de la page'),
+        'next_cursor': fields.String(description='Curseur de la page suivante (null si dernière page)'),
+        'limit': fields.Integer(description='Taille de page appliquée')
+    })
+
+
+def page_response(page: Page) -> dict:
+    """Sérialise une page pour la réponse API"""
+    return {
+        'data': [item.to_dict() for item in page.items],
+        'next_cursor': page.next_cursor,
+        'limit': page.limit
+    }
@@ -0,0 +1,151 @@
+"""
+Hachage des mots de passe hors du thread de la requête
+
+Les hachages de werkzeug (pbkdf2, scrypt) sont volontairement lents : exécutés
+dans le thread de la requête, une rafale de connexions ou d'inscriptions
+occupe le CPU et les threads du worker, et le catalogue comme le panier
+ralentissent.
+
+PasswordHasher les exécute dans un pool borné de PASSWORD_HASH_WORKERS
+threads ; hashlib relâche le GIL pendant le calcul, les autres requêtes
+continuent d'être servies. La file d'attente du pool est elle aussi bornée
+(PASSWORD_HASH_QUEUE_SIZE) : au-delà, ou après PASSWORD_HASH_TIMEOUT secondes
+d'attente, la demande est refusée (HachageIndisponible, 503 côté API) plutôt
+que d'immobiliser un thread de requête de plus.
+
+La méthode et son facteur de travail sont configurables
+(PASSWORD_HASH_METHOD, au format werkzeug : 'pbkdf2:sha256:600000',
+'scrypt:32768:8:1'...). Un mot de passe haché avec d'autres paramètres est
+haché de nouveau à la connexion suivante (doit_rehacher).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, Optional
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Méthode par défaut de werkzeug 2.3
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+class HachageIndisponible(RuntimeError):
+    """Le pool de hachage est saturé ou n'a pas répondu à temps"""
+
+
+class PasswordHasher:
+    """
+    Pool borné de hachage des mots de passe, avec ses compteurs
+
+    workers = 0 : hachage synchrone dans le thread appelant (sans limite).
+    """
+
+    def __init__(self, method: str = DEFAULT_METHOD, workers: int = 2, queue_size: int = 32,
+                 timeout: float = 10.0):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.configure(method, workers, queue_size, timeout)
+
+    def configure(self, method: str, workers: int, queue_size: int, timeout: float):
+        """Reconfigure le pool ; les compteurs sont remis à zéro"""
+        with self._lock:
+            ancien = self._executor
+            self.method = method
+            self.workers = workers
+            self.queue_size = queue_size
+            self.timeout = timeout
+            self._executor = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hachage')
+                              if workers > 0 else None)
+            self._prefixe: Optional[str] = None
+            self._en_attente = self._en_cours = self._profondeur_max = 0
+            self.soumis = self.termines = self.refuses = self.expires = self.rehaches = 0
+            self._duree_hachage = self._duree_attente = 0.0
+        if ancien is not None:
+            ancien.shutdown(wait=False)
+
+    def hacher(self, password: str) -> str:
+        """Hache un mot de passe avec la méthode configurée"""
+        return self._executer(generate_password_hash, password, self.method)
+
+    def verifier(self, hash_: str, password: str) -> bool:
+        """Vérifie un mot de passe contre son hachage"""
+        return self._executer(check_password_hash, hash_, password)
+
+    def doit_rehacher(self, hash_: str) -> bool:
+        """Indique si un hachage a été produit avec une autre méthode ou un autre facteur de travail"""
+        return hash_.split('$', 1)[0] != self._prefixe_configure()
+
+    def compter_rehachage(self):
+        """Compte un mot de passe haché de nouveau à la connexion"""
+        with self._lock:
+            self.rehaches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Configuration, profondeur de file et compteurs du pool"""
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'timeout_seconds': self.timeout,
+                'in_flight': self._en_cours,
+                'queued': self._en_attente,
+                'max_queue_depth': self._profondeur_max,
+                'submitted': self.soumis,
+                'completed': self.termines,
+                'rejected': self.refuses,
+                'timed_out': self.expires,
+                'rehashed': self.rehaches,
+                'avg_hash_ms': round(self._duree_hachage * 1000 / self.termines, 2) if self.termines else None,
+                'avg_wait_ms': round(self._duree_attente * 1000 / self.termines, 2) if self.termines else None
+            }
+
+    def _prefixe_configure(self) -> str:
+        """Préfixe 'méthode:paramètres' des hachages produits par la configuration (calculé une fois)"""
+        if self._prefixe is None:
+            self._prefixe = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._prefixe
+
+    def _executer(self, fonction, *args):
+        """Exécute un hachage dans le pool et attend son résultat"""
+        with self._lock:
+            executor = self._executor
+            if executor is not None:
+                if self._en_attente + self._en_cours >= self.workers + self.queue_size:
+                    self.refuses += 1
+                    raise HachageIndisponible("Trop de hachages de mots de passe en cours, réessayez")
+                self._en_attente += 1
+                self._profondeur_max = max(self._profondeur_max, self._en_attente)
+                self.soumis += 1
+
+        if executor is None:
+            return fonction(*args)
+
+        future = executor.submit(self._tache, fonction, args, time.monotonic())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            with self._lock:
+                self.expires += 1
+                # Jamais démarrée : elle quitte la file
+                if future.cancel():
+                    self._en_attente -= 1
+            raise HachageIndisponible("Hachage du mot de passe trop long, réessayez")
+
+    def _tache(self, fonction, args, soumission: float):
+        debut = time.monotonic()
+        with self._lock:
+            self._en_attente -= 1
+            self._en_cours += 1
+            self._duree_attente += debut - soumission
+        try:
+            return fonction(*args)
+        finally:
+            with self._lock:
+                self._en_cours -= 1
+                self.termines += 1
+                self._duree_hachage += time.monotonic() - debut
+
+
+# Pool du processus, configuré par create_app (PASSWORD_HASH_*)
+password_hasher = PasswordHasher()
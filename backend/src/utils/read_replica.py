@@ -0,0 +1,26 @@
+"""
+Envoi des lectures des endpoints GET vers les réplicas en lecture seule
+"""
+
+from functools import wraps
+from flask import request
+from ..data.database.routing import replica_reads
+
+# Méthodes HTTP sans effet de bord
+READ_METHODS = ('GET', 'HEAD')
+
+
+def replica_on_get(f):
+    """
+    Décorateur de vue : les SELECT d'une requête GET/HEAD peuvent être servis par un réplica
+
+    S'applique à un Namespace entier (Namespace(..., decorators=[replica_on_get])) :
+    les autres méthodes HTTP restent intégralement sur le primaire.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.method not in READ_METHODS:
+            return f(*args, **kwargs)
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated
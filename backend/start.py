@@ -11,6 +11,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.app import create_app, init_db
+from src.data.repositories.panier_anonyme_repository import demarrer_ecriture_differee
 
 if __name__ == '__main__':
     print("🚀 Démarrage de l'API E-commerce avec Architecture en Couches...")
@@ -31,6 +32,9 @@ if __name__ == '__main__':
     # Initialiser la base de données
     init_db(app)
     
+    # Écriture différée des paniers anonymes gardés en mémoire
+    demarrer_ecriture_differee(app)
+    
     # Démarrer l'application
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -5,7 +5,9 @@ Configuration des tests backend
 import pytest
 import sys
 import os
+from contextlib import contextmanager
 from unittest.mock import Mock, patch
+from sqlalchemy import event
 
 # Ajouter le chemin du backend
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -28,6 +30,53 @@ def app():
         db.drop_all()
 
 
+@pytest.fixture
+def assert_max_queries(app):
+    """
+    Helper qui échoue si un bloc exécute plus de `maximum` requêtes SQL
+    
+    Usage:
+        with assert_max_queries(4) as queries:
+            client.get('/api/commandes/', headers=headers)
+    """
+    @contextmanager
+    def _assert_max_queries(maximum):
+        statements = []
+        
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', _record)
+        assert len(statements) <= maximum, (
+            f"{len(statements)} requêtes exécutées (maximum {maximum}):\n" + "\n".join(statements)
+        )
+    
+    return _assert_max_queries
+
+
+@pytest.fixture
+def paniers_en_base(app):
+    """Paniers anonymes écrits directement en base (CART_STORE_BACKEND = 'database')"""
+    from src.data.database.cart_store import configure_cart_store
+    
+    app.config['CART_STORE_BACKEND'] = 'database'
+    configure_cart_store(app)
+
+
+@pytest.fixture
+def paniers_en_memoire(app):
+    """Paniers anonymes gardés en mémoire du processus (CART_STORE_BACKEND = 'memory', sur option)"""
+    from src.data.database.cart_store import configure_cart_store
+    
+    app.config['CART_STORE_BACKEND'] = 'memory'
+    configure_cart_store(app)
+
+
 @pytest.fixture
 def client(app):
     """Client de test Flask"""
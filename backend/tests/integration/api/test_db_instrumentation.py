@@ -0,0 +1,77 @@
+"""
+Tests pour l'instrumentation base de données par requête et par endpoint
+"""
+
+import pytest
+from src.data.database.instrumentation import metrics, percentiles
+from src.data.repositories.produit_repository import ProduitRepository
+from src.service.impl.reports_service import ReportsService
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(app):
+    """Registre vide pour chaque test"""
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def _endpoint(snapshot, name):
+    return next(e for e in snapshot['endpoints'] if e['endpoint'] == name)
+
+
+class TestMesuresParEndpoint:
+    """Agrégation des requêtes SQL par endpoint"""
+
+    def test_requetes_comptees_par_endpoint(self, client, db_session, assert_max_queries):
+        """Chaque requête HTTP enregistre son nombre de requêtes SQL et son temps base"""
+        ProduitRepository().create(nom="P1", categorie="Test", prix=1.0)
+        with assert_max_queries(10) as statements:
+            for _ in range(3):
+                assert client.get('/api/produits/').status_code == 200
+
+        stats = _endpoint(metrics.snapshot(), 'GET /api/produits/')
+        assert stats['requests'] == 3
+        assert stats['total_queries'] == len(statements)
+        assert stats['queries']['max'] == len(statements) / 3
+        assert stats['db_time_ms']['p95'] >= stats['db_time_ms']['p50'] > 0
+        assert stats['slowest_query']['statement'].startswith('SELECT')
+
+    def test_endpoints_par_regle_de_routage(self, client, db_session):
+        """Les paramètres d'URL sont regroupés sous la règle de routage"""
+        produit = ProduitRepository().create(nom="P1", categorie="Test", prix=1.0)
+        client.get(f'/api/produits/{produit.id}')
+        client.get('/api/produits/999999')
+
+        snapshot = metrics.snapshot()
+        stats = _endpoint(snapshot, 'GET /api/produits/<int:product_id>')
+        assert stats['requests'] == 2
+        assert snapshot['totals']['requests'] == 2
+        assert snapshot['active_requests'] == 0
+
+    def test_hors_requete_non_comptabilise(self, app, db_session):
+        """Les requêtes SQL hors requête HTTP ne sont rattachées à aucun endpoint"""
+        ProduitRepository().create(nom="P1", categorie="Test", prix=1.0)
+        assert metrics.snapshot()['totals']['queries'] == 0
+
+
+class TestRapportPerformance:
+    """Rapport /api/reports/performance alimenté par les mesures"""
+
+    def test_rapport_mesure(self, client, db_session):
+        """Le rapport reflète les requêtes réellement servies"""
+        for _ in range(4):
+            client.get('/api/produits/')
+
+        report = ReportsService().generate_performance_report()
+        assert report['requests_per_minute'] >= 1
+        assert sum(point['requests'] for point in report['performance_data']) == 4
+        assert report['error_rate'] == 0.0
+        assert report['database']['totals']['requests'] == 4
+
+
+def test_percentiles():
+    """Rang le plus proche, converti en millisecondes"""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentiles(values) == {'avg': 50.5, 'p50': 50.0, 'p95': 95.0, 'p99': 99.0, 'max': 100.0}
+    assert percentiles([]) == {'avg': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
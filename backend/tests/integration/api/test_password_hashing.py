@@ -0,0 +1,77 @@
+"""
+Tests du hachage des mots de passe dans un pool borné (connexion, inscription, nouveau hachage)
+"""
+
+import threading
+import pytest
+from src.domain.models.utilisateur import Utilisateur
+from src.utils import password_hashing
+from src.utils.password_hashing import password_hasher
+
+LOGIN = {'email': 'hachage@test.com', 'mot_de_passe': 'secret123'}
+
+
+@pytest.fixture
+def hasher(app):
+    """Pool de deux threads, facteur de travail réduit pour les tests"""
+    password_hasher.configure('pbkdf2:sha256:1000', workers=2, queue_size=4, timeout=5)
+    return password_hasher
+
+
+@pytest.fixture
+def utilisateur(db_session, hasher):
+    user = Utilisateur(email=LOGIN['email'], mot_de_passe=LOGIN['mot_de_passe'], nom="Test")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+class TestPasswordHashing:
+    """Connexion et inscription passent par le pool"""
+
+    def test_connexion_via_le_pool(self, client, utilisateur, hasher):
+        soumis = hasher.stats()['submitted']
+        assert client.post('/api/auth/login', json=LOGIN).status_code == 200
+        stats = hasher.stats()
+        assert (stats['submitted'], stats['completed']) == (soumis + 1, soumis + 1)
+        assert (stats['in_flight'], stats['queued']) == (0, 0)
+
+        response = client.post('/api/auth/login', json=dict(LOGIN, mot_de_passe='mauvais'))
+        assert response.status_code == 401
+
+    def test_inscription_un_seul_hachage(self, client, hasher):
+        response = client.post('/api/auth/register',
+                               json={'email': 'nouveau@test.com', 'mot_de_passe': 'secret123', 'nom': 'Nouveau'})
+        assert response.status_code == 201
+        assert response.get_json()['token']
+        assert hasher.stats()['submitted'] == 1
+
+    def test_nouveau_hachage_a_la_connexion(self, client, db_session, utilisateur, hasher):
+        assert utilisateur.mot_de_passe.startswith('pbkdf2:sha256:1000$')
+        hasher.configure('pbkdf2:sha256:2000', workers=2, queue_size=4, timeout=5)
+
+        assert client.post('/api/auth/login', json=LOGIN).status_code == 200
+        db_session.expire_all()
+        assert db_session.get(Utilisateur, utilisateur.id).mot_de_passe.startswith('pbkdf2:sha256:2000$')
+        assert hasher.stats()['rehashed'] == 1
+
+        assert client.post('/api/auth/login', json=LOGIN).status_code == 200
+        assert hasher.stats()['rehashed'] == 1
+
+    def test_pool_sature(self, client, utilisateur, hasher, monkeypatch):
+        """File pleine : la connexion est refusée (503) sans attendre"""
+        hasher.configure('pbkdf2:sha256:1000', workers=1, queue_size=0, timeout=5)
+        libere = threading.Event()
+        monkeypatch.setattr(password_hashing, 'generate_password_hash', lambda *args: libere.wait(5) and 'x')
+        occupe = threading.Thread(target=hasher.hacher, args=('autre',))
+        occupe.start()
+        try:
+            while hasher.stats()['in_flight'] == 0:
+                libere.wait(0.01)
+            response = client.post('/api/auth/login', json=LOGIN)
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            assert hasher.stats()['rejected'] == 1
+        finally:
+            libere.set()
+            occupe.join()
@@ -4,6 +4,7 @@ Tests pour l'API des produits
 
 import pytest
 import json
+from src.domain.models.produit import Produit
 
 
 class TestProductAPI:
@@ -239,3 +240,29 @@ class TestProductAPI:
         data = response.json
         assert data['success'] is True
         assert len(data['data']) <= 3
+
+
+class TestProductSearchAPI:
+    """GET /api/produits/search : recherche plein texte paginée par curseur"""
+    
+    @pytest.fixture
+    def catalogue(self, db_session):
+        db_session.add_all([
+            Produit(nom="Souris sans fil", description="Idéale avec un clavier compact", categorie="Informatique",
+                    prix=25.0, quantite_stock=0),
+            Produit(nom="Tapis de souris", description="Grand format", categorie="Accessoires",
+                    prix=12.0, quantite_stock=30),
+        ])
+        db_session.commit()
+    
+    def test_endpoint_search(self, client, catalogue):
+        response = client.get('/api/produits/search?q=souris&en_stock=false&limit=1')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['data']) == 1 and body['next_cursor']
+        
+        suite = client.get(f"/api/produits/search?q=souris&limit=1&cursor={body['next_cursor']}").get_json()
+        assert {body['data'][0]['nom'], suite['data'][0]['nom']} == {"Souris sans fil", "Tapis de souris"}
+        
+        assert client.get('/api/produits/search?q=').status_code == 400
+        assert client.get('/api/produits/search?q=souris&sort=stock').status_code == 400
@@ -0,0 +1,110 @@
+"""
+Tests pour l'import de produits en masse (POST /api/produits/bulk)
+"""
+
+import json
+
+import pytest
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+
+
+@pytest.fixture
+def admin_headers(client, db_session):
+    """En-têtes d'un administrateur authentifié via /api/auth/login"""
+    db_session.add(Utilisateur(email="bulk-admin@test.com", mot_de_passe="admin123", nom="Admin", role="admin"))
+    db_session.commit()
+    response = client.post('/api/auth/login', json={'email': 'bulk-admin@test.com', 'mot_de_passe': 'admin123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def existant(db_session):
+    """Produit déjà présent au catalogue"""
+    produit = Produit(nom="Ancien", categorie="Test", prix=1.0, quantite_stock=7, description="Conservée")
+    db_session.add(produit)
+    db_session.commit()
+    return produit
+
+
+def _produits(n, debut=0):
+    return [{'nom': f"Produit {i}", 'categorie': "Import", 'prix': 10.0 + i, 'quantite_stock': i}
+            for i in range(debut, debut + n)]
+
+
+class TestBulkJson:
+    """Corps en tableau JSON"""
+
+    def test_creation_par_lots(self, app, client, admin_headers):
+        """Les produits sont écrits par lots de BULK_IMPORT_CHUNK_SIZE"""
+        app.config['BULK_IMPORT_CHUNK_SIZE'] = 7
+        response = client.post('/api/produits/bulk', json=_produits(25), headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['summary'] == {'total': 25, 'created': 25, 'updated': 0, 'failed': 0, 'message': None}
+        assert [r['index'] for r in data['results']] == list(range(25))
+        assert Produit.query.count() == 25
+        assert Produit.query.get(data['results'][3]['id']).prix == 13.0
+
+    def test_mise_a_jour_partielle(self, client, admin_headers, existant):
+        """Une ligne avec id ne modifie que les colonnes fournies"""
+        rows = [{'id': existant.id, 'nom': "Nouveau", 'categorie': "Test", 'prix': 2.5}]
+        data = client.post('/api/produits/bulk', json=rows, headers=admin_headers).get_json()
+
+        assert data['results'] == [{'index': 0, 'status': 'updated', 'id': existant.id}]
+        produit = Produit.query.get(existant.id)
+        assert (produit.nom, produit.prix, produit.quantite_stock, produit.description) == \
+            ("Nouveau", 2.5, 7, "Conservée")
+
+    def test_lignes_invalides_signalees(self, client, admin_headers, existant):
+        """Les lignes invalides sont rejetées sans bloquer les autres"""
+        rows = [
+            {'nom': "Sans prix", 'categorie': "Test"},
+            _produits(1)[0],
+            "pas un objet",
+            {'id': existant.id, 'nom': "Doublon 1", 'categorie': "Test", 'prix': 3.0},
+            {'id': existant.id, 'nom': "Doublon 2", 'categorie': "Test", 'prix': 4.0},
+        ]
+        data = client.post('/api/produits/bulk', json=rows, headers=admin_headers).get_json()
+
+        statuts = {r['index']: r['status'] for r in data['results']}
+        assert statuts == {0: 'error', 1: 'created', 2: 'error', 3: 'updated', 4: 'updated'}
+        assert data['summary']['failed'] == 2
+        assert Produit.query.get(existant.id).nom == "Doublon 2"
+
+    def test_corps_invalide(self, client, admin_headers):
+        """Un corps qui n'est pas un tableau JSON est refusé"""
+        response = client.post('/api/produits/bulk', data='{"nom": "x"}',
+                               content_type='application/json', headers=admin_headers)
+        assert response.status_code == 400
+
+
+class TestBulkNdjson:
+    """Corps NDJSON (un produit par ligne)"""
+
+    def test_flux_ndjson(self, client, admin_headers, existant):
+        """Réponse NDJSON : un résultat par ligne puis le récapitulatif"""
+        rows = _produits(3) + [{'id': existant.id, 'nom': "Maj", 'categorie': "Test", 'prix': 5.0}]
+        body = "\n".join(json.dumps(row) for row in rows) + "\n"
+        response = client.post('/api/produits/bulk', data=body,
+                               content_type='application/x-ndjson', headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lignes = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [l['status'] for l in lignes[:-1]] == ['created', 'created', 'created', 'updated']
+        assert lignes[-1] == {'summary': {'total': 4, 'created': 3, 'updated': 1, 'failed': 0, 'message': None}}
+
+    def test_ligne_illisible_interrompt_l_import(self, app, client, admin_headers):
+        """Une ligne NDJSON illisible arrête l'import ; les lots déjà écrits sont conservés"""
+        app.config['BULK_IMPORT_CHUNK_SIZE'] = 2
+        body = "\n".join(json.dumps(row) for row in _produits(2)) + "\n{pas du json\n" + json.dumps(_produits(1, 5)[0])
+        response = client.post('/api/produits/bulk', data=body,
+                               content_type='application/x-ndjson', headers=admin_headers)
+
+        recap = json.loads(response.get_data(as_text=True).splitlines()[-1])['summary']
+        assert recap['created'] == 2
+        assert 'Ligne NDJSON 3' in recap['message']
+        assert Produit.query.count() == 2
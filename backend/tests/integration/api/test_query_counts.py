@@ -0,0 +1,70 @@
+"""
+Tests de non-régression du nombre de requêtes SQL par endpoint
+"""
+
+import pytest
+from src.data.database.db import db
+from src.domain.models.commande import Commande
+from src.domain.models.ligne_commande import LigneCommande
+from src.domain.models.panier import Panier, PanierItem
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+
+
+@pytest.fixture
+def catalogue(db_session):
+    """Dix produits"""
+    produits = [Produit(nom=f"Produit {i}", categorie="Test", prix=10.0 + i, quantite_stock=100)
+                for i in range(10)]
+    db_session.add_all(produits)
+    db_session.commit()
+    return produits
+
+
+@pytest.fixture
+def admin_token(client, db_session):
+    """Token JWT d'un administrateur obtenu via /api/auth/login"""
+    db_session.add(Utilisateur(email="perf-admin@test.com", mot_de_passe="admin123",
+                               nom="Admin", role="admin"))
+    db_session.commit()
+    response = client.post('/api/auth/login', json={'email': 'perf-admin@test.com', 'mot_de_passe': 'admin123'})
+    return response.get_json()['token']
+
+
+class TestQueryCounts:
+    """Nombre de requêtes constant quel que soit le volume sérialisé"""
+
+    def test_liste_commandes_sans_n_plus_un(self, client, db_session, catalogue, admin_token, assert_max_queries):
+        """Lister 30 commandes de 5 lignes coûte un nombre fixe de requêtes"""
+        client_user = Utilisateur(email="perf-client@test.com", mot_de_passe="client123", nom="Client")
+        db_session.add(client_user)
+        db_session.commit()
+        for _ in range(30):
+            commande = Commande(utilisateur_id=client_user.id, adresse_livraison="1 rue du Test")
+            commande.lignes_commande = [
+                LigneCommande(produit_id=p.id, quantite=1, prix_unitaire=p.prix) for p in catalogue[:5]
+            ]
+            db_session.add(commande)
+        db_session.commit()
+        db_session.expunge_all()
+
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        # Vérification du token (1) + page de commandes (1) + lignes en IN (1)
+        with assert_max_queries(4):
+            response = client.get('/api/commandes/?limit=30', headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['data']) == 30
+
+    def test_panier_session_sans_n_plus_un(self, client, db_session, catalogue, assert_max_queries):
+        """Afficher un panier de 10 articles coûte un nombre fixe de requêtes"""
+        panier = Panier(session_id='perf-session', statut='actif')
+        panier.items = [PanierItem(produit_id=p.id, quantite=2, prix_unitaire=p.prix) for p in catalogue]
+        db_session.add(panier)
+        db_session.commit()
+        db_session.expunge_all()
+
+        # Panier (1) + items en IN (1) + produits en IN (1)
+        with assert_max_queries(3):
+            response = client.get('/api/panier/', headers={'X-Session-ID': 'perf-session'})
+        assert response.status_code == 200
+        assert len(response.get_json()['items']) == 10
@@ -0,0 +1,163 @@
+"""
+Tests pour le routage des lectures vers un réplica (deux fichiers SQLite)
+"""
+
+import pytest
+from sqlalchemy import insert, select
+from src.app import create_app
+from src.config.app_config import config
+from src.data.database import routing
+from src.data.database.db import db
+from src.data.database.unit_of_work import transaction
+from src.data.repositories.produit_repository import ProduitRepository, produit_cache
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """Application avec une base primaire et un réplica, chacun dans son fichier SQLite"""
+    monkeypatch.setattr(config['default'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(config['default'], 'SQLALCHEMY_REPLICA_URIS', [f"sqlite:///{tmp_path / 'replica.db'}"])
+    monkeypatch.setattr(routing, '_sticky_until', {})
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica_0'])
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            db.metadata.drop_all(engine)
+    # Flask-SQLAlchemy enregistre une MetaData par bind sur l'instance globale
+    db.metadatas.pop('replica_0', None)
+
+
+@pytest.fixture
+def client(replica_app):
+    return replica_app.test_client()
+
+
+def _repliquer(*models):
+    """Recopie les tables du primaire vers le réplica (réplication simulée)"""
+    with db.engine.connect() as source, db.engines['replica_0'].begin() as cible:
+        for model in models:
+            rows = [dict(row._mapping) for row in source.execute(select(model.__table__))]
+            cible.execute(model.__table__.delete())
+            if rows:
+                cible.execute(insert(model.__table__), rows)
+
+
+def _noms(response):
+    return [produit['nom'] for produit in response.get_json()['data']]
+
+
+@pytest.fixture
+def admin_headers(client):
+    """Administrateur présent sur les deux bases, authentifié via /api/auth/login"""
+    db.session.add(Utilisateur(email="replica-admin@test.com", mot_de_passe="admin123", nom="Admin", role="admin"))
+    db.session.commit()
+    _repliquer(Utilisateur)
+    response = client.post('/api/auth/login', json={'email': 'replica-admin@test.com', 'mot_de_passe': 'admin123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+class TestLecturesGet:
+    """Endpoints GET servis par le réplica"""
+
+    def test_listing_produits_sur_le_replica(self, client):
+        """Le listing lit le réplica, en retard sur le primaire"""
+        ProduitRepository().create(nom="Répliqué", categorie="Test", prix=1.0)
+        _repliquer(Produit)
+        ProduitRepository().create(nom="Pas encore répliqué", categorie="Test", prix=2.0)
+
+        assert _noms(client.get('/api/produits/')) == ["Répliqué"]
+
+    def test_stats_sur_le_replica(self, client, admin_headers):
+        """Les statistiques sont calculées sur le réplica"""
+        ProduitRepository().create(nom="Primaire", categorie="Test", prix=1.0)
+
+        response = client.get('/api/stats/products', headers=admin_headers)
+        assert response.get_json()['data']['total'] == 0
+
+
+class TestLectureDeSesEcritures:
+    """Le client qui vient d'écrire relit sur le primaire"""
+
+    def test_apres_sa_propre_ecriture(self, replica_app, client, admin_headers):
+        """Après une création, l'auteur voit le produit ; les autres lisent le réplica"""
+        response = client.post('/api/produits/', json={'nom': "Nouveau", 'categorie': "Test", 'prix': 3.0},
+                               headers=admin_headers)
+        assert response.status_code == 201
+
+        assert _noms(client.get('/api/produits/', headers=admin_headers)) == ["Nouveau"]
+        with replica_app.app_context():  # autre client : contexte (et g) distinct
+            assert _noms(client.get('/api/produits/')) == []
+
+    def test_fin_de_la_periode_collante(self, replica_app, client, admin_headers):
+        """Passé REPLICA_STICKY_SECONDS, l'auteur relit le réplica"""
+        replica_app.config['REPLICA_STICKY_SECONDS'] = 0
+        client.post('/api/produits/', json={'nom': "Nouveau", 'categorie': "Test", 'prix': 3.0},
+                    headers=admin_headers)
+
+        assert _noms(client.get('/api/produits/', headers=admin_headers)) == []
+
+    def test_autre_worker(self, replica_app, client, admin_headers, monkeypatch):
+        """Un worker qui n'a pas vu l'écriture suit le cookie signé renvoyé au client"""
+        client.post('/api/produits/', json={'nom': "Nouveau", 'categorie': "Test", 'prix': 3.0},
+                    headers=admin_headers)
+        cookie = client.get_cookie(routing.STICKY_COOKIE)
+        assert cookie is not None and cookie.http_only
+        monkeypatch.setattr(routing, '_sticky_until', {})
+
+        assert _noms(client.get('/api/produits/', headers=admin_headers)) == ["Nouveau"]
+        # Cookie falsifié ou d'un autre client : lectures sur le réplica
+        client.set_cookie(routing.STICKY_COOKIE, cookie.value[:-2] + 'xx')
+        assert _noms(client.get('/api/produits/', headers=admin_headers)) == []
+        client.set_cookie(routing.STICKY_COOKIE, cookie.value)
+        with replica_app.app_context():
+            assert _noms(client.get('/api/produits/')) == []
+
+
+class TestCacheDesProduits:
+    """Le cache partagé des produits n'est alimenté que depuis le primaire"""
+
+    def test_replica_en_retard(self, replica_app, client):
+        """Un réplica en retard ne fige pas l'ancien prix dans le cache"""
+        produit_id = ProduitRepository().create(nom="Prix", categorie="Test", prix=1.0).id
+        _repliquer(Produit)
+        ProduitRepository().update(produit_id, prix=2.0)
+        produit_cache.configure(100, 60.0)
+        db.session.expunge_all()
+
+        response = client.get(f'/api/produits/{produit_id}')
+        assert response.get_json()['prix'] == 2.0
+        assert produit_cache.get(produit_id)['prix'] == 2.0
+        # Le listing, lui, reste servi par le réplica
+        assert client.get('/api/produits/').get_json()['data'][0]['prix'] == 1.0
+
+
+class TestRepositories:
+    """Méthodes read_only appelées hors requête"""
+
+    def test_read_only_sur_le_replica(self, replica_app):
+        """Hors écriture en cours, une méthode read_only lit le réplica"""
+        ProduitRepository().create(nom="Primaire", categorie="Test", prix=1.0)
+        assert ProduitRepository().count() == 0
+
+    def test_unite_de_travail_sur_le_primaire(self, replica_app):
+        """Dans une unité de travail, les lectures voient les écritures en cours"""
+        with transaction():
+            ProduitRepository().create(nom="En cours", categorie="Test", prix=1.0)
+            assert ProduitRepository().count() == 1
+            assert [p.nom for p in ProduitRepository().get_all()] == ["En cours"]
+
+    def test_ecriture_non_validee_sur_le_primaire(self, replica_app):
+        """Une écriture envoyée mais pas encore validée garde la session sur le primaire"""
+        db.session.add(Produit(nom="Flush", categorie="Test", prix=1.0))
+        db.session.flush()
+        assert ProduitRepository().count() == 1
+        db.session.rollback()
+        assert ProduitRepository().count() == 0
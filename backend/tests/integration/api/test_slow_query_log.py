@@ -0,0 +1,101 @@
+"""
+Tests pour le journal des requêtes lentes (GET /api/maintenance/slow-queries)
+"""
+
+import pytest
+from sqlalchemy import text
+from src.data.database.db import db
+from src.data.database.slow_query_log import (
+    DEFAULT_LOG_SIZE, DEFAULT_THRESHOLD_MS, normalize_statement, redact_parameters, slow_queries
+)
+from src.domain.models.utilisateur import Utilisateur
+
+
+@pytest.fixture
+def tout_est_lent(app):
+    """Seuil à 0 ms : chaque requête est journalisée"""
+    slow_queries.configure(0, 50)
+    yield slow_queries
+    slow_queries.configure(DEFAULT_THRESHOLD_MS, DEFAULT_LOG_SIZE)
+
+
+@pytest.fixture
+def admin_headers(client, db_session):
+    """En-têtes d'un administrateur authentifié via /api/auth/login"""
+    db_session.add(Utilisateur(email="slow-admin@test.com", mot_de_passe="admin123", nom="Admin", role="admin"))
+    db_session.commit()
+    response = client.post('/api/auth/login', json={'email': 'slow-admin@test.com', 'mot_de_passe': 'admin123'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+class TestJournal:
+    """Enregistrement des requêtes au-delà du seuil"""
+
+    def test_plan_et_parametres_masques(self, client, db_session, admin_headers, tout_est_lent):
+        """La recherche par email est journalisée avec son plan et sans l'email en clair"""
+        client.post('/api/auth/login', json={'email': 'slow-admin@test.com', 'mot_de_passe': 'admin123'})
+
+        requete = next(q for q in slow_queries.top(50) if 'FROM utilisateurs' in q['statement']
+                       and 'email' in q['statement'])
+        assert requete['endpoints'] == {'POST /api/auth/login': 1}
+        assert 'slow-admin@test.com' not in str(requete['slowest_parameters'])
+        assert '<str:19>' in requete['slowest_parameters']
+        assert 'utilisateurs' in requete['plan']
+
+    def test_sous_le_seuil_ignore(self, app, db_session):
+        """Une requête rapide n'est pas journalisée"""
+        slow_queries.configure(60000, 50)
+        try:
+            db.session.execute(text("SELECT 1"))
+            assert slow_queries.count() == 0
+        finally:
+            slow_queries.configure(DEFAULT_THRESHOLD_MS, DEFAULT_LOG_SIZE)
+
+    def test_journal_borne(self, app, db_session, tout_est_lent):
+        """Au-delà de la capacité, les entrées les plus anciennes sont écartées"""
+        slow_queries.configure(0, 3)
+        for i in range(10):
+            db.session.execute(text(f"SELECT {i}"))
+        assert slow_queries.count() == 3
+        assert sorted(q['statement'] for q in slow_queries.top()) == ["SELECT 7", "SELECT 8", "SELECT 9"]
+
+    def test_regroupement_et_classement(self, app, db_session, tout_est_lent):
+        """Les requêtes de même forme sont cumulées, classées par temps total"""
+        for ids in ([1], [1, 2], [1, 2, 3]):
+            db.session.query(Utilisateur).filter(Utilisateur.id.in_(ids)).all()
+
+        groupe = next(q for q in slow_queries.top() if 'IN (...)' in q['statement'])
+        assert groupe['count'] == 3
+        totaux = [q['total_time_ms'] for q in slow_queries.top()]
+        assert totaux == sorted(totaux, reverse=True)
+
+
+class TestEndpoint:
+    """Consultation par un administrateur"""
+
+    def test_top_offenders(self, client, admin_headers, tout_est_lent):
+        """L'endpoint liste les requêtes les plus coûteuses avec leur plan"""
+        client.get('/api/produits/')
+        response = client.get('/api/maintenance/slow-queries?limit=2', headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert data['threshold_ms'] == 0
+        assert len(data['queries']) == 2
+        assert {'statement', 'count', 'total_time_ms', 'avg_time_ms', 'endpoints', 'plan'} <= set(data['queries'][0])
+
+    def test_vider_le_journal(self, client, admin_headers, tout_est_lent):
+        """DELETE vide le journal"""
+        client.get('/api/produits/')
+        assert client.delete('/api/maintenance/slow-queries', headers=admin_headers).status_code == 200
+
+        queries = client.get('/api/maintenance/slow-queries', headers=admin_headers).get_json()['data']['queries']
+        assert not any('FROM produits' in q['statement'] for q in queries)
+
+
+def test_normalisation_et_masquage():
+    """Listes IN repliées ; textes masqués, nombres conservés"""
+    assert normalize_statement("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (...)"
+    assert normalize_statement("WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == "WHERE id IN (...)"
+    assert redact_parameters(('secret', 3, None)) == ['<str:6>', 3, None]
+    assert redact_parameters({'email': 'a@b.c', 'limit': 10}) == {'email': '<str:5>', 'limit': 10}
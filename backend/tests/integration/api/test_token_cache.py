@@ -0,0 +1,81 @@
+"""
+Tests du cache des tokens vérifiés et des réponses des décorateurs d'authentification
+"""
+
+import time
+from datetime import datetime, timedelta
+import jwt
+import pytest
+from src.data.database import cache
+from src.domain.models.utilisateur import Utilisateur
+from src.service.impl.auth_service import token_cache, verify_claims
+
+
+def _token(client, db_session, email, role='client'):
+    db_session.add(Utilisateur(email=email, mot_de_passe="secret123", nom="Test", role=role))
+    db_session.commit()
+    response = client.post('/api/auth/login', json={'email': email, 'mot_de_passe': 'secret123'})
+    return response.get_json()['token']
+
+
+@pytest.fixture
+def headers(client, db_session):
+    return {'Authorization': f"Bearer {_token(client, db_session, 'jeton@test.com')}"}
+
+
+class TestTokenCache:
+    """Un token n'est vérifié qu'une fois ; l'utilisateur est relu à chaque requête"""
+
+    def test_token_verifie_une_fois(self, client, headers, assert_max_queries):
+        assert client.get('/api/panier/resume', headers=headers).status_code == 200
+        hits = token_cache.stats()['hits']
+
+        # Utilisateur (une requête) puis résumé du panier (une requête)
+        with assert_max_queries(2):
+            assert client.get('/api/panier/resume', headers=headers).status_code == 200
+        assert token_cache.stats()['hits'] == hits + 1
+
+    def test_expiration_du_token(self, app, monkeypatch):
+        token = jwt.encode({'user_id': 1, 'role': 'client', 'exp': datetime.utcnow() + timedelta(seconds=30)},
+                           app.config['JWT_SECRET_KEY'], algorithm='HS256')
+        assert verify_claims(token)['user_id'] == 1
+        assert token_cache.stats()['size'] == 1
+
+        # L'entrée expire avec le token, bien avant TOKEN_CACHE_TTL
+        demain = time.monotonic() + 31
+        monkeypatch.setattr(cache.time, 'monotonic', lambda: demain)
+        assert token_cache.stats()['size'] == 1
+        hits = token_cache.stats()['hits']
+        verify_claims(token)
+        assert token_cache.stats()['hits'] == hits
+
+    def test_utilisateur_supprime(self, client, db_session, headers):
+        assert client.get('/api/panier/resume', headers=headers).status_code == 200
+        db_session.query(Utilisateur).filter_by(email='jeton@test.com').delete()
+        db_session.commit()
+
+        response = client.post('/api/panier/migrer', headers=headers)
+        assert response.status_code == 401
+
+
+class TestReponsesRefus:
+    """401/403 en JSON, y compris sur les ressources sérialisées par marshal_with"""
+
+    def test_token_invalide(self, client):
+        response = client.get('/api/commandes/', headers={'Authorization': 'Bearer invalide'})
+        assert response.status_code == 401
+        assert response.get_json()['error'] == 'invalid_token'
+        assert response.get_json()['success'] is False
+
+    def test_token_absent(self, client):
+        response = client.get('/api/commandes/')
+        assert (response.status_code, response.get_json()['error']) == (401, 'missing_token')
+
+    def test_role_insuffisant(self, client, headers):
+        response = client.get('/api/commandes/', headers=headers)
+        assert (response.status_code, response.get_json()['error']) == (403, 'insufficient_permissions')
+
+    def test_authentification_optionnelle(self, client):
+        """Un token invalide sur une route à authentification optionnelle : requête anonyme"""
+        response = client.get('/api/panier/resume', headers={'Authorization': 'Bearer invalide'})
+        assert response.status_code == 200
@@ -5,6 +5,22 @@ Tests d'intégration pour l'API du panier
 import pytest
 import requests
 import json
+from sqlalchemy import text
+from src.data.database.db import db
+from src.domain.models.panier import Panier, PanierItem
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+
+# Panier anonyme (magasin en mémoire)
+SESSION = {'X-Session-ID': 'session-memoire'}
+
+
+@pytest.fixture
+def produit(db_session):
+    produit = Produit(nom="Produit", categorie="Test", prix=12.5, quantite_stock=100)
+    db_session.add(produit)
+    db_session.commit()
+    return produit
 
 
 class TestCartAPI:
@@ -347,3 +363,124 @@ class TestCartAPI:
             
         except requests.exceptions.ConnectionError:
             pytest.skip("Backend non accessible")
+
+
+class TestValidationCommande:
+    """POST /api/panier/checkout : panier -> commande en une transaction"""
+    
+    @pytest.fixture
+    def acheteur(self, client, db_session, produit):
+        db_session.add(Utilisateur(email="acheteur@test.com", mot_de_passe="client123", nom="Acheteur", role="client"))
+        db_session.commit()
+        utilisateur = db_session.query(Utilisateur).filter_by(email="acheteur@test.com").one()
+        panier = Panier(utilisateur_id=utilisateur.id, statut='actif', items=[
+            PanierItem(produit_id=produit.id, quantite=3, prix_unitaire=10.0)
+        ])
+        db_session.add(panier)
+        db_session.commit()
+        token = client.post('/api/auth/login', json={'email': 'acheteur@test.com', 'mot_de_passe': 'client123'})
+        return panier.id, {'Authorization': f"Bearer {token.get_json()['token']}"}
+    
+    def test_commande_creee(self, client, db_session, produit, acheteur):
+        panier_id, headers = acheteur
+        response = client.post('/api/panier/checkout', json={'adresse_livraison': '1 rue du Test'}, headers=headers)
+        assert response.status_code == 201
+        commande = response.get_json()['commande']
+        # Prix du catalogue au moment de la commande
+        assert [(l['produit_id'], l['quantite'], l['prix_unitaire']) for l in commande['lignes_commande']] == \
+            [(produit.id, 3, 12.5)]
+        assert (commande['total'], commande['nombre_articles']) == (37.5, 3)
+    
+        db_session.expire_all()
+        assert db_session.get(Panier, panier_id).statut == 'converti'
+        assert db_session.get(Produit, produit.id).quantite_stock == 97
+    
+        response = client.post('/api/panier/checkout', json={'adresse_livraison': '1 rue du Test'}, headers=headers)
+        assert (response.status_code, response.get_json()['message']) == (400, 'Panier vide')
+    
+    def test_stock_insuffisant(self, client, db_session, produit, acheteur):
+        panier_id, headers = acheteur
+        db.session.execute(text("UPDATE produits SET quantite_stock = 2 WHERE id = :p"), {'p': produit.id})
+        db.session.commit()
+    
+        response = client.post('/api/panier/checkout', json={'adresse_livraison': '1 rue du Test'}, headers=headers)
+        assert response.status_code == 400
+        db_session.expire_all()
+        assert db_session.get(Panier, panier_id).statut == 'actif'
+        assert db_session.get(Produit, produit.id).quantite_stock == 2
+        assert db.session.execute(text("SELECT COUNT(*) FROM commandes")).scalar() == 0
+    
+    def test_adresse_requise(self, client, acheteur):
+        response = client.post('/api/panier/checkout', json={}, headers=acheteur[1])
+        assert response.status_code == 400
+
+
+@pytest.mark.usefixtures('paniers_en_memoire')
+class TestPaniersAnonymes:
+    """Les endpoints du panier servent les paniers anonymes depuis la mémoire"""
+    
+    @pytest.fixture
+    def produits(self, db_session):
+        items = [Produit(nom="Stylo", categorie="Test", prix=2.5, quantite_stock=50),
+                 Produit(nom="Cahier", categorie="Test", prix=4.0, quantite_stock=50)]
+        db_session.add_all(items)
+        db_session.commit()
+        return [produit.id for produit in items]
+    
+    @staticmethod
+    def _paniers():
+        return db.session.execute(text("SELECT COUNT(*) FROM paniers")).scalar()
+    
+    def test_consultation_sans_ecriture(self, client, produits, assert_max_queries):
+        with assert_max_queries(1):
+            response = client.get('/api/panier/', headers=SESSION)
+        assert response.status_code == 200
+        assert response.get_json()['items'] == []
+        assert self._paniers() == 0
+    
+        with assert_max_queries(0):
+            assert client.get('/api/panier/', headers=SESSION).status_code == 200
+    
+    def test_parcours_complet(self, client, produits):
+        stylo, cahier = produits
+        assert client.post('/api/panier/ajouter', json={'produit_id': stylo, 'quantite': 2}, headers=SESSION).status_code == 200
+        body = client.post('/api/panier/ajouter', json={'produit_id': cahier}, headers=SESSION).get_json()
+        assert (body['panier']['nombre_items'], body['panier']['total']) == (3, 9.0)
+        assert body['item']['produit']['nom'] == "Cahier"
+    
+        assert client.put('/api/panier/modifier-quantite', json={'produit_id': stylo, 'quantite': 5},
+                          headers=SESSION).status_code == 200
+        assert client.delete('/api/panier/supprimer', json={'produit_id': cahier}, headers=SESSION).status_code == 200
+        assert client.delete('/api/panier/supprimer', json={'produit_id': cahier}, headers=SESSION).status_code == 400
+    
+        resume = client.get('/api/panier/resume', headers=SESSION).get_json()
+        assert (resume['nombre_items'], resume['total']) == (5, 12.5)
+        assert self._paniers() == 0
+    
+    def test_resume_sans_requete(self, client, produits, assert_max_queries):
+        """Le résumé d'un panier présent dans le magasin ne touche pas la base"""
+        client.post('/api/panier/ajouter', json={'produit_id': produits[0], 'quantite': 2}, headers=SESSION)
+        with assert_max_queries(0):
+            resume = client.get('/api/panier/resume', headers=SESSION).get_json()
+        assert (resume['nombre_items'], resume['total']) == (2, 5.0)
+    
+    def test_stock_insuffisant(self, client, produits):
+        response = client.post('/api/panier/ajouter', json={'produit_id': produits[0], 'quantite': 51}, headers=SESSION)
+        assert response.status_code == 400
+
+
+class TestResumePanier:
+    """GET /api/panier/resume : articles seulement sur demande"""
+    
+    def test_details_sur_demande(self, client, db_session, produit, paniers_en_base):
+        panier = Panier(session_id='session-resume', statut='actif')
+        db_session.add(panier)
+        db_session.commit()
+        panier.ajouter_produit(produit.id, 2)
+        headers = {'X-Session-ID': 'session-resume'}
+        
+        resume = client.get('/api/panier/resume', headers=headers).get_json()
+        assert (resume['nombre_items'], resume['total'], resume['items']) == (2, 25.0, None)
+        resume = client.get('/api/panier/resume?details=true', headers=headers).get_json()
+        assert (resume['nombre_items'], resume['total']) == (2, 25.0)
+        assert [item['produit_id'] for item in resume['items']] == [produit.id]
@@ -0,0 +1,3 @@
+"""
+Tests unitaires des repositories
+"""
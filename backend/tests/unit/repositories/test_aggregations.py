@@ -0,0 +1,169 @@
+"""
+Tests pour les agrégations SQL des repositories (statistiques et rapports)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from src.data.repositories.commande_repository import CommandeRepository
+from src.data.repositories.ligne_commande_repository import LigneCommandeRepository
+from src.data.repositories.produit_repository import ProduitRepository
+from src.data.repositories.utilisateur_repository import UtilisateurRepository
+from src.domain.models.commande import Commande
+from src.domain.models.ligne_commande import LigneCommande
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+from src.service.impl.stats_service import StatsService
+
+AUJOURD_HUI = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+HIER = AUJOURD_HUI - timedelta(days=1)
+IL_Y_A_60_JOURS = AUJOURD_HUI - timedelta(days=60)
+
+
+@pytest.fixture
+def ventes(db_session):
+    """
+    Deux clients, deux produits et quatre commandes :
+    - Alice : aujourd'hui 2 x A (10) + 1 x B (5), hier 1 x A (10) annulée
+    - Bob : hier 3 x B (5), il y a 60 jours 1 x A (10)
+    """
+    alice = Utilisateur(email="alice@test.com", mot_de_passe="client123", nom="Alice")
+    alice.date_creation = AUJOURD_HUI
+    bob = Utilisateur(email="bob@test.com", mot_de_passe="client123", nom="Bob")
+    bob.date_creation = IL_Y_A_60_JOURS
+    produit_a = Produit(nom="A", categorie="Test", prix=10.0, quantite_stock=0, date_creation=AUJOURD_HUI)
+    produit_b = Produit(nom="B", categorie="Test", prix=5.0, quantite_stock=50, date_creation=HIER)
+    db_session.add_all([alice, bob, produit_a, produit_b])
+    db_session.flush()
+
+    def commande(user, date, statut, lignes):
+        cmd = Commande(utilisateur_id=user.id, adresse_livraison="1 rue du Test",
+                       date_commande=date, statut=statut)
+        cmd.lignes_commande = [LigneCommande(produit_id=p.id, quantite=q, prix_unitaire=p.prix) for p, q in lignes]
+        db_session.add(cmd)
+
+    commande(alice, AUJOURD_HUI, 'en_attente', [(produit_a, 2), (produit_b, 1)])
+    commande(alice, HIER, 'annulee', [(produit_a, 1)])
+    commande(bob, HIER, 'en_attente', [(produit_b, 3)])
+    commande(bob, IL_Y_A_60_JOURS, 'expediee', [(produit_a, 1)])
+    db_session.commit()
+    return {'alice': alice, 'bob': bob, 'a': produit_a, 'b': produit_b}
+
+
+class TestCompteurs:
+    """Comptages par date, par statut et par seuil"""
+
+    def test_count_by_date(self, app, ventes):
+        """Les bornes de jour sont inclusives"""
+        repo = CommandeRepository()
+        assert repo.count_by_date(AUJOURD_HUI.date()) == 1
+        assert repo.count_by_date_range(HIER.date(), AUJOURD_HUI.date()) == 3
+        assert UtilisateurRepository().count_by_date(IL_Y_A_60_JOURS.date()) == 1
+        assert ProduitRepository().count_by_date(HIER.date()) == 1
+
+    def test_count_active_since(self, app, ventes):
+        """Un client ayant plusieurs commandes récentes n'est compté qu'une fois"""
+        repo = UtilisateurRepository()
+        assert repo.count_active_since((AUJOURD_HUI - timedelta(days=30)).date()) == 2
+        assert repo.count_active_since(AUJOURD_HUI.date()) == 1
+
+    def test_count_low_stock_et_statut(self, app, ventes):
+        """Stock faible sous le seuil et commandes en attente"""
+        assert ProduitRepository().count_low_stock() == 1
+        assert ProduitRepository().count_low_stock(seuil=100) == 2
+        assert CommandeRepository().count_by_status('en_attente') == 2
+
+
+class TestChiffreAffaires:
+    """Sommes et regroupements par jour"""
+
+    def test_revenus(self, app, ventes):
+        """Le CA est la somme quantité x prix des lignes"""
+        repo = CommandeRepository()
+        assert repo.get_total_revenue() == pytest.approx(25.0 + 10.0 + 15.0 + 10.0)
+        assert repo.get_revenue_by_date(AUJOURD_HUI.date()) == pytest.approx(25.0)
+        assert repo.get_revenue_by_date_range(HIER.date(), AUJOURD_HUI.date()) == pytest.approx(50.0)
+        assert repo.get_revenue_by_date((AUJOURD_HUI + timedelta(days=1)).date()) == 0.0
+
+    def test_graphiques_par_jour(self, app, ventes):
+        """Une entrée par jour ayant des commandes, dans l'ordre chronologique"""
+        repo = CommandeRepository()
+        debut, fin = HIER.date(), AUJOURD_HUI.date()
+
+        assert repo.get_orders_by_date_range(debut, fin) == [
+            {'date': debut.isoformat(), 'count': 2},
+            {'date': fin.isoformat(), 'count': 1},
+        ]
+        assert repo.get_revenue_by_date_range_chart(debut, fin) == [
+            {'date': debut.isoformat(), 'revenue': 25.0, 'count': 2, 'average': 12.5},
+            {'date': fin.isoformat(), 'revenue': 25.0, 'count': 1, 'average': 25.0},
+        ]
+
+    def test_repartition_par_statut(self, app, ventes):
+        """Statuts triés par nombre de commandes décroissant"""
+        repo = CommandeRepository()
+        assert repo.get_orders_by_status() == [
+            {'statut': 'en_attente', 'count': 2},
+            {'statut': 'annulee', 'count': 1},
+            {'statut': 'expediee', 'count': 1},
+        ]
+        assert repo.get_orders_by_status_in_range(AUJOURD_HUI.date(), AUJOURD_HUI.date()) == [
+            {'statut': 'en_attente', 'count': 1},
+        ]
+
+
+class TestClassements:
+    """Top clients et top produits"""
+
+    def test_top_clients(self, app, ventes):
+        """Clients classés par montant dépensé sur la période"""
+        top = CommandeRepository().get_top_clients(HIER.date(), AUJOURD_HUI.date(), 10)
+        assert [(c['nom'], c['order_count'], c['total_spent']) for c in top] == [
+            ('Alice', 2, 35.0),
+            ('Bob', 1, 15.0),
+        ]
+
+    def test_top_produits(self, app, ventes):
+        """Produits classés par quantité vendue, avec et sans période"""
+        repo = LigneCommandeRepository()
+        assert [(p['nom'], p['quantity_sold'], p['revenue']) for p in repo.get_top_products(10)] == [
+            ('A', 4, 40.0),
+            ('B', 4, 20.0),
+        ]
+        assert [p['nom'] for p in repo.get_top_products(1)] == ['A']
+        recents = repo.get_top_products_by_date_range(HIER.date(), AUJOURD_HUI.date(), 10)
+        assert [(p['nom'], p['quantity_sold']) for p in recents] == [('B', 4), ('A', 3)]
+
+    def test_total_ventes_produit(self, app, ventes):
+        """Somme des quantités vendues calculée en SQL"""
+        repo = LigneCommandeRepository()
+        assert repo.get_total_ventes_produit(ventes['a'].id) == 4
+        assert repo.get_total_ventes_produit(9999) == 0
+
+
+class TestStatsService:
+    """Le tableau de bord est calculé en une seule requête"""
+
+    def test_statistiques_generales_une_requete(self, app, ventes, assert_max_queries):
+        """Utilisateurs, produits, commandes et CA dans un seul SELECT"""
+        with assert_max_queries(1):
+            stats = StatsService().get_general_stats()
+
+        assert stats['users'] == {'total': 2, 'new_today': 1, 'active': 2}
+        assert stats['products'] == {'total': 2, 'new_today': 1, 'low_stock': 1}
+        assert stats['orders'] == {'total': 4, 'new_today': 1, 'pending': 2}
+        assert stats['revenue']['total'] == pytest.approx(60.0)
+        assert stats['revenue']['today'] == pytest.approx(25.0)
+
+    def test_statistiques_periode_une_requete(self, app, ventes, assert_max_queries):
+        """Statistiques journalières en un seul SELECT"""
+        with assert_max_queries(1):
+            stats = StatsService().get_daily_stats(HIER.date())
+
+        assert stats == {
+            'date': HIER.date().isoformat(),
+            'users_created': 0,
+            'products_created': 1,
+            'orders_created': 2,
+            'revenue': 25.0,
+        }
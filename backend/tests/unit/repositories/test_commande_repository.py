@@ -0,0 +1,159 @@
+"""
+Tests pour CommandeRepository
+"""
+
+import os
+from datetime import datetime
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+from src.data.database.db import db
+from src.data.repositories.commande_repository import CommandeRepository
+from src.domain.models.commande import Commande
+from src.domain.models.ligne_commande import LigneCommande
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+
+
+@pytest.fixture
+def acheteur(db_session):
+    """Client passant les commandes"""
+    user = Utilisateur(email="acheteur@test.com", mot_de_passe="client123", nom="Acheteur")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def produits(db_session):
+    """Trois produits à prix connus"""
+    items = [Produit(nom=f"Produit {i}", categorie="Test", prix=10.0 * (i + 1), quantite_stock=50)
+             for i in range(3)]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+class TestCreateCommande:
+    """Tests pour la création transactionnelle des commandes"""
+
+    def test_prix_relus_en_base(self, app, acheteur, produits):
+        """Le prix unitaire vient du catalogue, pas du client"""
+        commande = CommandeRepository().create_commande(acheteur.id, "1 rue du Test", [
+            {'produit_id': produits[0].id, 'quantite': 2, 'prix_unitaire': 0.01},
+            {'produit_id': produits[2].id, 'quantite': 1},
+        ])
+
+        lignes = LigneCommande.query.filter_by(commande_id=commande.id).order_by(LigneCommande.id).all()
+        assert [(l.produit_id, l.quantite, l.prix_unitaire) for l in lignes] == [
+            (produits[0].id, 2, 10.0),
+            (produits[2].id, 1, 30.0),
+        ]
+
+    def test_requetes_constantes(self, app, acheteur, produits, assert_max_queries):
+        """Prix en IN + en-tête + lignes groupées + deltas de daily_sales, quel que soit le nombre de lignes"""
+        lignes = [{'produit_id': p.id, 'quantite': 1} for p in produits] * 10
+        with assert_max_queries(7):
+            CommandeRepository().create_commande(acheteur.id, "1 rue du Test", lignes)
+
+    def test_produit_inconnu_annule_tout(self, app, acheteur, produits):
+        """Une ligne invalide n'écrit ni l'en-tête ni les autres lignes"""
+        with pytest.raises(ValueError):
+            CommandeRepository().create_commande(acheteur.id, "1 rue du Test", [
+                {'produit_id': produits[0].id, 'quantite': 1},
+                {'produit_id': 9999, 'quantite': 1},
+            ])
+        assert Commande.query.count() == 0
+        assert LigneCommande.query.count() == 0
+
+    def test_quantite_invalide(self, app, acheteur, produits):
+        """Une quantité nulle est refusée"""
+        with pytest.raises(ValueError):
+            CommandeRepository().create_commande(acheteur.id, "1 rue du Test", [
+                {'produit_id': produits[0].id, 'quantite': 0},
+            ])
+        assert Commande.query.count() == 0
+
+
+class TestTotauxPersistes:
+    """Total et nombre d'articles maintenus à chaque écriture de lignes"""
+
+    def test_creation(self, app, acheteur, produits):
+        """create_commande calcule les totaux avec les prix du catalogue"""
+        commande = CommandeRepository().create_commande(acheteur.id, "1 rue du Test", [
+            {'produit_id': produits[0].id, 'quantite': 2},
+            {'produit_id': produits[2].id, 'quantite': 1},
+        ])
+        db.session.expire_all()
+        assert (commande.total, commande.nombre_articles) == (50.0, 3)
+        assert commande.total == commande.calculer_total()
+
+    def test_ecritures_orm_sur_les_lignes(self, app, db_session, acheteur, produits):
+        """Ajout, modification, déplacement et suppression de lignes"""
+        commande = Commande(utilisateur_id=acheteur.id, adresse_livraison="1 rue du Test")
+        autre = Commande(utilisateur_id=acheteur.id, adresse_livraison="2 rue du Test")
+        commande.lignes_commande = [
+            LigneCommande(produit_id=produits[0].id, quantite=1, prix_unitaire=10.0),
+            LigneCommande(produit_id=produits[1].id, quantite=2, prix_unitaire=20.0),
+        ]
+        db_session.add_all([commande, autre])
+        db_session.commit()
+        assert (commande.total, commande.nombre_articles) == (50.0, 3)
+
+        premiere, seconde = commande.lignes_commande
+        premiere.quantite = 4
+        db_session.commit()
+        assert (commande.total, commande.nombre_articles) == (80.0, 6)
+
+        seconde.commande_id = autre.id
+        db_session.commit()
+        assert (commande.total, autre.total) == (40.0, 40.0)
+
+        db_session.delete(premiere)
+        db_session.commit()
+        assert (commande.total, commande.nombre_articles) == (0.0, 0)
+
+    def test_chiffre_affaires_sans_les_lignes(self, app, acheteur, produits, assert_max_queries):
+        """Les requêtes de chiffre d'affaires ne lisent que la table commandes"""
+        repo = CommandeRepository()
+        commande = repo.create_commande(acheteur.id, "1 rue du Test", [{'produit_id': produits[1].id, 'quantite': 3}])
+        jour = commande.date_commande.date()
+
+        with assert_max_queries(4) as statements:
+            assert repo.get_total_revenue() == 60.0
+            assert repo.get_revenue_by_date_range_chart(jour, jour)[0]['revenue'] == 60.0
+            assert repo.get_top_clients(jour, jour)[0]['total_spent'] == 60.0
+            assert repo.get_total(commande.id) == 60.0
+        assert not any('lignes_commande' in statement for statement in statements)
+
+    def test_update_ignore_les_champs_derives(self, app, acheteur, produits):
+        """Totaux, date et client ne sont pas modifiables par update (PUT)"""
+        repo = CommandeRepository()
+        commande = repo.create_commande(acheteur.id, "1 rue du Test", [{'produit_id': produits[0].id, 'quantite': 2}])
+        date_commande = commande.date_commande
+
+        repo.update(commande.id, total=0, nombre_articles=0, date_commande=datetime(2020, 1, 1),
+                    utilisateur_id=None, statut='expediee', adresse_livraison="2 rue du Test")
+        db.session.expire_all()
+        commande = repo.get_by_id(commande.id)
+        assert (commande.total, commande.nombre_articles) == (20.0, 2)
+        assert (commande.date_commande, commande.utilisateur_id) == (date_commande, acheteur.id)
+        assert (commande.statut, commande.adresse_livraison) == ('expediee', "2 rue du Test")
+        assert repo.get_total_revenue() == 20.0
+
+    def test_rattrapage_par_migration(self, app, acheteur, produits):
+        """La migration 0002 recalcule les totaux des commandes existantes"""
+        commande = CommandeRepository().create_commande(acheteur.id, "1 rue du Test", [
+            {'produit_id': produits[0].id, 'quantite': 1},
+            {'produit_id': produits[1].id, 'quantite': 1},
+        ])
+        db.session.execute(text("UPDATE commandes SET total = 0, nombre_articles = 0"))
+        db.session.commit()
+
+        migrations = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+        flask_migrate.stamp(directory=migrations, revision='0001_schema_initial')
+        flask_migrate.upgrade(directory=migrations, revision='0002_totaux_commandes')
+
+        db.session.expire_all()
+        assert (commande.total, commande.nombre_articles) == (30.0, 2)
@@ -0,0 +1,80 @@
+"""
+Tests pour les index des chemins d'accès fréquents (migration 0003_index_acces)
+"""
+
+import os
+
+import flask_migrate
+import pytest
+from sqlalchemy import inspect, text
+from src.data.database.db import db
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+
+INDEX = {
+    'paniers': {'ix_paniers_utilisateur_statut', 'ix_paniers_session_statut', 'ix_paniers_abandonnes_modification'},
+    'panier_items': {'ix_panier_items_panier_produit'},
+    'commandes': {'ix_commandes_utilisateur_id', 'ix_commandes_statut', 'ix_commandes_date_commande'},
+    'lignes_commande': {'ix_lignes_commande_commande_id', 'ix_lignes_commande_produit_id'},
+}
+
+
+def _index(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+
+def _plan(sql, **params):
+    rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+    return ' '.join(row[-1] for row in rows)
+
+
+def test_migration_cree_les_index_manquants(app):
+    """La migration recrée les index absents et ignore ceux qui existent déjà"""
+    with db.engine.begin() as connection:
+        for nom in INDEX['paniers'] | INDEX['commandes']:
+            connection.execute(text(f"DROP INDEX {nom}"))
+
+    flask_migrate.stamp(directory=MIGRATIONS, revision='0002_totaux_commandes')
+    flask_migrate.upgrade(directory=MIGRATIONS, revision='0003_index_acces')
+
+    for table, noms in INDEX.items():
+        assert noms <= _index(table)
+
+
+@pytest.mark.parametrize('sql, index', [
+    ("SELECT * FROM paniers WHERE session_id = :s AND statut = 'actif'", 'ix_paniers_session_statut'),
+    ("SELECT * FROM panier_items WHERE panier_id = 1 AND produit_id = 2", 'uq_panier_items_panier_produit'),
+    ("SELECT * FROM commandes WHERE utilisateur_id = 1 ORDER BY id LIMIT 20", 'ix_commandes_utilisateur_id'),
+    ("SELECT * FROM paniers WHERE statut = 'abandonne' AND date_modification < '2026-01-01'",
+     'ix_paniers_abandonnes_modification'),
+    ("SELECT id FROM paniers WHERE statut = 'actif' AND date_modification < '2026-01-01' LIMIT 100",
+     'ix_paniers_actifs_modification'),
+])
+def test_plans_utilisent_les_index(app, sql, index):
+    """Les recherches des repositories passent par l'index correspondant"""
+    assert index in _plan(sql, s='session-1')
+
+
+def test_migration_index_paniers_actifs(app):
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_paniers_actifs_modification"))
+
+    flask_migrate.stamp(directory=MIGRATIONS, revision='0007_panier_items_unique')
+    flask_migrate.upgrade(directory=MIGRATIONS, revision='0008_paniers_actifs_modification')
+
+    assert 'ix_paniers_actifs_modification' in _index('paniers')
+
+
+def test_migration_panier_actif_unique_par_session(app):
+    """Les paniers actifs en double d'une session sont abandonnés, sauf le plus récent"""
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX uq_paniers_session_actif"))
+        for _ in range(2):
+            connection.execute(text("INSERT INTO paniers (session_id, statut) VALUES ('double', 'actif')"))
+
+    flask_migrate.stamp(directory=MIGRATIONS, revision='0009_fk_lignes_differee')
+    flask_migrate.upgrade(directory=MIGRATIONS, revision='0010_paniers_session_actifs_uniques')
+
+    assert 'uq_paniers_session_actif' in _index('paniers')
+    statuts = db.session.execute(text("SELECT statut FROM paniers WHERE session_id = 'double' ORDER BY id")).scalars()
+    assert list(statuts) == ['abandonne', 'actif']
@@ -0,0 +1,115 @@
+"""
+Tests pour la pagination par curseur des repositories
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from src.data.repositories import PageRequest
+from src.data.repositories.commande_repository import CommandeRepository
+from src.data.repositories.produit_repository import ProduitRepository
+from src.domain.models.commande import Commande
+from src.domain.models.produit import Produit
+
+
+@pytest.fixture
+def produits(db_session):
+    """Catalogue de 7 produits avec des prix en doublon"""
+    prix = [30.0, 10.0, 20.0, 10.0, 30.0, 20.0, 10.0]
+    items = []
+    for i, p in enumerate(prix):
+        produit = Produit(nom=f"Produit {i}", categorie="Test", prix=p, quantite_stock=i)
+        db_session.add(produit)
+        items.append(produit)
+    db_session.commit()
+    return items
+
+
+def _parcourir(repo, page_request):
+    """Parcourt toutes les pages et retourne les ids dans l'ordre"""
+    ids = []
+    while True:
+        page = repo.get_page(page_request)
+        ids.extend(item.id for item in page.items)
+        if not page.has_more:
+            return ids
+        page_request = PageRequest(limit=page_request.limit, cursor=page.next_cursor,
+                                   sort=page_request.sort, descending=page_request.descending)
+
+
+class TestKeysetPagination:
+    """Tests pour BaseRepository.get_page"""
+
+    def test_pages_par_id(self, app, produits):
+        """Le parcours par id retourne chaque produit une seule fois, dans l'ordre"""
+        repo = ProduitRepository()
+        ids = _parcourir(repo, PageRequest(limit=3))
+        assert ids == sorted(p.id for p in produits)
+
+    def test_after_id(self, app, produits):
+        """after_id reprend strictement après l'id donné"""
+        repo = ProduitRepository()
+        page = repo.get_page(PageRequest(limit=2, after_id=produits[2].id))
+        assert [p.id for p in page.items] == [produits[3].id, produits[4].id]
+
+    def test_tri_stable_avec_doublons(self, app, produits):
+        """Le tri par prix départage les doublons par id sans perte ni doublon"""
+        repo = ProduitRepository()
+        ids = _parcourir(repo, PageRequest(limit=2, sort='prix'))
+        attendu = [p.id for p in sorted(produits, key=lambda p: (p.prix, p.id))]
+        assert ids == attendu
+
+    def test_tri_descendant(self, app, produits):
+        """Le tri descendant parcourt les produits du plus cher au moins cher"""
+        repo = ProduitRepository()
+        ids = _parcourir(repo, PageRequest(limit=3, sort='prix', descending=True))
+        attendu = [p.id for p in sorted(produits, key=lambda p: (p.prix, p.id), reverse=True)]
+        assert ids == attendu
+
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_tri_avec_nulls(self, app, db_session, client_user, descending):
+        """Les lignes sans valeur de tri (date_commande NULL) sont parcourues en dernier, sans fin prématurée"""
+        debut = datetime(2026, 1, 1)
+        dates = [debut, None, debut + timedelta(days=1), None, debut, None, debut + timedelta(days=2)]
+        commandes = [Commande(utilisateur_id=client_user.id, adresse_livraison="1 rue du Test") for _ in dates]
+        db_session.add_all(commandes)
+        db_session.flush()
+        for commande, date in zip(commandes, dates):
+            commande.date_commande = date
+        db_session.commit()
+
+        ids = _parcourir(CommandeRepository(), PageRequest(limit=2, sort='date_commande', descending=descending))
+        avec_date = sorted((c for c in commandes if c.date_commande), key=lambda c: (c.date_commande, c.id),
+                           reverse=descending)
+        sans_date = sorted((c.id for c in commandes if c.date_commande is None), reverse=descending)
+        assert ids == [c.id for c in avec_date] + sans_date
+
+    def test_limite_plafonnee(self, app, produits):
+        """La taille de page est plafonnée par la configuration"""
+        app.config['PAGINATION_MAX_LIMIT'] = 4
+        page = ProduitRepository().get_page(PageRequest(limit=10000))
+        assert page.limit == 4
+        assert len(page.items) == 4
+        assert page.has_more
+
+    def test_tri_non_supporte(self, app, produits):
+        """Une clé de tri hors liste blanche est refusée"""
+        with pytest.raises(ValueError):
+            ProduitRepository().get_page(PageRequest(sort='description'))
+
+    def test_curseur_invalide(self, app, produits):
+        """Un curseur illisible est refusé"""
+        with pytest.raises(ValueError):
+            ProduitRepository().get_page(PageRequest(cursor='pas-un-curseur'))
+
+    def test_endpoint_liste_produits(self, client, produits):
+        """GET /api/produits/ retourne une page et son curseur"""
+        response = client.get('/api/produits/?limit=5')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['data']) == 5
+        assert data['next_cursor']
+
+        response = client.get(f"/api/produits/?limit=5&cursor={data['next_cursor']}")
+        suite = response.get_json()
+        assert len(suite['data']) == 2
+        assert suite['next_cursor'] is None
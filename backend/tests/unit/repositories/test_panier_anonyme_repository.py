@@ -0,0 +1,191 @@
+"""
+Tests pour les paniers anonymes en mémoire (magasin des paniers et écriture différée)
+"""
+
+import threading
+import pytest
+from sqlalchemy import text
+from src.data.database.cart_store import MemoryCartStore, get_cart_store, nouvel_etat
+from src.data.database.db import db
+from src.data.repositories.panier_anonyme_repository import PanierAnonymeRepository
+from src.domain.models.panier import Panier, PanierItem
+from src.domain.models.produit import Produit
+from src.service.impl.panier_service import PanierService
+
+@pytest.fixture
+def produits(db_session):
+    items = [Produit(nom="Stylo", categorie="Test", prix=2.5, quantite_stock=50),
+             Produit(nom="Cahier", categorie="Test", prix=4.0, quantite_stock=50)]
+    db_session.add_all(items)
+    db_session.commit()
+    return [produit.id for produit in items]
+
+
+def _lignes(session_id):
+    return db.session.execute(text(
+        "SELECT i.produit_id, i.quantite FROM panier_items i JOIN paniers p ON p.id = i.panier_id "
+        "WHERE p.session_id = :s ORDER BY i.produit_id"
+    ), {'s': session_id}).all()
+
+
+@pytest.mark.usefixtures('paniers_en_memoire')
+class TestPersistance:
+    """Écriture en base : différée, à la demande et à la migration"""
+
+    def test_ecriture_differee(self, app, produits):
+        stylo, cahier = produits
+        service = PanierService()
+        service.ajouter_produit_session('s1', stylo, 2)
+        service.ajouter_produit_session('s1', cahier, 1)
+        repo = PanierAnonymeRepository()
+
+        assert repo.persister_paniers_modifies() == 1
+        assert _lignes('s1') == [(stylo, 2), (cahier, 1)]
+        assert repo.persister_paniers_modifies() == 0
+
+        panier = service.get_panier_session('s1')
+        assert panier.id is not None and all(item.id for item in panier.items)
+        ids = {item.produit_id: item.id for item in panier.items}
+
+        service.modifier_quantite_session('s1', stylo, 7)
+        service.supprimer_produit_session('s1', cahier)
+        assert repo.persister_paniers_modifies() == 1
+        assert _lignes('s1') == [(stylo, 7)]
+        assert db.session.get(PanierItem, ids[stylo]).quantite == 7
+
+    def test_relecture_apres_redemarrage(self, app, produits):
+        """Un panier écrit en base est relu quand le magasin ne l'a plus"""
+        service = PanierService()
+        service.ajouter_produit_session('s2', produits[0], 3)
+        PanierAnonymeRepository().persister_paniers_modifies()
+        get_cart_store().clear()
+
+        panier = service.get_panier_session('s2')
+        assert panier.calculer_nombre_items() == 3
+        assert service.ajouter_produit_session('s2', produits[0], 1)['panier']['nombre_items'] == 4
+
+    def test_migration(self, app, produits, client_user):
+        service = PanierService()
+        service.ajouter_produit_session('s3', produits[0], 2)
+
+        result = service.migrer_panier_session_vers_utilisateur('s3', client_user.id)
+        assert result['success'] is True
+        assert result['panier']['utilisateur_id'] == client_user.id
+        assert result['panier']['nombre_items'] == 2
+        assert get_cart_store().get('s3') is None
+        assert db.session.query(Panier).filter_by(session_id='s3').count() == 0
+
+    def test_persister_une_session(self, app, produits):
+        service = PanierService()
+        service.ajouter_produit_session('s4', produits[0], 1)
+        service.ajouter_produit_session('s5', produits[0], 1)
+
+        panier_id = PanierAnonymeRepository().persister('s4')
+        assert db.session.get(Panier, panier_id).session_id == 's4'
+        assert _lignes('s5') == []
+
+    def test_ecriture_differee_apres_migration(self, app, produits, client_user):
+        """Un instantané pris avant la migration n'est pas écrit après elle"""
+        service = PanierService()
+        service.ajouter_produit_session('s7', produits[0], 1)
+        repo = PanierAnonymeRepository()
+        (session_id, version, etat), = repo.store.a_persister()
+
+        def migrer():
+            with app.app_context():
+                service.migrer_panier_session_vers_utilisateur('s7', utilisateur_id)
+
+        # Migration pendant l'écriture différée : elle attend sa fin
+        utilisateur_id = client_user.id
+        migration = threading.Thread(target=migrer)
+        migration.start()
+        migration.join(0.2)
+        assert migration.is_alive()
+        repo._ecrire(session_id, version, etat)
+        repo.store.liberer(session_id)
+        migration.join(5)
+
+        assert repo.store.get('s7') is None
+        assert repo._ecrire(session_id, version, etat) is None
+        assert db.session.query(Panier).filter_by(session_id='s7').count() == 0
+
+    def test_un_seul_panier_actif_par_session(self, app, produits):
+        """Ligne paniers créée par upsert : une écriture de plus ne la duplique pas"""
+        PanierService().ajouter_produit_session('s8', produits[0], 1)
+        repo = PanierAnonymeRepository()
+        panier_id = repo.paniers.creer_panier_session('s8').id
+        assert repo.persister('s8') == panier_id
+        assert repo.paniers.creer_panier_session('s8').id == panier_id
+        assert db.session.query(Panier).filter_by(session_id='s8').count() == 1
+
+    def test_mode_base(self, app, produits, paniers_en_base):
+        """CART_STORE_BACKEND = 'database' : comportement historique, écriture immédiate"""
+        PanierService().ajouter_produit_session('s6', produits[0], 1)
+        assert _lignes('s6') == [(produits[0], 1)]
+
+
+def test_base_par_defaut(app):
+    """Sans CART_STORE_BACKEND, les paniers anonymes sont écrits en base (partagés entre workers)"""
+    assert app.config['CART_STORE_BACKEND'] == 'database'
+    assert get_cart_store() is None
+
+
+class TestMemoryCartStore:
+    """Bornes et expiration du magasin en mémoire"""
+
+    @staticmethod
+    def _ajout(etat):
+        etat['items'][1] = {'id': None, 'quantite': 1, 'prix_unitaire': 1.0, 'date_ajout': None, 'date_modification': None}
+
+    def test_eviction_garde_les_paniers_modifies(self):
+        store = MemoryCartStore(maxsize=2, ttl=60)
+        store.modifier('a', self._ajout, nouvel_etat())
+        store.charger('b', nouvel_etat())
+        store.charger('c', nouvel_etat())
+
+        assert store.stats()['evictions'] == 1
+        assert [cle for cle, _, _ in store.a_persister()] == ['a']
+        assert store.get('a')['items'][1]['quantite'] == 1
+
+    def test_expiration_apres_ecriture(self):
+        store = MemoryCartStore(maxsize=10, ttl=0)
+        store.modifier('a', self._ajout, nouvel_etat())
+        assert store.get('a') is not None
+
+        (cle, version, _), = store.a_persister()
+        store.marquer_persiste(cle, version, 1, {1: 10})
+        assert store.purger() == 1
+        assert store.get('a') is None
+
+    def test_modification_pendant_ecriture(self):
+        """Un panier modifié pendant son écriture reste à persister"""
+        store = MemoryCartStore()
+        store.modifier('a', self._ajout, nouvel_etat())
+        (_, version, _), = store.a_persister()
+        store.modifier('a', self._ajout)
+        store.marquer_persiste('a', version, 1, {1: 10})
+
+        assert len(store.a_persister()) == 1
+        assert store.get('a')['items'][1]['id'] == 10
+
+    def test_panier_reserve(self):
+        """Un panier en cours d'écriture n'est proposé qu'une fois ; reserver attend sa libération"""
+        store = MemoryCartStore()
+        store.modifier('a', self._ajout, nouvel_etat())
+        assert len(store.a_persister()) == 1
+        store.modifier('a', self._ajout)
+        assert store.a_persister() == []
+        with pytest.raises(TimeoutError):
+            store.reserver('a', timeout=0.01)
+
+        threading.Timer(0.05, store.liberer, args=('a',)).start()
+        version, etat, modifie = store.reserver('a', timeout=5)
+        assert (version, modifie, etat['items'][1]['quantite']) == (2, True, 1)
+        assert store.est_reserve('a')
+        store.retirer('a')
+        assert not store.est_reserve('a')
+        assert store.reserver('a') is None
+
+    def test_panier_absent(self):
+        with pytest.raises(KeyError):
+            MemoryCartStore().modifier('absent', self._ajout)
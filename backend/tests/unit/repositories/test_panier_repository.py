@@ -0,0 +1,338 @@
+"""
+Tests pour les écritures de PanierRepository (articles, migration, cycle de vie)
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from src.data.database.db import db
+from src.data.repositories.panier_repository import PanierRepository
+from src.domain.models.panier import Panier, PanierItem
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+from src.service.impl.paniers_abandonnes_job import paniers_abandonnes_job
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+
+
+@pytest.fixture
+def panier(db_session):
+    panier = Panier(session_id='session-upsert', statut='actif')
+    db_session.add(panier)
+    db_session.commit()
+    return panier
+
+
+@pytest.fixture
+def produit(db_session):
+    produit = Produit(nom="Produit", categorie="Test", prix=12.5, quantite_stock=100)
+    db_session.add(produit)
+    db_session.commit()
+    return produit
+
+
+def _lignes(panier_id):
+    return db.session.execute(
+        text("SELECT produit_id, quantite, prix_unitaire FROM panier_items WHERE panier_id = :p"), {'p': panier_id}
+    ).all()
+
+
+class TestArticles:
+    """Ajout, modification et suppression d'articles"""
+
+    def test_ajout_cumule_les_quantites(self, app, panier, produit):
+        """Deux ajouts du même produit : une ligne, quantités cumulées, prix du catalogue"""
+        panier.ajouter_produit(produit.id, 2)
+        item = panier.ajouter_produit(produit.id, 3)
+        assert (item.quantite, item.prix_unitaire) == (5, 12.5)
+        assert _lignes(panier.id) == [(produit.id, 5, 12.5)]
+        assert panier.calculer_nombre_items() == 5
+
+    def test_ajout_une_instruction(self, app, panier, produit, assert_max_queries):
+        """L'article et son prix en une instruction (plus la date du panier hors PostgreSQL)"""
+        panier_id, produit_id = panier.id, produit.id
+        with assert_max_queries(2) as statements:
+            PanierRepository().ajouter_item(panier_id, produit_id, 1)
+        assert sum('panier_items' in statement for statement in statements) == 1
+
+    def test_produit_inconnu(self, app, panier):
+        with pytest.raises(ValueError):
+            panier.ajouter_produit(9999, 1)
+        assert _lignes(panier.id) == []
+
+    def test_modifier_et_supprimer(self, app, panier, produit):
+        panier.ajouter_produit(produit.id, 2)
+        assert panier.modifier_quantite(produit.id, 7) is True
+        assert _lignes(panier.id) == [(produit.id, 7, 12.5)]
+        assert panier.modifier_quantite(9999, 1) is False
+
+        assert panier.modifier_quantite(produit.id, 0) is True
+        assert _lignes(panier.id) == []
+        assert panier.supprimer_produit(produit.id) is False
+
+    def test_vider(self, app, panier, produit, db_session):
+        autre = Produit(nom="Autre", categorie="Test", prix=1.0, quantite_stock=1)
+        db_session.add(autre)
+        db_session.commit()
+        panier.ajouter_produit(produit.id, 1)
+        panier.ajouter_produit(autre.id, 1)
+        panier.vider()
+        assert panier.items == []
+
+    def test_date_du_panier(self, app, panier, produit):
+        """Chaque écriture d'article rafraîchit la date de modification du panier"""
+        db.session.execute(text("UPDATE paniers SET date_modification = '2020-01-01 00:00:00'"))
+        db.session.commit()
+        panier.ajouter_produit(produit.id, 1)
+        assert panier.date_modification.year > 2020
+
+    def test_contrainte_unique(self, app, db_session, panier, produit):
+        db_session.add_all([
+            PanierItem(panier_id=panier.id, produit_id=produit.id, quantite=1, prix_unitaire=1.0),
+            PanierItem(panier_id=panier.id, produit_id=produit.id, quantite=1, prix_unitaire=1.0),
+        ])
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+
+    def test_ajouts_concurrents(self, app, panier, produit):
+        """20 ajouts simultanés du même produit : une seule ligne, aucune quantité perdue"""
+        if db.engine.url.database in (None, '', ':memory:'):
+            pytest.skip("Base SQLite en mémoire non partageable entre threads")
+
+        panier_id, produit_id = panier.id, produit.id
+        nb_threads = 20
+        depart = threading.Barrier(nb_threads)
+        erreurs = []
+
+        def ajouter():
+            with app.app_context():
+                depart.wait()
+                try:
+                    PanierRepository().ajouter_item(panier_id, produit_id, 1)
+                    db.session.commit()
+                except Exception as e:
+                    erreurs.append(e)
+                db.session.remove()
+
+        threads = [threading.Thread(target=ajouter) for _ in range(nb_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert erreurs == []
+        assert _lignes(panier_id) == [(produit_id, nb_threads, 12.5)]
+
+
+def test_migration_fusionne_les_doublons(app, panier, produit):
+    """La migration 0007 cumule les doublons existants puis pose l'index unique"""
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX uq_panier_items_panier_produit"))
+        connection.execute(text(
+            "INSERT INTO panier_items (panier_id, produit_id, quantite, prix_unitaire) "
+            "VALUES (:p, :q, 2, 12.5), (:p, :q, 3, 12.5)"
+        ), {'p': panier.id, 'q': produit.id})
+
+    flask_migrate.stamp(directory=MIGRATIONS, revision='0006_recherche_produits')
+    flask_migrate.upgrade(directory=MIGRATIONS, revision='0007_panier_items_unique')
+
+    assert _lignes(panier.id) == [(produit.id, 5, 12.5)]
+    with pytest.raises(IntegrityError):
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO panier_items (panier_id, produit_id, quantite, prix_unitaire) VALUES (:p, :q, 1, 1)"
+            ), {'p': panier.id, 'q': produit.id})
+
+
+class TestResume:
+    """Résumé du panier (badge) : une requête d'agrégat"""
+
+    def test_une_requete(self, app, panier, produit, assert_max_queries):
+        autre = Produit(nom="Autre", categorie="Test", prix=2.0, quantite_stock=10)
+        db.session.add(autre)
+        db.session.commit()
+        panier.ajouter_produit(produit.id, 2)
+        panier.ajouter_produit(autre.id, 3)
+        db.session.expunge_all()
+
+        with assert_max_queries(1):
+            resume = PanierRepository().get_resume_session('session-upsert')
+        assert resume == {'nombre_items': 5, 'total': 31.0}
+
+    def test_panier_absent_ou_inactif(self, app, db_session, panier):
+        repository = PanierRepository()
+        assert repository.get_resume_session('inconnue') == {'nombre_items': 0, 'total': 0.0}
+        panier.statut = 'converti'
+        db_session.commit()
+        assert repository.get_resume_session('session-upsert') == {'nombre_items': 0, 'total': 0.0}
+
+
+class TestMigration:
+    """Fusion du panier de session dans le panier de l'utilisateur"""
+
+    @pytest.fixture
+    def paniers(self, db_session, client_user, produit):
+        peu = Produit(nom="Peu", categorie="Test", prix=3.0, quantite_stock=4)
+        seul = Produit(nom="Seul", categorie="Test", prix=1.0, quantite_stock=9)
+        db_session.add(peu)
+        db_session.add(seul)
+        db_session.flush()
+        session = Panier(session_id='session-login', statut='actif', items=[
+            PanierItem(produit_id=produit.id, quantite=2, prix_unitaire=12.5),
+            PanierItem(produit_id=peu.id, quantite=3, prix_unitaire=3.0),
+            PanierItem(produit_id=seul.id, quantite=1, prix_unitaire=1.0),
+        ])
+        utilisateur = Panier(utilisateur_id=client_user.id, statut='actif', items=[
+            PanierItem(produit_id=produit.id, quantite=1, prix_unitaire=12.5),
+            PanierItem(produit_id=peu.id, quantite=2, prix_unitaire=3.0),
+        ])
+        db_session.add_all([session, utilisateur])
+        db_session.commit()
+        return session.id, utilisateur.id, {'produit': produit.id, 'peu': peu.id, 'seul': seul.id}
+
+    def test_fusion(self, app, client_user, paniers):
+        session_id, utilisateur_id, ids = paniers
+        panier = PanierRepository().migrer_panier_session_vers_utilisateur('session-login', client_user.id)
+
+        assert panier.id == utilisateur_id
+        # Quantités cumulées, plafonnées au stock (4) pour « Peu » ; « Seul » repris tel quel
+        assert sorted(_lignes(utilisateur_id)) == sorted([(ids['produit'], 3, 12.5), (ids['peu'], 4, 3.0),
+                                                          (ids['seul'], 1, 1.0)])
+        assert {item.produit_id: item.quantite for item in panier.items} == {ids['produit']: 3, ids['peu']: 4,
+                                                                              ids['seul']: 1}
+        assert db.session.get(Panier, session_id) is None
+        assert _lignes(session_id) == []
+
+    def test_quantite_utilisateur_jamais_reduite(self, app, db_session, client_user, paniers):
+        _, utilisateur_id, ids = paniers
+        db.session.execute(text("UPDATE produits SET quantite_stock = 1 WHERE id = :p"), {'p': ids['peu']})
+        db.session.commit()
+        PanierRepository().migrer_panier_session_vers_utilisateur('session-login', client_user.id)
+        assert (ids['peu'], 2, 3.0) in _lignes(utilisateur_id)
+
+    def test_requetes_constantes(self, app, client_user, paniers, assert_max_queries):
+        """Le nombre de requêtes ne dépend pas du nombre d'articles"""
+        utilisateur_id = client_user.id
+        db.session.expunge_all()
+        with assert_max_queries(10) as statements:
+            PanierRepository().migrer_panier_session_vers_utilisateur('session-login', utilisateur_id)
+        assert sum(s.lstrip().startswith('INSERT INTO panier_items') for s in statements) == 1
+
+    def test_rattachement_sans_panier_utilisateur(self, app, db_session, client_user, panier, produit):
+        panier.ajouter_produit(produit.id, 2)
+        migre = PanierRepository().migrer_panier_session_vers_utilisateur('session-upsert', client_user.id)
+        assert (migre.id, migre.utilisateur_id, migre.session_id) == (panier.id, client_user.id, None)
+        assert migre.calculer_nombre_items() == 2
+
+
+class TestCycleDeVie:
+    """Marquage des paniers inactifs et purge des abandonnés, par lots"""
+
+    @pytest.fixture
+    def anciens(self, db_session, produit):
+        """5 paniers actifs inactifs depuis 10 jours (un article chacun) et un panier récent"""
+        ancien = datetime.utcnow() - timedelta(days=10)
+        paniers = [Panier(session_id=f'ancien-{i}', statut='actif', date_modification=ancien,
+                          items=[PanierItem(produit_id=produit.id, quantite=1, prix_unitaire=1.0)])
+                   for i in range(5)]
+        paniers.append(Panier(session_id='recent', statut='actif'))
+        db_session.add_all(paniers)
+        db_session.commit()
+        return ancien
+
+    def _statuts(self):
+        return dict(db.session.execute(text("SELECT statut, COUNT(*) FROM paniers GROUP BY statut")).all())
+
+    def test_marquage_par_lots(self, app, anciens):
+        repo = PanierRepository()
+        limite = datetime.utcnow() - timedelta(days=7)
+        lots, ids = [], repo.lot_perimes('actif', limite, 2)
+        while ids:
+            lots.append(repo.marquer_lot_abandonnes(ids, limite))
+            ids = repo.lot_perimes('actif', limite, 2, ids[-1])
+        assert lots == [2, 2, 1]
+        assert self._statuts() == {'abandonne': 5, 'actif': 1}
+        # La date de dernière activité est conservée pour la purge
+        assert db.session.execute(text(
+            "SELECT COUNT(*) FROM paniers WHERE statut = 'abandonne' AND date_modification = :d"
+        ), {'d': anciens}).scalar() == 5
+
+    def test_purge_par_lots(self, app, anciens):
+        repo = PanierRepository()
+        limite = datetime.utcnow() - timedelta(days=7)
+        repo.marquer_lot_abandonnes(repo.lot_perimes('actif', limite, 100), limite)
+        lot = repo.lot_perimes('abandonne', limite, 3)
+        assert repo.purger_lot_abandonnes(lot, limite) == (3, 3)
+        assert repo.purger_lot_abandonnes(repo.lot_perimes('abandonne', limite, 3, lot[-1]), limite) == (2, 2)
+        assert self._statuts() == {'actif': 1}
+        assert db.session.execute(text("SELECT COUNT(*) FROM panier_items")).scalar() == 0
+        assert repo.lot_perimes('abandonne', limite, 3) == []
+
+    def test_purge_apres_lot_epargne(self, app, anciens):
+        """Un lot court (panier repris entre sélection et suppression) n'arrête pas la purge"""
+        repo = PanierRepository()
+        limite = datetime.utcnow() - timedelta(days=7)
+        repo.marquer_lot_abandonnes(repo.lot_perimes('actif', limite, 100), limite)
+        selection = repo.lot_perimes
+        repris = []
+
+        def selection_puis_reprise(*args):
+            ids = selection(*args)
+            if ids and not repris:
+                # Le client revient sur le premier panier du lot avant sa suppression
+                repris.append(ids[0])
+                db.session.execute(text("UPDATE paniers SET statut = 'actif', date_modification = :d WHERE id = :id"),
+                                   {'d': datetime.utcnow(), 'id': ids[0]})
+            return ids
+
+        repo.lot_perimes = selection_puis_reprise
+        assert repo.nettoyer_paniers_abandonnes(jours=7, taille_lot=2) == 4
+        assert self._statuts() == {'actif': 2}
+
+    def test_job_et_progression(self, app, anciens):
+        progression = paniers_abandonnes_job.executer(abandon_days=7, purge_days=30, batch_size=2, pause=0)
+        assert progression['statut'] == 'termine'
+        assert (progression['paniers_marques'], progression['paniers_supprimes']) == (5, 0)
+
+        progression = paniers_abandonnes_job.executer(abandon_days=7, purge_days=5, batch_size=2, pause=0)
+        assert (progression['paniers_supprimes'], progression['articles_supprimes']) == (5, 5)
+        assert progression['lots'] == 3
+        assert self._statuts() == {'actif': 1}
+
+    def test_endpoint_maintenance(self, app, client, db_session, anciens):
+        db_session.add(Utilisateur(email="paniers-admin@test.com", mot_de_passe="admin123", nom="Admin", role="admin"))
+        db_session.commit()
+        token = client.post('/api/auth/login', json={'email': 'paniers-admin@test.com', 'mot_de_passe': 'admin123'})
+        auth_headers = {'Authorization': f"Bearer {token.get_json()['token']}"}
+
+        response = client.post('/api/maintenance/abandoned-carts?abandon_days=7&purge_days=5&batch_size=2',
+                               headers=auth_headers)
+        assert response.status_code == 202
+        paniers_abandonnes_job.attendre(10)
+
+        progression = client.get('/api/maintenance/abandoned-carts', headers=auth_headers).get_json()['data']
+        assert progression['statut'] == 'termine'
+        assert progression['paniers_supprimes'] == 5
+        assert client.post('/api/maintenance/abandoned-carts?batch_size=0', headers=auth_headers).status_code == 400
+
+        # Un défaut de configuration invalide est refusé avant de passer en cours
+        app.config['CART_LIFECYCLE_BATCH_SIZE'] = 0
+        assert client.post('/api/maintenance/abandoned-carts', headers=auth_headers).status_code == 400
+        assert paniers_abandonnes_job.progression()['statut'] == 'termine'
+
+    def test_batch_size_invalide(self, app, anciens):
+        """Un lot vide bouclerait sans fin en gardant le job en cours"""
+        with pytest.raises(ValueError):
+            paniers_abandonnes_job.executer(batch_size=0)
+        assert not paniers_abandonnes_job.en_cours
+
+        result = app.test_cli_runner().invoke(args=['carts', 'lifecycle', '--batch-size', '-1'])
+        assert result.exit_code != 0
+        assert 'batch_size doit être un entier positif' in result.output
+        assert not paniers_abandonnes_job.en_cours
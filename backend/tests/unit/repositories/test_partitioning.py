@@ -0,0 +1,178 @@
+"""
+Tests pour le partitionnement mensuel des commandes
+
+Les tests PostgreSQL ne s'exécutent que si TEST_POSTGRESQL_URL désigne une base
+jetable (ses tables sont supprimées) ; les autres vérifient le schéma simple.
+"""
+
+import os
+from datetime import date, datetime
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+from src.app import create_app
+from src.config.app_config import config
+from src.data.database.db import db
+from src.data.database import partitioning
+from src.data.repositories.commande_repository import CommandeRepository
+from src.data.repositories.ligne_commande_repository import LigneCommandeRepository
+from src.domain.models.commande import Commande
+from src.domain.models.ligne_commande import LigneCommande
+from src.domain.models.produit import Produit
+from src.domain.models.utilisateur import Utilisateur
+from src.service.impl.maintenance_service import MaintenanceService
+
+POSTGRESQL_URL = os.environ.get('TEST_POSTGRESQL_URL')
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+
+
+def _donnees():
+    """Un client, un produit, une commande par mois de juillet à septembre 2026"""
+    user = Utilisateur(email="partition@test.com", mot_de_passe="client123", nom="Client")
+    produit = Produit(nom="P", categorie="Test", prix=10.0, quantite_stock=100)
+    db.session.add_all([user, produit])
+    db.session.flush()
+    for mois in (7, 8, 9):
+        commande = Commande(utilisateur_id=user.id, adresse_livraison="1 rue du Test",
+                            date_commande=datetime(2026, mois, 15, 12))
+        commande.lignes_commande = [LigneCommande(produit_id=produit.id, quantite=mois, prix_unitaire=10.0)]
+        db.session.add(commande)
+    db.session.commit()
+    return user, produit
+
+
+def test_mois():
+    """Arithmétique des mois et noms de partitions"""
+    assert partitioning.month_start(datetime(2026, 10, 17, 9)) == date(2026, 10, 1)
+    assert partitioning.month_start('2024-01') == date(2024, 1, 1)
+    assert partitioning.add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert partitioning.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitioning.partition_name('commandes', date(2026, 2, 1)) == 'commandes_p2026_02'
+
+
+class TestSchemaSimple:
+    """SQLite : pas de partitions, date de commande recopiée sur les lignes"""
+
+    def test_date_recopiee_sur_les_lignes(self, app, db_session):
+        """Lignes créées par l'ORM ou en lot, déplacées, commande redatée"""
+        user, produit = _donnees()
+        assert sorted(l.date_commande.month for l in LigneCommande.query.all()) == [7, 8, 9]
+
+        commande = CommandeRepository().create_commande(user.id, "2 rue du Test",
+                                                        [{'produit_id': produit.id, 'quantite': 1}])
+        ligne = LigneCommande.query.filter_by(commande_id=commande.id).one()
+        assert ligne.date_commande == commande.date_commande
+
+        juillet = Commande.query.filter(Commande.date_commande < datetime(2026, 8, 1)).one()
+        ligne.commande_id = juillet.id
+        db_session.commit()
+        assert ligne.date_commande == datetime(2026, 7, 15, 12)
+
+        juillet.date_commande = datetime(2026, 6, 1)
+        db_session.commit()
+        db_session.expire_all()
+        assert {l.date_commande for l in juillet.lignes_commande} == {datetime(2026, 6, 1)}
+
+    def test_top_produits_sans_jointure(self, app, db_session, assert_max_queries):
+        """Le classement par période filtre les lignes sans joindre commandes"""
+        _donnees()
+        with assert_max_queries(1) as statements:
+            top = LigneCommandeRepository().get_top_products_by_date_range(date(2026, 8, 1), date(2026, 9, 30))
+        assert top[0]['quantity_sold'] == 17
+        assert 'commandes.' not in statements[0]
+
+    def test_maintenance_hors_postgresql(self, app, db_session):
+        """Sans partitionnement, l'API le signale sans erreur"""
+        service = MaintenanceService()
+        assert service.get_partitions() == {'enabled': False, 'partitions': []}
+        assert service.maintain_partitions()['success'] is False
+        with pytest.raises(RuntimeError):
+            partitioning.create_partitions(db.session.connection())
+
+    def test_migration_renseigne_les_lignes(self, app, db_session):
+        """La migration 0004 recopie la date des commandes existantes"""
+        _donnees()
+        db.session.execute(text("UPDATE lignes_commande SET date_commande = NULL"))
+        db.session.commit()
+
+        flask_migrate.stamp(directory=MIGRATIONS, revision='0003_index_acces')
+        flask_migrate.upgrade(directory=MIGRATIONS, revision='0004_lignes_date_commande')
+
+        db.session.expire_all()
+        assert sorted(l.date_commande.month for l in LigneCommande.query.all()) == [7, 8, 9]
+
+
+@pytest.mark.skipif(not POSTGRESQL_URL, reason="TEST_POSTGRESQL_URL non défini")
+class TestPostgreSQL:
+    """Conversion, élagage des partitions et archivage sous PostgreSQL"""
+
+    @pytest.fixture
+    def pg_app(self, monkeypatch):
+        monkeypatch.setattr(config['default'], 'SQLALCHEMY_DATABASE_URI', POSTGRESQL_URL)
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP SCHEMA IF EXISTS archive CASCADE"))
+            db.drop_all()
+            db.create_all()
+            _donnees()
+            with db.engine.begin() as connection:
+                partitioning.enable_partitioning(connection, ahead=2)
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def _plan(self, query):
+        compiled = query.compile(db.engine)
+        rows = db.session.connection().exec_driver_sql("EXPLAIN " + str(compiled), compiled.params)
+        return '\n'.join(row[0] for row in rows)
+
+    def test_repositories_transparents(self, pg_app):
+        """Lectures et écritures inchangées après conversion"""
+        repo = CommandeRepository()
+        assert repo.get_total_revenue() == 240.0
+        assert repo.get_revenue_by_date_range(date(2026, 8, 1), date(2026, 8, 31)) == 80.0
+
+        user = Utilisateur.query.one()
+        commande = repo.create_commande(user.id, "3 rue du Test", [{'produit_id': Produit.query.one().id, 'quantite': 1}])
+        assert repo.get_by_id(commande.id).total == 10.0
+        assert repo.delete(commande.id) is True
+
+    def test_elagage_des_partitions(self, pg_app):
+        """Un filtre sur un mois ne lit que la partition de ce mois"""
+        repo = CommandeRepository()
+        plan = self._plan(db.select(repo.revenue_column(date(2026, 8, 1), date(2026, 8, 31))))
+        assert 'commandes_p2026_08' in plan
+        assert 'commandes_p2026_07' not in plan and 'commandes_p2026_09' not in plan
+
+        plan = self._plan(db.select(LigneCommande).where(
+            LigneCommande.date_commande >= datetime(2026, 9, 1), LigneCommande.date_commande < datetime(2026, 10, 1)
+        ))
+        assert 'lignes_commande_p2026_09' in plan and 'lignes_commande_p2026_08' not in plan
+
+    def test_creation_et_archivage(self, pg_app):
+        """Partitions futures créées, anciennes détachées vers le schéma d'archive"""
+        with db.engine.begin() as connection:
+            futur = partitioning.add_months(partitioning.month_start(date.today()), 5)
+            assert partitioning.partition_name('commandes', futur) in partitioning.create_partitions(connection, 5)
+            detachees = partitioning.detach_partitions(connection, '2026-08')
+
+        assert detachees == ['lignes_commande_p2026_07', 'commandes_p2026_07']
+        assert CommandeRepository().get_total_revenue() == 170.0
+        archive = db.session.execute(text("SELECT count(*) FROM archive.commandes_p2026_07")).scalar()
+        assert archive == 1
+
+    def test_commande_redatee(self, pg_app):
+        """Une commande redatée change de partition, ses lignes la suivent"""
+        commande = Commande.query.filter(Commande.date_commande < datetime(2026, 8, 1)).one()
+        commande.date_commande = datetime(2026, 8, 20, 12)
+        db.session.commit()
+
+        partitions = db.session.execute(text(
+            "SELECT tableoid::regclass::text FROM commandes WHERE id = :id "
+            "UNION ALL SELECT tableoid::regclass::text FROM lignes_commande WHERE commande_id = :id"
+        ), {'id': commande.id}).scalars().all()
+        assert partitions == ['commandes_p2026_08', 'lignes_commande_p2026_08']
+        assert CommandeRepository().get_revenue_by_date_range(date(2026, 8, 1), date(2026, 8, 31)) == 150.0
@@ -0,0 +1,137 @@
+"""
+Tests pour le cache des produits lus par id (ProduitRepository.get_cached)
+"""
+
+import pytest
+from src.data.database.db import db
+from src.data.database.unit_of_work import transaction
+from src.data.repositories.produit_repository import ProduitRepository, produit_cache
+from src.domain.models.produit import Produit
+from src.service.impl.panier_service import PanierService
+
+
+@pytest.fixture
+def produit(db_session):
+    """Produit avec 10 unités en stock, absent du cache et de la session"""
+    produit = Produit(nom="Caché", categorie="Test", prix=12.5, quantite_stock=10, images=["a.png"])
+    db_session.add(produit)
+    db_session.commit()
+    produit_id = produit.id
+    db_session.expunge_all()
+    produit_cache.configure(100, 60.0)
+    return produit_id
+
+
+def _nouvelle_requete():
+    """Simule une nouvelle requête HTTP : session vide"""
+    db.session.commit()
+    db.session.expunge_all()
+
+
+class TestLectureViaCache:
+    """Lecture par id sans SELECT après le premier chargement"""
+
+    def test_second_acces_sans_requete(self, produit, assert_max_queries):
+        """Le premier accès charge le produit, les suivants viennent du cache"""
+        repo = ProduitRepository()
+        assert repo.get_cached(produit).nom == "Caché"
+        _nouvelle_requete()
+
+        with assert_max_queries(0):
+            cache = repo.get_cached(produit)
+            assert (cache.prix, cache.quantite_stock, cache.images) == (12.5, 10, ["a.png"])
+        assert cache in db.session
+        assert produit_cache.stats()['hits'] == 1
+        assert produit_cache.stats()['misses'] == 1
+
+    def test_produit_inconnu(self, produit):
+        """Un id inexistant retourne None et n'est pas mis en cache"""
+        assert ProduitRepository().get_cached(999999) is None
+        assert produit_cache.stats()['size'] == 0
+
+    def test_non_alimente_dans_une_unite_de_travail(self, produit):
+        """Des écritures non validées ne sont jamais mises en cache"""
+        repo = ProduitRepository()
+        with pytest.raises(RuntimeError):
+            with transaction():
+                repo.reserver_stock({produit: 4})
+                assert repo.get_cached(produit).quantite_stock == 6
+                raise RuntimeError("annulation")
+        assert produit_cache.stats()['size'] == 0
+
+
+class TestInvalidation:
+    """Les écritures du repository retirent le produit du cache"""
+
+    @pytest.mark.parametrize('ecrire, attendu', [
+        (lambda repo, pid: repo.update(pid, prix=99.0), ('prix', 99.0)),
+        (lambda repo, pid: repo.update_stock(pid, 2), ('quantite_stock', 2)),
+        (lambda repo, pid: repo.decrementer_stock(pid, 3), ('quantite_stock', 7)),
+        (lambda repo, pid: repo.upsert_batch([{'id': pid, 'nom': "Caché", 'categorie': "Test", 'prix': 1.0}]),
+         ('prix', 1.0)),
+    ])
+    def test_ecriture_invalide(self, produit, ecrire, attendu):
+        """Après une écriture, la lecture suivante voit la nouvelle valeur"""
+        repo = ProduitRepository()
+        repo.get_cached(produit)
+        _nouvelle_requete()
+
+        ecrire(repo, produit)
+        _nouvelle_requete()
+        assert getattr(repo.get_cached(produit), attendu[0]) == attendu[1]
+
+    def test_suppression_invalide(self, produit):
+        """Un produit supprimé n'est plus servi par le cache"""
+        repo = ProduitRepository()
+        repo.get_cached(produit)
+        assert repo.delete(produit) is True
+        _nouvelle_requete()
+        assert repo.get_cached(produit) is None
+
+
+class TestBornes:
+    """Taille maximale et expiration"""
+
+    def test_eviction_lru(self, db_session):
+        """Au-delà de maxsize, l'entrée la moins récemment utilisée est évincée"""
+        produit_cache.configure(2, 60.0)
+        ids = [ProduitRepository().create(nom=f"P{i}", categorie="Test", prix=1.0).id for i in range(3)]
+        _nouvelle_requete()
+        repo = ProduitRepository()
+        for produit_id in ids:
+            repo.get_cached(produit_id)
+
+        stats = produit_cache.stats()
+        assert (stats['size'], stats['evictions']) == (2, 1)
+        assert produit_cache.get(ids[0]) is None
+
+    def test_expiration(self, produit):
+        """Une entrée expirée est rechargée"""
+        produit_cache.configure(10, 0)
+        repo = ProduitRepository()
+        repo.get_cached(produit)
+        _nouvelle_requete()
+        repo.get_cached(produit)
+        assert produit_cache.stats()['hits'] == 0
+
+
+def _lectures_produit(statements):
+    return sum(1 for s in statements if s.lstrip().startswith('SELECT') and 'FROM produits' in s)
+
+
+def test_ajout_panier_lit_le_cache(produit, assert_max_queries, paniers_en_base):
+    """Le contrôle de stock d'un ajout au panier lit le produit depuis le cache"""
+    service = PanierService()
+    produit_cache.configure(0, 60.0)
+    with assert_max_queries(50) as sans_cache:
+        assert service.ajouter_produit_session("sans-cache", produit, 1)['success'] is True
+    _nouvelle_requete()
+
+    produit_cache.configure(100, 60.0)
+    ProduitRepository().get_cached(produit)
+    _nouvelle_requete()
+    with assert_max_queries(50) as avec_cache:
+        assert service.ajouter_produit_session("avec-cache", produit, 1)['success'] is True
+
+    assert _lectures_produit(avec_cache) == _lectures_produit(sans_cache) - 1
+    assert produit_cache.stats()['hits'] == 1
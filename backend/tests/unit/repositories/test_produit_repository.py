@@ -0,0 +1,78 @@
+"""
+Tests pour la réservation de stock de ProduitRepository
+"""
+
+import threading
+import pytest
+from src.data.database.db import db
+from src.data.repositories.produit_repository import ProduitRepository
+from src.domain.models.produit import Produit
+
+
+@pytest.fixture
+def produits(db_session):
+    """Deux produits avec 10 et 3 unités en stock"""
+    items = [
+        Produit(nom="Stock large", categorie="Test", prix=10.0, quantite_stock=10),
+        Produit(nom="Stock faible", categorie="Test", prix=20.0, quantite_stock=3),
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+def _stock(produit_id):
+    return db.session.query(Produit.quantite_stock).filter_by(id=produit_id).scalar()
+
+
+class TestReserverStock:
+    """Tests pour ProduitRepository.reserver_stock"""
+
+    def test_reservation_complete(self, app, produits):
+        """Toutes les lignes sont décrémentées"""
+        echecs = ProduitRepository().reserver_stock({produits[0].id: 4, produits[1].id: 3})
+        assert echecs == []
+        assert _stock(produits[0].id) == 6
+        assert _stock(produits[1].id) == 0
+
+    def test_echec_partiel_annule_tout(self, app, produits):
+        """Un produit insuffisant annule la réservation et est signalé"""
+        echecs = ProduitRepository().reserver_stock({produits[0].id: 4, produits[1].id: 5, 9999: 1})
+        assert echecs == [produits[1].id, 9999]
+        assert _stock(produits[0].id) == 10
+        assert _stock(produits[1].id) == 3
+
+    def test_decrementer_stock(self, app, produits):
+        """decrementer_stock refuse de passer sous zéro"""
+        repo = ProduitRepository()
+        assert repo.decrementer_stock(produits[1].id, 3) is True
+        assert repo.decrementer_stock(produits[1].id, 1) is False
+        assert _stock(produits[1].id) == 0
+
+    def test_concurrence_produit_chaud(self, app, produits):
+        """40 réservations concurrentes sur 10 unités: exactement 5 réussissent, jamais de survente"""
+        if db.engine.url.database in (None, '', ':memory:'):
+            pytest.skip("Base SQLite en mémoire non partageable entre threads")
+
+        produit_id = produits[0].id
+        nb_threads = 40
+        depart = threading.Barrier(nb_threads)
+        resultats = []
+        verrou = threading.Lock()
+
+        def acheter():
+            with app.app_context():
+                depart.wait()
+                echecs = ProduitRepository().reserver_stock({produit_id: 2})
+                with verrou:
+                    resultats.append(not echecs)
+                db.session.remove()
+
+        threads = [threading.Thread(target=acheter) for _ in range(nb_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert resultats.count(True) == 5
+        assert _stock(produit_id) == 0
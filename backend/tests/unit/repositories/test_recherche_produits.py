@@ -0,0 +1,94 @@
+"""
+Tests pour la recherche plein texte des produits (FTS5 sous SQLite)
+"""
+
+import os
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+from src.data.database.db import db
+from src.data.repositories.pagination import PageRequest
+from src.data.repositories.produit_repository import ProduitRepository
+from src.domain.models.produit import Produit
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+
+
+@pytest.fixture
+def catalogue(db_session):
+    items = [
+        Produit(nom="Clavier mécanique", description="Switchs rouges, rétroéclairé", categorie="Informatique",
+                prix=89.0, quantite_stock=4),
+        Produit(nom="Souris sans fil", description="Idéale avec un clavier compact", categorie="Informatique",
+                prix=25.0, quantite_stock=0),
+        Produit(nom="Tapis de souris", description="Grand format", categorie="Accessoires",
+                prix=12.0, quantite_stock=30),
+        Produit(nom="Café moulu", description="Arabica 100 %", categorie="Épicerie", prix=6.5, quantite_stock=100),
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+def _noms(page):
+    return [produit.nom for produit in page.items]
+
+
+class TestRechercher:
+    """Tests pour ProduitRepository.rechercher"""
+
+    def test_pertinence(self, app, catalogue):
+        """Un mot du nom passe avant un mot de la description ; accents et casse ignorés"""
+        assert _noms(ProduitRepository().rechercher("CLAVIER")) == ["Clavier mécanique", "Souris sans fil"]
+        assert _noms(ProduitRepository().rechercher("mecanique")) == ["Clavier mécanique"]
+
+    def test_prefixes_et_tous_les_mots(self, app, catalogue):
+        assert _noms(ProduitRepository().rechercher("sour tap")) == ["Tapis de souris"]
+
+    def test_filtres(self, app, catalogue):
+        repo = ProduitRepository()
+        assert _noms(repo.rechercher("souris", categorie="Accessoires")) == ["Tapis de souris"]
+        assert _noms(repo.rechercher("souris", en_stock=True)) == ["Tapis de souris"]
+        assert _noms(repo.rechercher("clavier", prix_max=50)) == ["Souris sans fil"]
+
+    def test_syntaxe_fts_neutralisee(self, app, catalogue):
+        """Guillemets et opérateurs FTS5 sont cherchés comme du texte"""
+        assert _noms(ProduitRepository().rechercher('clavier" OR "cafe')) == []
+        assert _noms(ProduitRepository().rechercher("NEAR(")) == []
+
+    def test_pagination_par_curseur(self, app, catalogue):
+        repo = ProduitRepository()
+        premiere = repo.rechercher("souris", PageRequest(limit=1, sort='pertinence'))
+        seconde = repo.rechercher("souris", PageRequest(limit=1, sort='pertinence', cursor=premiere.next_cursor))
+        assert premiere.has_more and not seconde.has_more
+        assert sorted(_noms(premiere) + _noms(seconde)) == ["Souris sans fil", "Tapis de souris"]
+
+    def test_tri_par_prix(self, app, catalogue):
+        page = ProduitRepository().rechercher("souris", PageRequest(sort='prix'))
+        assert _noms(page) == ["Tapis de souris", "Souris sans fil"]
+
+    def test_index_suit_les_ecritures(self, app, db_session, catalogue):
+        repo = ProduitRepository()
+        catalogue[3].nom = "Thé vert"
+        db_session.commit()
+        assert _noms(repo.rechercher("the")) == ["Thé vert"]
+        assert _noms(repo.rechercher("cafe")) == []
+
+        db_session.delete(catalogue[0])
+        db_session.commit()
+        assert _noms(repo.rechercher("clavier")) == ["Souris sans fil"]
+
+    def test_recherche_vide(self, app, catalogue):
+        with pytest.raises(ValueError):
+            ProduitRepository().rechercher("   ")
+
+    def test_migration(self, app, catalogue):
+        """La migration crée l'index FTS5 et y indexe les produits existants"""
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE produits_fts"))
+
+        flask_migrate.stamp(directory=MIGRATIONS, revision='0005_ventes_journalieres')
+        flask_migrate.upgrade(directory=MIGRATIONS, revision='0006_recherche_produits')
+
+        assert _noms(ProduitRepository().rechercher("cafe")) == ["Café moulu"]
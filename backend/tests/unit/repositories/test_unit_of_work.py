@@ -0,0 +1,116 @@
+"""
+Tests pour l'unité de travail (transaction, SAVEPOINT et commit différé)
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from src.data.database.db import db
+from src.data.database.unit_of_work import in_transaction, transaction
+from src.data.repositories.panier_repository import PanierRepository
+from src.data.repositories.produit_repository import ProduitRepository
+from src.domain.models.panier import Panier
+from src.domain.models.produit import Produit
+from src.service.impl.panier_service import PanierService
+
+
+@pytest.fixture
+def count_commits(app):
+    """Compte les COMMIT réellement envoyés à la base"""
+    @contextmanager
+    def _count_commits():
+        commits = []
+        listener = lambda conn: commits.append(conn)
+        event.listen(db.engine, 'commit', listener)
+        try:
+            yield commits
+        finally:
+            event.remove(db.engine, 'commit', listener)
+    return _count_commits
+
+
+def _produit(nom, stock=10):
+    return ProduitRepository().create(nom=nom, categorie="Test", prix=10.0, quantite_stock=stock)
+
+
+class TestTransaction:
+    """Regroupement des écritures des repositories"""
+
+    def test_un_seul_commit(self, app, db_session, count_commits):
+        """Plusieurs créations dans une unité de travail : un seul COMMIT"""
+        with count_commits() as commits:
+            with transaction():
+                produits = [_produit(f"P{i}") for i in range(5)]
+                assert in_transaction()
+                assert all(p.id is not None for p in produits)  # flush effectué
+        assert len(commits) == 1
+        assert not in_transaction()
+        assert Produit.query.count() == 5
+
+    def test_hors_transaction_commit_immediat(self, app, db_session, count_commits):
+        """Sans unité de travail, chaque écriture reste validée immédiatement"""
+        with count_commits() as commits:
+            _produit("P1")
+            _produit("P2")
+        assert len(commits) == 2
+
+    def test_exception_annule_tout(self, app, db_session):
+        """Une exception dans le bloc annule toutes les écritures"""
+        with pytest.raises(RuntimeError):
+            with transaction():
+                _produit("P1")
+                _produit("P2")
+                raise RuntimeError("échec")
+        assert Produit.query.count() == 0
+        assert not in_transaction()
+
+    def test_bloc_imbrique_rejoint_la_transaction(self, app, db_session, count_commits):
+        """Un bloc imbriqué sans SAVEPOINT ne valide pas lui-même"""
+        with count_commits() as commits:
+            with transaction():
+                with transaction():
+                    _produit("P1")
+                assert len(commits) == 0
+                _produit("P2")
+        assert len(commits) == 1
+        assert Produit.query.count() == 2
+
+
+class TestSavepoint:
+    """Isolation des blocs imbriqués"""
+
+    def test_savepoint_annule_seulement_le_bloc(self, app, db_session):
+        """L'échec d'un SAVEPOINT préserve les écritures du bloc englobant"""
+        with transaction():
+            _produit("Conservé")
+            with pytest.raises(ValueError):
+                with transaction(savepoint=True):
+                    _produit("Annulé")
+                    raise ValueError("échec")
+            _produit("Après")
+        assert sorted(p.nom for p in Produit.query.all()) == ["Après", "Conservé"]
+
+    def test_reservation_echouee_dans_une_unite_de_travail(self, app, db_session):
+        """Une réservation refusée n'annule que ses propres décréments"""
+        produit = _produit("Stock", stock=5)
+        repo = ProduitRepository()
+        with transaction():
+            panier = PanierRepository().creer_panier_session("uow-session")
+            assert repo.reserver_stock({produit.id: 2, 9999: 1}) == [9999]
+            assert repo.reserver_stock({produit.id: 3}) == []
+        assert db.session.get(Produit, produit.id).quantite_stock == 2
+        assert db.session.get(Panier, panier.id) is not None
+
+
+class TestPanierService:
+    """Services composant plusieurs écritures"""
+
+    def test_ajout_premier_produit_un_seul_commit(self, app, db_session, count_commits, paniers_en_base):
+        """Création du panier et ajout de l'article validés ensemble"""
+        produit = _produit("P1")
+        with count_commits() as commits:
+            result = PanierService().ajouter_produit_session("uow-panier", produit.id, 2)
+        assert result['success'] is True
+        assert len(commits) == 1
+        assert result['panier']['nombre_items'] == 2
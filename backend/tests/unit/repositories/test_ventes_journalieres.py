@@ -0,0 +1,304 @@
+"""
+Tests pour l'agrégat quotidien des ventes (table daily_sales)
+
+Le test de concurrence ne s'exécute que si TEST_POSTGRESQL_URL désigne une base
+jetable (ses tables sont supprimées).
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+import flask_migrate
+import pytest
+from sqlalchemy import text
+from src.app import create_app
+from src.config.app_config import config
+from src.data.database.db import db
+from src.data.database.unit_of_work import transaction
+from src.data.repositories.commande_repository import CommandeRepository
+from src.data.repositories.vente_journaliere_repository import VenteJournaliereRepository
+from src.domain.models import ClientJournalier, Commande, LigneCommande, Produit, Utilisateur, VenteJournaliere
+
+POSTGRESQL_URL = os.environ.get('TEST_POSTGRESQL_URL')
+MIGRATIONS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'migrations')
+
+HIER = datetime(2026, 10, 16, 15, 0)
+AUJOURD_HUI = datetime(2026, 10, 17, 9, 0)
+
+
+@pytest.fixture
+def clients(db_session):
+    users = [Utilisateur(email=f"client{i}@test.com", mot_de_passe="client123", nom=f"Client {i}")
+             for i in range(2)]
+    db_session.add_all(users)
+    db_session.commit()
+    return users
+
+
+@pytest.fixture
+def produits(db_session):
+    """Deux catégories : Livres (10 et 20) et Jeux (30)"""
+    items = [
+        Produit(nom="Livre A", categorie="Livres", prix=10.0, quantite_stock=50),
+        Produit(nom="Livre B", categorie="Livres", prix=20.0, quantite_stock=50),
+        Produit(nom="Jeu", categorie="Jeux", prix=30.0, quantite_stock=50),
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+def _commande(client, date_commande, lignes, statut='en_attente'):
+    commande = Commande(utilisateur_id=client.id, adresse_livraison="1 rue du Test",
+                        date_commande=date_commande, statut=statut)
+    commande.lignes_commande = [LigneCommande(produit_id=p.id, quantite=q, prix_unitaire=p.prix) for p, q in lignes]
+    db.session.add(commande)
+    db.session.commit()
+    return commande
+
+
+def _agregat():
+    db.session.expire_all()
+    return {
+        (vente.jour.isoformat(), vente.categorie): (vente.commandes, vente.articles, vente.chiffre_affaires,
+                                                    vente.clients, vente.commandes_annulees)
+        for vente in VenteJournaliere.query.all()
+    }
+
+
+@pytest.fixture
+def historique(clients, produits):
+    """Trois commandes sur deux jours, dont une annulée, et une commande sans ligne"""
+    livre_a, livre_b, jeu = produits
+    return [
+        _commande(clients[0], HIER, [(livre_a, 2), (jeu, 1)]),
+        _commande(clients[1], HIER, [(livre_b, 1)], statut='annulee'),
+        _commande(clients[0], AUJOURD_HUI, [(jeu, 2)]),
+        _commande(clients[1], AUJOURD_HUI, []),
+    ]
+
+
+class TestMiseAJourIncrementale:
+    """L'agrégat suit les écritures sur les commandes et leurs lignes"""
+
+    def test_creation(self, app, historique):
+        """Une ligne par jour toutes catégories, une par jour et catégorie"""
+        assert _agregat() == {
+            ('2026-10-16', ''): (2, 4, 70.0, 2, 1),
+            ('2026-10-16', 'Livres'): (2, 3, 40.0, 2, 1),
+            ('2026-10-16', 'Jeux'): (1, 1, 30.0, 1, 0),
+            ('2026-10-17', ''): (2, 2, 60.0, 2, 0),
+            ('2026-10-17', 'Jeux'): (1, 2, 60.0, 1, 0),
+        }
+
+    def test_create_commande(self, app, clients, produits):
+        """Les lignes insérées en lot par create_commande sont comptées"""
+        commande = CommandeRepository().create_commande(clients[0].id, "1 rue du Test", [
+            {'produit_id': produits[0].id, 'quantite': 3},
+        ])
+        jour = commande.date_commande.date().isoformat()
+        assert _agregat() == {(jour, ''): (1, 3, 30.0, 1, 0), (jour, 'Livres'): (1, 3, 30.0, 1, 0)}
+
+    def test_statut_date_et_lignes(self, app, db_session, historique, produits):
+        """Changement de statut, de date, ajout et suppression de lignes"""
+        premiere, annulee, _, _ = historique
+        annulee.statut = 'validee'
+        db_session.commit()
+        assert _agregat()[('2026-10-16', '')] == (2, 4, 70.0, 2, 0)
+
+        premiere.lignes_commande.append(LigneCommande(produit_id=produits[1].id, quantite=1, prix_unitaire=20.0))
+        db_session.commit()
+        assert _agregat()[('2026-10-16', 'Livres')] == (2, 4, 60.0, 2, 0)
+
+        db_session.delete(LigneCommande.query.filter_by(commande_id=premiere.id, produit_id=produits[2].id).one())
+        db_session.commit()
+        assert ('2026-10-16', 'Jeux') not in _agregat()
+
+        premiere.date_commande = AUJOURD_HUI
+        db_session.commit()
+        agregat = _agregat()
+        assert agregat[('2026-10-16', '')] == (1, 1, 20.0, 1, 0)
+        assert agregat[('2026-10-17', '')] == (3, 5, 100.0, 2, 0)
+
+        db_session.delete(premiere)
+        db_session.commit()
+        assert _agregat()[('2026-10-17', '')] == (2, 2, 60.0, 2, 0)
+
+    def test_clients_distincts(self, app, db_session, clients, produits):
+        """Un client qui commande deux fois est compté une fois, jusqu'à sa dernière commande"""
+        livre_a, _, jeu = produits
+        premiere = _commande(clients[0], HIER, [(livre_a, 1)])
+        seconde = _commande(clients[0], HIER, [(livre_a, 1), (jeu, 1)])
+        agregat = _agregat()
+        assert (agregat[('2026-10-16', '')][3], agregat[('2026-10-16', 'Livres')][3]) == (1, 1)
+
+        db_session.delete(premiere)
+        db_session.commit()
+        assert _agregat()[('2026-10-16', 'Livres')] == (1, 1, 10.0, 1, 0)
+        assert ClientJournalier.query.count() == 3
+
+        db_session.delete(seconde)
+        db_session.commit()
+        assert _agregat() == {}
+        assert ClientJournalier.query.count() == 0
+
+    def test_deltas_egaux_au_recalcul(self, app, db_session, historique, produits):
+        """Après une série d'écritures, l'agrégat tenu par deltas est celui que recalcule rebuild"""
+        premiere, annulee, seconde, vide = historique
+        annulee.statut = 'validee'
+        seconde.utilisateur_id = premiere.utilisateur_id
+        vide.lignes_commande.append(LigneCommande(produit_id=produits[1].id, quantite=2, prix_unitaire=20.0))
+        premiere.date_commande = AUJOURD_HUI
+        db_session.commit()
+        db_session.delete(annulee)
+        db_session.commit()
+
+        agregat = _agregat()
+        clients = {(c.jour, c.categorie, c.utilisateur_id, c.commandes) for c in ClientJournalier.query.all()}
+        VenteJournaliereRepository().rebuild()
+        assert _agregat() == agregat
+        assert {(c.jour, c.categorie, c.utilisateur_id, c.commandes) for c in ClientJournalier.query.all()} == clients
+
+    def test_rollback(self, app, historique):
+        """Une transaction annulée ne laisse rien à recalculer"""
+        with pytest.raises(RuntimeError):
+            with transaction():
+                historique[0].statut = 'annulee'
+                db.session.flush()
+                raise RuntimeError
+        assert _agregat()[('2026-10-16', '')] == (2, 4, 70.0, 2, 1)
+
+
+class TestLectures:
+    """Graphiques et rapports lus dans l'agrégat"""
+
+    def test_memes_resultats_que_les_commandes(self, app, historique):
+        """Même forme et mêmes valeurs que les requêtes sur les commandes"""
+        commandes, ventes = CommandeRepository(), VenteJournaliereRepository()
+        debut, fin = HIER.date(), AUJOURD_HUI.date()
+        assert ventes.get_revenue_chart(debut, fin) == commandes.get_revenue_by_date_range_chart(debut, fin)
+        assert ventes.get_orders_chart(debut, fin) == commandes.get_orders_by_date_range(debut, fin)
+        assert ventes.get_totaux(debut, fin) == {
+            'commandes': commandes.count_by_date_range(debut, fin),
+            'articles': 6,
+            'chiffre_affaires': commandes.get_revenue_by_date_range(debut, fin)
+        }
+
+    def test_par_categorie(self, app, historique):
+        ventes = VenteJournaliereRepository()
+        assert ventes.get_revenue_chart(HIER, AUJOURD_HUI, 'Jeux') == [
+            {'date': '2026-10-16', 'revenue': 30.0, 'count': 1, 'average': 30.0},
+            {'date': '2026-10-17', 'revenue': 60.0, 'count': 1, 'average': 60.0},
+        ]
+        assert ventes.get_totaux(HIER, AUJOURD_HUI, 'Livres')['chiffre_affaires'] == 40.0
+
+    def test_rapport_ventes_sans_les_commandes(self, app, historique, assert_max_queries):
+        """Le rapport des ventes ne lit que daily_sales"""
+        from src.service.impl.reports_service import ReportsService
+
+        with assert_max_queries(2) as statements:
+            rapport = ReportsService().generate_sales_report('2026-10-16', '2026-10-17', 'Jeux')
+        assert (rapport['total_sales'], rapport['total_orders'], rapport['category']) == (90.0, 2, 'Jeux')
+        assert not any('FROM commandes' in statement for statement in statements)
+
+
+class TestReconstruction:
+    """Rattrapage par la commande rebuild et par la migration"""
+
+    def test_rebuild(self, app, historique):
+        attendu = _agregat()
+        db.session.execute(text("DELETE FROM daily_sales"))
+        db.session.commit()
+
+        assert VenteJournaliereRepository().rebuild('2026-10-17', '2026-10-17') == 1
+        assert set(_agregat()) == {('2026-10-17', ''), ('2026-10-17', 'Jeux')}
+        assert VenteJournaliereRepository().rebuild() == 2
+        assert _agregat() == attendu
+
+    def test_commande_cli(self, app, historique):
+        db.session.execute(text("DELETE FROM daily_sales"))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['daily-sales', 'rebuild', '--start', '2026-10-01'])
+        assert result.exit_code == 0
+        assert "17 jours recalculés" in result.output
+        assert len(_agregat()) == 5
+
+    def test_migration(self, app, historique):
+        attendu = _agregat()
+        VenteJournaliere.__table__.drop(db.engine)
+
+        flask_migrate.stamp(directory=MIGRATIONS, revision='0004_lignes_date_commande')
+        flask_migrate.upgrade(directory=MIGRATIONS, revision='0005_ventes_journalieres')
+
+        assert _agregat() == attendu
+
+    def test_migration_clients(self, app, historique):
+        """La migration 0011 remplit les compteurs de clients à partir des commandes"""
+        attendu = {(c.jour, c.categorie, c.utilisateur_id, c.commandes) for c in ClientJournalier.query.all()}
+        ClientJournalier.__table__.drop(db.engine)
+
+        flask_migrate.stamp(directory=MIGRATIONS, revision='0010_paniers_session_actifs_uniques')
+        flask_migrate.upgrade(directory=MIGRATIONS, revision='0011_clients_journaliers')
+
+        assert {(c.jour, c.categorie, c.utilisateur_id, c.commandes) for c in ClientJournalier.query.all()} == attendu
+        assert len(attendu) == 8
+
+
+def test_deltas_en_un_upsert(app, clients, produits, assert_max_queries):
+    """Les deltas de commandes sur plusieurs jours sont écrits en un seul upsert, sans relire les jours"""
+    client_id = clients[0].id
+    with assert_max_queries(7) as statements:
+        with transaction():
+            db.session.add_all([Commande(utilisateur_id=client_id, adresse_livraison="1 rue du Test",
+                                         date_commande=HIER + timedelta(days=jours)) for jours in range(3)])
+    assert sum(statement.startswith('INSERT INTO daily_sales ') for statement in statements) == 1
+    assert not any('date_commande >=' in statement for statement in statements)
+    assert len(_agregat()) == 3
+
+
+@pytest.mark.skipif(not POSTGRESQL_URL, reason="TEST_POSTGRESQL_URL non défini")
+class TestConcurrencePostgreSQL:
+    """Transactions concurrentes qui touchent le même jour"""
+
+    @pytest.fixture
+    def pg_app(self, monkeypatch):
+        monkeypatch.setattr(config['default'], 'SQLALCHEMY_DATABASE_URI', POSTGRESQL_URL)
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([Utilisateur(email=f"concurrent{i}@test.com", mot_de_passe="client123", nom="Client")
+                                for i in range(2)])
+            db.session.commit()
+            yield app
+            db.session.remove()
+            db.drop_all()
+
+    def test_commandes_concurrentes_le_meme_jour(self, pg_app):
+        """Des commandes validées en parallèle le même jour sont toutes comptées, sans verrou sur le jour"""
+        client_ids = [client.id for client in Utilisateur.query.all()]
+        erreurs = []
+
+        def commander(client_id):
+            try:
+                with pg_app.app_context():
+                    for _ in range(10):
+                        with transaction():
+                            db.session.add(Commande(utilisateur_id=client_id, adresse_livraison="1 rue du Test",
+                                                    date_commande=AUJOURD_HUI))
+                    db.session.remove()
+            except Exception as e:
+                erreurs.append(e)
+
+        threads = [threading.Thread(target=commander, args=(client_id,)) for client_id in client_ids * 2]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        assert erreurs == []
+        commandes, _, _, _, clients, _ = _agregat()[(AUJOURD_HUI.date().isoformat(), '')]
+        assert (commandes, clients) == (40, 2)
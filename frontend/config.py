@@ -8,6 +8,12 @@ import os
 # En Docker, utilise le service backend directement, sinon localhost pour le développement local
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:5000' if os.getenv('DOCKER_ENV') else 'https://localhost')
 
+# Taille des pages demandées pour reconstituer une liste complète (plafond du backend)
+PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', '200'))
+
+# Durée de conservation des clés publiques du backend (/api/auth/jwks), en secondes
+JWKS_CACHE_SECONDS = int(os.getenv('JWKS_CACHE_SECONDS', '300'))
+
 # Configuration Streamlit
 STREAMLIT_PORT = int(os.getenv('STREAMLIT_SERVER_PORT', '8501'))
 STREAMLIT_ADDRESS = os.getenv('STREAMLIT_SERVER_ADDRESS', '0.0.0.0')
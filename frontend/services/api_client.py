@@ -4,8 +4,9 @@ Client API pour les appels HTTP
 
 import requests
 from typing import Dict, Any, Optional, List
+from urllib.parse import urlencode
 import streamlit as st
-from config import BACKEND_URL
+from config import BACKEND_URL, PAGINATION_MAX_LIMIT
 
 
 class ApiClient:
@@ -75,17 +76,28 @@ class ApiClient:
             st.error(f"❌ Erreur inattendue: {str(e)}")
             return None
     
+    def _get_all_pages(self, endpoint: str) -> List[Dict]:
+        """Récupère tous les éléments d'une liste paginée en suivant next_cursor (pages au plafond du backend)"""
+        items = []
+        params = {'limit': PAGINATION_MAX_LIMIT}
+        while True:
+            response = self._make_request("GET", f"{endpoint}?{urlencode(params)}")
+            if response is None:
+                return items
+            # Ancien format: liste directe
+            if isinstance(response, list):
+                return items + response
+            if not isinstance(response, dict):
+                return items
+            items.extend(response.get('data', []))
+            params['cursor'] = response.get('next_cursor')
+            if not params['cursor']:
+                return items
+    
     # Méthodes pour les utilisateurs
     def get_users(self) -> List[Dict]:
         """Récupère tous les utilisateurs"""
-        response = self._make_request("GET", "/api/utilisateurs/")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages("/api/utilisateurs/")
     
     def get_user(self, user_id: int) -> Optional[Dict]:
         """Récupère un utilisateur par ID"""
@@ -138,26 +150,12 @@ class ApiClient:
     
     def get_users_by_role(self, role: str) -> List[Dict]:
         """Récupère les utilisateurs par rôle"""
-        response = self._make_request("GET", f"/api/utilisateurs/role/{role}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/utilisateurs/role/{role}")
     
     # Méthodes pour les produits
     def get_products(self) -> List[Dict]:
         """Récupère tous les produits"""
-        response = self._make_request("GET", "/api/produits/")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages("/api/produits/")
     
     def get_product(self, product_id: int) -> Optional[Dict]:
         """Récupère un produit par ID"""
@@ -197,38 +195,25 @@ class ApiClient:
         response = self._make_request("DELETE", f"/api/produits/{product_id}")
         return response is not None
     
+    def search_products(self, query: str, limit: int = 50, **filters) -> List[Dict]:
+        """Recherche des produits côté serveur, les plus pertinents en premier (une page)"""
+        params = {'q': query, 'limit': limit, **{k: v for k, v in filters.items() if v is not None}}
+        response = self._make_request("GET", f"/api/produits/search?{urlencode(params)}")
+        if isinstance(response, dict):
+            return response.get('data', [])
+        return []
+    
     def get_products_by_category(self, category: str) -> List[Dict]:
         """Récupère les produits par catégorie"""
-        response = self._make_request("GET", f"/api/produits/categorie/{category}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/produits/categorie/{category}")
     
     def get_products_in_stock(self) -> List[Dict]:
         """Récupère les produits en stock"""
-        response = self._make_request("GET", "/api/produits/stock")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages("/api/produits/stock")
     
     def get_products_by_price_range(self, min_price: float, max_price: float) -> List[Dict]:
         """Récupère les produits dans une fourchette de prix"""
-        response = self._make_request("GET", f"/api/produits/prix/{min_price}/{max_price}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/produits/prix/{min_price}/{max_price}")
     
     def update_stock(self, product_id: int, quantity: int) -> bool:
         """Met à jour le stock d'un produit"""
@@ -239,14 +224,7 @@ class ApiClient:
     # Méthodes pour les commandes
     def get_orders(self) -> List[Dict]:
         """Récupère toutes les commandes"""
-        response = self._make_request("GET", "/api/commandes/")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages("/api/commandes/")
     
     def get_order(self, order_id: int) -> Optional[Dict]:
         """Récupère une commande par ID"""
@@ -261,14 +239,7 @@ class ApiClient:
     
     def get_user_orders(self, user_id: int) -> List[Dict]:
         """Récupère les commandes d'un utilisateur"""
-        response = self._make_request("GET", f"/api/commandes/utilisateur/{user_id}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/commandes/utilisateur/{user_id}")
     
     def create_order(self, order_data: Dict) -> Optional[Dict]:
         """Crée une nouvelle commande"""
@@ -299,25 +270,11 @@ class ApiClient:
     
     def get_orders_by_user(self, user_id: int) -> List[Dict]:
         """Récupère les commandes d'un utilisateur"""
-        response = self._make_request("GET", f"/api/commandes/utilisateur/{user_id}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/commandes/utilisateur/{user_id}")
     
     def get_orders_by_status(self, status: str) -> List[Dict]:
         """Récupère les commandes par statut"""
-        response = self._make_request("GET", f"/api/commandes/statut/{status}")
-        if response is None:
-            return []
-        # L'API retourne directement une liste, pas un objet avec clé 'data'
-        if isinstance(response, list):
-            return response
-        # Fallback si c'est un objet avec clé 'data'
-        return response.get('data', []) if isinstance(response, dict) else []
+        return self._get_all_pages(f"/api/commandes/statut/{status}")
     
     def update_order_status(self, order_id: int, status: str) -> bool:
         """Met à jour le statut d'une commande"""
@@ -442,6 +399,21 @@ class ApiClient:
             st.error(f"❌ Erreur migration panier: {str(e)}")
             return None
 
+    
+    def checkout_cart(self, data: Dict, headers: Optional[Dict] = None) -> Optional[Dict]:
+        """Transforme le panier en commande (la réponse d'un refus, 400, est retournée telle quelle)"""
+        try:
+            url = f"{self.base_url}/api/panier/checkout"
+            if headers:
+                response = self.session.post(url, json=data, headers=headers)
+            else:
+                response = self.session.post(url, json=data)
+            if response.status_code != 400:
+                response.raise_for_status()
+            return response.json() if response.content else {}
+        except Exception as e:
+            st.error(f"❌ Erreur validation commande: {str(e)}")
+            return None
 
 def get_api_client() -> ApiClient:
     """Factory function pour créer un client API"""
@@ -2,11 +2,36 @@
 Service d'authentification pour le frontend
 """
 
+import jwt
 import streamlit as st
 import requests
 from typing import Optional, Dict, Any
 from services.api_client import get_api_client
 
+# Tokens signés par clé publique, vérifiables sans appeler le backend
+ALGORITHMES_LOCAUX = ('RS256', 'EdDSA')
+
+# Clés publiques du backend, partagées par toutes les sessions du processus
+_jwks_client: Optional[jwt.PyJWKClient] = None
+
+
+def _get_jwks_client(base_url: str) -> jwt.PyJWKClient:
+    """Client JWKS du processus (clés gardées JWKS_CACHE_SECONDS secondes)"""
+    global _jwks_client
+    if _jwks_client is None:
+        from config import JWKS_CACHE_SECONDS
+        _jwks_client = jwt.PyJWKClient(f"{base_url}/api/auth/jwks", cache_keys=True,
+                                       lifespan=JWKS_CACHE_SECONDS)
+    return _jwks_client
+
+
+def _algorithme_de_la_cle(cle: jwt.PyJWK) -> Optional[str]:
+    """Algorithme de vérification d'une clé du JWKS, déduit de son type (alg ou kty/crv)"""
+    for nom in ALGORITHMES_LOCAUX:
+        if isinstance(cle.Algorithm, type(jwt.get_algorithm_by_name(nom))):
+            return nom
+    return None
+
 
 class AuthService:
     """Service pour la gestion de l'authentification côté frontend"""
@@ -150,11 +175,23 @@ class AuthService:
         return st.session_state.get('access_token', None)
     
     def verify_token(self) -> bool:
-        """Vérifie la validité du token actuel"""
+        """
+        Vérifie la validité du token actuel
+        
+        Un token RS256/EdDSA est vérifié localement avec les clés publiques du
+        backend, sans requête par navigation ; un token HS256, ou dont la clé
+        n'est pas disponible, est vérifié par /api/auth/verify.
+        """
         token = self.get_access_token()
         if not token:
             return False
         
+        valide = self._verify_token_locally(token)
+        if valide is not None:
+            if not valide:
+                self.logout()
+            return valide
+        
         try:
             headers = {"Authorization": f"Bearer {token}"}
             response = requests.get(f"{self.base_url}/api/auth/verify", headers=headers)
@@ -169,6 +206,37 @@ class AuthService:
         except Exception:
             return False
     
+    def _verify_token_locally(self, token: str) -> Optional[bool]:
+        """
+        Vérifie la signature et l'expiration d'un token avec les clés JWKS
+        
+        Returns:
+            True ou False, ou None si le token ne peut pas être vérifié localement
+        """
+        try:
+            en_tete = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            return None
+        if en_tete.get('alg') not in ALGORITHMES_LOCAUX or not en_tete.get('kid'):
+            return None
+        
+        try:
+            # Kid inconnu (rotation) : le client relit le JWKS une fois
+            cle = _get_jwks_client(self.base_url).get_signing_key(en_tete['kid'])
+        except jwt.PyJWKClientError:
+            return None
+        
+        algorithme = _algorithme_de_la_cle(cle)
+        if algorithme is None:
+            return None
+        
+        try:
+            # Algorithme imposé par la clé publiée, jamais par l'en-tête du token
+            jwt.decode(token, cle.key, algorithms=[algorithme])
+            return True
+        except jwt.InvalidTokenError:
+            return False
+    
     def is_admin(self) -> bool:
         """Vérifie si l'utilisateur actuel est un administrateur"""
         user = self.get_current_user()
@@ -7,6 +7,7 @@ import time
 from typing import Dict, Any, Optional
 # Pas d'héritage de BaseService car le panier a une logique différente
 from models.cart import Cart, CartItem, CartSummary, AddToCartRequest, UpdateCartQuantityRequest, RemoveFromCartRequest
+from models.order import Order
 from utils.logging_config import get_logger, log_user_action, log_error
 
 # Configuration du logger
@@ -243,6 +244,26 @@ class CartService:
         except Exception as e:
             return {'success': False, 'message': f'Erreur lors de la migration: {str(e)}'}
     
+    def checkout(self, adresse_livraison: str, token: str) -> Dict[str, Any]:
+        """Transforme le panier en commande en un seul appel (stock réservé, panier converti côté serveur)"""
+        try:
+            headers = self._get_headers(token)
+            headers['X-Session-ID'] = st.session_state.get('session_id', 'default')
+            
+            data = self.api_client.checkout_cart({'adresse_livraison': adresse_livraison}, headers)
+            
+            if data is not None:
+                if data.get('success', False):
+                    return {'success': True, 'message': data.get('message', 'Commande créée'),
+                            'order': Order.from_dict(data['commande'])}
+                else:
+                    return {'success': False, 'message': data.get('message', 'Erreur lors de la commande')}
+            else:
+                return {'success': False, 'message': 'Erreur lors de la commande'}
+                
+        except Exception as e:
+            return {'success': False, 'message': f'Erreur lors de la commande: {str(e)}'}
+    
     def get_cart_item_count(self, token: Optional[str] = None) -> int:
         """Récupère le nombre d'items dans le panier"""
         try:
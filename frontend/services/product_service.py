@@ -37,6 +37,17 @@ class ProductService(BaseService):
             self.handle_error(e, f"récupération des produits {category}")
             return []
     
+    def search(self, query: str, category: Optional[str] = None, in_stock: Optional[bool] = None) -> List[Product]:
+        """Recherche des produits côté serveur (nom, description, catégorie)"""
+        try:
+            products_data = self.api_client.search_products(
+                query, categorie=category, en_stock='true' if in_stock else None
+            )
+            return [Product.from_dict(product_data) for product_data in products_data]
+        except Exception as e:
+            self.handle_error(e, f"recherche de produits '{query}'")
+            return []
+    
     def get_in_stock(self) -> List[Product]:
         """Récupère les produits en stock"""
         try:
@@ -240,3 +240,32 @@ class TestAuthService:
         # Vérifications
         assert is_valid is False
         mock_session.get.assert_called_once_with('access_token', None)
+
+
+class TestVerificationLocale:
+    """Vérification des tokens avec les clés publiques du JWKS"""
+    
+    def setup_method(self):
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+        import jwt
+        self.jwt = jwt
+        self.cle_rsa = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.cle_ed25519 = ed25519.Ed25519PrivateKey.generate()
+        self.auth_service = AuthService()
+    
+    def _jwk(self, cle, algorithm):
+        jwk = self.jwt.get_algorithm_by_name(algorithm).to_jwk(cle.public_key(), as_dict=True)
+        return self.jwt.PyJWK(dict(jwk, kid='k1'))
+    
+    @patch('services.auth_service._get_jwks_client')
+    def test_token_valide(self, mock_client):
+        mock_client.return_value.get_signing_key.return_value = self._jwk(self.cle_ed25519, 'EdDSA')
+        token = self.jwt.encode({'user_id': 1}, self.cle_ed25519, algorithm='EdDSA', headers={'kid': 'k1'})
+        assert self.auth_service._verify_token_locally(token) is True
+    
+    @patch('services.auth_service._get_jwks_client')
+    def test_algorithme_impose_par_la_cle(self, mock_client):
+        """L'alg de l'en-tête ne choisit pas l'algorithme : la clé publiée est RSA"""
+        mock_client.return_value.get_signing_key.return_value = self._jwk(self.cle_rsa, 'RS256')
+        token = self.jwt.encode({'user_id': 1}, self.cle_ed25519, algorithm='EdDSA', headers={'kid': 'k1'})
+        assert self.auth_service._verify_token_locally(token) is False
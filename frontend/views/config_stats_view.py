@@ -241,7 +241,7 @@ class ConfigStatsView:
         # Graphique des ventes
         if 'sales_data' in data:
             df = pd.DataFrame(data['sales_data'])
-            fig = px.line(df, x='date', y='sales', title='Évolution des Ventes')
+            fig = px.line(df, x='date', y='revenue', title='Évolution des Ventes')
             st.plotly_chart(fig, use_container_width=True)
     
     def show_top_clients_report(self, data: Dict):
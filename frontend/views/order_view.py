@@ -8,8 +8,7 @@ from datetime import datetime
 from services.order_service import OrderService
 from services.cart_service import get_cart_service
 from services.auth_service import get_auth_service
-from models.order import Order, CreateOrderRequest, OrderLine
-from models.cart import Cart, CartItem
+from models.order import Order
 
 
 def show_order_page():
@@ -297,36 +296,11 @@ def show_checkout_page():
             }
             
             # Créer la commande
-            create_order_from_cart(cart, adresse_complete, token)
+            create_order_from_cart(adresse_complete, token)
 
 
-def create_order_from_cart(cart: Cart, adresse_livraison, token: str):
-    """Crée une commande à partir du panier"""
-    auth_service = get_auth_service()
-    from services.api_client import get_api_client
-    api_client = get_api_client()
-    order_service = OrderService(api_client)
-    
-    user_info = auth_service.get_current_user()
-    if not user_info:
-        st.error("❌ Impossible de récupérer les informations utilisateur")
-        return
-    
-    user_id = user_info.get('id')
-    if not user_id:
-        st.error("❌ Impossible de récupérer l'ID utilisateur")
-        return
-    
-    # Préparer les lignes de commande
-    lignes_commande = []
-    for item in cart.items:
-        ligne = {
-            'produit_id': item.produit_id,
-            'quantite': item.quantite,
-            'prix_unitaire': item.prix_unitaire
-        }
-        lignes_commande.append(ligne)
-    
+def create_order_from_cart(adresse_livraison, token: str):
+    """Crée une commande à partir du panier (un seul appel : le serveur lit le panier, réserve le stock et le convertit)"""
     # Formater l'adresse de livraison
     if isinstance(adresse_livraison, dict):
         # Adresse détaillée - formater en chaîne
@@ -345,24 +319,14 @@ Mode de livraison: {adresse_livraison['mode_livraison']}
         # Adresse simple (chaîne)
         adresse_formatee = adresse_livraison
     
-    # Créer la requête de commande
-    order_request = CreateOrderRequest(
-        utilisateur_id=user_id,
-        adresse_livraison=adresse_formatee,
-        statut="en_attente",
-        lignes_commande=lignes_commande
-    )
-    
     # Afficher un spinner pendant la création
     with st.spinner("🔄 Création de votre commande..."):
         try:
-            # Créer la commande
-            order = order_service.create(order_request)
+            # Valider le panier : commande créée et panier converti côté serveur
+            result = get_cart_service().checkout(adresse_formatee, token)
             
-            if order:
-                # Vider le panier après création de la commande
-                cart_service = get_cart_service()
-                cart_service.clear_cart(token)
+            if result['success']:
+                order = result['order']
                 
                 # Afficher la confirmation
                 st.success("✅ Commande créée avec succès !")
@@ -381,7 +345,7 @@ Mode de livraison: {adresse_livraison['mode_livraison']}
                 
                 with col2:
                     st.markdown("**Adresse de livraison:**")
-                    st.markdown(adresse_livraison.replace('\n', '<br>'), unsafe_allow_html=True)
+                    st.markdown(adresse_formatee.strip().replace('\n', '<br>'), unsafe_allow_html=True)
                 
                 # Boutons d'action
                 col1, col2, col3 = st.columns([1, 1, 1])
@@ -402,7 +366,7 @@ Mode de livraison: {adresse_livraison['mode_livraison']}
                         st.rerun()
                 
             else:
-                st.error("❌ Erreur lors de la création de la commande")
+                st.error(f"❌ {result['message']}")
                 
         except Exception as e:
             st.error(f"❌ Erreur lors de la création de la commande: {str(e)}")
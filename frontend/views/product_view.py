@@ -373,11 +373,7 @@ def show_product_search(product_presenter: ProductPresenter):
         product_name = st.text_input("Nom du produit", key="product_name_search")
         if st.button("Rechercher", key="search_by_name"):
             if product_name:
-                products = product_presenter.service.get_all()
-                matching_products = [
-                    p for p in products 
-                    if product_name.lower() in p.nom.lower()
-                ]
+                matching_products = product_presenter.service.search(product_name)
                 
                 if matching_products:
                     st.write(f"**{len(matching_products)} produit(s) trouvé(s):**")